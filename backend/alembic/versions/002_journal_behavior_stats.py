@@ -0,0 +1,64 @@
+"""Journal behaviour sufficient statistics.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "002"
+down_revision = "001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "journal_behavior_stats",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("behavior_key", sa.String(100), nullable=False),
+        sa.Column("metric", sa.String(50), nullable=False),
+        sa.Column("n", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("sum_x", sa.Float, nullable=False, server_default="0"),
+        sa.Column("sum_y", sa.Float, nullable=False, server_default="0"),
+        sa.Column("sum_xy", sa.Float, nullable=False, server_default="0"),
+        sa.Column("sum_x2", sa.Float, nullable=False, server_default="0"),
+        sa.Column("sum_y2", sa.Float, nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "behavior_key", "metric", name="uq_journal_behavior_stats_user_key_metric"),
+    )
+
+    # Backfill from existing history with the same JOIN the service uses.
+    op.execute(
+        """
+        INSERT INTO journal_behavior_stats
+            (id, user_id, behavior_key, metric, n, sum_x, sum_y, sum_xy, sum_x2, sum_y2)
+        SELECT gen_random_uuid(), s.user_id, s.behavior_key, 'recovery_score',
+               COUNT(*), SUM(s.x), SUM(s.y), SUM(s.x * s.y), SUM(s.x * s.x), SUM(s.y * s.y)
+        FROM (
+            SELECT e.user_id, r.behavior_key, m.recovery_score AS y,
+                   CASE
+                       WHEN r.bool_value IS NOT NULL THEN CASE WHEN r.bool_value THEN 1.0 ELSE 0.0 END
+                       WHEN r.numeric_value IS NOT NULL THEN r.numeric_value
+                       ELSE CAST(r.scale_value AS DOUBLE PRECISION)
+                   END AS x
+            FROM journal_responses r
+            JOIN journal_entries e ON e.id = r.journal_entry_id
+            JOIN daily_metrics m ON m.user_id = e.user_id AND m.date = e.date
+            WHERE m.recovery_score IS NOT NULL
+        ) s
+        WHERE s.x IS NOT NULL
+        GROUP BY s.user_id, s.behavior_key
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("journal_behavior_stats")
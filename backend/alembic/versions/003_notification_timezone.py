@@ -0,0 +1,24 @@
+"""Notification preference timezone.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "003"
+down_revision = "002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notification_preferences", sa.Column("timezone", sa.String(64)))
+
+
+def downgrade() -> None:
+    op.drop_column("notification_preferences", "timezone")
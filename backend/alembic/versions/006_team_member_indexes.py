@@ -0,0 +1,29 @@
+"""Team member listing and lookup indexes.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_team_members_team_joined",
+        "team_members",
+        ["team_id", "joined_at", "id"],
+    )
+    op.create_index("ix_team_members_user_id", "team_members", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_team_members_user_id", table_name="team_members")
+    op.drop_index("ix_team_members_team_joined", table_name="team_members")
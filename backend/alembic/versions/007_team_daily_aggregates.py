@@ -0,0 +1,65 @@
+"""Per-team daily metric aggregates.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+_METRICS = {
+    "recovery": "recovery_score",
+    "strain": "strain_score",
+    "sleep": "sleep_duration_hours",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "team_daily_aggregates",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("team_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("teams.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date, nullable=False),
+        sa.Column("metric", sa.String(50), nullable=False),
+        sa.Column("n", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("sum", sa.Float, nullable=False, server_default="0"),
+        sa.Column("sum_sq", sa.Float, nullable=False, server_default="0"),
+        sa.Column("p25", sa.Float),
+        sa.Column("p50", sa.Float),
+        sa.Column("p75", sa.Float),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("team_id", "date", "metric", name="uq_team_daily_aggregates_team_date_metric"),
+    )
+
+    # Backfill the trailing 90 days for existing teams.
+    for metric, column in _METRICS.items():
+        op.execute(
+            f"""
+            INSERT INTO team_daily_aggregates
+                (id, team_id, date, metric, n, sum, sum_sq, p25, p50, p75)
+            SELECT gen_random_uuid(), tm.team_id, m.date, '{metric}',
+                   COUNT(*), SUM(m.{column}), SUM(m.{column} * m.{column}),
+                   percentile_cont(0.25) WITHIN GROUP (ORDER BY m.{column}),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY m.{column}),
+                   percentile_cont(0.75) WITHIN GROUP (ORDER BY m.{column})
+            FROM team_members tm
+            JOIN daily_metrics m ON m.user_id = tm.user_id
+            WHERE m.{column} IS NOT NULL
+              AND m.date >= CURRENT_DATE - INTERVAL '90 days'
+            GROUP BY tm.team_id, m.date
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("team_daily_aggregates")
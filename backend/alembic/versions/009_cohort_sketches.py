@@ -0,0 +1,37 @@
+"""Cohort quantile sketches.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cohort_sketches",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("metric", sa.String(50), nullable=False),
+        sa.Column("age_band", sa.String(10), nullable=False),
+        sa.Column("sex", sa.String(20), nullable=False),
+        sa.Column("count", sa.Float, nullable=False, server_default="0"),
+        sa.Column("digest", postgresql.JSONB, nullable=False),
+        sa.Column("through_date", sa.Date, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("metric", "age_band", "sex", name="uq_cohort_sketches_cohort"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cohort_sketches")
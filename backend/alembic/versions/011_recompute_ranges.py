@@ -0,0 +1,38 @@
+"""Pending recompute ranges for late-arriving data.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recompute_ranges",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("node", sa.String(32), nullable=False),
+        sa.Column("from_date", sa.Date, nullable=False),
+        sa.Column("to_date", sa.Date, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "node", name="uq_recompute_ranges_user_node"),
+    )
+    # Recovery recomputes need every input the original score used.
+    op.add_column("daily_metrics", sa.Column("skin_temperature_deviation", sa.Float))
+
+
+def downgrade() -> None:
+    op.drop_column("daily_metrics", "skin_temperature_deviation")
+    op.drop_table("recompute_ranges")
@@ -0,0 +1,39 @@
+"""Persisted sleep need and debt ledger.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sleep_ledger_nights",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date, nullable=False),
+        sa.Column("sleep_hours", sa.Float, nullable=False),
+        sa.Column("strain", sa.Float),
+        sa.Column("need_hours", sa.Float, nullable=False),
+        sa.Column("deficit_hours", sa.Float, nullable=False),
+        sa.Column("debt_hours", sa.Float, nullable=False),
+        sa.Column("next_need_hours", sa.Float, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "date", name="uq_sleep_ledger_nights_user_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sleep_ledger_nights")
@@ -0,0 +1,24 @@
+"""Run-length encoded hypnogram on sleep sessions.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sleep_sessions", sa.Column("hypnogram", sa.LargeBinary))
+
+
+def downgrade() -> None:
+    op.drop_column("sleep_sessions", "hypnogram")
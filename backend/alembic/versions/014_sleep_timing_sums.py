@@ -0,0 +1,40 @@
+"""Running circular sums of sleep bed and wake times.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sleep_timing_sums",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date, nullable=False),
+        sa.Column("bedtime_minutes", sa.Float, nullable=False),
+        sa.Column("wake_time_minutes", sa.Float, nullable=False),
+        sa.Column("nights", sa.Integer, nullable=False),
+        sa.Column("bedtime_sin", sa.Float, nullable=False),
+        sa.Column("bedtime_cos", sa.Float, nullable=False),
+        sa.Column("wake_time_sin", sa.Float, nullable=False),
+        sa.Column("wake_time_cos", sa.Float, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "date", name="uq_sleep_timing_sums_user_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sleep_timing_sums")
@@ -0,0 +1,35 @@
+"""User timezone, for local-time sleep timing.
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("timezone", sa.String(64)))
+    # Seed from the zone users already gave their notification preferences.
+    op.execute(
+        """
+        UPDATE users SET timezone = (
+            SELECT np.timezone FROM notification_preferences np
+            WHERE np.user_id = users.id AND np.timezone IS NOT NULL
+            ORDER BY np.updated_at DESC
+            LIMIT 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "timezone")
@@ -2,31 +2,36 @@
 
 from __future__ import annotations
 
+import json
 import uuid
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, require_admin
 from app.auth.models import AuthUser
-from app.core.exceptions import NotFoundError
+from app.core.exceptions import NotFoundError, ValidationError
+from app.core.redis_client import get_redis
 from app.db.repositories import coach_repo, user_repo
 from app.db.session import get_session
+from app.models.coach import CoachConversation, CoachMessage
 from app.schemas.coach import (
     CoachConversationResponse,
+    CoachConversationSummary,
     CoachMessageCreate,
     CoachMessageResponse,
 )
+from app.schemas.common import decode_cursor, encode_cursor
+from app.services import coach_cache, coach_service
 
 router = APIRouter()
 
 
-@router.post("/message", response_model=CoachMessageResponse)
-async def send_message(
-    body: CoachMessageCreate,
-    current_user: AuthUser = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
-) -> CoachMessageResponse:
+async def _resolve_conversation(
+    session: AsyncSession, current_user: AuthUser, body: CoachMessageCreate
+) -> CoachConversation:
     user = await user_repo.get_by_firebase_uid(session, current_user.uid)
     if not user:
         user = await user_repo.create(
@@ -40,36 +45,85 @@ async def send_message(
             raise NotFoundError("Conversation")
     else:
         conv = await coach_repo.create_conversation(session, user.id)
+    return conv
 
-    # Save user message
-    await coach_repo.add_message(session, conv.id, "user", body.content)
 
-    # Generate AI response (placeholder — wired to CoachService in production)
-    ai_content = (
-        "I'm your Zyva AI coach. Based on your recent metrics, "
-        "I recommend focusing on recovery today. How can I help you further?"
-    )
-    ai_msg = await coach_repo.add_message(session, conv.id, "assistant", ai_content)
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
+
+@router.post("/message", response_model=CoachMessageResponse)
+async def send_message(
+    body: CoachMessageCreate,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> CoachMessageResponse:
+    conv = await _resolve_conversation(session, current_user, body)
+    ai_msg = await coach_service.generate_response(
+        session, conv.user_id, conv.id, body.content
+    )
     return CoachMessageResponse.model_validate(ai_msg)
 
 
-@router.get("/conversations", response_model=list[CoachConversationResponse])
+@router.post("/message/stream")
+async def stream_message(
+    body: CoachMessageCreate,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> StreamingResponse:
+    """Stream the coach's reply as Server-Sent Events.
+
+    Emits ``start`` (conversation id), a ``token`` event per text delta and
+    ``done`` with the persisted assistant message. The generator writes
+    through the request session; FastAPI >= 0.118 (the pinned minimum)
+    commits and closes it only after the stream has been sent.
+    """
+    conv = await _resolve_conversation(session, current_user, body)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("start", {"conversation_id": str(conv.id)})
+        async for item in coach_service.stream_response(
+            session, conv.user_id, conv.id, body.content
+        ):
+            if isinstance(item, CoachMessage):
+                message = CoachMessageResponse.model_validate(item)
+                yield _sse("done", message.model_dump(mode="json"))
+            else:
+                yield _sse("token", {"delta": item})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    _admin: AuthUser = Depends(require_admin),
+) -> dict[str, float]:
+    """Semantic response cache hit rate and generation time saved (admins only)."""
+    return await coach_cache.stats(get_redis())
+
+
+@router.get("/conversations", response_model=list[CoachConversationSummary])
 async def list_conversations(
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
-) -> list[CoachConversationResponse]:
+) -> list[CoachConversationSummary]:
     user = await user_repo.get_by_firebase_uid(session, current_user.uid)
     if not user:
         return []
 
-    convos = await coach_repo.list_conversations(session, user.id)
-    return [CoachConversationResponse.model_validate(c) for c in convos]
+    rows = await coach_repo.list_conversation_summaries(session, user.id)
+    return [CoachConversationSummary.model_validate(row) for row in rows]
 
 
 @router.get("/conversations/{conversation_id}", response_model=CoachConversationResponse)
 async def get_conversation(
     conversation_id: uuid.UUID,
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> CoachConversationResponse:
@@ -81,4 +135,22 @@ async def get_conversation(
     if not conv or conv.user_id != user.id:
         raise NotFoundError("Conversation")
 
-    return CoachConversationResponse.model_validate(conv)
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise ValidationError(str(exc)) from exc
+
+    messages, has_more = await coach_repo.list_messages(
+        session, conv.id, before=before, limit=limit
+    )
+    next_cursor = (
+        encode_cursor(messages[0].created_at, messages[0].id) if has_more else None
+    )
+    return CoachConversationResponse(
+        id=conv.id,
+        title=conv.title,
+        messages=[CoachMessageResponse.model_validate(m) for m in messages],
+        next_cursor=next_cursor,
+        created_at=conv.created_at,
+        updated_at=conv.updated_at,
+    )
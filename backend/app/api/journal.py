@@ -18,6 +18,7 @@ from app.schemas.journal import (
     JournalEntryResponse,
     JournalImpact,
 )
+from app.services import coach_context, coach_retrieval, dashboard_service, journal_service
 
 router = APIRouter()
 
@@ -38,12 +39,15 @@ async def submit_journal(
     if existing:
         raise ConflictError("Journal entry already exists for this date")
 
-    entry = await journal_repo.create_entry(
+    entry = await journal_service.create_entry(
         session,
         user.id,
         body.date,
         [r.model_dump() for r in body.responses],
     )
+    await coach_context.refresh(session, user.id)
+    await dashboard_service.invalidate(session, user.id)
+    await coach_retrieval.index_days(session, user.id, [body.date])
     # Reload with responses
     entry = await journal_repo.get_by_user_and_date(session, user.id, body.date)
     return JournalEntryResponse.model_validate(entry)
@@ -76,5 +80,8 @@ async def get_journal_impacts(
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> list[JournalImpact]:
-    # Placeholder — full correlation analysis is done by JournalService
-    return []
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    if not user:
+        return []
+
+    return await journal_service.compute_impacts(session, user.id)
@@ -7,12 +7,30 @@ from datetime import date, timedelta
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, require_admin
 from app.auth.models import AuthUser
+from app.core.redis_client import get_redis_or_none
 from app.db.repositories import metrics_repo, user_repo
 from app.db.session import get_session
+from app.engines.daily_pipeline import DayBundle
 from app.schemas.common import PaginatedResponse
-from app.schemas.metrics import DailyMetricResponse, MetricsSyncRequest, RawMetricsSyncRequest
+from app.schemas.metrics import (
+    CohortComparisonResponse,
+    CohortPercentile,
+    DailyMetricResponse,
+    DailyScoreResponse,
+    MetricsSyncRequest,
+    RawMetricsSyncRequest,
+)
+from app.services import (
+    baseline_service,
+    coach_context,
+    coach_retrieval,
+    cohort_service,
+    daily_scoring_service,
+    engine_memo,
+    metrics_service,
+)
 
 router = APIRouter()
 
@@ -29,13 +47,8 @@ async def sync_metrics(
             session, firebase_uid=current_user.uid, email=current_user.email
         )
 
-    results = []
-    for item in body.metrics:
-        metric = await metrics_repo.upsert(
-            session, user.id, **item.model_dump()
-        )
-        results.append(DailyMetricResponse.model_validate(metric))
-    return results
+    metrics = await metrics_service.sync_metrics(session, user.id, body.metrics)
+    return [DailyMetricResponse.model_validate(m) for m in metrics]
 
 
 @router.get("/daily", response_model=PaginatedResponse[DailyMetricResponse])
@@ -78,23 +91,10 @@ async def get_weekly_metrics(
         session, user.id, week_start, target, offset=0, limit=7
     )
 
-    # Fetch 28-day history for baselines
-    baseline_start = target - timedelta(days=28)
-    history, _ = await metrics_repo.list_by_date_range(
-        session, user.id, baseline_start, target, offset=0, limit=28
-    )
-
-    # Compute baselines
-    def avg(values: list) -> float | None:
-        filtered = [v for v in values if v is not None]
-        return sum(filtered) / len(filtered) if filtered else None
-
+    window = await baseline_service.get_window(session, user.id, target)
     baselines = {
-        "hrv_rmssd": avg([m.hrv_rmssd for m in history]),
-        "resting_heart_rate": avg([m.resting_heart_rate for m in history]),
-        "vo2_max": avg([m.vo2_max for m in history]),
-        "active_calories": avg([m.active_calories for m in history]),
-        "steps": avg([m.steps for m in history]),
+        name: window.mean(name)
+        for name in ("hrv_rmssd", "resting_heart_rate", "vo2_max", "active_calories", "steps")
     }
 
     # Format weekly data
@@ -115,56 +115,92 @@ async def get_weekly_metrics(
     return {"week": week, "baselines": baselines}
 
 
-@router.post("/sync-raw", response_model=list[DailyMetricResponse])
+@router.get("/cohort", response_model=CohortComparisonResponse)
+async def get_cohort_comparison(
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> CohortComparisonResponse:
+    """Where the user's latest HRV, resting HR and VO2 max fall among peers."""
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    if not user:
+        return CohortComparisonResponse(date=None, metrics=[])
+
+    latest = await metrics_repo.get_latest(session, user.id, date.today())
+    if latest is None:
+        return CohortComparisonResponse(date=None, metrics=[])
+
+    comparisons = await cohort_service.compare(
+        session,
+        user,
+        {metric: getattr(latest, metric) for metric in cohort_service.COMPARED_METRICS},
+        on=latest.date,
+    )
+    return CohortComparisonResponse(
+        date=latest.date, metrics=[CohortPercentile(**c) for c in comparisons]
+    )
+
+
+@router.get("/engine-cache/stats")
+async def get_engine_cache_stats(
+    _admin: AuthUser = Depends(require_admin),
+) -> dict[str, dict[str, float]]:
+    """Hit rate of the memoized recovery / strain engine results (admins only)."""
+    return await engine_memo.stats(get_redis_or_none())
+
+
+@router.post("/sync-raw", response_model=list[DailyScoreResponse])
 async def sync_raw_metrics(
     body: RawMetricsSyncRequest,
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
-) -> list[DailyMetricResponse]:
-    """Accept raw vitals and compute scores server-side using engines."""
-    from app.services.scoring_service import compute_recovery, compute_strain
-
+) -> list[DailyScoreResponse]:
+    """Accept raw vitals and score each day server-side with the daily pipeline."""
     user = await user_repo.get_by_firebase_uid(session, current_user.uid)
     if not user:
         user = await user_repo.create(
             session, firebase_uid=current_user.uid, email=current_user.email
         )
+    if not body.metrics:
+        return []
+
+    # Cohort priors, timezone and stored nights, read once for the batch
+    scorer = await daily_scoring_service.Scorer.load(
+        session,
+        user,
+        min(item.date for item in body.metrics),
+        max(item.date for item in body.metrics),
+    )
 
     results = []
+    changed_days = []
     for item in body.metrics:
-        # Fetch 28-day history for baselines
-        from_date = item.date - timedelta(days=28)
-        history, _ = await metrics_repo.list_by_date_range(
-            session, user.id, from_date, item.date, limit=28
-        )
-
-        # Build historical lists for recovery baselines
-        hist_hrv = [m.hrv_rmssd for m in history if m.hrv_rmssd is not None]
-        hist_rhr = [m.resting_heart_rate for m in history if m.resting_heart_rate is not None]
-        hist_sleep = [m.sleep_performance for m in history if m.sleep_performance is not None]
-        hist_resp = [m.respiratory_rate for m in history if m.respiratory_rate is not None]
-        hist_spo2 = [m.spo2 for m in history if m.spo2 is not None]
-
-        # Compute recovery
-        recovery_result = compute_recovery(
-            hrv=item.hrv_rmssd,
-            resting_heart_rate=item.resting_heart_rate,
-            sleep_performance=item.sleep_efficiency,
-            respiratory_rate=item.respiratory_rate,
-            spo2=item.spo2,
-            skin_temperature_deviation=item.skin_temperature_deviation,
-            historical_hrv=hist_hrv or None,
-            historical_rhr=hist_rhr or None,
-            historical_sleep=hist_sleep or None,
-            historical_resp=hist_resp or None,
-            historical_spo2=hist_spo2 or None,
-        )
-
         # Compute strain from HR samples
         strain_result = None
         if item.hr_samples and user.max_heart_rate:
             raw_samples = [(int(s[0]), s[1]) for s in item.hr_samples]
-            strain_result = compute_strain(user.max_heart_rate, raw_samples)
+            strain_result = await engine_memo.strain(user.max_heart_rate, raw_samples)
+
+        # Sleep, recovery, strain target and tonight's need against the user's
+        # rolling history; memoized on their inputs, so unchanged re-syncs
+        # skip the engines
+        night = scorer.night(item.date)
+        scored = await scorer.score_day(
+            session,
+            DayBundle(
+                date=item.date,
+                hrv=item.hrv_rmssd,
+                resting_heart_rate=item.resting_heart_rate,
+                respiratory_rate=item.respiratory_rate,
+                spo2=item.spo2,
+                skin_temperature_deviation=item.skin_temperature_deviation,
+                strain=strain_result.strain if strain_result else night.strain,
+                sleep_performance=item.sleep_efficiency,
+                sleep_hours=item.sleep_duration_hours,
+                sleep_need_hours=night.need_hours,
+                bedtime_minutes=night.bedtime_minutes,
+                wake_time_minutes=night.wake_time_minutes,
+            ),
+        )
 
         # Upsert the metric with computed scores
         metric_data = {
@@ -173,17 +209,33 @@ async def sync_raw_metrics(
             "resting_heart_rate": item.resting_heart_rate,
             "respiratory_rate": item.respiratory_rate,
             "spo2": item.spo2,
+            "skin_temperature_deviation": item.skin_temperature_deviation,
             "steps": item.steps,
             "active_calories": item.active_calories,
             "vo2_max": item.vo2_max,
             "sleep_duration_hours": item.sleep_duration_hours,
-            "recovery_score": recovery_result.score if recovery_result else None,
-            "recovery_zone": recovery_result.zone.value if recovery_result else None,
+            "recovery_score": scored.recovery.score,
+            "recovery_zone": scored.recovery.zone.value,
             "strain_score": strain_result.strain if strain_result else None,
             "sleep_performance": item.sleep_efficiency,
         }
 
-        metric = await metrics_repo.upsert(session, user.id, **metric_data)
-        results.append(DailyMetricResponse.model_validate(metric))
+        # Identical values skip the write and everything hooked on it
+        metric, written = await metrics_service.write_metric(session, user.id, **metric_data)
+        low, high = scored.strain_target
+        results.append(
+            DailyScoreResponse.model_validate(metric).model_copy(
+                update={
+                    "strain_target_min": low,
+                    "strain_target_max": high,
+                    "next_sleep_need_hours": scored.next_sleep_need_hours,
+                }
+            )
+        )
+        if written:
+            changed_days.append(metric.date)
 
+    if changed_days:
+        await coach_context.refresh(session, user.id)
+        await coach_retrieval.index_days(session, user.id, changed_days)
     return results
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from datetime import time
+
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy import select
@@ -9,9 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.auth.models import AuthUser
+from app.core.exceptions import ValidationError
 from app.db.repositories import user_repo
 from app.db.session import get_session
 from app.models.notification import NotificationPreference
+from app.services import notification_scheduler
 
 router = APIRouter()
 
@@ -25,6 +29,7 @@ class NotificationPrefUpdate(BaseModel):
     notification_type: str
     enabled: bool
     preferred_time: str | None = None
+    timezone: str | None = None
 
 
 @router.post("/device")
@@ -79,6 +84,7 @@ async def get_preferences(
             "notification_type": p.notification_type,
             "enabled": p.enabled,
             "preferred_time": str(p.preferred_time) if p.preferred_time else None,
+            "timezone": p.timezone,
         }
         for p in result.scalars().all()
     ]
@@ -90,6 +96,18 @@ async def update_preference(
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> dict:
+    preferred_time = None
+    if body.preferred_time is not None:
+        try:
+            preferred_time = time.fromisoformat(body.preferred_time)
+        except ValueError as exc:
+            raise ValidationError(f"Invalid preferred_time '{body.preferred_time}'") from exc
+    if body.timezone is not None:
+        try:
+            notification_scheduler.resolve_timezone(body.timezone)
+        except ValueError as exc:
+            raise ValidationError(str(exc)) from exc
+
     user = await user_repo.get_by_firebase_uid(session, current_user.uid)
     if not user:
         user = await user_repo.create(
@@ -112,6 +130,11 @@ async def update_preference(
             enabled=body.enabled,
         )
         session.add(pref)
+    if preferred_time is not None:
+        pref.preferred_time = preferred_time
+    if body.timezone is not None:
+        pref.timezone = body.timezone
 
     await session.flush()
+    notification_scheduler.defer_sync(session, pref)
     return {"status": "ok"}
@@ -1,7 +1,8 @@
-"""Sleep session history routes."""
+"""Sleep sync, session history, hypnogram and sleep need routes."""
 
 from __future__ import annotations
 
+import uuid
 from datetime import date
 
 from fastapi import APIRouter, Depends, Query
@@ -10,14 +11,39 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.auth.models import AuthUser
+from app.core.exceptions import NotFoundError
 from app.db.repositories import user_repo
 from app.db.session import get_session
 from app.models.sleep import SleepSession
-from app.schemas.sleep import SleepSessionResponse
+from app.schemas.metrics import DailyMetricResponse
+from app.schemas.sleep import (
+    HypnogramResponse,
+    SleepNeedResponse,
+    SleepSessionResponse,
+    SleepSyncRequest,
+)
+from app.services import sleep_ledger_service, sleep_service
 
 router = APIRouter()
 
 
+@router.post("/sync", response_model=list[DailyMetricResponse])
+async def sync_sleep(
+    body: SleepSyncRequest,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[DailyMetricResponse]:
+    """Accept raw sleep stages for many nights and score them server-side."""
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    if not user:
+        user = await user_repo.create(
+            session, firebase_uid=current_user.uid, email=current_user.email
+        )
+
+    metrics = await sleep_service.sync_nights(session, user.id, body.nights)
+    return [DailyMetricResponse.model_validate(m) for m in metrics]
+
+
 @router.get("/history", response_model=list[SleepSessionResponse])
 async def get_sleep_history(
     current_user: AuthUser = Depends(get_current_user),
@@ -39,3 +65,29 @@ async def get_sleep_history(
     stmt = stmt.order_by(SleepSession.start_date.desc()).limit(limit)
     result = await session.execute(stmt)
     return [SleepSessionResponse.model_validate(s) for s in result.scalars().all()]
+
+
+@router.get("/sessions/{session_id}/hypnogram", response_model=HypnogramResponse)
+async def get_hypnogram(
+    session_id: uuid.UUID,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    resolution_seconds: int = Query(30, ge=30, le=3600),
+) -> HypnogramResponse:
+    """Stage timeline decimated server-side to ``resolution_seconds`` per epoch."""
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    if not user:
+        raise NotFoundError("User")
+    return await sleep_service.get_hypnogram(session, user.id, session_id, resolution_seconds)
+
+
+@router.get("/need", response_model=SleepNeedResponse)
+async def get_sleep_need(
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> SleepNeedResponse:
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    night = await sleep_ledger_service.get_latest(session, user.id) if user else None
+    if night is None:
+        raise NotFoundError("Sleep ledger")
+    return SleepNeedResponse.model_validate(night)
@@ -4,22 +4,38 @@ from __future__ import annotations
 
 import secrets
 import uuid
+from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.auth.models import AuthUser
-from app.core.exceptions import ConflictError, ForbiddenError, NotFoundError
-from app.db.repositories import team_repo, user_repo
+from app.core.exceptions import (
+    ConflictError,
+    ForbiddenError,
+    NotFoundError,
+    ValidationError,
+)
+from app.db.repositories import challenge_repo, team_repo, user_repo
 from app.db.session import get_session
+from app.models.team import Team
+from app.models.user import User
+from app.schemas.challenge import (
+    ChallengeCreate,
+    ChallengeResponse,
+    ChallengeStandingsResponse,
+)
+from app.schemas.common import decode_cursor, encode_cursor
 from app.schemas.team import (
     LeaderboardResponse,
     TeamCreate,
+    TeamMemberPage,
     TeamMemberResponse,
     TeamResponse,
+    TeamTrendsResponse,
 )
-from app.services.team_service import build_leaderboard
+from app.services import challenge_service, team_analytics, team_service
 
 router = APIRouter()
 
@@ -46,6 +62,7 @@ async def create_team(
     )
     # Auto-add creator as admin
     await team_repo.add_member(session, team.id, user.id, role="admin")
+    await team_analytics.on_membership_changed(session, team.id)
 
     resp = TeamResponse.model_validate(team)
     resp.member_count = 1
@@ -68,16 +85,16 @@ async def join_team(
     if not team:
         raise NotFoundError("Team", invite_code)
 
-    # Check if already a member
-    team_full = await team_repo.get_by_id(session, team.id)
-    if team_full and any(m.user_id == user.id for m in team_full.members):
+    if await team_repo.is_member(session, team.id, user.id):
         raise ConflictError("Already a member of this team")
 
     await team_repo.add_member(session, team.id, user.id)
-    team_full = await team_repo.get_by_id(session, team.id)
+    await team_service.invalidate_rosters([team.id])
+    await team_analytics.on_membership_changed(session, team.id)
 
-    resp = TeamResponse.model_validate(team_full)
-    resp.member_count = len(team_full.members) if team_full else 0
+    counts = await team_repo.get_member_counts(session, [team.id])
+    resp = TeamResponse.model_validate(team)
+    resp.member_count = counts.get(team.id, 0)
     return resp
 
 
@@ -91,20 +108,91 @@ async def list_my_teams(
         return []
 
     teams = await team_repo.list_user_teams(session, user.id)
+    counts = await team_repo.get_member_counts(session, [t.id for t in teams])
     results = []
     for t in teams:
         resp = TeamResponse.model_validate(t)
-        resp.member_count = len(t.members)
+        resp.member_count = counts.get(t.id, 0)
         results.append(resp)
     return results
 
 
+async def _get_team_for_member(
+    session: AsyncSession, team_id: uuid.UUID, current_user: AuthUser
+) -> tuple[Team, User]:
+    user = await user_repo.get_by_firebase_uid(session, current_user.uid)
+    if not user:
+        raise NotFoundError("User")
+
+    team = await team_repo.get_by_id(session, team_id)
+    if not team:
+        raise NotFoundError("Team")
+
+    if not await team_repo.is_member(session, team.id, user.id):
+        raise ForbiddenError("Not a member of this team")
+    return team, user
+
+
+@router.get("/{team_id}/members", response_model=TeamMemberPage)
+async def list_members(
+    team_id: uuid.UUID,
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TeamMemberPage:
+    team, _ = await _get_team_for_member(session, team_id, current_user)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise ValidationError(str(exc)) from exc
+
+    rows, has_more = await team_repo.list_members(session, team.id, after=after, limit=limit)
+    next_cursor = encode_cursor(rows[-1].joined_at, rows[-1].id) if has_more else None
+    return TeamMemberPage(
+        members=[
+            TeamMemberResponse(
+                user_id=row.user_id,
+                display_name=row.display_name,
+                role=row.role,
+                joined_at=row.joined_at,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+
 @router.get("/{team_id}/leaderboard", response_model=LeaderboardResponse)
 async def get_leaderboard(
     team_id: uuid.UUID,
+    sort_by: Literal["recovery", "strain"] = Query("recovery"),
     current_user: AuthUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> LeaderboardResponse:
+    team, _ = await _get_team_for_member(session, team_id, current_user)
+    return await team_service.build_leaderboard(session, team, sort_by=sort_by)
+
+
+@router.get("/{team_id}/trends", response_model=TeamTrendsResponse)
+async def get_trends(
+    team_id: uuid.UUID,
+    days: int = Query(team_analytics.TREND_DAYS, ge=1, le=team_analytics.TREND_DAYS),
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TeamTrendsResponse:
+    team, _ = await _get_team_for_member(session, team_id, current_user)
+    return await team_analytics.get_trends(session, team.id, days=days)
+
+
+@router.post("/{team_id}/challenges", response_model=ChallengeResponse)
+async def create_challenge(
+    team_id: uuid.UUID,
+    body: ChallengeCreate,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ChallengeResponse:
     user = await user_repo.get_by_firebase_uid(session, current_user.uid)
     if not user:
         raise NotFoundError("User")
@@ -113,7 +201,53 @@ async def get_leaderboard(
     if not team:
         raise NotFoundError("Team")
 
-    if not any(m.user_id == user.id for m in team.members):
+    role = await team_repo.get_member_role(session, team.id, user.id)
+    if role is None:
         raise ForbiddenError("Not a member of this team")
+    if role != "admin":
+        raise ForbiddenError("Only team admins can create challenges")
+
+    if body.end_date < body.start_date:
+        raise ValidationError("end_date must not be before start_date")
+    if (body.end_date - body.start_date).days + 1 > challenge_service.MAX_WINDOW_DAYS:
+        raise ValidationError(
+            f"Challenges can run for at most {challenge_service.MAX_WINDOW_DAYS} days"
+        )
+    if body.aggregation == "streak" and body.threshold is None:
+        raise ValidationError("Streak challenges need a threshold")
+
+    challenge = await challenge_repo.create(
+        session, team_id=team.id, created_by=user.id, **body.model_dump()
+    )
+    await session.refresh(challenge)
+    return ChallengeResponse.model_validate(challenge)
+
+
+@router.get("/{team_id}/challenges", response_model=list[ChallengeResponse])
+async def list_challenges(
+    team_id: uuid.UUID,
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[ChallengeResponse]:
+    team, _ = await _get_team_for_member(session, team_id, current_user)
+    challenges = await challenge_repo.list_for_team(session, team.id)
+    return [ChallengeResponse.model_validate(c) for c in challenges]
+
+
+@router.get(
+    "/{team_id}/challenges/{challenge_id}/standings",
+    response_model=ChallengeStandingsResponse,
+)
+async def get_challenge_standings(
+    team_id: uuid.UUID,
+    challenge_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ChallengeStandingsResponse:
+    team, user = await _get_team_for_member(session, team_id, current_user)
+    challenge = await challenge_repo.get(session, challenge_id)
+    if not challenge or challenge.team_id != team.id:
+        raise NotFoundError("Challenge")
 
-    return await build_leaderboard(session, team)
+    return await challenge_service.get_standings(session, challenge, user.id, limit=limit)
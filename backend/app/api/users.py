@@ -7,9 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.auth.models import AuthUser
-from app.db.repositories import user_repo
+from app.core.exceptions import ValidationError
+from app.db.repositories import team_repo, user_repo
 from app.db.session import get_session
 from app.schemas.user import UserResponse, UserUpdate
+from app.services import notification_scheduler, team_service
 
 router = APIRouter()
 
@@ -44,7 +46,15 @@ async def update_profile(
             email=current_user.email,
             display_name=current_user.name,
         )
-    user = await user_repo.update(
-        session, user, **body.model_dump(exclude_unset=True)
-    )
+    if body.timezone is not None:
+        try:
+            notification_scheduler.resolve_timezone(body.timezone)
+        except ValueError as exc:
+            raise ValidationError(str(exc)) from exc
+    updates = body.model_dump(exclude_unset=True)
+    user = await user_repo.update(session, user, **updates)
+    if "display_name" in updates:
+        await team_service.invalidate_rosters(
+            await team_repo.list_team_ids_for_user(session, user.id)
+        )
     return UserResponse.model_validate(user)
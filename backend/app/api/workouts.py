@@ -14,6 +14,7 @@ from app.db.repositories import user_repo
 from app.db.session import get_session
 from app.models.workout import Workout
 from app.schemas.workout import WorkoutResponse, WorkoutSyncRequest
+from app.services import coach_context, coach_retrieval, dashboard_service
 
 router = APIRouter()
 
@@ -36,6 +37,12 @@ async def sync_workouts(
         session.add(workout)
         await session.flush()
         results.append(WorkoutResponse.model_validate(workout))
+    if results:
+        await coach_context.refresh(session, user.id)
+        await dashboard_service.invalidate(session, user.id)
+        await coach_retrieval.index_days(
+            session, user.id, [w.start_date.date() for w in results if w.start_date]
+        )
     return results
 
 
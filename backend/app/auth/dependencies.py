@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from fastapi import Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 
 from app.auth.firebase_auth import verify_firebase_token
 from app.auth.models import AuthUser
+from app.core.exceptions import ForbiddenError
 
 
 async def get_current_user(
@@ -37,3 +38,10 @@ async def get_current_user(
         ) from exc
 
     return user
+
+
+async def require_admin(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
+    """Allow only users whose token carries the ``admin`` custom claim; 403 otherwise."""
+    if not current_user.is_admin:
+        raise ForbiddenError("Admin access required")
+    return current_user
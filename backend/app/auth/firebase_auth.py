@@ -99,6 +99,7 @@ async def verify_firebase_token(token: str) -> AuthUser:
             uid=uid,
             email=payload.get("email"),
             name=payload.get("name"),
+            is_admin=payload.get("admin") is True,
         )
 
     except JWTError as exc:
@@ -12,6 +12,8 @@ class AuthUser:
     uid: str
     email: str | None = None
     name: str | None = None
+    # Set from the ``admin`` custom claim on the Firebase token.
+    is_admin: bool = False
 
 
 @dataclass(frozen=True, slots=True)
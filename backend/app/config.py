@@ -23,13 +23,40 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    # Entries kept in each worker's in-process cache in front of Redis
+    cache_l1_max_entries: int = 10_000
 
     # Firebase
     firebase_project_id: str = ""
     firebase_credentials_path: str = ""
 
+    # Push notifications: FCM endpoint. Empty selects FCM in prod and
+    # log-only pushes elsewhere; point at app.core.fcm_stub for local runs.
+    fcm_base_url: str = ""
+    push_max_connections: int = 100
+
     # Google Cloud
     gcp_project_id: str = ""
+    gcp_region: str = "us-central1"
+    cloud_run_url: str = ""
+
+    # Background tasks: "cloud" (Cloud Tasks), "local" (in-process worker)
+    # or "log" (log payloads only). Empty selects cloud in prod, log elsewhere.
+    task_backend: str = ""
+    task_worker_concurrency: int = 4
+
+    # AI coach: "vertex" (Gemini via Vertex AI) or "local" (deterministic
+    # offline generator). Empty selects vertex in prod, local elsewhere.
+    coach_backend: str = ""
+    coach_model: str = "gemini-1.5-flash"
+    coach_local_token_delay_ms: int = 0
+
+    # Coach retrieval: vector index "pgvector" or "numpy" (in-process);
+    # empty selects pgvector on PostgreSQL. Embeddings "vertex" or "local"
+    # (hashing embedder); empty selects vertex in prod, local elsewhere.
+    vector_index_backend: str = ""
+    embedding_backend: str = ""
+    embedding_model: str = "text-embedding-004"
 
     # Security
     secret_key: str = "change-me"
@@ -42,6 +69,36 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.environment == "prod"
 
+    @property
+    def resolved_task_backend(self) -> str:
+        if self.task_backend:
+            return self.task_backend
+        return "cloud" if self.is_production else "log"
+
+    @property
+    def resolved_fcm_base_url(self) -> str:
+        if self.fcm_base_url:
+            return self.fcm_base_url
+        return "https://fcm.googleapis.com" if self.is_production else ""
+
+    @property
+    def resolved_coach_backend(self) -> str:
+        if self.coach_backend:
+            return self.coach_backend
+        return "vertex" if self.is_production else "local"
+
+    @property
+    def resolved_vector_index_backend(self) -> str:
+        if self.vector_index_backend:
+            return self.vector_index_backend
+        return "pgvector" if self.database_url.startswith("postgresql") else "numpy"
+
+    @property
+    def resolved_embedding_backend(self) -> str:
+        if self.embedding_backend:
+            return self.embedding_backend
+        return "vertex" if self.is_production else "local"
+
     @property
     def parsed_cors_origins(self) -> list[str]:
         try:
@@ -0,0 +1,386 @@
+"""Two-tier cache — a per-worker LRU (L1) in front of Redis (L2).
+
+Entries live in namespaces (``user_namespace`` gives each user one). Every
+namespace has a version counter in Redis that is part of its keys, so
+invalidating a namespace is a single INCR: older entries become
+unreachable and expire on their own. Workers remember namespace versions
+for up to ``VERSION_TTL_SECONDS`` and forget them as soon as an
+invalidation is published on ``INVALIDATION_CHANNEL``, so L1 entries on
+other instances stop being served without waiting for their TTL.
+
+``get_or_load`` stores each value with a fresh-until time. Past it, and
+for up to ``stale_ttl`` more seconds, the stale value is returned at once
+while a single background task reloads it (stale-while-revalidate). Misses
+are single-flight: concurrent callers in a worker share one load, and
+across instances a short Redis lock lets one instance load while the
+others poll L2 for its result.
+
+Values must be JSON-serialisable. L1 hands the same object to every
+caller, so treat cached values as read-only. Without Redis nothing is
+cached and loaders run on every call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import redis.asyncio as aioredis
+
+from app.core.redis_client import get_redis_or_none
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+DEFAULT_MAX_ENTRIES = 10_000
+VERSION_TTL_SECONDS = 5.0
+LOCK_TTL_MS = 10_000
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+RESUBSCRIBE_DELAY_SECONDS = 1.0
+
+Loader = Callable[[], Awaitable[Any]]
+
+_cache: TwoTierCache | None = None
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+def user_namespace(user_id: uuid.UUID) -> str:
+    return f"user:{user_id}"
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache:ver:{namespace}"
+
+
+class TwoTierCache:
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, redis: aioredis.Redis | None = None
+    ) -> None:
+        self.max_entries = max_entries
+        self._redis = redis
+        self._bound: aioredis.Redis | None = None
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._versions: dict[str, tuple[int, float]] = {}
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._listener: asyncio.Task[None] | None = None
+
+    def _client(self) -> aioredis.Redis | None:
+        redis = self._redis if self._redis is not None else get_redis_or_none()
+        if redis is not self._bound:
+            # Nothing in L1 was validated against this Redis.
+            self._entries.clear()
+            self._versions.clear()
+            self._bound = redis
+        return redis
+
+    # -- reads ----------------------------------------------------------
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Loader,
+        *,
+        ttl: float,
+        stale_ttl: float = 0.0,
+    ) -> Any:
+        """Cached value of ``key`` in ``namespace``, loading it on a miss.
+
+        ``loader`` may run in a background task when ``stale_ttl`` is set,
+        so it must not depend on request-scoped state in that case.
+        """
+        redis = self._client()
+        if redis is None:
+            return await loader()
+        version = await self.namespace_version(namespace, redis=redis)
+        if version is None:
+            return await loader()
+        full_key = f"cache:{namespace}:v{version}:{key}"
+
+        entry = self._l1_get(full_key)
+        if entry is None:
+            entry = await self._l2_get(redis, full_key)
+            if entry is not None:
+                self._l1_put(full_key, entry)
+        if entry is not None:
+            if time.time() >= entry.fresh_until:
+                self._refresh_in_background(redis, full_key, loader, ttl, stale_ttl)
+            return entry.value
+        return await self._single_flight(redis, full_key, loader, ttl, stale_ttl)
+
+    async def namespace_version(
+        self, namespace: str, *, redis: aioredis.Redis | None = None
+    ) -> int | None:
+        """Current version of ``namespace``, or None if Redis is unavailable."""
+        cached = self._versions.get(namespace)
+        if cached is not None and time.monotonic() - cached[1] < VERSION_TTL_SECONDS:
+            return cached[0]
+        redis = redis or self._client()
+        if redis is None:
+            return None
+        key = _version_key(namespace)
+        try:
+            raw: bytes | str | None = await redis.get(key)
+            if raw is None:
+                # Start new (or evicted) counters past any version used before.
+                await redis.set(key, time.time_ns(), nx=True)
+                raw = await redis.get(key)
+        except aioredis.RedisError as exc:
+            logger.warning("Cache version read failed for %s: %s", namespace, exc)
+            return None
+        if raw is None:
+            return None  # evicted again between the write and the read
+        version = int(raw)
+        self._versions[namespace] = (version, time.monotonic())
+        return version
+
+    def _l1_get(self, full_key: str) -> _Entry | None:
+        entry = self._entries.get(full_key)
+        if entry is None:
+            return None
+        if time.time() >= entry.stale_until:
+            del self._entries[full_key]
+            return None
+        self._entries.move_to_end(full_key)
+        return entry
+
+    def _l1_put(self, full_key: str, entry: _Entry) -> None:
+        self._entries[full_key] = entry
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _l2_get(self, redis: aioredis.Redis, full_key: str) -> _Entry | None:
+        try:
+            raw = await redis.get(full_key)
+        except aioredis.RedisError as exc:
+            logger.warning("Cache read failed for %s: %s", full_key, exc)
+            return None
+        if raw is None:
+            return None
+        envelope = json.loads(raw)
+        if time.time() >= envelope["s"]:
+            return None
+        return _Entry(envelope["v"], envelope["f"], envelope["s"])
+
+    # -- loads ----------------------------------------------------------
+
+    async def _single_flight(
+        self,
+        redis: aioredis.Redis,
+        full_key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+    ) -> Any:
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await self._load(redis, full_key, loader, ttl, stale_ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # the raise below reports it; waiters are optional
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(full_key, None)
+
+    async def _load(
+        self,
+        redis: aioredis.Redis,
+        full_key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+    ) -> Any:
+        lock_key, token = f"{full_key}:lock", secrets.token_hex(8)
+        locked = await self._acquire(redis, lock_key, token)
+        if not locked:
+            # Another instance is loading; wait briefly for its result.
+            deadline = time.monotonic() + LOCK_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                entry = await self._l2_get(redis, full_key)
+                if entry is not None:
+                    self._l1_put(full_key, entry)
+                    return entry.value
+        try:
+            value = await loader()
+            await self._store(redis, full_key, value, ttl, stale_ttl)
+        finally:
+            if locked:
+                await self._release(redis, lock_key, token)
+        return value
+
+    def _refresh_in_background(
+        self,
+        redis: aioredis.Redis,
+        full_key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+    ) -> None:
+        if full_key in self._refreshing or full_key in self._inflight:
+            return
+        self._refreshing.add(full_key)
+        task = asyncio.get_running_loop().create_task(
+            self._refresh(redis, full_key, loader, ttl, stale_ttl)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(
+        self,
+        redis: aioredis.Redis,
+        full_key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+    ) -> None:
+        lock_key, token = f"{full_key}:lock", secrets.token_hex(8)
+        try:
+            if not await self._acquire(redis, lock_key, token):
+                return  # another instance is already refreshing it
+            try:
+                await self._store(redis, full_key, await loader(), ttl, stale_ttl)
+            finally:
+                await self._release(redis, lock_key, token)
+        except Exception:
+            logger.exception("Cache refresh failed for %s", full_key)
+        finally:
+            self._refreshing.discard(full_key)
+
+    async def _store(
+        self, redis: aioredis.Redis, full_key: str, value: Any, ttl: float, stale_ttl: float
+    ) -> None:
+        now = time.time()
+        entry = _Entry(value, now + ttl, now + ttl + stale_ttl)
+        self._l1_put(full_key, entry)
+        envelope = {"v": value, "f": entry.fresh_until, "s": entry.stale_until}
+        try:
+            await redis.set(full_key, json.dumps(envelope), px=int((ttl + stale_ttl) * 1000))
+        except aioredis.RedisError as exc:
+            logger.warning("Cache write failed for %s: %s", full_key, exc)
+
+    @staticmethod
+    async def _acquire(redis: aioredis.Redis, lock_key: str, token: str) -> bool:
+        try:
+            return bool(await redis.set(lock_key, token, nx=True, px=LOCK_TTL_MS))
+        except aioredis.RedisError as exc:
+            logger.warning("Cache lock failed for %s: %s", lock_key, exc)
+            return True  # load without the lock rather than not at all
+
+    @staticmethod
+    async def _release(redis: aioredis.Redis, lock_key: str, token: str) -> None:
+        try:
+            if await redis.get(lock_key) == token:
+                await redis.delete(lock_key)
+        except aioredis.RedisError as exc:
+            logger.warning("Cache unlock failed for %s: %s", lock_key, exc)
+
+    # -- invalidation ---------------------------------------------------
+
+    async def invalidate(self, namespace: str) -> None:
+        """Retire every entry in ``namespace`` on this and all other instances."""
+        self._versions.pop(namespace, None)
+        redis = self._client()
+        if redis is None:
+            return
+        try:
+            if await redis.get(_version_key(namespace)) is None:
+                await redis.set(_version_key(namespace), time.time_ns(), nx=True)
+            pipe = redis.pipeline(transaction=True)
+            pipe.incr(_version_key(namespace))
+            pipe.publish(INVALIDATION_CHANNEL, namespace)
+            await pipe.execute()
+        except aioredis.RedisError as exc:
+            logger.warning("Cache invalidation failed for %s: %s", namespace, exc)
+
+    async def start(self) -> None:
+        """Subscribe to invalidations published by other instances."""
+        if self._listener is None and self._client() is not None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _listen(self) -> None:
+        while True:
+            redis = self._client()
+            if redis is None:
+                return
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Invalidations may have been missed while unsubscribed.
+                self._versions.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._versions.pop(message["data"], None)
+            except aioredis.RedisError as exc:
+                logger.warning("Cache invalidation listener lost: %s", exc)
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+
+
+async def init_cache(max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+    """Create the process cache and subscribe it to invalidations."""
+    global _cache  # noqa: PLW0603
+    _cache = TwoTierCache(max_entries)
+    await _cache.start()
+    logger.info("Cache initialised (L1 max %d entries)", max_entries)
+
+
+async def close_cache() -> None:
+    global _cache  # noqa: PLW0603
+    if _cache is not None:
+        await _cache.stop()
+        _cache = None
+
+
+def get_cache() -> TwoTierCache:
+    """The process cache.
+
+    Outside the app (jobs, tests) one is created on first use without the
+    pub/sub listener; it then sees other instances' invalidations within
+    ``VERSION_TTL_SECONDS``.
+    """
+    global _cache  # noqa: PLW0603
+    if _cache is None:
+        _cache = TwoTierCache()
+    return _cache
@@ -1,4 +1,4 @@
-"""Google Cloud Tasks helper for dispatching async jobs."""
+"""Background task dispatch — Cloud Tasks in production, in-process locally."""
 
 from __future__ import annotations
 
@@ -6,6 +6,7 @@ import json
 import logging
 
 from app.config import get_settings
+from app.core.task_queue import TaskPriority, get_local_worker
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +17,57 @@ async def enqueue_task(
     payload: dict,
     *,
     delay_seconds: int = 0,
+    priority: TaskPriority = TaskPriority.DEFAULT,
 ) -> str | None:
-    """Enqueue an HTTP task on Cloud Tasks.
+    """Enqueue a task on the configured backend.
 
-    In local/dev mode this logs the payload instead of dispatching.
-    Returns the task name on success, None in dev mode.
+    ``cloud`` creates an HTTP task on Cloud Tasks, ``local`` hands it to the
+    in-process worker (see ``app.core.task_queue``), and ``log`` only logs
+    the payload. ``priority`` orders the local worker's lanes; on Cloud Tasks
+    each non-default lane is a separate queue (see ``cloud_queue_name``),
+    which must exist with its own rate limits.
+    Returns the task name, or None when the task was only logged.
     """
-    settings = get_settings()
+    backend = get_settings().resolved_task_backend
 
-    if not settings.is_production:
-        logger.info(
-            "DEV cloud-task queue=%s path=%s payload=%s",
-            queue,
-            handler_path,
-            json.dumps(payload, default=str),
+    if backend == "cloud":
+        return await _enqueue_cloud_task(
+            cloud_queue_name(queue, priority), handler_path, payload, delay_seconds=delay_seconds
         )
-        return None
 
-    # Production path — import lazily so dev environments don't need the SDK.
+    worker = get_local_worker()
+    if backend == "local" and worker is not None:
+        return await worker.enqueue(
+            queue, handler_path, payload, delay_seconds=delay_seconds, priority=priority
+        )
+
+    logger.info(
+        "DEV cloud-task queue=%s path=%s payload=%s",
+        queue,
+        handler_path,
+        json.dumps(payload, default=str),
+    )
+    return None
+
+
+def cloud_queue_name(queue: str, priority: TaskPriority) -> str:
+    """Cloud Tasks queue for a lane: ``queue`` itself, or ``queue-<lane>`` off default."""
+    if priority == TaskPriority.DEFAULT:
+        return queue
+    return f"{queue}-{priority.name.lower()}"
+
+
+async def _enqueue_cloud_task(
+    queue: str,
+    handler_path: str,
+    payload: dict,
+    *,
+    delay_seconds: int = 0,
+) -> str | None:
+    """Enqueue an HTTP task on Cloud Tasks."""
+    settings = get_settings()
+
+    # Import lazily so dev environments don't need the SDK.
     try:
         from google.cloud import tasks_v2  # type: ignore[import-untyped]
         from google.protobuf import duration_pb2, timestamp_pb2  # type: ignore[import-untyped]
@@ -42,7 +76,7 @@ async def enqueue_task(
         return None
 
     client = tasks_v2.CloudTasksAsyncClient()
-    parent = client.queue_path(settings.gcp_project_id, "us-central1", queue)
+    parent = client.queue_path(settings.gcp_project_id, settings.gcp_region, queue)
 
     task: dict = {
         "http_request": {
@@ -0,0 +1,121 @@
+"""Pluggable text generators for the AI coach.
+
+Generators stream a reply as text deltas. ``VertexCoachGenerator`` calls
+Gemini through LangChain; ``LocalCoachGenerator`` is a deterministic
+stand-in that composes a reply from the prompt's context, so streaming
+latency and throughput can be exercised offline. The optional per-token
+delays model a remote model's time-to-first-token and token rate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+_generator: CoachGenerator | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class CoachPrompt:
+    system: str
+    context: str
+    message: str
+    history: list[tuple[str, str]] = field(default_factory=list)  # (role, content)
+    retrieved: list[str] = field(default_factory=list)  # relevant history documents
+
+
+class CoachGenerator(Protocol):
+    def stream(self, prompt: CoachPrompt) -> AsyncIterator[str]: ...
+
+
+class LocalCoachGenerator:
+    """Deterministic offline generator; streams a templated reply word by word."""
+
+    def __init__(self, *, first_token_delay_s: float = 0.0, token_delay_s: float = 0.0) -> None:
+        self._first_token_delay_s = first_token_delay_s
+        self._token_delay_s = token_delay_s
+
+    @staticmethod
+    def compose(prompt: CoachPrompt) -> str:
+        return (
+            f"{prompt.context}"
+            f"Based on your question: '{prompt.message[:100]}', "
+            "I recommend maintaining consistent sleep habits and "
+            "adjusting your training intensity based on your daily recovery score."
+        )
+
+    async def stream(self, prompt: CoachPrompt) -> AsyncIterator[str]:
+        if self._first_token_delay_s:
+            await asyncio.sleep(self._first_token_delay_s)
+        for i, token in enumerate(re.findall(r"\S+\s*", self.compose(prompt))):
+            if i and self._token_delay_s:
+                await asyncio.sleep(self._token_delay_s)
+            yield token
+
+
+class VertexCoachGenerator:
+    """Streams Gemini completions from Vertex AI via LangChain."""
+
+    def __init__(
+        self, model: str, project: str, location: str, *, temperature: float = 0.4
+    ) -> None:
+        from langchain_google_vertexai import ChatVertexAI  # type: ignore[import-untyped]
+
+        self._llm = ChatVertexAI(
+            model_name=model, project=project, location=location, temperature=temperature
+        )
+
+    async def stream(self, prompt: CoachPrompt) -> AsyncIterator[str]:
+        from langchain_core.messages import (  # type: ignore[import-untyped]
+            AIMessage,
+            HumanMessage,
+            SystemMessage,
+        )
+
+        system = f"{prompt.system}\n\n{prompt.context}"
+        if prompt.retrieved:
+            system += "\n\nRelevant history:\n" + "\n".join(f"- {d}" for d in prompt.retrieved)
+        messages = [SystemMessage(content=system)]
+        for role, content in prompt.history:
+            cls = AIMessage if role == "assistant" else HumanMessage
+            messages.append(cls(content=content))
+        messages.append(HumanMessage(content=prompt.message))
+
+        async for chunk in self._llm.astream(messages):
+            if chunk.content:
+                yield str(chunk.content)
+
+
+def init_coach_generator(
+    backend: str,
+    *,
+    model: str = "",
+    project: str = "",
+    location: str = "",
+    token_delay_ms: int = 0,
+) -> CoachGenerator:
+    """Create the global coach generator for ``backend`` ("vertex" or "local")."""
+    global _generator  # noqa: PLW0603
+    if backend == "vertex":
+        _generator = VertexCoachGenerator(model, project, location)
+    else:
+        delay = token_delay_ms / 1000
+        _generator = LocalCoachGenerator(first_token_delay_s=delay, token_delay_s=delay)
+    logger.info("Coach generator ready: %s", backend)
+    return _generator
+
+
+def close_coach_generator() -> None:
+    global _generator  # noqa: PLW0603
+    _generator = None
+
+
+def get_coach_generator() -> CoachGenerator:
+    """Return the configured generator, defaulting to the local stand-in."""
+    return _generator if _generator is not None else LocalCoachGenerator()
@@ -0,0 +1,162 @@
+"""Pooled Firebase Cloud Messaging (HTTP v1) client.
+
+A single ``httpx.AsyncClient`` is shared for the process so pushes reuse
+keep-alive connections. FCM v1 accepts one message per request, so a
+"multicast" is a batch of at most ``FCM_MULTICAST_LIMIT`` messages sent
+concurrently under a semaphore, matching the Admin SDK's limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+FCM_MULTICAST_LIMIT = 500
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+
+TokenProvider = Callable[[], Awaitable[str | None]]
+
+_fcm: FCMClient | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class PushMessage:
+    token: str
+    title: str
+    body: str
+    data: dict[str, str] | None = None
+
+
+class FCMClient:
+    """Sends FCM v1 messages through a shared connection pool."""
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        project_id: str,
+        *,
+        base_url: str = "https://fcm.googleapis.com",
+        token_provider: TokenProvider | None = None,
+        concurrency: int = 50,
+    ) -> None:
+        self._http = http
+        self._url = f"{base_url.rstrip('/')}/v1/projects/{project_id}/messages:send"
+        self._token_provider = token_provider
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def send(self, message: PushMessage) -> bool:
+        payload: dict = {
+            "message": {
+                "token": message.token,
+                "notification": {"title": message.title, "body": message.body},
+            }
+        }
+        if message.data:
+            payload["message"]["data"] = message.data
+
+        headers = {}
+        if self._token_provider is not None:
+            access_token = await self._token_provider()
+            if access_token:
+                headers["Authorization"] = f"Bearer {access_token}"
+
+        async with self._semaphore:
+            try:
+                response = await self._http.post(self._url, json=payload, headers=headers)
+            except httpx.HTTPError as exc:
+                logger.warning("FCM request failed: %s", exc)
+                return False
+
+        if response.status_code != 200:
+            logger.info(
+                "FCM rejected token %s…: %d %s",
+                message.token[:12],
+                response.status_code,
+                response.text[:200],
+            )
+            return False
+        return True
+
+    async def send_multicast(self, messages: list[PushMessage]) -> list[bool]:
+        """Send up to ``FCM_MULTICAST_LIMIT`` messages; returns per-message success."""
+        if len(messages) > FCM_MULTICAST_LIMIT:
+            raise ValueError(f"At most {FCM_MULTICAST_LIMIT} messages per multicast")
+        return list(await asyncio.gather(*(self.send(m) for m in messages)))
+
+
+def _google_token_provider(credentials_path: str) -> TokenProvider:
+    """Build an OAuth2 access-token provider from service-account credentials."""
+    credentials = None
+    lock = asyncio.Lock()
+
+    async def provide() -> str | None:
+        nonlocal credentials
+        async with lock:
+            if credentials is None:
+                import google.auth  # type: ignore[import-untyped]
+                from google.oauth2 import service_account  # type: ignore[import-untyped]
+
+                if credentials_path:
+                    credentials = service_account.Credentials.from_service_account_file(
+                        credentials_path, scopes=[FCM_SCOPE]
+                    )
+                else:
+                    credentials, _ = google.auth.default(scopes=[FCM_SCOPE])
+            expiry = credentials.expiry.timestamp() if credentials.expiry else 0.0
+            if not credentials.valid or expiry - time.time() < 60:
+                from google.auth.transport.requests import Request  # type: ignore[import-untyped]
+
+                await asyncio.to_thread(credentials.refresh, Request())
+            return credentials.token
+
+    return provide
+
+
+async def init_fcm(
+    base_url: str,
+    project_id: str,
+    *,
+    credentials_path: str = "",
+    use_google_auth: bool = True,
+    max_connections: int = 100,
+) -> FCMClient:
+    """Create the global FCM client and its pooled HTTP client."""
+    global _fcm  # noqa: PLW0603
+    http = httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0),
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+    )
+    _fcm = FCMClient(
+        http,
+        project_id,
+        base_url=base_url,
+        token_provider=_google_token_provider(credentials_path) if use_google_auth else None,
+        concurrency=max_connections,
+    )
+    logger.info("FCM client ready: %s", base_url)
+    return _fcm
+
+
+async def close_fcm() -> None:
+    """Close the pooled HTTP client."""
+    global _fcm  # noqa: PLW0603
+    if _fcm is not None:
+        await _fcm.aclose()
+        _fcm = None
+
+
+def get_fcm() -> FCMClient | None:
+    """Return the FCM client, or None when pushes are only logged."""
+    return _fcm
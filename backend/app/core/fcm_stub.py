@@ -0,0 +1,53 @@
+"""Local stand-in for the FCM v1 send endpoint, for tests and benchmarks.
+
+Accepts ``POST /v1/projects/{project}/messages:send`` like FCM, records each
+message, optionally sleeps to simulate network latency, and rejects tokens
+starting with ``invalid`` as unregistered. Run standalone with
+``python -m app.core.fcm_stub [port]`` and point ``FCM_BASE_URL`` at it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_fcm_stub_app(*, latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="FCM stub")
+    app.state.received = []
+    counter = itertools.count(1)
+
+    @app.post("/v1/projects/{project_id}/messages:send")
+    async def send(project_id: str, request: Request) -> JSONResponse:
+        body = await request.json()
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+
+        token = body.get("message", {}).get("token", "")
+        if token.startswith("invalid"):
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "error": {
+                        "code": 404,
+                        "status": "NOT_FOUND",
+                        "details": [{"errorCode": "UNREGISTERED"}],
+                    }
+                },
+            )
+
+        app.state.received.append(body["message"])
+        return JSONResponse({"name": f"projects/{project_id}/messages/{next(counter)}"})
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9099
+    uvicorn.run(create_fcm_stub_app(), host="127.0.0.1", port=port)
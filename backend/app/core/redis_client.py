@@ -32,3 +32,8 @@ def get_redis() -> aioredis.Redis:
     if _redis is None:
         raise RuntimeError("Redis has not been initialised — call init_redis() first")
     return _redis
+
+
+def get_redis_or_none() -> aioredis.Redis | None:
+    """Return the Redis client, or None for callers that treat Redis as a cache."""
+    return _redis
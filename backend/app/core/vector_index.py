@@ -0,0 +1,227 @@
+"""Embedding backends and vector indexes for coach retrieval.
+
+Documents and their embeddings always live in ``coach_documents``; the
+index decides how nearest neighbours are found. ``PgVectorIndex`` orders by
+cosine distance in SQL (served by the HNSW index on Postgres, with an exact
+per-user scan when the filtered index scan comes back short).
+``NumpyVectorIndex`` keeps each user's embeddings as an in-process matrix,
+loaded from the table on first search and updated on every upsert, for
+SQLite-backed tests and local runs. Per-user document sets are small, so
+its exact dot-product scan answers in well under a millisecond.
+
+``HashingEmbedder`` is a deterministic offline embedder (signed feature
+hashing of word tokens); ``VertexEmbedder`` calls Vertex AI text
+embeddings through LangChain.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import re
+import uuid
+from typing import Protocol
+
+import numpy as np
+from sqlalchemy import Select, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.coach import EMBEDDING_DIM, CoachDocument
+
+logger = logging.getLogger(__name__)
+
+_embedder: Embedder | None = None
+_index: VectorIndex | None = None
+
+
+class Embedder(Protocol):
+    async def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class VectorIndex(Protocol):
+    async def add(self, user_id: uuid.UUID, items: list[tuple[uuid.UUID, list[float]]]) -> None:
+        ...
+
+    async def search(
+        self, session: AsyncSession, user_id: uuid.UUID, vector: list[float], k: int
+    ) -> list[tuple[uuid.UUID, float]]:
+        ...
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder; similar wording gives similar vectors."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        self._dim = dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self._dim
+        for token in re.findall(r"[a-z_]+", text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self._dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class VertexEmbedder:
+    """Vertex AI text embeddings via LangChain."""
+
+    def __init__(self, model: str, project: str, location: str) -> None:
+        from langchain_google_vertexai import VertexAIEmbeddings  # type: ignore[import-untyped]
+
+        self._embeddings = VertexAIEmbeddings(
+            model_name=model, project=project, location=location
+        )
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return await self._embeddings.aembed_documents(texts)
+
+
+class PgVectorIndex:
+    """Nearest-neighbour search with pgvector's cosine distance operator.
+
+    The HNSW index spans every user's documents, so a plain filtered scan
+    can return fewer than ``k`` of one user's rows once other users' vectors
+    crowd the candidate list. Searches enable iterative index scans
+    (pgvector 0.8+) for the transaction and fall back to an exact scan of
+    the user's own rows when the index still comes back short.
+    """
+
+    async def add(self, user_id: uuid.UUID, items: list[tuple[uuid.UUID, list[float]]]) -> None:
+        # The embeddings are already in coach_documents; the HNSW index is
+        # maintained by Postgres.
+        return None
+
+    async def search(
+        self, session: AsyncSession, user_id: uuid.UUID, vector: list[float], k: int
+    ) -> list[tuple[uuid.UUID, float]]:
+        await session.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        distance = CoachDocument.embedding.cosine_distance(vector)
+        stmt = (
+            select(CoachDocument.id, distance.label("distance"))
+            .where(CoachDocument.user_id == user_id)
+            .order_by(distance)
+            .limit(k)
+        )
+        rows = (await session.execute(stmt)).all()
+        if len(rows) < k:
+            rows = (await session.execute(self._exact_stmt(user_id, vector, k))).all()
+        return [(row.id, 1.0 - float(row.distance)) for row in rows]
+
+    @staticmethod
+    def _exact_stmt(user_id: uuid.UUID, vector: list[float], k: int) -> Select:
+        # A materialized CTE keeps the planner off the HNSW index, so every
+        # one of the user's rows is scored.
+        docs = (
+            select(CoachDocument.id, CoachDocument.embedding)
+            .where(CoachDocument.user_id == user_id)
+            .cte("user_documents")
+            .prefix_with("MATERIALIZED")
+        )
+        distance = docs.c.embedding.cosine_distance(vector)
+        return select(docs.c.id, distance.label("distance")).order_by(distance).limit(k)
+
+
+class NumpyVectorIndex:
+    """In-process per-user embedding matrices with exact cosine search."""
+
+    def __init__(self) -> None:
+        self._ids: dict[uuid.UUID, list[uuid.UUID]] = {}
+        self._matrices: dict[uuid.UUID, np.ndarray] = {}
+
+    async def add(self, user_id: uuid.UUID, items: list[tuple[uuid.UUID, list[float]]]) -> None:
+        if user_id not in self._ids or not items:
+            return  # loaded lazily on the user's first search
+        ids = self._ids[user_id]
+        positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        matrix = self._matrices[user_id]
+        new_rows = []
+        for doc_id, vector in items:
+            row = _normalise(vector)
+            if doc_id in positions:
+                matrix[positions[doc_id]] = row
+            else:
+                ids.append(doc_id)
+                new_rows.append(row)
+        if new_rows:
+            self._matrices[user_id] = np.vstack([matrix, *new_rows])
+
+    async def search(
+        self, session: AsyncSession, user_id: uuid.UUID, vector: list[float], k: int
+    ) -> list[tuple[uuid.UUID, float]]:
+        if user_id not in self._ids:
+            await self._load(session, user_id)
+        ids = self._ids[user_id]
+        if not ids:
+            return []
+        scores = self._matrices[user_id] @ _normalise(vector)
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    async def _load(self, session: AsyncSession, user_id: uuid.UUID) -> None:
+        result = await session.execute(
+            select(CoachDocument.id, CoachDocument.embedding).where(
+                CoachDocument.user_id == user_id
+            )
+        )
+        rows = result.all()
+        self._ids[user_id] = [row.id for row in rows]
+        self._matrices[user_id] = (
+            np.vstack([_normalise(row.embedding) for row in rows])
+            if rows
+            else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        )
+
+
+def _normalise(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
+
+
+def init_vector_index(
+    index_backend: str,
+    embedding_backend: str,
+    *,
+    model: str = "",
+    project: str = "",
+    location: str = "",
+) -> None:
+    """Create the global embedder and index."""
+    global _embedder, _index  # noqa: PLW0603
+    _embedder = (
+        VertexEmbedder(model, project, location)
+        if embedding_backend == "vertex"
+        else HashingEmbedder()
+    )
+    _index = PgVectorIndex() if index_backend == "pgvector" else NumpyVectorIndex()
+    logger.info("Vector index ready: index=%s embeddings=%s", index_backend, embedding_backend)
+
+
+def close_vector_index() -> None:
+    global _embedder, _index  # noqa: PLW0603
+    _embedder = None
+    _index = None
+
+
+def get_embedder() -> Embedder:
+    """Return the configured embedder, defaulting to the offline hashing embedder."""
+    global _embedder  # noqa: PLW0603
+    if _embedder is None:
+        _embedder = HashingEmbedder()
+    return _embedder
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the configured index, defaulting to the in-process NumPy index."""
+    global _index  # noqa: PLW0603
+    if _index is None:
+        _index = NumpyVectorIndex()
+    return _index
@@ -0,0 +1,69 @@
+"""Work deferred until a session's transaction commits.
+
+Services that keep derived state outside the database (Redis indexes,
+caches) register a flush coroutine for a key with ``on_commit`` and queue
+items under it with ``defer``. Once the transaction commits, each key's
+items are handed to its flush as one batch, in a task on the running loop;
+a rollback drops them. A commit outside the event loop drops them too, so
+whatever a flush writes must be rebuildable from the database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+Flush = Callable[[list[Any]], Awaitable[None]]
+
+_INFO_KEY = "after_commit"
+_flushes: dict[str, Flush] = {}
+_background_tasks: set[asyncio.Task[None]] = set()
+
+
+def on_commit(key: str) -> Callable[[Flush], Flush]:
+    """Register the decorated coroutine as the flush for items deferred under ``key``."""
+
+    def register(flush: Flush) -> Flush:
+        _flushes[key] = flush
+        return flush
+
+    return register
+
+
+def defer(session: AsyncSession | Session, key: str, item: Any) -> None:
+    """Queue ``item`` for ``key``'s flush once ``session`` commits."""
+    session.info.setdefault(_INFO_KEY, {}).setdefault(key, []).append(item)
+
+
+def pending(session: AsyncSession | Session, key: str) -> list[Any]:
+    """Items deferred under ``key`` in ``session`` and not yet flushed."""
+    return list(session.info.get(_INFO_KEY, {}).get(key, []))
+
+
+async def _run(flush: Flush, items: list[Any]) -> None:
+    await flush(items)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_after_commit(session: Session) -> None:
+    queued: dict[str, list[Any]] | None = session.info.pop(_INFO_KEY, None)
+    if not queued:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # committed outside the event loop; readers rebuild from the database
+    for key, items in queued.items():
+        task = loop.create_task(_run(_flushes[key], items))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
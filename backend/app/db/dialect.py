@@ -0,0 +1,33 @@
+"""Dialect-specific SQL constructs shared by the repositories."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def upsert_insert(session: AsyncSession, entity: Any) -> Any:
+    """Return an INSERT supporting ``on_conflict_do_update`` for the bound dialect.
+
+    Production runs on PostgreSQL; the test-suite runs on SQLite, whose
+    ``INSERT ... ON CONFLICT`` construct has the same interface.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(entity)
+    return postgresql.insert(entity)
+
+
+def least(session: AsyncSession, *args: Any) -> Any:
+    """``LEAST(...)`` on PostgreSQL; SQLite spells it as multi-argument ``min``."""
+    if session.get_bind().dialect.name == "sqlite":
+        return func.min(*args)
+    return func.least(*args)
+
+
+def greatest(session: AsyncSession, *args: Any) -> Any:
+    if session.get_bind().dialect.name == "sqlite":
+        return func.max(*args)
+    return func.greatest(*args)
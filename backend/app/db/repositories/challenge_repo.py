@@ -0,0 +1,88 @@
+"""Challenge repository — data-access helpers for team_challenges."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.challenge import TeamChallenge
+from app.models.daily_metric import DailyMetric
+from app.models.team import TeamMember
+
+
+async def create(session: AsyncSession, **kwargs) -> TeamChallenge:
+    challenge = TeamChallenge(**kwargs)
+    session.add(challenge)
+    await session.flush()
+    return challenge
+
+
+async def get(session: AsyncSession, challenge_id: uuid.UUID) -> TeamChallenge | None:
+    return await session.get(TeamChallenge, challenge_id)
+
+
+async def list_for_team(session: AsyncSession, team_id: uuid.UUID) -> list[TeamChallenge]:
+    stmt = (
+        select(TeamChallenge)
+        .where(TeamChallenge.team_id == team_id)
+        .order_by(TeamChallenge.start_date.desc(), TeamChallenge.id)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def list_covering(
+    session: AsyncSession, team_ids: list[uuid.UUID], on_date: date
+) -> list[TeamChallenge]:
+    """Challenges of ``team_ids`` whose window includes ``on_date``."""
+    if not team_ids:
+        return []
+    stmt = select(TeamChallenge).where(
+        TeamChallenge.team_id.in_(team_ids),
+        TeamChallenge.start_date <= on_date,
+        TeamChallenge.end_date >= on_date,
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def list_open(
+    session: AsyncSession, started_by: date, ended_after: date
+) -> list[TeamChallenge]:
+    """Challenges that have started by ``started_by`` and end on or after ``ended_after``."""
+    stmt = (
+        select(TeamChallenge)
+        .where(
+            TeamChallenge.start_date <= started_by,
+            TeamChallenge.end_date >= ended_after,
+        )
+        .order_by(TeamChallenge.id)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def member_values(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    column: str,
+    from_date: date,
+    to_date: date,
+) -> list[tuple[uuid.UUID, date, float]]:
+    """``(user_id, date, value)`` for current members' non-null values in the range."""
+    value = getattr(DailyMetric, column)
+    stmt = (
+        select(DailyMetric.user_id, DailyMetric.date, value)
+        .join(TeamMember, TeamMember.user_id == DailyMetric.user_id)
+        .where(
+            TeamMember.team_id == team_id,
+            DailyMetric.date >= from_date,
+            DailyMetric.date <= to_date,
+            value.is_not(None),
+        )
+    )
+    result = await session.execute(stmt)
+    return [(row[0], row[1], float(row[2])) for row in result.all()]
@@ -3,37 +3,101 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.models.coach import CoachConversation, CoachMessage
+from app.db.dialect import upsert_insert
+from app.models.coach import CoachConversation, CoachDocument, CoachMessage
+
+PREVIEW_LENGTH = 120
 
 
 async def get_conversation(
     session: AsyncSession, conversation_id: uuid.UUID
 ) -> CoachConversation | None:
-    stmt = (
-        select(CoachConversation)
-        .options(selectinload(CoachConversation.messages))
-        .where(CoachConversation.id == conversation_id)
-    )
+    stmt = select(CoachConversation).where(CoachConversation.id == conversation_id)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def list_conversations(
+async def list_conversation_summaries(
     session: AsyncSession, user_id: uuid.UUID
-) -> list[CoachConversation]:
+) -> list:
+    """Conversations with message count and last-message preview, in one query.
+
+    The per-conversation subqueries are served by
+    ``ix_coach_messages_conversation_created``; no message bodies beyond the
+    preview are read.
+    """
+    def latest(column):
+        return (
+            select(column)
+            .where(CoachMessage.conversation_id == CoachConversation.id)
+            .order_by(CoachMessage.created_at.desc(), CoachMessage.id.desc())
+            .limit(1)
+            .correlate(CoachConversation)
+            .scalar_subquery()
+        )
+
+    message_count = (
+        select(func.count(CoachMessage.id))
+        .where(CoachMessage.conversation_id == CoachConversation.id)
+        .correlate(CoachConversation)
+        .scalar_subquery()
+    )
     stmt = (
-        select(CoachConversation)
-        .options(selectinload(CoachConversation.messages))
+        select(
+            CoachConversation.id,
+            CoachConversation.title,
+            func.substr(latest(CoachMessage.content), 1, PREVIEW_LENGTH).label(
+                "last_message_preview"
+            ),
+            latest(CoachMessage.created_at).label("last_message_at"),
+            message_count.label("message_count"),
+            CoachConversation.created_at,
+            CoachConversation.updated_at,
+        )
         .where(CoachConversation.user_id == user_id)
         .order_by(CoachConversation.updated_at.desc())
     )
     result = await session.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
+
+
+async def list_messages(
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    *,
+    before: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> tuple[list[CoachMessage], bool]:
+    """Newest ``limit`` messages older than ``before``, returned oldest first.
+
+    Keyset pagination on ``(created_at, id)``. Returns the messages and
+    whether older ones remain.
+    """
+    stmt = (
+        select(CoachMessage)
+        .where(CoachMessage.conversation_id == conversation_id)
+        .order_by(CoachMessage.created_at.desc(), CoachMessage.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        created_at, message_id = before
+        stmt = stmt.where(
+            or_(
+                CoachMessage.created_at < created_at,
+                and_(CoachMessage.created_at == created_at, CoachMessage.id < message_id),
+            )
+        )
+    result = await session.execute(stmt)
+    messages = list(result.scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, has_more
 
 
 async def create_conversation(
@@ -51,7 +115,67 @@ async def add_message(
     role: str,
     content: str,
 ) -> CoachMessage:
-    msg = CoachMessage(conversation_id=conversation_id, role=role, content=content)
+    # Timestamp in Python: a user message and its reply share one transaction,
+    # where the server's now() would give both the same created_at.
+    msg = CoachMessage(
+        conversation_id=conversation_id,
+        role=role,
+        content=content,
+        created_at=datetime.now(timezone.utc),
+    )
     session.add(msg)
     await session.flush()
     return msg
+
+
+async def get_document_hashes(
+    session: AsyncSession, user_id: uuid.UUID, keys: list[tuple[str, str]]
+) -> dict[tuple[str, str], str]:
+    """Content hashes of the user's documents for ``(source, source_key)`` pairs."""
+    if not keys:
+        return {}
+    stmt = select(
+        CoachDocument.source, CoachDocument.source_key, CoachDocument.content_hash
+    ).where(
+        CoachDocument.user_id == user_id,
+        tuple_(CoachDocument.source, CoachDocument.source_key).in_(keys),
+    )
+    result = await session.execute(stmt)
+    return {(row.source, row.source_key): row.content_hash for row in result}
+
+
+async def upsert_documents(
+    session: AsyncSession, rows: list[dict]
+) -> list[tuple[uuid.UUID, list[float]]]:
+    """Insert or overwrite documents by (user_id, source, source_key).
+
+    Returns ``(id, embedding)`` for every row written.
+    """
+    if not rows:
+        return []
+    stmt = upsert_insert(session, CoachDocument).values(
+        [{"id": uuid.uuid4(), **row} for row in rows]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "source", "source_key"],
+        set_={
+            "doc_date": stmt.excluded.doc_date,
+            "content": stmt.excluded.content,
+            "content_hash": stmt.excluded.content_hash,
+            "embedding": stmt.excluded.embedding,
+            "updated_at": func.now(),
+        },
+    ).returning(CoachDocument.id, CoachDocument.embedding)
+    result = await session.execute(stmt)
+    return [(row.id, list(row.embedding)) for row in result]
+
+
+async def get_documents(
+    session: AsyncSession, document_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, CoachDocument]:
+    if not document_ids:
+        return {}
+    result = await session.execute(
+        select(CoachDocument).where(CoachDocument.id.in_(document_ids))
+    )
+    return {doc.id: doc for doc in result.scalars()}
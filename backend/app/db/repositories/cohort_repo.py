@@ -0,0 +1,75 @@
+"""Cohort repository — data-access helpers for cohort_sketches."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import date
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import upsert_insert
+from app.models.cohort import CohortSketch
+from app.models.daily_metric import DailyMetric
+from app.models.user import User
+
+
+async def list_sketches(session: AsyncSession) -> list[CohortSketch]:
+    result = await session.execute(select(CohortSketch))
+    return list(result.scalars().all())
+
+
+async def replace_sketches(session: AsyncSession, rows: list[dict]) -> None:
+    """Write one sketch per (metric, age_band, sex) and drop cohorts not in ``rows``."""
+    if rows:
+        stmt = upsert_insert(session, CohortSketch).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["metric", "age_band", "sex"],
+            set_={
+                "count": stmt.excluded.count,
+                "digest": stmt.excluded.digest,
+                "through_date": stmt.excluded.through_date,
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
+    stale = delete(CohortSketch)
+    if rows:
+        stale = stale.where(
+            tuple_(CohortSketch.metric, CohortSketch.age_band, CohortSketch.sex).not_in(
+                [(row["metric"], row["age_band"], row["sex"]) for row in rows]
+            )
+        )
+    await session.execute(stale)
+
+
+async def stream_user_means(
+    session: AsyncSession,
+    columns: list[str],
+    after: date,
+    through: date,
+    *,
+    batch_size: int = 5000,
+) -> AsyncIterator:
+    """Yield ``(date_of_birth, biological_sex, *column means)`` per user.
+
+    Means cover the user's days in ``(after, through]``.
+    """
+    stmt = (
+        select(
+            User.date_of_birth,
+            User.biological_sex,
+            *(func.avg(getattr(DailyMetric, c)) for c in columns),
+        )
+        .join(User, User.id == DailyMetric.user_id)
+        .where(
+            User.date_of_birth.is_not(None),
+            DailyMetric.date > after,
+            DailyMetric.date <= through,
+        )
+        .group_by(User.id, User.date_of_birth, User.biological_sex)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream(stmt)
+    async for row in result:
+        yield row
@@ -0,0 +1,75 @@
+"""Healthspan repository — data-access helpers for healthspan_scores."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import upsert_insert
+from app.models.healthspan import HealthspanScore
+from app.models.user import User
+
+_SCORE_FIELDS = (
+    "vitalos_age",
+    "biological_age",
+    "cardiovascular_score",
+    "recovery_score",
+    "sleep_score",
+    "activity_score",
+)
+
+
+async def upsert_many(
+    session: AsyncSession, rows: list[dict]
+) -> list[HealthspanScore]:
+    """Insert or overwrite one score per (user_id, date) in a single statement."""
+    if not rows:
+        return []
+
+    stmt = upsert_insert(session, HealthspanScore).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "date"],
+        set_={
+            **{field: getattr(stmt.excluded, field) for field in _SCORE_FIELDS},
+            "updated_at": func.now(),
+        },
+    ).returning(HealthspanScore)
+    result = await session.scalars(
+        stmt, execution_options={"populate_existing": True}
+    )
+    return list(result.all())
+
+
+async def list_score_dates(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date
+) -> list[date]:
+    """Dates in ``[from_date, to_date]`` the user already has a score for."""
+    stmt = (
+        select(HealthspanScore.date)
+        .where(
+            HealthspanScore.user_id == user_id,
+            HealthspanScore.date >= from_date,
+            HealthspanScore.date <= to_date,
+        )
+        .order_by(HealthspanScore.date)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def list_users_with_birth_date(
+    session: AsyncSession,
+    *,
+    after_id: uuid.UUID | None = None,
+    limit: int = 500,
+) -> list[tuple[uuid.UUID, date]]:
+    """Keyset-paginate ``(user_id, date_of_birth)`` for users the engine can score."""
+    stmt = select(User.id, User.date_of_birth).where(User.date_of_birth.is_not(None))
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    stmt = stmt.order_by(User.id).limit(limit)
+    result = await session.execute(stmt)
+    return [(row.id, row.date_of_birth) for row in result]
@@ -5,11 +5,12 @@ from __future__ import annotations
 import uuid
 from datetime import date
 
-from sqlalchemy import func, select
+from sqlalchemy import Float, Row, and_, case, cast, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.journal import JournalEntry, JournalResponse
+from app.models.daily_metric import DailyMetric
+from app.models.journal import JournalBehaviorStat, JournalEntry, JournalResponse
 
 
 async def get_by_user_and_date(
@@ -72,3 +73,102 @@ async def list_entries(
     result = await session.execute(stmt)
     total_result = await session.execute(count_stmt)
     return list(result.scalars().all()), total_result.scalar_one()
+
+
+def response_value_expr():
+    """SQL expression mapping a response to its numeric value.
+
+    Mirrors ``journal_service.response_value``: booleans become 1/0, then
+    numeric values, then scale values.
+    """
+    return case(
+        (
+            JournalResponse.bool_value.is_not(None),
+            case((JournalResponse.bool_value.is_(True), 1.0), else_=0.0),
+        ),
+        (JournalResponse.numeric_value.is_not(None), JournalResponse.numeric_value),
+        else_=cast(JournalResponse.scale_value, Float),
+    )
+
+
+async def aggregate_behavior_stats(
+    session: AsyncSession, user_id: uuid.UUID, metric: str
+) -> list[Row]:
+    """Aggregate (n, Σx, Σy, Σxy, Σx², Σy²) per behaviour in a single JOIN.
+
+    Joins journal responses to the same-day ``daily_metrics`` row and sums
+    over every day where both the response value and the metric are present.
+    """
+    x = response_value_expr()
+    y = getattr(DailyMetric, metric)
+    stmt = (
+        select(
+            JournalResponse.behavior_key,
+            func.count().label("n"),
+            func.sum(x).label("sum_x"),
+            func.sum(y).label("sum_y"),
+            func.sum(x * y).label("sum_xy"),
+            func.sum(x * x).label("sum_x2"),
+            func.sum(y * y).label("sum_y2"),
+        )
+        .join(JournalEntry, JournalResponse.journal_entry_id == JournalEntry.id)
+        .join(
+            DailyMetric,
+            and_(
+                DailyMetric.user_id == JournalEntry.user_id,
+                DailyMetric.date == JournalEntry.date,
+            ),
+        )
+        .where(JournalEntry.user_id == user_id, x.is_not(None), y.is_not(None))
+        .group_by(JournalResponse.behavior_key)
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def list_behavior_stats(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    metric: str,
+    behavior_keys: list[str] | None = None,
+) -> list[JournalBehaviorStat]:
+    stmt = select(JournalBehaviorStat).where(
+        JournalBehaviorStat.user_id == user_id,
+        JournalBehaviorStat.metric == metric,
+    )
+    if behavior_keys is not None:
+        stmt = stmt.where(JournalBehaviorStat.behavior_key.in_(behavior_keys))
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def replace_behavior_stats(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    metric: str,
+    rows: list[Row],
+) -> list[JournalBehaviorStat]:
+    """Replace a user's stored statistics with freshly aggregated rows."""
+    await session.execute(
+        delete(JournalBehaviorStat).where(
+            JournalBehaviorStat.user_id == user_id,
+            JournalBehaviorStat.metric == metric,
+        )
+    )
+    stats = [
+        JournalBehaviorStat(
+            user_id=user_id,
+            behavior_key=row.behavior_key,
+            metric=metric,
+            n=row.n,
+            sum_x=row.sum_x or 0.0,
+            sum_y=row.sum_y or 0.0,
+            sum_xy=row.sum_xy or 0.0,
+            sum_x2=row.sum_x2 or 0.0,
+            sum_y2=row.sum_y2 or 0.0,
+        )
+        for row in rows
+    ]
+    session.add_all(stats)
+    await session.flush()
+    return stats
@@ -3,11 +3,12 @@
 from __future__ import annotations
 
 import uuid
-from datetime import date
+from datetime import date, timedelta
 
-from sqlalchemy import func, select
+from sqlalchemy import Float, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.baseline import UserBaseline
 from app.models.daily_metric import DailyMetric
 
 
@@ -22,21 +23,51 @@ async def get_by_user_and_date(
     return result.scalar_one_or_none()
 
 
+async def create(session: AsyncSession, user_id: uuid.UUID, **kwargs) -> DailyMetric:
+    metric = DailyMetric(user_id=user_id, **kwargs)
+    session.add(metric)
+    await session.flush()
+    return metric
+
+
+async def update(session: AsyncSession, metric: DailyMetric, **kwargs) -> DailyMetric:
+    for key, value in kwargs.items():
+        if value is not None:
+            setattr(metric, key, value)
+    await session.flush()
+    # updated_at is regenerated server-side; load it now rather than lazily.
+    await session.refresh(metric, ["updated_at"])
+    return metric
+
+
 async def upsert(session: AsyncSession, user_id: uuid.UUID, **kwargs) -> DailyMetric:
     metric_date = kwargs.pop("date")
     existing = await get_by_user_and_date(session, user_id, metric_date)
 
     if existing:
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(existing, key, value)
-        await session.flush()
-        return existing
+        return await update(session, existing, **kwargs)
+    return await create(session, user_id, date=metric_date, **kwargs)
 
-    metric = DailyMetric(user_id=user_id, date=metric_date, **kwargs)
-    session.add(metric)
-    await session.flush()
-    return metric
+
+async def list_day_columns(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    columns: list[str],
+    from_date: date,
+    to_date: date,
+) -> list:
+    """``(date, *columns)`` rows for the range, oldest first, without loading entities."""
+    stmt = (
+        select(DailyMetric.date, *(getattr(DailyMetric, c) for c in columns))
+        .where(
+            DailyMetric.user_id == user_id,
+            DailyMetric.date >= from_date,
+            DailyMetric.date <= to_date,
+        )
+        .order_by(DailyMetric.date)
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
 
 
 async def list_by_date_range(
@@ -66,3 +97,135 @@ async def list_by_date_range(
     total_result = await session.execute(count_stmt)
 
     return list(result.scalars().all()), total_result.scalar_one()
+
+
+async def window_averages(
+    session: AsyncSession,
+    user_ids: list[uuid.UUID],
+    columns: list[str],
+    *,
+    from_date: date,
+    recent_from: date,
+    to_date: date,
+) -> dict[uuid.UUID, dict[str, tuple[float | None, float | None]]]:
+    """Average ``columns`` over a long and a recent window in one GROUP BY.
+
+    Returns ``{user_id: {column: (long_avg, recent_avg)}}`` where the long
+    window is ``[from_date, to_date]`` and the recent one ``[recent_from,
+    to_date]`` (computed with ``AVG(...) FILTER (WHERE date >= recent_from)``).
+    Users without any rows in the long window are omitted.
+    """
+    if not user_ids:
+        return {}
+
+    aggregates = []
+    for name in columns:
+        value = cast(getattr(DailyMetric, name), Float)
+        aggregates.append(func.avg(value).label(f"{name}__long"))
+        aggregates.append(
+            func.avg(value).filter(DailyMetric.date >= recent_from).label(f"{name}__recent")
+        )
+
+    stmt = (
+        select(DailyMetric.user_id, *aggregates)
+        .where(
+            DailyMetric.user_id.in_(user_ids),
+            DailyMetric.date >= from_date,
+            DailyMetric.date <= to_date,
+        )
+        .group_by(DailyMetric.user_id)
+    )
+    result = await session.execute(stmt)
+
+    averages: dict[uuid.UUID, dict[str, tuple[float | None, float | None]]] = {}
+    for row in result.mappings():
+        averages[row["user_id"]] = {
+            name: (_as_float(row[f"{name}__long"]), _as_float(row[f"{name}__recent"]))
+            for name in columns
+        }
+    return averages
+
+
+async def get_latest(
+    session: AsyncSession, user_id: uuid.UUID, on_or_before: date
+) -> DailyMetric | None:
+    stmt = (
+        select(DailyMetric)
+        .where(DailyMetric.user_id == user_id, DailyMetric.date <= on_or_before)
+        .order_by(DailyMetric.date.desc())
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_first_date(session: AsyncSession, user_id: uuid.UUID) -> date | None:
+    stmt = select(func.min(DailyMetric.date)).where(DailyMetric.user_id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def trailing_averages(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    columns: list[str],
+    windows: list[int],
+    to_date: date,
+) -> dict[str, dict[int, float | None]]:
+    """Average ``columns`` over several trailing windows ending ``to_date``.
+
+    Returns ``{column: {days: avg}}``; one query with an ``AVG ... FILTER``
+    per column and window.
+    """
+    aggregates = []
+    for name in columns:
+        value = cast(getattr(DailyMetric, name), Float)
+        for days in windows:
+            since = to_date - timedelta(days=days - 1)
+            aggregates.append(
+                func.avg(value).filter(DailyMetric.date >= since).label(f"{name}__{days}")
+            )
+
+    stmt = select(*aggregates).where(
+        DailyMetric.user_id == user_id,
+        DailyMetric.date >= to_date - timedelta(days=max(windows) - 1),
+        DailyMetric.date <= to_date,
+    )
+    row = (await session.execute(stmt)).mappings().one()
+    return {
+        name: {days: _as_float(row[f"{name}__{days}"]) for days in windows}
+        for name in columns
+    }
+
+
+def _as_float(value: object) -> float | None:
+    return float(value) if value is not None else None
+
+
+async def get_baseline(
+    session: AsyncSession, user_id: uuid.UUID, *, for_update: bool = False
+) -> UserBaseline | None:
+    stmt = select(UserBaseline).where(UserBaseline.user_id == user_id)
+    if for_update:
+        stmt = stmt.with_for_update()
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def save_baseline(
+    session: AsyncSession,
+    baseline: UserBaseline | None,
+    user_id: uuid.UUID,
+    through_date: date,
+    daily_values: dict[str, dict[str, float]],
+) -> UserBaseline:
+    if baseline is None:
+        baseline = UserBaseline(
+            user_id=user_id, through_date=through_date, daily_values=daily_values
+        )
+        session.add(baseline)
+    else:
+        baseline.through_date = through_date
+        baseline.daily_values = daily_values
+    await session.flush()
+    return baseline
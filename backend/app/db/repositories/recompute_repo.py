@@ -0,0 +1,55 @@
+"""Recompute repository — data-access helpers for recompute_ranges."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import greatest, least, upsert_insert
+from app.models.recompute import RecomputeRange
+
+
+async def mark(
+    session: AsyncSession, user_id: uuid.UUID, node: str, from_date: date, to_date: date
+) -> None:
+    """Add ``[from_date, to_date]`` to the user's pending range for ``node``."""
+    stmt = upsert_insert(session, RecomputeRange).values(
+        id=uuid.uuid4(), user_id=user_id, node=node, from_date=from_date, to_date=to_date
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "node"],
+        set_={
+            "from_date": least(session, RecomputeRange.from_date, stmt.excluded.from_date),
+            "to_date": greatest(session, RecomputeRange.to_date, stmt.excluded.to_date),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def claim(
+    session: AsyncSession, user_id: uuid.UUID, node: str
+) -> tuple[date, date] | None:
+    """Remove and return the user's pending range for ``node``, if any."""
+    stmt = (
+        delete(RecomputeRange)
+        .where(RecomputeRange.user_id == user_id, RecomputeRange.node == node)
+        .returning(RecomputeRange.from_date, RecomputeRange.to_date)
+    )
+    row = (await session.execute(stmt)).one_or_none()
+    return (row.from_date, row.to_date) if row else None
+
+
+async def list_pending_users(session: AsyncSession, *, limit: int) -> list[uuid.UUID]:
+    """Users with pending ranges, longest-waiting first."""
+    stmt = (
+        select(RecomputeRange.user_id)
+        .group_by(RecomputeRange.user_id)
+        .order_by(func.min(RecomputeRange.updated_at))
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
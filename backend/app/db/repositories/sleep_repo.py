@@ -0,0 +1,187 @@
+"""Sleep repository — data-access helpers for sleep sessions and the sleep ledger."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_metric import DailyMetric
+from app.models.sleep import SleepLedgerNight, SleepSession, SleepTimingSum
+
+
+async def list_night_context(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date
+) -> list:
+    """Per-day inputs for analyzing the nights after ``[from_date, to_date]``.
+
+    One row per stored metric day, oldest first: ``date``, ``strain_score``,
+    the main session's ``start_date`` / ``end_date`` and the ledger's
+    ``sleep_hours`` / ``need_hours`` (each ``None`` when absent).
+    """
+    stmt = (
+        select(
+            DailyMetric.date,
+            DailyMetric.strain_score,
+            SleepSession.start_date,
+            SleepSession.end_date,
+            SleepLedgerNight.sleep_hours,
+            SleepLedgerNight.need_hours,
+        )
+        .outerjoin(
+            SleepSession,
+            and_(SleepSession.daily_metric_id == DailyMetric.id, SleepSession.is_main_sleep),
+        )
+        .outerjoin(
+            SleepLedgerNight,
+            and_(
+                SleepLedgerNight.user_id == DailyMetric.user_id,
+                SleepLedgerNight.date == DailyMetric.date,
+            ),
+        )
+        .where(
+            DailyMetric.user_id == user_id,
+            DailyMetric.date >= from_date,
+            DailyMetric.date <= to_date,
+        )
+        .order_by(DailyMetric.date)
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def get_hypnogram(session: AsyncSession, user_id: uuid.UUID, session_id: uuid.UUID):
+    """``(start_date, hypnogram)`` of one of the user's sessions, or ``None``."""
+    stmt = select(SleepSession.start_date, SleepSession.hypnogram).where(
+        SleepSession.id == session_id, SleepSession.user_id == user_id
+    )
+    result = await session.execute(stmt)
+    return result.one_or_none()
+
+
+async def replace_sessions(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    daily_metric_ids: list[uuid.UUID],
+    sessions: list[dict],
+) -> None:
+    """Replace every session linked to ``daily_metric_ids`` with ``sessions``."""
+    if daily_metric_ids:
+        await session.execute(
+            delete(SleepSession).where(
+                SleepSession.user_id == user_id,
+                SleepSession.daily_metric_id.in_(daily_metric_ids),
+            )
+        )
+    if sessions:
+        await session.execute(
+            insert(SleepSession),
+            [{"id": uuid.uuid4(), "user_id": user_id, **s} for s in sessions],
+        )
+
+
+async def get_latest_night(
+    session: AsyncSession, user_id: uuid.UUID
+) -> SleepLedgerNight | None:
+    stmt = (
+        select(SleepLedgerNight)
+        .where(SleepLedgerNight.user_id == user_id)
+        .order_by(SleepLedgerNight.date.desc())
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def list_deficits(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date
+) -> dict[date, float]:
+    """Stored deficit per night in the range; nights without a row are absent."""
+    stmt = select(SleepLedgerNight.date, SleepLedgerNight.deficit_hours).where(
+        SleepLedgerNight.user_id == user_id,
+        SleepLedgerNight.date >= from_date,
+        SleepLedgerNight.date <= to_date,
+    )
+    result = await session.execute(stmt)
+    return {row.date: row.deficit_hours for row in result.all()}
+
+
+async def replace_nights(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+    nights: list[dict],
+) -> None:
+    """Replace the user's ledger rows in ``[from_date, to_date]`` with ``nights``."""
+    await session.execute(
+        delete(SleepLedgerNight).where(
+            SleepLedgerNight.user_id == user_id,
+            SleepLedgerNight.date >= from_date,
+            SleepLedgerNight.date <= to_date,
+        )
+    )
+    if nights:
+        await session.execute(
+            insert(SleepLedgerNight),
+            [{"id": uuid.uuid4(), "user_id": user_id, **night} for night in nights],
+        )
+
+
+TIMING_SUM_COLUMNS = ("nights", "bedtime_sin", "bedtime_cos", "wake_time_sin", "wake_time_cos")
+
+
+async def get_timing(
+    session: AsyncSession, user_id: uuid.UUID, on_date: date
+) -> SleepTimingSum | None:
+    stmt = select(SleepTimingSum).where(
+        SleepTimingSum.user_id == user_id, SleepTimingSum.date == on_date
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_timing_before(
+    session: AsyncSession, user_id: uuid.UUID, before: date
+) -> SleepTimingSum | None:
+    stmt = (
+        select(SleepTimingSum)
+        .where(SleepTimingSum.user_id == user_id, SleepTimingSum.date < before)
+        .order_by(SleepTimingSum.date.desc())
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def shift_timing_after(
+    session: AsyncSession, user_id: uuid.UUID, after: date, delta: dict[str, float]
+) -> None:
+    """Add ``delta`` to the running sums of every night after ``after``."""
+    await session.execute(
+        update(SleepTimingSum)
+        .where(SleepTimingSum.user_id == user_id, SleepTimingSum.date > after)
+        .values({name: getattr(SleepTimingSum, name) + value for name, value in delta.items()})
+    )
+
+
+async def timing_sums_at(
+    session: AsyncSession, user_ids: list[uuid.UUID], on_or_before: date
+) -> dict[uuid.UUID, dict[str, float]]:
+    """Each user's running sums as of ``on_or_before``; users with no nights are absent."""
+    latest = (
+        select(SleepTimingSum.user_id, func.max(SleepTimingSum.date).label("date"))
+        .where(SleepTimingSum.user_id.in_(user_ids), SleepTimingSum.date <= on_or_before)
+        .group_by(SleepTimingSum.user_id)
+        .subquery()
+    )
+    stmt = select(
+        SleepTimingSum.user_id, *(getattr(SleepTimingSum, c) for c in TIMING_SUM_COLUMNS)
+    ).join(
+        latest,
+        and_(SleepTimingSum.user_id == latest.c.user_id, SleepTimingSum.date == latest.c.date),
+    )
+    result = await session.execute(stmt)
+    return {row.user_id: {c: getattr(row, c) for c in TIMING_SUM_COLUMNS} for row in result}
@@ -3,20 +3,19 @@
 from __future__ import annotations
 
 import uuid
+from datetime import date, datetime, timezone
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, delete, exists, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.models.team import Team, TeamMember
+from app.db.dialect import upsert_insert
+from app.models.daily_metric import DailyMetric
+from app.models.team import Team, TeamDailyAggregate, TeamMember
+from app.models.user import User
 
 
 async def get_by_id(session: AsyncSession, team_id: uuid.UUID) -> Team | None:
-    stmt = (
-        select(Team)
-        .options(selectinload(Team.members))
-        .where(Team.id == team_id)
-    )
+    stmt = select(Team).where(Team.id == team_id)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
@@ -40,7 +39,12 @@ async def add_member(
     user_id: uuid.UUID,
     role: str = "member",
 ) -> TeamMember:
-    member = TeamMember(team_id=team_id, user_id=user_id, role=role)
+    member = TeamMember(
+        team_id=team_id,
+        user_id=user_id,
+        role=role,
+        joined_at=datetime.now(timezone.utc),
+    )
     session.add(member)
     await session.flush()
     return member
@@ -67,7 +71,227 @@ async def list_user_teams(
         select(Team)
         .join(TeamMember)
         .where(TeamMember.user_id == user_id)
-        .options(selectinload(Team.members))
+        .order_by(Team.created_at)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def is_member(
+    session: AsyncSession, team_id: uuid.UUID, user_id: uuid.UUID
+) -> bool:
+    stmt = select(
+        exists().where(TeamMember.team_id == team_id, TeamMember.user_id == user_id)
+    )
+    result = await session.execute(stmt)
+    return bool(result.scalar())
+
+
+async def get_member_role(
+    session: AsyncSession, team_id: uuid.UUID, user_id: uuid.UUID
+) -> str | None:
+    stmt = select(TeamMember.role).where(
+        TeamMember.team_id == team_id, TeamMember.user_id == user_id
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_display_names(
+    session: AsyncSession, user_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, str | None]:
+    if not user_ids:
+        return {}
+    stmt = select(User.id, User.display_name).where(User.id.in_(user_ids))
+    result = await session.execute(stmt)
+    return {row.id: row.display_name for row in result}
+
+
+async def get_member_counts(
+    session: AsyncSession, team_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, int]:
+    """Member count per team, computed with one GROUP BY."""
+    if not team_ids:
+        return {}
+    stmt = (
+        select(TeamMember.team_id, func.count())
+        .where(TeamMember.team_id.in_(team_ids))
+        .group_by(TeamMember.team_id)
+    )
+    result = await session.execute(stmt)
+    return {team_id: count for team_id, count in result.all()}
+
+
+async def list_members(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    *,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> tuple[list, bool]:
+    """One page of members in join order, with display names.
+
+    Keyset pagination on ``(joined_at, id)``. Rows carry ``id``,
+    ``user_id``, ``display_name``, ``role`` and ``joined_at``; the bool says
+    whether later members remain.
+    """
+    stmt = (
+        select(
+            TeamMember.id,
+            TeamMember.user_id,
+            User.display_name,
+            TeamMember.role,
+            TeamMember.joined_at,
+        )
+        .join(User, User.id == TeamMember.user_id)
+        .where(TeamMember.team_id == team_id)
+        .order_by(TeamMember.joined_at, TeamMember.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        joined_at, member_id = after
+        stmt = stmt.where(
+            or_(
+                TeamMember.joined_at > joined_at,
+                and_(TeamMember.joined_at == joined_at, TeamMember.id > member_id),
+            )
+        )
+    result = await session.execute(stmt)
+    rows = list(result.all())
+    return rows[:limit], len(rows) > limit
+
+
+async def list_team_ids_for_user(
+    session: AsyncSession, user_id: uuid.UUID
+) -> list[uuid.UUID]:
+    stmt = select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def leaderboard_rows(
+    session: AsyncSession, team_id: uuid.UUID, on_date: date
+) -> list:
+    """Every member with display name and the day's scores, in one JOIN.
+
+    Rows carry ``user_id``, ``display_name``, ``recovery_score`` and
+    ``strain_score`` (None when the member has no metrics for the day).
+    """
+    stmt = (
+        select(
+            TeamMember.user_id,
+            User.display_name,
+            DailyMetric.recovery_score,
+            DailyMetric.strain_score,
+        )
+        .join(User, User.id == TeamMember.user_id)
+        .outerjoin(
+            DailyMetric,
+            and_(DailyMetric.user_id == TeamMember.user_id, DailyMetric.date == on_date),
+        )
+        .where(TeamMember.team_id == team_id)
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def member_metric_values(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    columns: list[str],
+    from_date: date,
+    to_date: date,
+) -> list:
+    """``(date, *columns)`` rows for every member's metrics in the range."""
+    stmt = (
+        select(DailyMetric.date, *(getattr(DailyMetric, c) for c in columns))
+        .join(TeamMember, TeamMember.user_id == DailyMetric.user_id)
+        .where(
+            TeamMember.team_id == team_id,
+            DailyMetric.date >= from_date,
+            DailyMetric.date <= to_date,
+        )
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def replace_daily_aggregates(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+    rows: list[dict],
+) -> None:
+    """Upsert ``rows`` and drop the team's other aggregates in the range."""
+    if rows:
+        stmt = upsert_insert(session, TeamDailyAggregate).values(
+            [{"id": uuid.uuid4(), "team_id": team_id, **row} for row in rows]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["team_id", "date", "metric"],
+            set_={
+                **{
+                    field: getattr(stmt.excluded, field)
+                    for field in ("n", "sum", "sum_sq", "p25", "p50", "p75")
+                },
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
+
+    stale = delete(TeamDailyAggregate).where(
+        TeamDailyAggregate.team_id == team_id,
+        TeamDailyAggregate.date >= from_date,
+        TeamDailyAggregate.date <= to_date,
+    )
+    if rows:
+        stale = stale.where(
+            tuple_(TeamDailyAggregate.date, TeamDailyAggregate.metric).not_in(
+                [(row["date"], row["metric"]) for row in rows]
+            )
+        )
+    await session.execute(stale)
+
+
+async def add_daily_aggregate_deltas(
+    session: AsyncSession, team_id: uuid.UUID, day: date, deltas: dict[str, dict]
+) -> None:
+    """Apply ``{metric: {"n", "sum", "sum_sq", "p25", "p50", "p75"}}`` to the team's ``day``.
+
+    Count and sums are deltas added to the stored row; quartiles replace it.
+    """
+    stmt = upsert_insert(session, TeamDailyAggregate).values(
+        [
+            {"id": uuid.uuid4(), "team_id": team_id, "date": day, "metric": metric, **delta}
+            for metric, delta in deltas.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["team_id", "date", "metric"],
+        set_={
+            **{
+                field: getattr(TeamDailyAggregate, field) + getattr(stmt.excluded, field)
+                for field in ("n", "sum", "sum_sq")
+            },
+            **{field: getattr(stmt.excluded, field) for field in ("p25", "p50", "p75")},
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def list_daily_aggregates(
+    session: AsyncSession, team_id: uuid.UUID, from_date: date, to_date: date
+) -> list[TeamDailyAggregate]:
+    stmt = (
+        select(TeamDailyAggregate)
+        .where(
+            TeamDailyAggregate.team_id == team_id,
+            TeamDailyAggregate.date >= from_date,
+            TeamDailyAggregate.date <= to_date,
+        )
+        .order_by(TeamDailyAggregate.date)
     )
     result = await session.execute(stmt)
     return list(result.scalars().all())
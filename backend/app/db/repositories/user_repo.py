@@ -32,4 +32,6 @@ async def update(session: AsyncSession, user: User, **kwargs) -> User:
         if value is not None:
             setattr(user, key, value)
     await session.flush()
+    # updated_at is regenerated server-side; load it now rather than lazily.
+    await session.refresh(user, ["updated_at"])
     return user
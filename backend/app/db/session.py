@@ -42,6 +42,13 @@ async def dispose_engine() -> None:
         logger.info("Database engine disposed")
 
 
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Return the session factory for work outside a request (jobs, workers)."""
+    if _session_factory is None:
+        raise RuntimeError("Database not initialised — call init_engine() first")
+    return _session_factory
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency that yields an async session."""
     if _session_factory is None:
@@ -36,8 +36,15 @@ def compute_baseline(
     values: list[float],
     window_days: int = 28,
     minimum_samples: int = 3,
+    prior: BaselineResult | None = None,
 ) -> BaselineResult | None:
-    if not values:
+    """Baseline from recent values.
+
+    With fewer than ``minimum_samples`` values, a ``prior`` (e.g. the
+    user's cohort) stands in: its ``sample_count`` is the pseudo-count the
+    prior mean is weighted by against the user's own values.
+    """
+    if not values and prior is None:
         return None
 
     recent = values[-window_days:]
@@ -59,6 +66,15 @@ def compute_baseline(
             window_days=len(fallback),
         )
 
+    if prior is not None:
+        weight = prior.sample_count
+        return BaselineResult(
+            mean=(sum(values) + prior.mean * weight) / (len(values) + weight),
+            standard_deviation=max(prior.standard_deviation, 0.001),
+            sample_count=len(values) + weight,
+            window_days=window_days,
+        )
+
     return None
 
 
@@ -0,0 +1,298 @@
+"""Daily scoring pipeline — one user-day through every engine in dependency order.
+
+For each day the pipeline builds the recovery baselines once from the
+history, then runs
+
+1. sleep analysis of the night ending that morning (``SleepEngine.analyze``,
+   using the previous day's strain and the trailing week's sleep debt),
+2. recovery, with that night's sleep performance as an input,
+3. the strain target for the recovery zone, and
+4. the sleep need for the coming night, from the day's strain (or the
+   middle of its target when the day is not over) and the debt carried
+   out of the night just scored.
+
+History holds one slot per calendar day, oldest first and ending the day
+before the one scored, with None for days without a value, so every
+window spans calendar days however sparse the data. ``run_batch`` scores
+a run of days, moving each day (and an empty slot for each day skipped)
+into the history so the next day sees it without re-reading anything.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, date, tzinfo
+
+from app.engines.baseline_engine import BaselineResult, compute_baseline
+from app.engines.config import ScoringConfig
+from app.engines.recovery_engine import (
+    RecoveryBaselines,
+    RecoveryEngine,
+    RecoveryInput,
+    RecoveryResult,
+)
+from app.engines.sleep_engine import (
+    SleepAnalysisResult,
+    SleepConsistencyInput,
+    SleepEngine,
+    SleepSessionData,
+    minutes_since_midnight,
+)
+from app.engines.sleep_ledger import DEBT_WINDOW_NIGHTS
+
+_VITALS = ("hrv", "resting_heart_rate", "respiratory_rate", "spo2", "sleep_performance")
+
+
+@dataclass
+class DayBundle:
+    """Everything recorded for one user-day."""
+
+    date: date
+    sleep_sessions: list[SleepSessionData] = field(default_factory=list)
+    hrv: float | None = None
+    resting_heart_rate: float | None = None
+    respiratory_rate: float | None = None
+    spo2: float | None = None
+    skin_temperature_deviation: float | None = None
+    strain: float | None = None  # the day's own strain, once known
+    # The night as already recorded, used when there are no sessions.
+    sleep_performance: float | None = None
+    sleep_hours: float | None = None
+    sleep_need_hours: float | None = None
+    bedtime_minutes: float | None = None
+    wake_time_minutes: float | None = None
+
+
+@dataclass
+class DailyHistory:
+    """Trailing daily values before the first day scored.
+
+    Each list holds one slot per calendar day, oldest first, ending the day
+    before; None marks a day without that value. Skin temperature has no
+    stored baseline, so its deviation is scored without one.
+    """
+
+    hrv: list[float | None] = field(default_factory=list)
+    resting_heart_rate: list[float | None] = field(default_factory=list)
+    respiratory_rate: list[float | None] = field(default_factory=list)
+    spo2: list[float | None] = field(default_factory=list)
+    sleep_performance: list[float | None] = field(default_factory=list)
+    sleep_hours: list[float | None] = field(default_factory=list)
+    sleep_needs: list[float | None] = field(default_factory=list)
+    bedtime_minutes: list[float | None] = field(default_factory=list)
+    wake_time_minutes: list[float | None] = field(default_factory=list)
+    previous_strain: float | None = None  # the day before's strain
+    baseline_sleep_hours: float | None = None
+
+
+@dataclass
+class DailyScoringResult:
+    date: date
+    baselines: RecoveryBaselines
+    sleep: SleepAnalysisResult | None
+    recovery: RecoveryResult
+    strain_target: tuple[float, float]
+    next_sleep_need_hours: float
+    sleep_debt_hours: float
+
+
+def _present(values: list[float | None], slots: int) -> list[float]:
+    return [v for v in values[-slots:] if v is not None]
+
+
+def _pairs(
+    first: list[float | None], second: list[float | None], slots: int
+) -> list[tuple[float, float]]:
+    """Days among the last ``slots`` with both values, aligned on the latest day."""
+    n = min(len(first), len(second), slots)
+    return [
+        (a, b)
+        for a, b in zip(first[len(first) - n :], second[len(second) - n :])
+        if a is not None and b is not None
+    ]
+
+
+class DailyScoringPipeline:
+    def __init__(
+        self,
+        config: ScoringConfig,
+        priors: dict[str, BaselineResult] | None = None,
+        window_days: int = 28,
+        tz: tzinfo = UTC,
+    ) -> None:
+        self._config = config
+        self._sleep = SleepEngine(config.sleep)
+        self._recovery = RecoveryEngine(config.recovery)
+        self._priors = priors or {}
+        self._window_days = window_days
+        self._tz = tz
+
+    @property
+    def history_days(self) -> int:
+        """Baselines read the ``window_days`` ending the scored day, less the day itself."""
+        return self._window_days - 1
+
+    def baselines(self, history: DailyHistory) -> RecoveryBaselines:
+        priors = self._priors
+        window = self._window_days
+
+        def baseline(name: str, prior: str) -> BaselineResult | None:
+            values = _present(getattr(history, name), self.history_days)
+            return compute_baseline(values, window, prior=priors.get(prior))
+
+        return RecoveryBaselines(
+            hrv=baseline("hrv", "hrv_rmssd"),
+            resting_heart_rate=baseline("resting_heart_rate", "resting_heart_rate"),
+            sleep_performance=baseline("sleep_performance", "sleep_performance"),
+            respiratory_rate=baseline("respiratory_rate", "respiratory_rate"),
+            spo2=baseline("spo2", "spo2"),
+        )
+
+    def run(self, day: DayBundle, history: DailyHistory) -> DailyScoringResult:
+        baselines = self.baselines(history)
+        baseline_sleep_hours = (
+            history.baseline_sleep_hours or self._config.sleep.defaults.baselineHours
+        )
+        week = _pairs(history.sleep_hours, history.sleep_needs, DEBT_WINDOW_NIGHTS)
+
+        sleep = None
+        sleep_performance = day.sleep_performance
+        night = (day.sleep_hours, day.sleep_need_hours)
+        if day.sleep_sessions:
+            recent = _pairs(
+                history.bedtime_minutes,
+                history.wake_time_minutes,
+                self._config.sleep.consistencyWindowNights,
+            )
+            sleep = self._sleep.analyze(
+                day.sleep_sessions,
+                baseline_sleep_hours,
+                history.previous_strain or 0.0,
+                [hours for hours, _ in week],
+                [need for _, need in week],
+                SleepConsistencyInput(
+                    recent_bedtime_minutes=[bedtime for bedtime, _ in recent],
+                    recent_wake_time_minutes=[wake for _, wake in recent],
+                ),
+                tz=self._tz,
+            )
+            sleep_performance = sleep.sleep_performance
+            night = (sleep.total_sleep_hours, sleep.sleep_need_hours)
+
+        recovery = self._recovery.compute_recovery(
+            RecoveryInput(
+                hrv=day.hrv,
+                resting_heart_rate=day.resting_heart_rate,
+                sleep_performance=sleep_performance,
+                respiratory_rate=day.respiratory_rate,
+                spo2=day.spo2,
+                skin_temperature_deviation=day.skin_temperature_deviation,
+            ),
+            baselines,
+        )
+        strain_target = self._recovery.strain_target(recovery.zone)
+
+        # Debt carried into tonight includes the night just scored.
+        tonight = _pairs(
+            [*history.sleep_hours, night[0]],
+            [*history.sleep_needs, night[1]],
+            DEBT_WINDOW_NIGHTS,
+        )
+        debt = self._sleep.compute_sleep_debt(
+            [hours for hours, _ in tonight], [need for _, need in tonight]
+        )
+        expected_strain = day.strain if day.strain is not None else sum(strain_target) / 2.0
+        next_need = self._sleep.compute_sleep_need(
+            baseline_sleep_hours, expected_strain, debt, 0.0
+        )
+
+        return DailyScoringResult(
+            date=day.date,
+            baselines=baselines,
+            sleep=sleep,
+            recovery=recovery,
+            strain_target=strain_target,
+            next_sleep_need_hours=next_need,
+            sleep_debt_hours=debt,
+        )
+
+    def run_batch(
+        self, days: list[DayBundle], history: DailyHistory
+    ) -> list[DailyScoringResult]:
+        """Score ``days`` in date order, carrying each day into the next one's history.
+
+        ``history`` ends the day before the first day; days missing between
+        bundles leave empty slots.
+        """
+        state = _RollingHistory(
+            history, self.history_days, self._config.sleep.consistencyWindowNights, self._tz
+        )
+        results = []
+        previous: date | None = None
+        for day in sorted(days, key=lambda d: d.date):
+            if previous is not None:
+                state.skip((day.date - previous).days - 1)
+            result = self.run(day, state.view())
+            state.append(day, result)
+            results.append(result)
+            previous = day.date
+        return results
+
+
+class _RollingHistory:
+    """Bounded per-day history windows updated in place between batch days."""
+
+    def __init__(
+        self, history: DailyHistory, history_days: int, consistency_nights: int, tz: tzinfo
+    ) -> None:
+        sizes = {
+            **dict.fromkeys(_VITALS, history_days),
+            "sleep_hours": DEBT_WINDOW_NIGHTS,
+            "sleep_needs": DEBT_WINDOW_NIGHTS,
+            "bedtime_minutes": consistency_nights,
+            "wake_time_minutes": consistency_nights,
+        }
+        self._windows: dict[str, deque[float | None]] = {
+            name: deque(getattr(history, name)[-size:], maxlen=size)
+            for name, size in sizes.items()
+        }
+        self._previous_strain = history.previous_strain
+        self._baseline_sleep_hours = history.baseline_sleep_hours
+        self._tz = tz
+
+    def view(self) -> DailyHistory:
+        return DailyHistory(
+            **{name: list(values) for name, values in self._windows.items()},
+            previous_strain=self._previous_strain,
+            baseline_sleep_hours=self._baseline_sleep_hours,
+        )
+
+    def skip(self, days: int) -> None:
+        """Empty slots for ``days`` days with nothing to score."""
+        if days <= 0:
+            return
+        for values in self._windows.values():
+            values.extend([None] * min(days, values.maxlen or days))
+        self._previous_strain = None
+
+    def append(self, day: DayBundle, result: DailyScoringResult) -> None:
+        sleep = result.sleep
+        values = {
+            "hrv": day.hrv,
+            "resting_heart_rate": day.resting_heart_rate,
+            "respiratory_rate": day.respiratory_rate,
+            "spo2": day.spo2,
+            "sleep_performance": sleep.sleep_performance if sleep else day.sleep_performance,
+            "sleep_hours": sleep.total_sleep_hours if sleep else day.sleep_hours,
+            "sleep_needs": sleep.sleep_need_hours if sleep else day.sleep_need_hours,
+            "bedtime_minutes": day.bedtime_minutes,
+            "wake_time_minutes": day.wake_time_minutes,
+        }
+        main = sleep.main_sleep if sleep else None
+        if main is not None:
+            values["bedtime_minutes"] = minutes_since_midnight(main.start_date_millis, self._tz)
+            values["wake_time_minutes"] = minutes_since_midnight(main.end_date_millis, self._tz)
+        for name, value in values.items():
+            self._windows[name].append(value)
+        self._previous_strain = day.strain
@@ -0,0 +1,117 @@
+"""Hypnogram encoding — run-length encoded sleep stage timelines.
+
+A night's stage samples are laid on a grid of ``EPOCH_SECONDS`` epochs
+starting at the session start, one stage code per epoch (sleep stages
+win over the in-bed sample they sit in; uncovered epochs are
+``unknown``), and stored as runs of ``(code, epochs)``: one byte of code
+and a big-endian ``uint16`` count, longer runs split. A typical night is
+a few hundred bytes.
+
+``resample`` coarsens runs to a multiple of the epoch by giving each
+output epoch the stage that covers most of it, walking the runs rather
+than expanding them, and merges the equal neighbours that produces.
+"""
+
+from __future__ import annotations
+
+import struct
+
+from app.engines.sleep_engine import SleepStageData
+
+EPOCH_SECONDS = 30
+STAGES = ("unknown", "awake", "light", "deep", "rem", "inBed")
+_CODES = {stage: code for code, stage in enumerate(STAGES)}
+# Ties in ``resample`` go to sleep stages, deepest first, so short deep / REM runs survive.
+_TIE_RANK = {
+    _CODES[stage]: rank
+    for rank, stage in enumerate(("unknown", "inBed", "awake", "light", "rem", "deep"))
+}
+_RUN = struct.Struct(">BH")
+_MAX_RUN = 0xFFFF
+
+
+def stage_code(stage_type: str) -> int:
+    """Code for a stage type; unrecognized asleep types count as light, as in ``SleepEngine``."""
+    return _CODES.get(stage_type, _CODES["light"])
+
+
+def encode(stages: list[SleepStageData], start_millis: int, end_millis: int) -> bytes:
+    """Run-length encode ``stages`` over ``[start_millis, end_millis)``."""
+    epoch_millis = EPOCH_SECONDS * 1000
+    epochs = [0] * max(0, round((end_millis - start_millis) / epoch_millis))
+    # In-bed first so the sleep stages inside it overwrite it.
+    for stage in sorted(stages, key=lambda s: s.type != "inBed"):
+        first = max(0, round((stage.start_date_millis - start_millis) / epoch_millis))
+        last = min(len(epochs), round((stage.end_date_millis - start_millis) / epoch_millis))
+        code = stage_code(stage.type)
+        for i in range(first, last):
+            epochs[i] = code
+
+    runs: list[tuple[int, int]] = []
+    for code in epochs:
+        if runs and runs[-1][0] == code:
+            runs[-1] = (code, runs[-1][1] + 1)
+        else:
+            runs.append((code, 1))
+    return to_bytes(runs)
+
+
+def to_bytes(runs: list[tuple[int, int]]) -> bytes:
+    out = bytearray()
+    for code, length in runs:
+        while length > 0:
+            chunk = min(length, _MAX_RUN)
+            out += _RUN.pack(code, chunk)
+            length -= chunk
+    return bytes(out)
+
+
+def decode(blob: bytes) -> list[tuple[int, int]]:
+    """``(code, epochs)`` runs, with split runs joined back together."""
+    runs: list[tuple[int, int]] = []
+    for code, length in _RUN.iter_unpack(blob):
+        if runs and runs[-1][0] == code:
+            runs[-1] = (code, runs[-1][1] + length)
+        else:
+            runs.append((code, length))
+    return runs
+
+
+def resample(runs: list[tuple[int, int]], factor: int) -> list[tuple[int, int]]:
+    """Runs at ``factor`` epochs per output epoch; a trailing partial epoch is kept."""
+    if factor <= 1:
+        return list(runs)
+
+    out: list[tuple[int, int]] = []
+
+    def emit(code: int, count: int) -> None:
+        if out and out[-1][0] == code:
+            out[-1] = (code, out[-1][1] + count)
+        elif count:
+            out.append((code, count))
+
+    bucket: dict[int, int] = {}
+    filled = 0
+    for code, length in runs:
+        while length > 0:
+            if filled == 0 and length >= factor:
+                # Whole output epochs of a single stage.
+                whole = length // factor
+                emit(code, whole)
+                length -= whole * factor
+                continue
+            take = min(length, factor - filled)
+            bucket[code] = bucket.get(code, 0) + take
+            filled += take
+            length -= take
+            if filled == factor:
+                emit(_dominant(bucket), 1)
+                bucket.clear()
+                filled = 0
+    if filled:
+        emit(_dominant(bucket), 1)
+    return out
+
+
+def _dominant(bucket: dict[int, int]) -> int:
+    return max(bucket.items(), key=lambda item: (item[1], _TIE_RANK[item[0]]))[0]
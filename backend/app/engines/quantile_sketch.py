@@ -0,0 +1,181 @@
+"""Quantile sketch engine — a mergeable t-digest for cohort distributions.
+
+A digest summarises any number of values in at most a few hundred
+centroids (``compression`` bounds the size), keeps tail quantiles tight,
+and merges with other digests without revisiting the raw data. Count, sum
+and sum of squares are tracked exactly alongside.
+"""
+
+from __future__ import annotations
+
+import math
+
+BUFFER_FACTOR = 5
+
+
+class TDigest:
+    def __init__(self, compression: float = 100.0) -> None:
+        self.compression = compression
+        self.count = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: list[float] = []
+        self._weights: list[float] = []
+        self._buffer: list[tuple[float, float]] = []
+
+    # -- building -------------------------------------------------------
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.total += value * weight
+        self.total_sq += value * value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= BUFFER_FACTOR * self.compression:
+            self._flush()
+
+    def update(self, values: list[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: TDigest) -> None:
+        other._flush()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._flush()
+
+    def _k(self, q: float) -> float:
+        q = min(max(q, 0.0), 1.0)
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted([*zip(self._means, self._weights), *self._buffer])
+        self._buffer = []
+        total_weight = sum(w for _, w in points)
+
+        means: list[float] = []
+        weights: list[float] = []
+        cur_mean, cur_weight = points[0]
+        weight_before = 0.0
+        k_limit = self._k(0.0) + 1
+        for mean, weight in points[1:]:
+            if self._k((weight_before + cur_weight + weight) / total_weight) <= k_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                weight_before += cur_weight
+                k_limit = self._k(weight_before / total_weight) + 1
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self._means, self._weights = means, weights
+
+    # -- queries --------------------------------------------------------
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    @property
+    def standard_deviation(self) -> float | None:
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return math.sqrt(max(self.total_sq / self.count - mean * mean, 0.0))
+
+    def quantile(self, q: float) -> float | None:
+        """Value below which a fraction ``q`` of the weight lies."""
+        self._flush()
+        if not self._means:
+            return None
+        if len(self._means) == 1 or q <= 0:
+            return self.min if q <= 0 else self._means[0]
+        if q >= 1:
+            return self.max
+
+        means, weights = self._means, self._weights
+        target = q * self.count
+        if target < weights[0] / 2:
+            return self.min + (means[0] - self.min) * target / (weights[0] / 2)
+        if target > self.count - weights[-1] / 2:
+            tail = (target - (self.count - weights[-1] / 2)) / (weights[-1] / 2)
+            return means[-1] + (self.max - means[-1]) * tail
+
+        cumulative = 0.0
+        for i in range(len(means) - 1):
+            center = cumulative + weights[i] / 2
+            next_center = cumulative + weights[i] + weights[i + 1] / 2
+            if target <= next_center:
+                t = (target - center) / (next_center - center)
+                return means[i] + t * (means[i + 1] - means[i])
+            cumulative += weights[i]
+        return means[-1]
+
+    def cdf(self, value: float) -> float | None:
+        """Fraction of the weight at or below ``value`` (its percentile rank / 100)."""
+        self._flush()
+        if not self._means:
+            return None
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+        means, weights = self._means, self._weights
+        if len(means) == 1:
+            return (value - self.min) / (self.max - self.min) if self.max > self.min else 0.5
+
+        if value < means[0]:
+            span = means[0] - self.min
+            return (weights[0] / 2) * ((value - self.min) / span if span else 1.0) / self.count
+        if value >= means[-1]:
+            span = self.max - means[-1]
+            tail = (value - means[-1]) / span if span else 0.0
+            return (self.count - weights[-1] / 2 + weights[-1] / 2 * tail) / self.count
+
+        cumulative = 0.0
+        for i in range(len(means) - 1):
+            if value < means[i + 1]:
+                center = cumulative + weights[i] / 2
+                next_center = cumulative + weights[i] + weights[i + 1] / 2
+                span = means[i + 1] - means[i]
+                t = (value - means[i]) / span if span else 0.0
+                return (center + t * (next_center - center)) / self.count
+            cumulative += weights[i]
+        return 1.0
+
+    # -- serialisation --------------------------------------------------
+
+    def to_dict(self) -> dict:
+        self._flush()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "sum": self.total,
+            "sum_sq": self.total_sq,
+            "min": self.min if self._means else None,
+            "max": self.max if self._means else None,
+            "centroids": [[m, w] for m, w in zip(self._means, self._weights)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> TDigest:
+        digest = cls(data.get("compression", 100.0))
+        digest.count = data["count"]
+        digest.total = data["sum"]
+        digest.total_sq = data["sum_sq"]
+        digest.min = data["min"] if data["min"] is not None else math.inf
+        digest.max = data["max"] if data["max"] is not None else -math.inf
+        digest._means = [m for m, _ in data["centroids"]]
+        digest._weights = [w for _, w in data["centroids"]]
+        return digest
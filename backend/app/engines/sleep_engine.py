@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass, field
-from datetime import UTC, datetime
+from datetime import UTC, datetime, tzinfo
 
 from app.engines.config import SleepConfig
 
@@ -56,6 +56,9 @@ class SleepAnalysisResult:
     rem_sleep_pct: float
 
 
+_MINUTES_PER_DAY = 24 * 60.0
+
+
 def _clamp(value: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, value))
 
@@ -68,15 +71,54 @@ def _std_dev(values: list[float]) -> float:
     return math.sqrt(variance)
 
 
-def _minutes_since_midnight(epoch_millis: int) -> float:
-    dt = datetime.fromtimestamp(epoch_millis / 1000.0, tz=UTC)
+def minutes_since_midnight(epoch_millis: int, tz: tzinfo = UTC) -> float:
+    dt = datetime.fromtimestamp(epoch_millis / 1000.0, tz=tz)
     return dt.hour * 60.0 + dt.minute + dt.second / 60.0
 
 
+def clock_vector(minutes: float) -> tuple[float, float]:
+    """``(sin, cos)`` of a time of day on the 24-hour circle."""
+    angle = 2 * math.pi * minutes / _MINUTES_PER_DAY
+    return math.sin(angle), math.cos(angle)
+
+
+def circular_std_minutes(count: int, sin_sum: float, cos_sum: float) -> float:
+    """Circular standard deviation, in minutes, of ``count`` times of day from their sums."""
+    resultant = math.hypot(sin_sum, cos_sum) / count
+    if resultant <= 0.0:
+        return math.inf
+    std_radians = math.sqrt(-2.0 * math.log(min(resultant, 1.0)))
+    return std_radians * _MINUTES_PER_DAY / (2 * math.pi)
+
+
 class SleepEngine:
     def __init__(self, config: SleepConfig) -> None:
         self._config = config
 
+    def build_sessions(self, stages: list[SleepStageData]) -> list[SleepSessionData]:
+        """Stitch stage samples into sessions — mirrors ``parseSleepSamples`` on iOS.
+
+        Samples less than ``gapToleranceMinutes`` apart belong to one session;
+        sessions with less than ``minimumDurationMinutes`` asleep are dropped.
+        """
+        if not stages:
+            return []
+
+        gap_tolerance_millis = self._config.sessionDetection.gapToleranceMinutes * 60_000
+        ordered = sorted(stages, key=lambda s: s.start_date_millis)
+        groups = [[ordered[0]]]
+        group_end = ordered[0].end_date_millis
+        for stage in ordered[1:]:
+            if stage.start_date_millis - group_end < gap_tolerance_millis:
+                groups[-1].append(stage)
+                group_end = max(group_end, stage.end_date_millis)
+            else:
+                groups.append([stage])
+                group_end = stage.end_date_millis
+
+        sessions = (self._build_session(group) for group in groups)
+        return [s for s in sessions if s is not None]
+
     def classify_sessions(
         self, sessions: list[SleepSessionData]
     ) -> tuple[SleepSessionData | None, list[SleepSessionData]]:
@@ -143,13 +185,33 @@ class SleepEngine:
         all_bedtimes = recent_bedtime_minutes + [current_bedtime_minutes]
         all_wake_times = recent_wake_time_minutes + [current_wake_time_minutes]
 
-        bedtime_std = _std_dev(all_bedtimes)
-        wake_time_std = _std_dev(all_wake_times)
-        avg_std = (bedtime_std + wake_time_std) / 2.0
+        return self.consistency_from_std(_std_dev(all_bedtimes), _std_dev(all_wake_times))
 
+    def consistency_from_std(self, bedtime_std: float, wake_time_std: float) -> float:
+        avg_std = (bedtime_std + wake_time_std) / 2.0
         score = 100.0 * math.exp(-avg_std / self._config.consistencyDecayTau)
         return _clamp(score, 0.0, 100.0)
 
+    def window_consistency(
+        self,
+        nights: int,
+        bedtime_sin: float,
+        bedtime_cos: float,
+        wake_time_sin: float,
+        wake_time_cos: float,
+    ) -> float | None:
+        """Consistency over a window from its circular sums (see ``clock_vector``).
+
+        Circular spread is unaffected by bedtimes either side of midnight.
+        None below two nights.
+        """
+        if nights < 2:
+            return None
+        return self.consistency_from_std(
+            circular_std_minutes(nights, bedtime_sin, bedtime_cos),
+            circular_std_minutes(nights, wake_time_sin, wake_time_cos),
+        )
+
     def compute_restorative_sleep_pct(self, session: SleepSessionData) -> float:
         if session.total_sleep_minutes <= 0:
             return 0.0
@@ -191,6 +253,7 @@ class SleepEngine:
         past_week_sleep_hours: list[float],
         past_week_sleep_needs: list[float],
         consistency_input: SleepConsistencyInput | None = None,
+        tz: tzinfo = UTC,
     ) -> SleepAnalysisResult:
         if consistency_input is None:
             consistency_input = SleepConsistencyInput()
@@ -222,8 +285,8 @@ class SleepEngine:
         )
 
         if main is not None:
-            bedtime_min = _minutes_since_midnight(main.start_date_millis)
-            wake_min = _minutes_since_midnight(main.end_date_millis)
+            bedtime_min = minutes_since_midnight(main.start_date_millis, tz)
+            wake_min = minutes_since_midnight(main.end_date_millis, tz)
             consistency = self.compute_sleep_consistency(
                 bedtime_min,
                 wake_min,
@@ -252,3 +315,47 @@ class SleepEngine:
             deep_sleep_pct=deep_pct,
             rem_sleep_pct=rem_pct,
         )
+
+    def _build_session(self, stages: list[SleepStageData]) -> SleepSessionData | None:
+        start = stages[0].start_date_millis
+        end = max(s.end_date_millis for s in stages)
+        time_in_bed = (end - start) / 60_000.0
+
+        minutes = {"light": 0.0, "deep": 0.0, "rem": 0.0, "awake": 0.0}
+        awakenings = 0
+        first_sleep = None
+        for stage in stages:
+            if stage.type == "inBed":
+                continue
+            kind = stage.type if stage.type in minutes else "light"
+            minutes[kind] += stage.duration_minutes
+            if kind == "awake":
+                awakenings += 1
+            elif first_sleep is None:
+                first_sleep = stage.start_date_millis
+
+        total_sleep = minutes["light"] + minutes["deep"] + minutes["rem"]
+        if total_sleep < self._config.sessionDetection.minimumDurationMinutes:
+            return None
+
+        in_bed = next((s for s in stages if s.type == "inBed"), None)
+        onset_latency = (
+            (first_sleep - in_bed.start_date_millis) / 60_000.0
+            if in_bed is not None and first_sleep is not None
+            else None
+        )
+
+        return SleepSessionData(
+            start_date_millis=start,
+            end_date_millis=end,
+            total_sleep_minutes=total_sleep,
+            time_in_bed_minutes=time_in_bed,
+            light_minutes=minutes["light"],
+            deep_minutes=minutes["deep"],
+            rem_minutes=minutes["rem"],
+            awake_minutes=minutes["awake"],
+            awakenings=awakenings,
+            sleep_onset_latency_minutes=onset_latency,
+            sleep_efficiency=(total_sleep / time_in_bed) * 100 if time_in_bed > 0 else 0.0,
+            stages=list(stages),
+        )
@@ -0,0 +1,74 @@
+"""Sleep ledger engine — night-by-night sleep need and debt in constant time.
+
+``SleepEngine.analyze`` derives a night's debt from lists of the past
+week's hours and needs, and each need depends on the debt before it, so
+scoring a long history that way re-assembles a week of state per night.
+The ledger keeps the last seven nights' deficits (need minus sleep, never
+negative) and their running sum instead: each ``record`` computes the
+night's need from the carried debt, then pushes its deficit and drops
+the one leaving the window. Results match ``SleepEngine`` night for
+night.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from app.engines.config import SleepConfig
+from app.engines.sleep_engine import SleepEngine
+
+DEBT_WINDOW_NIGHTS = 7
+
+
+@dataclass
+class LedgerNight:
+    sleep_hours: float | None
+    need_hours: float
+    deficit_hours: float
+    debt_hours: float  # over the window ending with this night
+
+
+class SleepLedger:
+    def __init__(
+        self,
+        config: SleepConfig,
+        deficits: Iterable[float] = (),
+        baseline_hours: float | None = None,
+    ) -> None:
+        self._engine = SleepEngine(config)
+        self._baseline_hours = baseline_hours or config.defaults.baselineHours
+        self._deficits: deque[float] = deque(maxlen=DEBT_WINDOW_NIGHTS)
+        self._debt = 0.0
+        for deficit in deficits:
+            self._push(deficit)
+
+    @property
+    def debt_hours(self) -> float:
+        return self._debt
+
+    @property
+    def deficits(self) -> list[float]:
+        return list(self._deficits)
+
+    def need(self, strain: float | None, nap_hours: float = 0.0) -> float:
+        """Sleep need for the next night after a day of ``strain``."""
+        return self._engine.compute_sleep_need(
+            self._baseline_hours, strain or 0.0, self._debt, nap_hours
+        )
+
+    def record(
+        self, sleep_hours: float | None, strain: float | None, nap_hours: float = 0.0
+    ) -> LedgerNight:
+        """Advance one night; ``strain`` is the day before it. No data adds no deficit."""
+        need = self.need(strain, nap_hours)
+        deficit = max(0.0, need - sleep_hours) if sleep_hours is not None else 0.0
+        self._push(deficit)
+        return LedgerNight(sleep_hours, need, deficit, self._debt)
+
+    def _push(self, deficit: float) -> None:
+        if len(self._deficits) == DEBT_WINDOW_NIGHTS:
+            self._debt -= self._deficits[0]
+        self._deficits.append(deficit)
+        self._debt = max(self._debt + deficit, 0.0)
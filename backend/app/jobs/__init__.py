@@ -0,0 +1 @@
+"""Batch jobs run outside the request path (Cloud Run jobs / schedulers)."""
@@ -0,0 +1,41 @@
+"""Daily challenge reconciliation — rebuilds open challenge standings from the database.
+
+Run with ``python -m app.jobs.challenge_reconcile [YYYY-MM-DD]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from app.config import get_settings
+from app.core.redis_client import close_redis, get_redis, init_redis
+from app.db.session import dispose_engine, get_session_factory, init_engine
+from app.services.challenge_service import ReconcileResult, reconcile_open
+
+logger = logging.getLogger(__name__)
+
+
+async def main(on_date: date | None = None) -> ReconcileResult:
+    settings = get_settings()
+    init_engine(settings.database_url)
+    await init_redis(settings.redis_url)
+    try:
+        result = await reconcile_open(get_session_factory(), get_redis(), on_date)
+    finally:
+        await close_redis()
+        await dispose_engine()
+    logger.info(
+        "Reconciled %d challenges, corrected %d standings",
+        result.challenges,
+        result.corrected,
+    )
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    asyncio.run(main(target))
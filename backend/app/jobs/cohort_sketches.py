@@ -0,0 +1,36 @@
+"""Nightly cohort sketch refresh — rebuilds the cohort t-digests over a rolling window.
+
+Run with ``python -m app.jobs.cohort_sketches [YYYY-MM-DD]`` (the last day
+of the window; defaults to yesterday).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from app.config import get_settings
+from app.db.session import dispose_engine, get_session_factory, init_engine
+from app.services import cohort_service
+
+logger = logging.getLogger(__name__)
+
+
+async def main(through: date | None = None) -> int:
+    init_engine(get_settings().database_url)
+    try:
+        async with get_session_factory()() as session:
+            added = await cohort_service.refresh(session, through)
+            await session.commit()
+    finally:
+        await dispose_engine()
+    logger.info("Cohort sketch refresh added %d user means", added)
+    return added
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    asyncio.run(main(target))
@@ -0,0 +1,63 @@
+"""Task handlers executed by the local worker (paths match Cloud Tasks targets)."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from app.core.redis_client import get_redis
+from app.core.task_queue import task_handler
+from app.db.session import get_session_factory
+from app.services import (
+    challenge_service,
+    cohort_service,
+    notification_scheduler,
+    recompute_service,
+)
+from app.services.healthspan_service import compute_healthspan, run_nightly_batch
+from app.services.notification_service import send_recovery_notifications
+
+
+@task_handler("/tasks/healthspan/nightly")
+async def nightly_healthspan(payload: dict) -> None:
+    on_date = date.fromisoformat(payload["date"]) if payload.get("date") else None
+    await run_nightly_batch(get_session_factory(), on_date)
+
+
+@task_handler("/tasks/healthspan/user")
+async def recompute_healthspan(payload: dict) -> None:
+    async with get_session_factory()() as session:
+        await compute_healthspan(session, uuid.UUID(payload["user_id"]))
+        await session.commit()
+
+
+@task_handler("/tasks/notifications/recovery")
+async def recovery_notifications(payload: dict) -> None:
+    day = date.fromisoformat(payload["date"]) if payload.get("date") else date.today()
+    async with get_session_factory()() as session:
+        await send_recovery_notifications(session, day, redis=get_redis())
+
+
+@task_handler("/tasks/notifications/tick")
+async def notification_tick(payload: dict) -> None:
+    async with get_session_factory()() as session:
+        await notification_scheduler.run_tick(session, get_redis())
+
+
+@task_handler("/tasks/challenges/reconcile")
+async def reconcile_challenges(payload: dict) -> None:
+    on_date = date.fromisoformat(payload["date"]) if payload.get("date") else None
+    await challenge_service.reconcile_open(get_session_factory(), get_redis(), on_date)
+
+
+@task_handler("/tasks/cohorts/refresh")
+async def refresh_cohorts(payload: dict) -> None:
+    through = date.fromisoformat(payload["through"]) if payload.get("through") else None
+    async with get_session_factory()() as session:
+        await cohort_service.refresh(session, through)
+        await session.commit()
+
+
+@task_handler("/tasks/recompute/pending")
+async def recompute_pending(payload: dict) -> None:
+    await recompute_service.run_pending(get_session_factory())
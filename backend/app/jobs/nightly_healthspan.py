@@ -0,0 +1,33 @@
+"""Nightly healthspan batch — scores every user once per day.
+
+Run with ``python -m app.jobs.nightly_healthspan [YYYY-MM-DD]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from app.config import get_settings
+from app.db.session import dispose_engine, get_session_factory, init_engine
+from app.services.healthspan_service import run_nightly_batch
+
+logger = logging.getLogger(__name__)
+
+
+async def main(on_date: date | None = None) -> int:
+    init_engine(get_settings().database_url)
+    try:
+        written = await run_nightly_batch(get_session_factory(), on_date)
+    finally:
+        await dispose_engine()
+    logger.info("Nightly healthspan batch wrote %d scores", written)
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    asyncio.run(main(target))
@@ -0,0 +1,57 @@
+"""Notification scheduler loop — delivers pushes as users' local times come due.
+
+Run with ``python -m app.jobs.notification_scheduler [--rebuild]``.
+``--rebuild`` reloads the Redis schedule from the database first (after a
+Redis flush or on first deploy). Several instances may run side by side;
+each due entry is claimed by exactly one tick.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from app.config import get_settings
+from app.core.fcm_client import close_fcm, init_fcm
+from app.core.redis_client import close_redis, get_redis, init_redis
+from app.db.session import dispose_engine, get_session_factory, init_engine
+from app.services import notification_scheduler
+
+logger = logging.getLogger(__name__)
+
+TICK_INTERVAL_SECONDS = 30.0
+
+
+async def main(rebuild: bool = False) -> None:
+    settings = get_settings()
+    init_engine(settings.database_url)
+    await init_redis(settings.redis_url)
+    if settings.resolved_fcm_base_url:
+        await init_fcm(
+            settings.resolved_fcm_base_url,
+            settings.firebase_project_id,
+            credentials_path=settings.firebase_credentials_path,
+            use_google_auth=settings.is_production,
+            max_connections=settings.push_max_connections,
+        )
+    session_factory = get_session_factory()
+    try:
+        if rebuild:
+            async with session_factory() as session:
+                await notification_scheduler.rebuild(session, get_redis())
+        while True:
+            async with session_factory() as session:
+                result = await notification_scheduler.run_tick(session, get_redis())
+            if result.sent or result.failed:
+                logger.info("Scheduler tick sent=%d failed=%d", result.sent, result.failed)
+            await asyncio.sleep(TICK_INTERVAL_SECONDS)
+    finally:
+        await close_fcm()
+        await close_redis()
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(rebuild="--rebuild" in sys.argv[1:]))
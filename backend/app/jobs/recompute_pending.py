@@ -0,0 +1,45 @@
+"""Late-data recompute — rewrites derived metrics for days marked stale.
+
+Run with ``python -m app.jobs.recompute_pending [--loop]``. ``--loop``
+keeps draining every ``POLL_INTERVAL_SECONDS``; without it one batch is
+processed and the job exits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from app.config import get_settings
+from app.core.redis_client import close_redis, init_redis
+from app.db.session import dispose_engine, get_session_factory, init_engine
+from app.services.recompute_service import run_pending
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 60.0
+
+
+async def main(loop: bool = False) -> int:
+    settings = get_settings()
+    init_engine(settings.database_url)
+    await init_redis(settings.redis_url)
+    total = 0
+    try:
+        while True:
+            rewritten = await run_pending(get_session_factory())
+            total += rewritten
+            if not loop:
+                break
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+    finally:
+        await close_redis()
+        await dispose_engine()
+    logger.info("Recomputed %d derived days", total)
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(loop="--loop" in sys.argv))
@@ -11,9 +11,14 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.config import get_settings
+from app.core.cache import close_cache, init_cache
+from app.core.coach_llm import close_coach_generator, init_coach_generator
 from app.core.exceptions import register_exception_handlers
+from app.core.fcm_client import close_fcm, init_fcm
 from app.core.middleware import RequestLoggingMiddleware
 from app.core.redis_client import close_redis, init_redis
+from app.core.task_queue import close_local_worker, init_local_worker
+from app.core.vector_index import close_vector_index, init_vector_index
 from app.db.session import dispose_engine, init_engine
 
 logger = logging.getLogger("zyva")
@@ -28,10 +33,42 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
     # Initialise shared resources
     init_engine(settings.database_url)
     await init_redis(settings.redis_url)
+    await init_cache(settings.cache_l1_max_entries)
+    if settings.resolved_fcm_base_url:
+        await init_fcm(
+            settings.resolved_fcm_base_url,
+            settings.firebase_project_id,
+            credentials_path=settings.firebase_credentials_path,
+            use_google_auth=settings.is_production,
+            max_connections=settings.push_max_connections,
+        )
+    init_coach_generator(
+        settings.resolved_coach_backend,
+        model=settings.coach_model,
+        project=settings.gcp_project_id,
+        location=settings.gcp_region,
+        token_delay_ms=settings.coach_local_token_delay_ms,
+    )
+    init_vector_index(
+        settings.resolved_vector_index_backend,
+        settings.resolved_embedding_backend,
+        model=settings.embedding_model,
+        project=settings.gcp_project_id,
+        location=settings.gcp_region,
+    )
+    if settings.resolved_task_backend == "local":
+        import app.jobs.handlers  # noqa: F401  (registers task handlers)
+
+        await init_local_worker(settings.task_worker_concurrency)
 
     yield
 
     # Teardown
+    await close_local_worker()
+    close_coach_generator()
+    close_vector_index()
+    await close_fcm()
+    await close_cache()
     await close_redis()
     await dispose_engine()
     logger.info("Zyva API shut down cleanly")
@@ -1,28 +1,41 @@
 """SQLAlchemy model package — import all models so Alembic can discover them."""
 
 from app.models.base import Base
-from app.models.coach import CoachConversation, CoachMessage
+from app.models.baseline import UserBaseline
+from app.models.challenge import TeamChallenge
+from app.models.coach import CoachConversation, CoachDocument, CoachMessage
+from app.models.cohort import CohortSketch
 from app.models.daily_metric import DailyMetric
 from app.models.healthspan import HealthspanScore
-from app.models.journal import JournalEntry, JournalResponse
+from app.models.journal import JournalBehaviorStat, JournalEntry, JournalResponse
 from app.models.notification import NotificationPreference
-from app.models.sleep import SleepSession
-from app.models.team import Team, TeamMember
+from app.models.recompute import RecomputeRange
+from app.models.sleep import SleepLedgerNight, SleepSession, SleepTimingSum
+from app.models.team import Team, TeamDailyAggregate, TeamMember
 from app.models.user import User
 from app.models.workout import Workout
 
 __all__ = [
     "Base",
     "CoachConversation",
+    "CoachDocument",
     "CoachMessage",
+    "CohortSketch",
     "DailyMetric",
     "HealthspanScore",
+    "JournalBehaviorStat",
     "JournalEntry",
     "JournalResponse",
     "NotificationPreference",
+    "RecomputeRange",
+    "SleepLedgerNight",
     "SleepSession",
+    "SleepTimingSum",
     "Team",
+    "TeamChallenge",
+    "TeamDailyAggregate",
     "TeamMember",
     "User",
+    "UserBaseline",
     "Workout",
 ]
@@ -0,0 +1,35 @@
+"""Per-user rolling baseline state ORM model."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import JSON, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+
+class UserBaseline(UUIDMixin, TimestampMixin, Base):
+    """The trailing 28 days of each baseline metric for one user.
+
+    ``daily_values`` maps metric -> ISO date -> value for days in
+    ``[through_date - 27, through_date]``. It is maintained on every
+    metric write by ``baseline_service``, so baseline readers load this
+    one row instead of 28 metric rows.
+    """
+
+    __tablename__ = "user_baselines"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        unique=True,
+        nullable=False,
+    )
+    through_date: Mapped[date] = mapped_column(Date, nullable=False)
+    daily_values: Mapped[dict] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=False
+    )
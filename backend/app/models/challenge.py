@@ -0,0 +1,41 @@
+"""Team challenge ORM model."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, Float, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+
+class TeamChallenge(UUIDMixin, TimestampMixin, Base):
+    """A team competition over one daily metric in a date window.
+
+    ``aggregation`` is one of ``sum``, ``average``, ``max`` or ``streak``;
+    a streak counts the longest run of consecutive days with the metric at
+    or above ``threshold``. Live standings are kept in Redis by
+    ``challenge_service``.
+    """
+
+    __tablename__ = "team_challenges"
+
+    team_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("teams.id", ondelete="CASCADE"), nullable=False
+    )
+    created_by: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    metric: Mapped[str] = mapped_column(String(50), nullable=False)
+    aggregation: Mapped[str] = mapped_column(String(20), nullable=False)
+    threshold: Mapped[float | None] = mapped_column(Float)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("ix_team_challenges_team_window", "team_id", "end_date", "start_date"),
+    )
@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import uuid
+from datetime import date
 
-from sqlalchemy import ForeignKey, String, Text
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Date, ForeignKey, Index, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin, UUIDMixin
 
+EMBEDDING_DIM = 768
+
 
 class CoachConversation(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "coach_conversations"
@@ -22,7 +26,10 @@ class CoachConversation(UUIDMixin, TimestampMixin, Base):
     # Relationships
     user: Mapped["User"] = relationship(back_populates="coach_conversations")  # noqa: F821
     messages: Mapped[list["CoachMessage"]] = relationship(
-        back_populates="conversation", lazy="selectin", cascade="all, delete-orphan"
+        back_populates="conversation",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
@@ -39,3 +46,34 @@ class CoachMessage(UUIDMixin, TimestampMixin, Base):
 
     # Relationships
     conversation: Mapped["CoachConversation"] = relationship(back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_coach_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
+
+
+class CoachDocument(UUIDMixin, TimestampMixin, Base):
+    __tablename__ = "coach_documents"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(String(20), nullable=False)
+    source_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    doc_date: Mapped[date] = mapped_column(Date, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(Vector(EMBEDDING_DIM), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "source", "source_key", name="uq_coach_documents_user_source_key"
+        ),
+        Index(
+            "ix_coach_documents_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
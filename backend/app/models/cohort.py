@@ -0,0 +1,34 @@
+"""Cohort quantile sketch ORM model."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import JSON, Date, Float, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+
+class CohortSketch(UUIDMixin, TimestampMixin, Base):
+    """Serialised t-digest of one metric for an age band × biological sex cohort.
+
+    Built from each member's mean over the window ending ``through_date``;
+    the nightly refresh rebuilds every sketch for the next window.
+    """
+
+    __tablename__ = "cohort_sketches"
+
+    metric: Mapped[str] = mapped_column(String(50), nullable=False)
+    age_band: Mapped[str] = mapped_column(String(10), nullable=False)
+    sex: Mapped[str] = mapped_column(String(20), nullable=False)
+    count: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    digest: Mapped[dict] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=False
+    )
+    through_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("metric", "age_band", "sex", name="uq_cohort_sketches_cohort"),
+    )
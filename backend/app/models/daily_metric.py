@@ -36,6 +36,7 @@ class DailyMetric(UUIDMixin, TimestampMixin, Base):
     resting_heart_rate: Mapped[float | None] = mapped_column(Float)
     respiratory_rate: Mapped[float | None] = mapped_column(Float)
     spo2: Mapped[float | None] = mapped_column(Float)
+    skin_temperature_deviation: Mapped[float | None] = mapped_column(Float)
 
     # Activity
     steps: Mapped[int | None] = mapped_column(Integer)
@@ -49,10 +50,10 @@ class DailyMetric(UUIDMixin, TimestampMixin, Base):
     # Relationships
     user: Mapped["User"] = relationship(back_populates="daily_metrics")  # noqa: F821
     workouts: Mapped[list["Workout"]] = relationship(  # noqa: F821
-        back_populates="daily_metric", lazy="selectin"
+        back_populates="daily_metric", lazy="raise", passive_deletes=True
     )
     sleep_sessions: Mapped[list["SleepSession"]] = relationship(  # noqa: F821
-        back_populates="daily_metric", lazy="selectin"
+        back_populates="daily_metric", lazy="raise", passive_deletes=True
     )
 
     __table_args__ = (
@@ -57,3 +57,31 @@ class JournalResponse(UUIDMixin, TimestampMixin, Base):
 
     # Relationships
     journal_entry: Mapped["JournalEntry"] = relationship(back_populates="responses")
+
+
+class JournalBehaviorStat(UUIDMixin, TimestampMixin, Base):
+    """Running sufficient statistics for one behaviour against one daily metric.
+
+    Updated incrementally on journal and metric writes so the Pearson
+    correlation can be derived without rescanning journal history.
+    """
+
+    __tablename__ = "journal_behavior_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    behavior_key: Mapped[str] = mapped_column(String(100), nullable=False)
+    metric: Mapped[str] = mapped_column(String(50), nullable=False)
+    n: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sum_x: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sum_y: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sum_xy: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sum_x2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sum_y2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "behavior_key", "metric", name="uq_journal_behavior_stats_user_key_metric"
+        ),
+    )
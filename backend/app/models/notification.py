@@ -21,6 +21,7 @@ class NotificationPreference(UUIDMixin, TimestampMixin, Base):
     notification_type: Mapped[str] = mapped_column(String(50), nullable=False)
     enabled: Mapped[bool] = mapped_column(Boolean, server_default="true")
     preferred_time: Mapped[time | None] = mapped_column(Time)
+    timezone: Mapped[str | None] = mapped_column(String(64))
     device_token: Mapped[str | None] = mapped_column(String(512))
 
     # Relationships
@@ -0,0 +1,34 @@
+"""Pending recompute ranges ORM model."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin, UUIDMixin
+
+
+class RecomputeRange(UUIDMixin, TimestampMixin, Base):
+    """Days of one derived metric that are stale for a user.
+
+    Written in the same transaction as the metric change that made them
+    stale; overlapping marks widen the range. ``recompute_service`` claims
+    and clears it.
+    """
+
+    __tablename__ = "recompute_ranges"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    node: Mapped[str] = mapped_column(String(32), nullable=False)
+    from_date: Mapped[date] = mapped_column(Date, nullable=False)
+    to_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "node", name="uq_recompute_ranges_user_node"),
+    )
@@ -1,11 +1,20 @@
-"""SleepSession ORM model."""
+"""SleepSession, SleepLedgerNight and SleepTimingSum ORM models."""
 
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -36,9 +45,67 @@ class SleepSession(UUIDMixin, TimestampMixin, Base):
 
     sleep_efficiency: Mapped[float | None] = mapped_column(Float)
     sleep_performance: Mapped[float | None] = mapped_column(Float)
+    # Run-length encoded stage timeline from start_date; see app.engines.hypnogram.
+    hypnogram: Mapped[bytes | None] = mapped_column(LargeBinary, deferred=True)
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="sleep_sessions")  # noqa: F821
     daily_metric: Mapped["DailyMetric | None"] = relationship(  # noqa: F821
         back_populates="sleep_sessions"
     )
+
+
+class SleepLedgerNight(UUIDMixin, TimestampMixin, Base):
+    """One night of a user's sleep ledger, keyed by the morning it ends.
+
+    ``debt_hours`` covers the seven nights ending with this one and
+    ``next_need_hours`` is the need for the night after, so the latest row
+    answers "how much sleep tonight" without replaying history.
+    """
+
+    __tablename__ = "sleep_ledger_nights"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    sleep_hours: Mapped[float] = mapped_column(Float, nullable=False)
+    strain: Mapped[float | None] = mapped_column(Float)  # the day the night ends
+    need_hours: Mapped[float] = mapped_column(Float, nullable=False)
+    deficit_hours: Mapped[float] = mapped_column(Float, nullable=False)
+    debt_hours: Mapped[float] = mapped_column(Float, nullable=False)
+    next_need_hours: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_sleep_ledger_nights_user_date"),
+    )
+
+
+class SleepTimingSum(UUIDMixin, TimestampMixin, Base):
+    """One night's main-sleep bed and wake times, with running circular sums.
+
+    ``nights`` and the ``*_sin`` / ``*_cos`` columns are cumulative over all
+    of the user's nights up to and including ``date``, so the sums for any
+    window are the difference of two rows.
+    """
+
+    __tablename__ = "sleep_timing_sums"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    bedtime_minutes: Mapped[float] = mapped_column(Float, nullable=False)
+    wake_time_minutes: Mapped[float] = mapped_column(Float, nullable=False)
+
+    nights: Mapped[int] = mapped_column(Integer, nullable=False)
+    bedtime_sin: Mapped[float] = mapped_column(Float, nullable=False)
+    bedtime_cos: Mapped[float] = mapped_column(Float, nullable=False)
+    wake_time_sin: Mapped[float] = mapped_column(Float, nullable=False)
+    wake_time_cos: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_sleep_timing_sums_user_date"),
+    )
@@ -3,9 +3,20 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, UniqueConstraint, func
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,9 +35,13 @@ class Team(UUIDMixin, TimestampMixin, Base):
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
 
-    # Relationships
+    # Relationships — members are counted and paged in SQL (see team_repo),
+    # never loaded wholesale.
     members: Mapped[list["TeamMember"]] = relationship(
-        back_populates="team", lazy="selectin", cascade="all, delete-orphan"
+        back_populates="team",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
@@ -49,4 +64,36 @@ class TeamMember(UUIDMixin, TimestampMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("team_id", "user_id", name="uq_team_members_team_user"),
+        Index("ix_team_members_team_joined", "team_id", "joined_at", "id"),
+        Index("ix_team_members_user_id", "user_id"),
+    )
+
+
+class TeamDailyAggregate(UUIDMixin, TimestampMixin, Base):
+    """One day's distribution of a metric across a team's members.
+
+    Count, sum and sum of squares give the mean and standard deviation;
+    the quartiles are stored directly. Metric upserts add their old→new
+    change to the day's sums and recompute that day's quartiles; membership
+    changes recompute the team's trend window.
+    """
+
+    __tablename__ = "team_daily_aggregates"
+
+    team_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("teams.id", ondelete="CASCADE"), nullable=False
+    )
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+    metric: Mapped[str] = mapped_column(String(50), nullable=False)
+    n: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    sum_sq: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    p25: Mapped[float | None] = mapped_column(Float)
+    p50: Mapped[float | None] = mapped_column(Float)
+    p75: Mapped[float | None] = mapped_column(Float)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "team_id", "date", "metric", name="uq_team_daily_aggregates_team_date_metric"
+        ),
     )
@@ -28,28 +28,29 @@ class User(UUIDMixin, TimestampMixin, Base):
     preferred_units: Mapped[str | None] = mapped_column(
         String(20), server_default="metric"
     )
+    timezone: Mapped[str | None] = mapped_column(String(64))  # IANA name
 
     # Relationships
     daily_metrics: Mapped[list["DailyMetric"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     workouts: Mapped[list["Workout"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     sleep_sessions: Mapped[list["SleepSession"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     journal_entries: Mapped[list["JournalEntry"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     coach_conversations: Mapped[list["CoachConversation"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     healthspan_scores: Mapped[list["HealthspanScore"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
     notification_preferences: Mapped[list["NotificationPreference"]] = relationship(  # noqa: F821
-        back_populates="user", lazy="selectin"
+        back_populates="user", lazy="raise", passive_deletes=True
     )
 
     __table_args__ = (
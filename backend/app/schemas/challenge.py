@@ -0,0 +1,51 @@
+"""Team challenge Pydantic schemas."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+ChallengeMetric = Literal["strain", "recovery", "sleep", "sleep_performance", "steps"]
+ChallengeAggregation = Literal["sum", "average", "max", "streak"]
+
+
+class ChallengeCreate(BaseModel):
+    name: str = Field(max_length=255)
+    metric: ChallengeMetric
+    aggregation: ChallengeAggregation
+    threshold: float | None = None
+    start_date: date
+    end_date: date
+
+
+class ChallengeResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    team_id: uuid.UUID
+    name: str
+    metric: str
+    aggregation: str
+    threshold: float | None
+    start_date: date
+    end_date: date
+    created_at: datetime
+
+
+class ChallengeStanding(BaseModel):
+    rank: int
+    user_id: uuid.UUID
+    display_name: str | None
+    score: float
+
+
+class ChallengeStandingsResponse(BaseModel):
+    """Top standings plus the caller's own position (None if they have no score)."""
+
+    challenge: ChallengeResponse
+    participants: int
+    standings: list[ChallengeStanding]
+    me: ChallengeStanding | None = None
@@ -23,11 +23,30 @@ class CoachMessageResponse(BaseModel):
     created_at: datetime
 
 
+class CoachConversationSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    title: str | None
+    last_message_preview: str | None
+    last_message_at: datetime | None
+    message_count: int
+    created_at: datetime
+    updated_at: datetime
+
+
 class CoachConversationResponse(BaseModel):
+    """A conversation with one page of messages, oldest first.
+
+    ``next_cursor`` fetches the page of older messages, or is None when the
+    page reaches the start of the conversation.
+    """
+
     model_config = ConfigDict(from_attributes=True)
 
     id: uuid.UUID
     title: str | None
     messages: list[CoachMessageResponse]
+    next_cursor: str | None = None
     created_at: datetime
     updated_at: datetime
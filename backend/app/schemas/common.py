@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import base64
 import math
+import uuid
 from datetime import date, datetime
 from typing import Generic, TypeVar
 
@@ -40,6 +42,22 @@ class PaginatedResponse(BaseModel, Generic[T]):
         )
 
 
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Opaque keyset cursor for ``(created_at, id)`` ordered listings."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
 class ErrorResponse(BaseModel):
     detail: str
     code: str | None = None
@@ -9,6 +9,8 @@ from pydantic import BaseModel, ConfigDict
 
 
 class JournalResponseData(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     behavior_key: str
     response_type: str
     bool_value: bool | None = None
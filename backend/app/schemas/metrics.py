@@ -73,3 +73,33 @@ class DailyMetricResponse(BaseModel):
     sleep_need_hours: float | None
     created_at: datetime
     updated_at: datetime
+
+
+class DailyScoreResponse(DailyMetricResponse):
+    """A day synced raw, with the day's strain target and the coming night's need."""
+
+    strain_target_min: float | None = None
+    strain_target_max: float | None = None
+    next_sleep_need_hours: float | None = None
+
+
+class CohortPercentile(BaseModel):
+    metric: str
+    value: float
+    percentile: float
+    age_band: str
+    sex: str
+    cohort_size: int
+    p25: float
+    p50: float
+    p75: float
+
+
+class CohortComparisonResponse(BaseModel):
+    """The user's latest values placed within their age band × sex cohort.
+
+    Metrics whose cohort (or every broader fallback) is too small are omitted.
+    """
+
+    date: date | None
+    metrics: list[CohortPercentile]
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict
 
@@ -26,3 +26,45 @@ class SleepSessionResponse(BaseModel):
     sleep_performance: float | None
     created_at: datetime
     updated_at: datetime
+
+
+class SleepStageSyncItem(BaseModel):
+    type: str  # "light", "deep", "rem", "awake" or "inBed"
+    start_date: datetime
+    end_date: datetime
+
+
+class SleepNightSyncItem(BaseModel):
+    """Stage samples for the sleep ending on ``date``, naps included."""
+
+    date: date
+    stages: list[SleepStageSyncItem]
+
+
+class SleepSyncRequest(BaseModel):
+    nights: list[SleepNightSyncItem]
+
+
+class HypnogramResponse(BaseModel):
+    """Stage timeline as ``[stage_code, epochs]`` runs from ``start_date``.
+
+    ``stages`` maps codes to names; each epoch is ``resolution_seconds`` long.
+    """
+
+    session_id: uuid.UUID
+    start_date: datetime | None
+    resolution_seconds: int
+    stages: list[str]
+    runs: list[list[int]]
+
+
+class SleepNeedResponse(BaseModel):
+    """Tonight's sleep need from the latest night in the sleep ledger."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    date: date  # the latest night recorded, by the morning it ended
+    sleep_hours: float
+    need_hours: float
+    debt_hours: float
+    next_need_hours: float
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -33,6 +33,16 @@ class TeamMemberResponse(BaseModel):
     joined_at: datetime
 
 
+class TeamMemberPage(BaseModel):
+    """One page of members in join order.
+
+    ``next_cursor`` fetches the following page, or is None on the last one.
+    """
+
+    members: list[TeamMemberResponse]
+    next_cursor: str | None = None
+
+
 class LeaderboardEntry(BaseModel):
     user_id: uuid.UUID
     display_name: str | None
@@ -46,3 +56,22 @@ class LeaderboardResponse(BaseModel):
     team_name: str
     entries: list[LeaderboardEntry]
     updated_at: datetime
+
+
+class TeamTrendPoint(BaseModel):
+    date: date
+    members: int
+    mean: float
+    stddev: float
+    p25: float | None
+    p50: float | None
+    p75: float | None
+
+
+class TeamTrendsResponse(BaseModel):
+    """Daily team distributions keyed by metric ("recovery", "strain", "sleep")."""
+
+    team_id: uuid.UUID
+    from_date: date
+    to_date: date
+    metrics: dict[str, list[TeamTrendPoint]]
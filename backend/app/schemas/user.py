@@ -23,6 +23,7 @@ class UserUpdate(BaseModel):
     max_heart_rate: int | None = None
     sleep_baseline_hours: float | None = None
     preferred_units: str | None = None
+    timezone: str | None = None
 
 
 class UserResponse(BaseModel):
@@ -39,5 +40,6 @@ class UserResponse(BaseModel):
     max_heart_rate: int | None
     sleep_baseline_hours: float | None
     preferred_units: str | None
+    timezone: str | None
     created_at: datetime
     updated_at: datetime
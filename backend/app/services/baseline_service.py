@@ -0,0 +1,152 @@
+"""Baseline service — per-user 28-day baselines maintained on every metric write.
+
+Each user has one ``user_baselines`` row holding the trailing 28 days of
+every baseline metric, keyed by date. ``on_metric_changed`` folds a
+metric write into it in the same transaction: the day's values are
+replaced (so corrections and late data are exact) and days that fall out
+of the window are evicted. Readers get a ``BaselineWindow`` from that one
+row; windows ending before the stored one fall back to the metric rows.
+"""
+
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import metrics_repo
+from app.models.daily_metric import DailyMetric
+
+WINDOW_DAYS = 28
+BASELINE_METRICS = [
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "respiratory_rate",
+    "spo2",
+    "sleep_performance",
+    "vo2_max",
+    "active_calories",
+    "steps",
+]
+
+
+@dataclass(frozen=True, slots=True)
+class BaselineWindow:
+    """Each metric's non-null values over the window, oldest first."""
+
+    as_of: date
+    values: dict[str, list[float]]
+
+    def mean(self, metric: str) -> float | None:
+        values = self.values.get(metric)
+        return sum(values) / len(values) if values else None
+
+    def stdev(self, metric: str) -> float | None:
+        """Sample standard deviation (None below two values)."""
+        values = self.values.get(metric) or []
+        if len(values) < 2:
+            return None
+        mean = sum(values) / len(values)
+        return math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+
+def _window_start(as_of: date) -> date:
+    return as_of - timedelta(days=WINDOW_DAYS - 1)
+
+
+def _from_metrics(metrics: list[DailyMetric]) -> dict[str, dict[str, float]]:
+    daily_values: dict[str, dict[str, float]] = {name: {} for name in BASELINE_METRICS}
+    for metric in metrics:
+        for name in BASELINE_METRICS:
+            value = getattr(metric, name)
+            if value is not None:
+                daily_values[name][metric.date.isoformat()] = float(value)
+    return daily_values
+
+
+async def _load_rows(
+    session: AsyncSession, user_id: uuid.UUID, as_of: date
+) -> dict[str, dict[str, float]]:
+    metrics, _ = await metrics_repo.list_by_date_range(
+        session, user_id, _window_start(as_of), as_of, limit=WINDOW_DAYS
+    )
+    return _from_metrics(metrics)
+
+
+async def on_metric_changed(session: AsyncSession, metric: DailyMetric) -> None:
+    """Fold one upserted metric day into the user's baseline row."""
+    baseline = await metrics_repo.get_baseline(session, metric.user_id, for_update=True)
+    if baseline is None:
+        # First write since the table was introduced: seed from history.
+        latest = await metrics_repo.get_latest(session, metric.user_id, date.max)
+        through = max(metric.date, latest.date) if latest else metric.date
+        daily_values = await _load_rows(session, metric.user_id, through)
+    else:
+        through = max(baseline.through_date, metric.date)
+        if metric.date < _window_start(through):
+            return  # too old to affect the current window
+        daily_values = {
+            name: dict(baseline.daily_values.get(name, {})) for name in BASELINE_METRICS
+        }
+        day = metric.date.isoformat()
+        for name in BASELINE_METRICS:
+            value = getattr(metric, name)
+            if value is None:
+                daily_values[name].pop(day, None)
+            else:
+                daily_values[name][day] = float(value)
+
+    oldest = _window_start(through).isoformat()
+    daily_values = {
+        name: {d: v for d, v in sorted(by_day.items()) if d >= oldest}
+        for name, by_day in daily_values.items()
+    }
+    await metrics_repo.save_baseline(session, baseline, metric.user_id, through, daily_values)
+
+
+async def _daily_values(
+    session: AsyncSession, user_id: uuid.UUID, as_of: date
+) -> dict[str, dict[str, float]]:
+    baseline = await metrics_repo.get_baseline(session, user_id)
+    if baseline is not None and as_of >= baseline.through_date:
+        return baseline.daily_values
+    return await _load_rows(session, user_id, as_of)
+
+
+async def get_window(
+    session: AsyncSession, user_id: uuid.UUID, as_of: date | None = None
+) -> BaselineWindow:
+    """Baseline values for the 28 days ending ``as_of`` (inclusive)."""
+    as_of = as_of or date.today()
+    daily_values = await _daily_values(session, user_id, as_of)
+
+    oldest, newest = _window_start(as_of).isoformat(), as_of.isoformat()
+    return BaselineWindow(
+        as_of=as_of,
+        values={
+            name: [
+                v
+                for d, v in sorted(daily_values.get(name, {}).items())
+                if oldest <= d <= newest
+            ]
+            for name in BASELINE_METRICS
+        },
+    )
+
+
+async def get_daily_history(
+    session: AsyncSession, user_id: uuid.UUID, day: date
+) -> dict[str, list[float | None]]:
+    """Each metric per calendar day over the window ending ``day``, before ``day`` itself.
+
+    Oldest first, one slot per day, None where the day has no value.
+    """
+    daily_values = await _daily_values(session, user_id, day)
+    start = _window_start(day)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(WINDOW_DAYS - 1)]
+    return {
+        name: [daily_values.get(name, {}).get(d) for d in days] for name in BASELINE_METRICS
+    }
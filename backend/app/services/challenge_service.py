@@ -0,0 +1,266 @@
+"""Team challenges — live standings kept incrementally in Redis.
+
+Each challenge keeps a per-member hash of day -> metric value for the days
+inside its window and a sorted set of member scores. A metric write
+updates the member's day, rescores that member from their (window-sized)
+hash and ZADDs the result, so standings reads are a ZREVRANGE/ZREVRANK.
+A daily reconciliation rebuilds every open challenge from
+``daily_metrics`` to correct any drift (missed events, Redis flushes,
+membership changes). Each rebuild also leaves a short-lived "reconciled"
+marker, so reads of a challenge nobody has scored in yet do not rebuild
+it on every request.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.redis_client import get_redis_or_none
+from app.db.repositories import challenge_repo, team_repo
+from app.models.challenge import TeamChallenge
+from app.models.daily_metric import DailyMetric
+from app.schemas.challenge import (
+    ChallengeResponse,
+    ChallengeStanding,
+    ChallengeStandingsResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+CHALLENGE_METRICS = {
+    "strain": "strain_score",
+    "recovery": "recovery_score",
+    "sleep": "sleep_duration_hours",
+    "sleep_performance": "sleep_performance",
+    "steps": "steps",
+}
+MAX_WINDOW_DAYS = 92
+KEY_RETENTION_DAYS = 7
+RECONCILE_GRACE_DAYS = 2
+RECONCILED_MARKER_TTL_SECONDS = 3600
+
+
+@dataclass(slots=True)
+class ReconcileResult:
+    challenges: int = 0
+    corrected: int = 0
+
+
+def _standings_key(challenge_id: uuid.UUID) -> str:
+    return f"challenge:{challenge_id}:standings"
+
+
+def _reconciled_key(challenge_id: uuid.UUID) -> str:
+    return f"challenge:{challenge_id}:reconciled"
+
+
+def _days_key(challenge_id: uuid.UUID, user_id: uuid.UUID | str) -> str:
+    return f"challenge:{challenge_id}:days:{user_id}"
+
+
+def _expires_at(challenge: TeamChallenge) -> datetime:
+    return datetime.combine(
+        challenge.end_date + timedelta(days=KEY_RETENTION_DAYS), time.min, timezone.utc
+    )
+
+
+def score(challenge: TeamChallenge, values: dict[date, float]) -> float | None:
+    """A member's challenge score from their per-day values, or None if unscored."""
+    if not values:
+        return None
+    if challenge.aggregation == "sum":
+        return sum(values.values())
+    if challenge.aggregation == "average":
+        return sum(values.values()) / len(values)
+    if challenge.aggregation == "max":
+        return max(values.values())
+    # streak: longest run of consecutive qualifying days
+    threshold = challenge.threshold if challenge.threshold is not None else 0.0
+    best = run = 0
+    previous: date | None = None
+    for day in sorted(d for d, v in values.items() if v >= threshold):
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        best = max(best, run)
+        previous = day
+    return float(best)
+
+
+async def on_metric_changed(
+    session: AsyncSession,
+    metric: DailyMetric,
+    team_ids: list[uuid.UUID],
+    *,
+    redis: aioredis.Redis | None = None,
+) -> None:
+    """Apply one member-day write to the standings of their open challenges."""
+    redis = redis or get_redis_or_none()
+    if redis is None:
+        return  # reconciliation rebuilds the standings
+    challenges = await challenge_repo.list_covering(session, team_ids, metric.date)
+    member = str(metric.user_id)
+    day = metric.date.isoformat()
+
+    for challenge in challenges:
+        value = getattr(metric, CHALLENGE_METRICS[challenge.metric])
+        days_key = _days_key(challenge.id, member)
+        try:
+            pipe = redis.pipeline(transaction=True)
+            if value is None:
+                pipe.hdel(days_key, day)
+            else:
+                pipe.hset(days_key, day, float(value))
+            pipe.expireat(days_key, _expires_at(challenge))
+            pipe.hgetall(days_key)
+            *_, stored = await pipe.execute()
+
+            member_score = score(
+                challenge, {date.fromisoformat(d): float(v) for d, v in stored.items()}
+            )
+            standings_key = _standings_key(challenge.id)
+            if member_score is None:
+                await redis.zrem(standings_key, member)
+            else:
+                pipe = redis.pipeline(transaction=True)
+                pipe.zadd(standings_key, {member: member_score})
+                pipe.expireat(standings_key, _expires_at(challenge))
+                await pipe.execute()
+        except aioredis.RedisError as exc:
+            logger.warning("Challenge %s update failed for %s: %s", challenge.id, member, exc)
+
+
+async def compute_standings(
+    session: AsyncSession, challenge: TeamChallenge
+) -> tuple[dict[uuid.UUID, dict[date, float]], dict[uuid.UUID, float]]:
+    """Per-member day values and scores for a challenge, straight from the database."""
+    values: dict[uuid.UUID, dict[date, float]] = defaultdict(dict)
+    for user_id, day, value in await challenge_repo.member_values(
+        session,
+        challenge.team_id,
+        CHALLENGE_METRICS[challenge.metric],
+        challenge.start_date,
+        challenge.end_date,
+    ):
+        values[user_id][day] = value
+    scores = {
+        user_id: member_score
+        for user_id, days in values.items()
+        if (member_score := score(challenge, days)) is not None
+    }
+    return values, scores
+
+
+async def reconcile(
+    session: AsyncSession, challenge: TeamChallenge, redis: aioredis.Redis
+) -> int:
+    """Rebuild one challenge's Redis state; returns how many member scores changed."""
+    values, scores = await compute_standings(session, challenge)
+    standings_key = _standings_key(challenge.id)
+    previous = dict(await redis.zrange(standings_key, 0, -1, withscores=True))
+    expires_at = _expires_at(challenge)
+
+    pipe = redis.pipeline(transaction=True)
+    pipe.delete(
+        standings_key,
+        *(_days_key(challenge.id, m) for m in set(previous) | {str(u) for u in values}),
+    )
+    for user_id, days in values.items():
+        days_key = _days_key(challenge.id, user_id)
+        pipe.hset(days_key, mapping={d.isoformat(): v for d, v in days.items()})
+        pipe.expireat(days_key, expires_at)
+    if scores:
+        pipe.zadd(standings_key, {str(u): s for u, s in scores.items()})
+        pipe.expireat(standings_key, expires_at)
+    pipe.set(_reconciled_key(challenge.id), 1, ex=RECONCILED_MARKER_TTL_SECONDS)
+    await pipe.execute()
+
+    current = {str(u): s for u, s in scores.items()}
+    return sum(
+        1
+        for member in set(previous) | set(current)
+        if previous.get(member) is None
+        or current.get(member) is None
+        or abs(previous[member] - current[member]) > 1e-9
+    )
+
+
+async def reconcile_open(
+    session_factory: async_sessionmaker[AsyncSession],
+    redis: aioredis.Redis,
+    on_date: date | None = None,
+) -> ReconcileResult:
+    """Rebuild every challenge that is running or ended within the grace period."""
+    on_date = on_date or date.today()
+    result = ReconcileResult()
+    async with session_factory() as session:
+        challenges = await challenge_repo.list_open(
+            session, on_date, on_date - timedelta(days=RECONCILE_GRACE_DAYS)
+        )
+        for challenge in challenges:
+            corrected = await reconcile(session, challenge, redis)
+            if corrected:
+                logger.info("Challenge %s: corrected %d standings", challenge.id, corrected)
+            result.challenges += 1
+            result.corrected += corrected
+    return result
+
+
+async def get_standings(
+    session: AsyncSession,
+    challenge: TeamChallenge,
+    user_id: uuid.UUID,
+    *,
+    limit: int = 20,
+    redis: aioredis.Redis | None = None,
+) -> ChallengeStandingsResponse:
+    """Top ``limit`` standings plus the caller's rank."""
+    redis = redis or get_redis_or_none()
+    if redis is None:
+        _, scores = await compute_standings(session, challenge)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        top = ranked[:limit]
+        participants = len(ranked)
+        mine = next(
+            ((i, s) for i, (u, s) in enumerate(ranked) if u == user_id), (None, None)
+        )
+    else:
+        standings_key = _standings_key(challenge.id)
+        # An empty standings set leaves no key; the marker says it was just rebuilt.
+        if not await redis.exists(standings_key, _reconciled_key(challenge.id)):
+            await reconcile(session, challenge, redis)
+        pipe = redis.pipeline(transaction=False)
+        pipe.zrevrange(standings_key, 0, limit - 1, withscores=True)
+        pipe.zcard(standings_key)
+        pipe.zrevrank(standings_key, str(user_id))
+        pipe.zscore(standings_key, str(user_id))
+        raw_top, participants, my_rank, my_score = await pipe.execute()
+        top = [(uuid.UUID(member), member_score) for member, member_score in raw_top]
+        mine = (my_rank, my_score)
+
+    names = await team_repo.get_display_names(
+        session, [u for u, _ in top] + ([user_id] if mine[0] is not None else [])
+    )
+    me = (
+        ChallengeStanding(
+            rank=mine[0] + 1, user_id=user_id, display_name=names.get(user_id), score=mine[1]
+        )
+        if mine[0] is not None
+        else None
+    )
+    return ChallengeStandingsResponse(
+        challenge=ChallengeResponse.model_validate(challenge),
+        participants=participants,
+        standings=[
+            ChallengeStanding(
+                rank=i + 1, user_id=u, display_name=names.get(u), score=member_score
+            )
+            for i, (u, member_score) in enumerate(top)
+        ],
+        me=me,
+    )
@@ -0,0 +1,138 @@
+"""Semantic response cache for the coach.
+
+Replies to opening questions are cached per user under the fingerprint of
+the context they were generated from. A new question is embedded and
+compared with the cached questions for the current fingerprint; at or
+above ``SIMILARITY_THRESHOLD`` cosine similarity the cached reply is
+replayed instead of calling the model. Entries expire after
+``CACHE_TTL_SECONDS`` and are dropped whenever the user's context
+snapshot is rebuilt. Hit / miss counts and the generation time saved are
+kept in Redis and exposed through ``stats``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 0.92
+CACHE_TTL_SECONDS = 6 * 3600
+MAX_ENTRIES_PER_USER = 50
+STATS_KEY = "coach:cache:stats"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedReply:
+    response: str
+    similarity: float
+    generation_ms: float
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", question.lower())).strip()
+
+
+def context_fingerprint(context: str) -> str:
+    return hashlib.sha256(context.encode()).hexdigest()[:16]
+
+
+def _key(user_id: uuid.UUID) -> str:
+    return f"coach:cache:{user_id}"
+
+
+async def lookup(
+    redis: aioredis.Redis,
+    user_id: uuid.UUID,
+    question_vector: list[float],
+    fingerprint: str,
+) -> CachedReply | None:
+    """Best cached reply for the question under ``fingerprint``, if similar enough."""
+    try:
+        raw_entries = await redis.lrange(_key(user_id), 0, -1)
+    except aioredis.RedisError as exc:
+        logger.warning("Coach cache read failed for %s: %s", user_id, exc)
+        return None
+
+    entries = [json.loads(raw) for raw in raw_entries]
+    entries = [e for e in entries if e["ctx"] == fingerprint]
+    if not entries:
+        return None
+
+    matrix = np.asarray([e["vec"] for e in entries], dtype=np.float32)
+    query = np.asarray(question_vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = (matrix @ query) / np.where(norms == 0, 1.0, norms)
+    best = int(np.argmax(scores))
+    if scores[best] < SIMILARITY_THRESHOLD:
+        return None
+    entry = entries[best]
+    return CachedReply(entry["reply"], float(scores[best]), float(entry["ms"]))
+
+
+async def store(
+    redis: aioredis.Redis,
+    user_id: uuid.UUID,
+    question_vector: list[float],
+    fingerprint: str,
+    response: str,
+    generation_ms: float,
+) -> None:
+    entry = {
+        "ctx": fingerprint,
+        "vec": [round(float(v), 5) for v in question_vector],
+        "reply": response,
+        "ms": round(generation_ms, 1),
+    }
+    key = _key(user_id)
+    try:
+        pipe = redis.pipeline(transaction=True)
+        pipe.lpush(key, json.dumps(entry))
+        pipe.ltrim(key, 0, MAX_ENTRIES_PER_USER - 1)
+        pipe.expire(key, CACHE_TTL_SECONDS)
+        await pipe.execute()
+    except aioredis.RedisError as exc:
+        logger.warning("Coach cache write failed for %s: %s", user_id, exc)
+
+
+async def invalidate(redis: aioredis.Redis, user_id: uuid.UUID) -> None:
+    """Drop a user's cached replies; call when their context changes."""
+    try:
+        await redis.delete(_key(user_id))
+    except aioredis.RedisError as exc:
+        logger.warning("Coach cache invalidation failed for %s: %s", user_id, exc)
+
+
+async def record(redis: aioredis.Redis, *, hit: bool, saved_ms: float = 0.0) -> None:
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, "hits" if hit else "misses", 1)
+        if saved_ms:
+            pipe.hincrbyfloat(STATS_KEY, "saved_ms", saved_ms)
+        await pipe.execute()
+    except aioredis.RedisError as exc:
+        logger.warning("Coach cache stats update failed: %s", exc)
+
+
+async def stats(redis: aioredis.Redis) -> dict[str, float]:
+    """Cache counters across all instances."""
+    raw = await redis.hgetall(STATS_KEY)
+    hits = int(raw.get("hits", 0))
+    misses = int(raw.get("misses", 0))
+    saved_ms = float(raw.get("saved_ms", 0.0))
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "saved_ms": round(saved_ms, 1),
+        "avg_saved_ms_per_hit": round(saved_ms / hits, 1) if hits else 0.0,
+    }
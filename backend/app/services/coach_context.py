@@ -0,0 +1,215 @@
+"""Coach context snapshots — prebuilt per-user prompt context in Redis.
+
+A snapshot holds the latest day's scores, 7/28/90-day averages, the
+strongest journal impacts and recent workouts. It is rebuilt with a handful
+of aggregate queries whenever the user's metrics, journal or workouts
+change, so a coach turn reads one Redis key instead of querying history.
+A rebuilt snapshot is written once the writing transaction commits.
+Snapshots are rebuilt on read when missing or from a previous day, and
+Redis being unavailable only costs the cache.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import date, datetime, timezone
+
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import get_redis_or_none
+from app.db import after_commit
+from app.db.repositories import metrics_repo
+from app.models.workout import Workout
+from app.services import coach_cache, journal_service
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_TTL_SECONDS = 2 * 24 * 3600
+WINDOWS = [7, 28, 90]
+TOP_IMPACTS = 3
+RECENT_WORKOUTS = 5
+_PENDING_KEY = "coach_context_snapshots"
+
+_AVERAGED_COLUMNS = [
+    "recovery_score",
+    "strain_score",
+    "sleep_performance",
+    "sleep_duration_hours",
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "steps",
+]
+_LATEST_COLUMNS = [
+    "recovery_score",
+    "recovery_zone",
+    "strain_score",
+    "sleep_performance",
+    "hrv_rmssd",
+    "resting_heart_rate",
+]
+
+
+def _key(user_id: uuid.UUID) -> str:
+    return f"coach:context:{user_id}"
+
+
+async def build_snapshot(
+    session: AsyncSession, user_id: uuid.UUID, as_of: date | None = None
+) -> dict:
+    """Assemble a user's context snapshot from the database."""
+    as_of = as_of or date.today()
+    latest = await metrics_repo.get_latest(session, user_id, as_of)
+    averages = await metrics_repo.trailing_averages(
+        session, user_id, _AVERAGED_COLUMNS, WINDOWS, as_of
+    )
+    impacts = await journal_service.compute_impacts(session, user_id)
+    workouts = await session.execute(
+        select(Workout)
+        .where(Workout.user_id == user_id)
+        .order_by(Workout.start_date.desc())
+        .limit(RECENT_WORKOUTS)
+    )
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "as_of": as_of.isoformat(),
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "latest": (
+            {"date": latest.date.isoformat()}
+            | {name: getattr(latest, name) for name in _LATEST_COLUMNS}
+            if latest
+            else None
+        ),
+        "averages": {
+            name: {f"{days}d": _round(v) for days, v in by_window.items()}
+            for name, by_window in averages.items()
+        },
+        "journal_impacts": [
+            {
+                "behavior_key": i.behavior_key,
+                "correlation": i.correlation,
+                "significance": i.significance,
+            }
+            for i in impacts[:TOP_IMPACTS]
+        ],
+        "recent_workouts": [
+            {
+                "date": w.start_date.date().isoformat() if w.start_date else None,
+                "type": w.workout_type,
+                "duration_minutes": _round(w.duration_minutes),
+                "strain_score": _round(w.strain_score),
+            }
+            for w in workouts.scalars()
+        ],
+    }
+
+
+async def refresh(
+    session: AsyncSession, user_id: uuid.UUID, *, redis: aioredis.Redis | None = None
+) -> dict:
+    """Rebuild a user's snapshot; call after their data changes.
+
+    The stored snapshot and cached coach replies are dropped now, so reads
+    before the commit rebuild from the database, and the new snapshot is
+    written once ``session`` commits. A rollback discards it.
+    """
+    snapshot = await build_snapshot(session, user_id)
+    after_commit.defer(session, _PENDING_KEY, (user_id, snapshot))
+    redis = redis or get_redis_or_none()
+    if redis is not None:
+        try:
+            await redis.delete(_key(user_id))
+        except aioredis.RedisError as exc:
+            logger.warning("Could not drop coach context for %s: %s", user_id, exc)
+        await coach_cache.invalidate(redis, user_id)
+    return snapshot
+
+
+async def get_snapshot(
+    session: AsyncSession, user_id: uuid.UUID, *, redis: aioredis.Redis | None = None
+) -> dict:
+    """Return the stored snapshot, rebuilding it if missing or stale."""
+    redis = redis or get_redis_or_none()
+    if redis is not None:
+        try:
+            raw = await redis.get(_key(user_id))
+        except aioredis.RedisError as exc:
+            logger.warning("Could not read coach context for %s: %s", user_id, exc)
+            raw = None
+        if raw:
+            snapshot = json.loads(raw)
+            if (
+                snapshot.get("version") == SNAPSHOT_VERSION
+                and snapshot.get("as_of") == date.today().isoformat()
+            ):
+                return snapshot
+    snapshot = await build_snapshot(session, user_id)
+    pending = {uid for uid, _ in after_commit.pending(session, _PENDING_KEY)}
+    if redis is not None and user_id not in pending:
+        # Uncommitted changes in this session are stored by their commit.
+        await _store(redis, user_id, snapshot)
+    return snapshot
+
+
+async def _store(redis: aioredis.Redis, user_id: uuid.UUID, snapshot: dict) -> None:
+    try:
+        await redis.set(_key(user_id), json.dumps(snapshot), ex=SNAPSHOT_TTL_SECONDS)
+    except aioredis.RedisError as exc:
+        logger.warning("Could not store coach context for %s: %s", user_id, exc)
+    await coach_cache.invalidate(redis, user_id)
+
+
+@after_commit.on_commit(_PENDING_KEY)
+async def _store_all(pending: list[tuple[uuid.UUID, dict]]) -> None:
+    redis = get_redis_or_none()
+    if redis is None:
+        return
+    for user_id, snapshot in dict(pending).items():  # the latest per user
+        await _store(redis, user_id, snapshot)
+
+
+def render(snapshot: dict) -> str:
+    """Render a snapshot as the prompt's context paragraph."""
+    averages = snapshot["averages"]
+    recovery_7d = averages["recovery_score"]["7d"]
+    if recovery_7d is None:
+        return "I don't have recent metrics to analyze yet. "
+
+    lines = [f"Your average recovery this week is {recovery_7d:.0f}%. "]
+    recovery_90d = averages["recovery_score"]["90d"]
+    if recovery_90d is not None:
+        lines.append(f"Your 90-day average recovery is {recovery_90d:.0f}%. ")
+
+    latest = snapshot["latest"]
+    if latest and latest["recovery_score"] is not None:
+        lines.append(
+            f"On {latest['date']} recovery was {latest['recovery_score']:.0f}%"
+            f" ({latest['recovery_zone'] or 'unknown'} zone). "
+        )
+    for name, label in (("hrv_rmssd", "HRV"), ("resting_heart_rate", "resting heart rate")):
+        week, baseline = averages[name]["7d"], averages[name]["28d"]
+        if week is not None and baseline:
+            lines.append(
+                f"This week's {label} is {(week - baseline) / baseline * 100:+.0f}% "
+                "against your 28-day baseline. "
+            )
+    if snapshot["journal_impacts"]:
+        behaviours = ", ".join(
+            f"{i['behavior_key']} ({i['correlation']:+.2f})" for i in snapshot["journal_impacts"]
+        )
+        lines.append(f"Behaviours most linked to your recovery: {behaviours}. ")
+    if snapshot["recent_workouts"]:
+        workouts = ", ".join(
+            f"{w['type'] or 'workout'} on {w['date']}" for w in snapshot["recent_workouts"]
+        )
+        lines.append(f"Recent workouts: {workouts}. ")
+    return "".join(lines)
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 1) if value is not None else None
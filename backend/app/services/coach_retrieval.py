@@ -0,0 +1,187 @@
+"""Coach retrieval — embedded user history for the coach prompt.
+
+Each day of a user's history becomes a few short documents: the daily
+metrics summary, one per workout and the journal entry. Documents are
+re-embedded only when their text changes (tracked by content hash) and are
+upserted incrementally as data syncs. A coach turn embeds the question and
+fetches the top-k most relevant documents from the vector index, instead
+of a fixed recent window.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.vector_index import Embedder, VectorIndex, get_embedder, get_vector_index
+from app.db.repositories import coach_repo
+from app.models.daily_metric import DailyMetric
+from app.models.journal import JournalEntry
+from app.models.workout import Workout
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_K = 4
+
+
+@dataclass(frozen=True, slots=True)
+class RetrievedDocument:
+    source: str
+    doc_date: date
+    content: str
+    score: float
+
+
+def describe_day(metric: DailyMetric) -> str:
+    parts = [f"{metric.date.isoformat()} daily summary:"]
+    if metric.recovery_score is not None:
+        zone = metric.recovery_zone or "unknown"
+        parts.append(f"recovery {metric.recovery_score:.0f}% ({zone} zone),")
+    if metric.strain_score is not None:
+        parts.append(f"strain {metric.strain_score:.1f},")
+    if metric.sleep_duration_hours is not None:
+        parts.append(f"sleep {metric.sleep_duration_hours:.1f} hours,")
+    if metric.sleep_performance is not None:
+        parts.append(f"sleep performance {metric.sleep_performance:.0f}%,")
+    if metric.hrv_rmssd is not None:
+        parts.append(f"HRV {metric.hrv_rmssd:.0f} ms,")
+    if metric.resting_heart_rate is not None:
+        parts.append(f"resting heart rate {metric.resting_heart_rate:.0f} bpm,")
+    if metric.steps is not None:
+        parts.append(f"{metric.steps} steps,")
+    return " ".join(parts).rstrip(",:") + "."
+
+
+def describe_workout(workout: Workout) -> str:
+    day = workout.start_date.date().isoformat() if workout.start_date else "unknown date"
+    parts = [f"{day} workout: {workout.workout_name or workout.workout_type or 'workout'}"]
+    if workout.duration_minutes is not None:
+        parts.append(f"{workout.duration_minutes:.0f} minutes")
+    if workout.strain_score is not None:
+        parts.append(f"strain {workout.strain_score:.1f}")
+    if workout.average_heart_rate is not None:
+        parts.append(f"average heart rate {workout.average_heart_rate:.0f} bpm")
+    return ", ".join(parts) + "."
+
+
+def describe_journal(entry: JournalEntry) -> str:
+    answers = []
+    for response in sorted(entry.responses, key=lambda r: r.behavior_key):
+        if response.bool_value is not None:
+            answers.append(f"{response.behavior_key} {'yes' if response.bool_value else 'no'}")
+        elif response.numeric_value is not None:
+            answers.append(f"{response.behavior_key} {response.numeric_value:g}")
+        elif response.scale_value is not None:
+            answers.append(f"{response.behavior_key} {response.scale_value}/5")
+    return f"{entry.date.isoformat()} journal: {', '.join(answers) or 'no answers'}."
+
+
+async def build_documents(
+    session: AsyncSession, user_id: uuid.UUID, dates: Iterable[date]
+) -> list[dict]:
+    """Document rows (without embeddings) for the user's data on ``dates``."""
+    days = sorted(set(dates))
+    if not days:
+        return []
+
+    docs: list[dict] = []
+    metrics = await session.execute(
+        select(DailyMetric).where(DailyMetric.user_id == user_id, DailyMetric.date.in_(days))
+    )
+    for metric in metrics.scalars():
+        docs.append(_doc("day", metric.date.isoformat(), metric.date, describe_day(metric)))
+
+    window_start = datetime.combine(days[0], time.min, timezone.utc)
+    window_end = datetime.combine(days[-1] + timedelta(days=1), time.min, timezone.utc)
+    workouts = await session.execute(
+        select(Workout).where(
+            Workout.user_id == user_id,
+            Workout.start_date >= window_start,
+            Workout.start_date < window_end,
+        )
+    )
+    wanted = set(days)
+    for workout in workouts.scalars():
+        workout_day = workout.start_date.date()
+        if workout_day in wanted:
+            docs.append(_doc("workout", str(workout.id), workout_day, describe_workout(workout)))
+
+    entries = await session.execute(
+        select(JournalEntry).where(JournalEntry.user_id == user_id, JournalEntry.date.in_(days))
+    )
+    for entry in entries.scalars():
+        docs.append(_doc("journal", entry.date.isoformat(), entry.date, describe_journal(entry)))
+    return docs
+
+
+async def index_days(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    dates: Iterable[date],
+    *,
+    embedder: Embedder | None = None,
+    index: VectorIndex | None = None,
+) -> int:
+    """Embed and upsert the user's documents for ``dates``; returns how many changed."""
+    docs = await build_documents(session, user_id, dates)
+    stored = await coach_repo.get_document_hashes(
+        session, user_id, [(d["source"], d["source_key"]) for d in docs]
+    )
+    changed = [
+        d for d in docs if stored.get((d["source"], d["source_key"])) != d["content_hash"]
+    ]
+    if not changed:
+        return 0
+
+    embedder = embedder or get_embedder()
+    vectors = await embedder.embed([d["content"] for d in changed])
+    rows = [
+        {"user_id": user_id, **doc, "embedding": vector}
+        for doc, vector in zip(changed, vectors)
+    ]
+    written = await coach_repo.upsert_documents(session, rows)
+    await (index or get_vector_index()).add(user_id, written)
+    return len(written)
+
+
+async def retrieve(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    query: str,
+    *,
+    k: int = RETRIEVAL_K,
+    query_vector: list[float] | None = None,
+    embedder: Embedder | None = None,
+    index: VectorIndex | None = None,
+) -> list[RetrievedDocument]:
+    """Top-``k`` documents from the user's history most relevant to ``query``.
+
+    Pass ``query_vector`` when the caller has already embedded the query.
+    """
+    vector = query_vector
+    if vector is None:
+        [vector] = await (embedder or get_embedder()).embed([query])
+    hits = await (index or get_vector_index()).search(session, user_id, vector, k)
+    documents = await coach_repo.get_documents(session, [doc_id for doc_id, _ in hits])
+    return [
+        RetrievedDocument(doc.source, doc.doc_date, doc.content, score)
+        for doc_id, score in hits
+        if (doc := documents.get(doc_id)) is not None
+    ]
+
+
+def _doc(source: str, source_key: str, doc_date: date, content: str) -> dict:
+    return {
+        "source": source,
+        "source_key": source_key,
+        "doc_date": doc_date,
+        "content": content,
+        "content_hash": hashlib.sha256(content.encode()).hexdigest(),
+    }
@@ -1,60 +1,165 @@
-"""Coach service — AI coach RAG pipeline (placeholder)."""
+"""Coach service — AI coach RAG pipeline.
+
+A reply is built from a prompt holding the user's prebuilt context
+snapshot (see ``coach_context``), the history documents most relevant to
+the question (see ``coach_retrieval``) and the last few turns of the
+conversation, then streamed from the configured generator (see
+``app.core.coach_llm``) or replayed from the semantic cache (see
+``coach_cache``). The assistant message is persisted once the
+stream completes.
+"""
 
 from __future__ import annotations
 
 import logging
+import re
+import time
 import uuid
+from collections.abc import AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.repositories import coach_repo, metrics_repo
+from app.core.coach_llm import CoachGenerator, CoachPrompt, get_coach_generator
+from app.core.redis_client import get_redis_or_none
+from app.core.vector_index import get_embedder
+from app.db.repositories import coach_repo
 from app.models.coach import CoachMessage
+from app.services import coach_cache, coach_context, coach_retrieval
 
 logger = logging.getLogger(__name__)
 
+HISTORY_TURNS = 10
+SYSTEM_PROMPT = (
+    "You are Zyva, a concise, encouraging health and fitness coach. Ground every "
+    "recommendation in the user's metrics below and never give medical diagnoses."
+)
 
-async def generate_response(
+
+async def build_context(session: AsyncSession, user_id: uuid.UUID) -> str:
+    """Render the user's prebuilt context snapshot for the prompt."""
+    return coach_context.render(await coach_context.get_snapshot(session, user_id))
+
+
+async def build_prompt(
     session: AsyncSession,
     user_id: uuid.UUID,
     conversation_id: uuid.UUID,
     user_message: str,
-) -> CoachMessage:
-    """Generate an AI coach response.
+    *,
+    question_vector: list[float] | None = None,
+    context: str | None = None,
+    history: list[CoachMessage] | None = None,
+) -> CoachPrompt:
+    if history is None:
+        history, _ = await coach_repo.list_messages(
+            session, conversation_id, limit=HISTORY_TURNS
+        )
+    retrieved = await coach_retrieval.retrieve(
+        session, user_id, user_message, query_vector=question_vector
+    )
+    return CoachPrompt(
+        system=SYSTEM_PROMPT,
+        context=context if context is not None else await build_context(session, user_id),
+        message=user_message,
+        history=[(m.role, m.content) for m in history],
+        retrieved=[doc.content for doc in retrieved],
+    )
 
-    In production this would:
-    1. Retrieve recent metrics as context (RAG).
-    2. Build a prompt with user history.
-    3. Call Vertex AI (Gemini) or Claude API.
-    4. Return the generated response.
 
-    Currently returns a contextual placeholder.
-    """
-    # Fetch recent metrics for context
-    from datetime import date, timedelta
+async def stream_response(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    conversation_id: uuid.UUID,
+    user_message: str,
+    *,
+    generator: CoachGenerator | None = None,
+) -> AsyncIterator[str | CoachMessage]:
+    """Save the user's message and stream the coach's reply.
 
-    today = date.today()
-    week_ago = today - timedelta(days=7)
-    recent_metrics, _ = await metrics_repo.list_by_date_range(
-        session, user_id, week_ago, today, limit=7
+    Yields text deltas as they are generated, then the persisted assistant
+    ``CoachMessage`` as the final item. Opening questions (no prior turns)
+    go through the semantic cache, looked up from the question vector and
+    the snapshot's fingerprint before retrieval runs; a hit replays the
+    cached reply without building a prompt.
+    """
+    [question_vector] = await get_embedder().embed(
+        [coach_cache.normalize_question(user_message)]
     )
+    context = await build_context(session, user_id)
+    history, _ = await coach_repo.list_messages(session, conversation_id, limit=HISTORY_TURNS)
 
-    # Build context summary
-    if recent_metrics:
-        avg_recovery = sum(
-            m.recovery_score for m in recent_metrics if m.recovery_score
-        ) / max(1, sum(1 for m in recent_metrics if m.recovery_score))
-        context = f"Your average recovery this week is {avg_recovery:.0f}%. "
-    else:
-        context = "I don't have recent metrics to analyze yet. "
-
-    # Placeholder AI response
-    response_text = (
-        f"{context}"
-        f"Based on your question: '{user_message[:100]}', "
-        "I recommend maintaining consistent sleep habits and "
-        "adjusting your training intensity based on your daily recovery score."
+    redis = get_redis_or_none()
+    cacheable = redis is not None and not history
+    fingerprint = coach_cache.context_fingerprint(context)
+    cached = (
+        await coach_cache.lookup(redis, user_id, question_vector, fingerprint)
+        if cacheable
+        else None
     )
+    if cached is not None:
+        deltas = _replay(cached.response)
+    else:
+        prompt = await build_prompt(
+            session,
+            user_id,
+            conversation_id,
+            user_message,
+            question_vector=question_vector,
+            context=context,
+            history=history,
+        )
+        deltas = (generator or get_coach_generator()).stream(prompt)
+    await coach_repo.add_message(session, conversation_id, "user", user_message)
 
-    return await coach_repo.add_message(
-        session, conversation_id, "assistant", response_text
+    started = time.perf_counter()
+    first_token_at: float | None = None
+    parts: list[str] = []
+    async for delta in deltas:
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        parts.append(delta)
+        yield delta
+
+    finished = time.perf_counter()
+    total_ms = (finished - started) * 1000
+    logger.info(
+        "Coach reply conversation=%s cached=%s ttft_ms=%.1f total_ms=%.1f deltas=%d",
+        conversation_id,
+        cached is not None,
+        ((first_token_at or finished) - started) * 1000,
+        total_ms,
+        len(parts),
     )
+    if cacheable:
+        if cached is not None:
+            await coach_cache.record(redis, hit=True, saved_ms=cached.generation_ms - total_ms)
+        else:
+            await coach_cache.store(
+                redis, user_id, question_vector, fingerprint, "".join(parts), total_ms
+            )
+            await coach_cache.record(redis, hit=False)
+    yield await coach_repo.add_message(session, conversation_id, "assistant", "".join(parts))
+
+
+async def generate_response(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    conversation_id: uuid.UUID,
+    user_message: str,
+    *,
+    generator: CoachGenerator | None = None,
+) -> CoachMessage:
+    """Save the user's message and return the complete coach reply."""
+    reply: CoachMessage | None = None
+    async for item in stream_response(
+        session, user_id, conversation_id, user_message, generator=generator
+    ):
+        if isinstance(item, CoachMessage):
+            reply = item
+    assert reply is not None
+    return reply
+
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    for token in re.findall(r"\S+\s*", text):
+        yield token
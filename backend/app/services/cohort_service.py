@@ -0,0 +1,220 @@
+"""Cohort comparisons — where a user's metrics fall among their peers.
+
+A t-digest per metric × age band × biological sex is rebuilt each night
+from the trailing ``WINDOW_DAYS`` of ``daily_metrics`` and stored in
+``cohort_sketches``. Each user contributes one value per metric, their
+mean over the window, so daily syncers do not outweigh occasional ones,
+old data ages out and corrected days are picked up by the next rebuild.
+API processes hold the digests (plus merged
+all-sexes and all-ages views) in memory and reload them periodically, so
+a percentile lookup touches no database. The same digests give new users
+cohort priors for their recovery baselines before they have enough
+history of their own.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import cohort_repo
+from app.engines.baseline_engine import BaselineResult
+from app.engines.quantile_sketch import TDigest
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+COHORT_METRICS = [
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "vo2_max",
+    "respiratory_rate",
+    "spo2",
+    "sleep_performance",
+]
+COMPARED_METRICS = ["hrv_rmssd", "resting_heart_rate", "vo2_max"]
+AGE_BANDS = [(30, "<30"), (40, "30-39"), (50, "40-49"), (60, "50-59"), (None, "60+")]
+ALL = "all"
+WINDOW_DAYS = 30
+MIN_COHORT_COUNT = 30
+RELOAD_SECONDS = 3600
+PRIOR_PSEUDO_COUNT = 3
+IQR_TO_STD = 1.349
+
+_index: CohortIndex | None = None
+
+
+def age_band(date_of_birth: date | None, on: date) -> str | None:
+    if date_of_birth is None:
+        return None
+    birthday_pending = (on.month, on.day) < (date_of_birth.month, date_of_birth.day)
+    age = on.year - date_of_birth.year - birthday_pending
+    for upper, label in AGE_BANDS:
+        if upper is None or age < upper:
+            return label
+    return None
+
+
+def normalize_sex(biological_sex: str | None) -> str:
+    value = (biological_sex or "").strip().lower()
+    if value in ("female", "f"):
+        return "female"
+    if value in ("male", "m"):
+        return "male"
+    return "unknown"
+
+
+@dataclass
+class CohortIndex:
+    """In-memory digests keyed by ``(metric, age_band, sex)``, including merged views."""
+
+    digests: dict[tuple[str, str, str], TDigest] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, exact: dict[tuple[str, str, str], TDigest]) -> CohortIndex:
+        digests = dict(exact)
+        for (metric, band, sex), digest in exact.items():
+            for key in ((metric, band, ALL), (metric, ALL, sex), (metric, ALL, ALL)):
+                merged = digests.setdefault(key, TDigest(digest.compression))
+                merged.merge(digest)
+        return cls(digests)
+
+    def lookup(self, metric: str, band: str | None, sex: str) -> tuple[TDigest, str, str] | None:
+        """Narrowest cohort with at least ``MIN_COHORT_COUNT`` values."""
+        for key_band, key_sex in ((band, sex), (band, ALL), (ALL, sex), (ALL, ALL)):
+            if key_band is None:
+                continue
+            digest = self.digests.get((metric, key_band, key_sex))
+            if digest is not None and digest.count >= MIN_COHORT_COUNT:
+                return digest, key_band, key_sex
+        return None
+
+
+async def refresh(session: AsyncSession, through: date | None = None) -> int:
+    """Rebuild the sketches over the window ending ``through``; returns values added.
+
+    A window that has already been built is skipped.
+    """
+    through = through or date.today() - timedelta(days=1)
+    stored = await cohort_repo.list_sketches(session)
+    if stored and min(s.through_date for s in stored) >= through:
+        return 0
+
+    digests: dict[tuple[str, str, str], TDigest] = {}
+    added = 0
+    async for row in cohort_repo.stream_user_means(
+        session, COHORT_METRICS, through - timedelta(days=WINDOW_DAYS), through
+    ):
+        date_of_birth, biological_sex, *means = row
+        band = age_band(date_of_birth, through)
+        if band is None:
+            continue
+        sex = normalize_sex(biological_sex)
+        for metric, mean in zip(COHORT_METRICS, means):
+            if mean is not None:
+                digests.setdefault((metric, band, sex), TDigest()).add(float(mean))
+                added += 1
+
+    await cohort_repo.replace_sketches(
+        session,
+        [
+            {
+                "id": uuid.uuid4(),
+                "metric": metric,
+                "age_band": band,
+                "sex": sex,
+                "count": digest.count,
+                "digest": digest.to_dict(),
+                "through_date": through,
+            }
+            for (metric, band, sex), digest in digests.items()
+        ],
+    )
+    invalidate()
+    logger.info("Cohort sketches rebuilt from %d user means through %s", added, through)
+    return added
+
+
+async def get_index(session: AsyncSession) -> CohortIndex:
+    """The in-memory cohort index, (re)loaded from the database when stale."""
+    global _index  # noqa: PLW0603
+    if _index is None or time.monotonic() - _index.loaded_at > RELOAD_SECONDS:
+        stored = await cohort_repo.list_sketches(session)
+        _index = CohortIndex.build(
+            {(s.metric, s.age_band, s.sex): TDigest.from_dict(s.digest) for s in stored}
+        )
+    return _index
+
+
+def invalidate() -> None:
+    """Drop the in-memory index so the next lookup reloads it."""
+    global _index  # noqa: PLW0603
+    _index = None
+
+
+async def compare(
+    session: AsyncSession, user: User, values: dict[str, float | None], on: date | None = None
+) -> list[dict]:
+    """Percentile of each value within the user's cohort."""
+    index = await get_index(session)
+    band = age_band(user.date_of_birth, on or date.today())
+    sex = normalize_sex(user.biological_sex)
+    comparisons = []
+    for metric, value in values.items():
+        found = index.lookup(metric, band, sex)
+        if value is None or found is None:
+            continue
+        digest, cohort_band, cohort_sex = found
+        cdf = digest.cdf(value)
+        p25, p50, p75 = (digest.quantile(q) for q in (0.25, 0.5, 0.75))
+        if cdf is None or p25 is None or p50 is None or p75 is None:
+            continue  # an empty digest
+        comparisons.append(
+            {
+                "metric": metric,
+                "value": value,
+                "percentile": round(cdf * 100, 1),
+                "age_band": cohort_band,
+                "sex": cohort_sex,
+                "cohort_size": int(digest.count),
+                "p25": p25,
+                "p50": p50,
+                "p75": p75,
+            }
+        )
+    return comparisons
+
+
+async def baseline_priors(
+    session: AsyncSession, user: User, on: date | None = None
+) -> dict[str, BaselineResult]:
+    """Cohort priors for ``compute_baseline``, keyed by metric column.
+
+    The prior mean is the cohort median and its spread the IQR-derived
+    standard deviation, weighted as ``PRIOR_PSEUDO_COUNT`` samples.
+    """
+    index = await get_index(session)
+    band = age_band(user.date_of_birth, on or date.today())
+    sex = normalize_sex(user.biological_sex)
+    priors = {}
+    for metric in COHORT_METRICS:
+        found = index.lookup(metric, band, sex)
+        if found is None:
+            continue
+        p25, p50, p75 = (found[0].quantile(q) for q in (0.25, 0.5, 0.75))
+        if p25 is None or p50 is None or p75 is None:
+            continue  # an empty digest
+        spread = (p75 - p25) / IQR_TO_STD
+        priors[metric] = BaselineResult(
+            mean=p50,
+            standard_deviation=max(spread, 0.001),
+            sample_count=PRIOR_PSEUDO_COUNT,
+            window_days=28,
+        )
+    return priors
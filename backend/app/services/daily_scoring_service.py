@@ -0,0 +1,103 @@
+"""Daily scoring service — user-days through ``DailyScoringPipeline``.
+
+A day's pipeline history comes from state the write path already keeps
+exact: vitals from the user's stored baseline window (``baseline_service``)
+and the trailing nights' strain, bed and wake times and ledger hours and
+needs (``sleep_service.load_nights``), loaded once per ``Scorer`` for every
+day it scores. ``Scorer.score_day`` scores one day through the engine memo;
+``Scorer.score_days`` scores a run of days with ``run_batch``, carrying
+each day into the next one's history.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta, tzinfo
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.engines.baseline_engine import BaselineResult
+from app.engines.config import get_scoring_config
+from app.engines.daily_pipeline import DailyHistory, DailyScoringResult, DayBundle
+from app.engines.sleep_ledger import DEBT_WINDOW_NIGHTS
+from app.models.user import User
+from app.services import (
+    baseline_service,
+    cohort_service,
+    engine_memo,
+    scoring_service,
+    sleep_service,
+)
+
+
+def _lookback_nights() -> int:
+    return max(get_scoring_config().sleep.consistencyWindowNights, DEBT_WINDOW_NIGHTS)
+
+
+@dataclass
+class Scorer:
+    """One user's scoring inputs for the days ``load`` covered."""
+
+    user_id: uuid.UUID
+    priors: dict[str, BaselineResult]
+    tz: tzinfo
+    nights: dict[date, sleep_service.Night]
+
+    @classmethod
+    async def load(
+        cls, session: AsyncSession, user: User, from_date: date, to_date: date
+    ) -> Scorer:
+        """Priors, timezone and stored nights for scoring ``from_date`` … ``to_date``."""
+        tz = await sleep_service.user_zone(session, user.id)
+        nights = await sleep_service.load_nights(
+            session,
+            user.id,
+            from_date - timedelta(days=_lookback_nights()),
+            to_date,
+            tz,
+        )
+        priors = await cohort_service.baseline_priors(session, user)
+        return cls(user.id, priors, tz, nights)
+
+    def night(self, day: date) -> sleep_service.Night:
+        return self.nights.get(day) or sleep_service.Night()
+
+    async def history(self, session: AsyncSession, day: date) -> DailyHistory:
+        """The pipeline history ending the day before ``day``."""
+        vitals = await baseline_service.get_daily_history(session, self.user_id, day)
+        trailing = [
+            self.night(day - timedelta(days=offset))
+            for offset in range(_lookback_nights(), 0, -1)
+        ]
+        return DailyHistory(
+            hrv=vitals["hrv_rmssd"],
+            resting_heart_rate=vitals["resting_heart_rate"],
+            respiratory_rate=vitals["respiratory_rate"],
+            spo2=vitals["spo2"],
+            sleep_performance=vitals["sleep_performance"],
+            sleep_hours=[n.sleep_hours for n in trailing],
+            sleep_needs=[n.need_hours for n in trailing],
+            bedtime_minutes=[n.bedtime_minutes for n in trailing],
+            wake_time_minutes=[n.wake_time_minutes for n in trailing],
+            previous_strain=self.night(day - timedelta(days=1)).strain,
+        )
+
+    async def score_day(self, session: AsyncSession, day: DayBundle) -> DailyScoringResult:
+        """Score one day; its strain is kept for the next day scored."""
+        history = await self.history(session, day.date)
+        result = await engine_memo.daily(day, history, priors=self.priors, tz=self.tz)
+        if day.strain is not None:
+            self.nights.setdefault(day.date, sleep_service.Night()).strain = day.strain
+        return result
+
+    async def score_days(
+        self, session: AsyncSession, days: list[DayBundle]
+    ) -> list[DailyScoringResult]:
+        """Score ``days`` in date order with one history read for the first day."""
+        if not days:
+            return []
+        first = min(day.date for day in days)
+        history = await self.history(session, first)
+        pipeline = scoring_service.daily_pipeline(self.priors, self.tz)
+        return pipeline.run_batch(days, history)
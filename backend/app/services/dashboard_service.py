@@ -0,0 +1,143 @@
+"""Dashboard service — builds and caches the dashboard summary.
+
+The summary is built from one column-only range read over the last seven
+days (today's values are the last row) plus the user's baseline row. Built
+responses are cached per date in the user's cache namespace. Metric,
+journal and workout writes call ``invalidate``, which retires the
+namespace immediately and again once the writing transaction commits, so
+a read racing the commit cannot leave the old data cached.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_cache, user_namespace
+from app.db import after_commit
+from app.db.repositories import metrics_repo
+from app.schemas.dashboard import (
+    DashboardSummaryResponse,
+    HealthMonitorStatus,
+    WeeklyMetricDay,
+)
+from app.services import baseline_service
+
+CACHE_TTL_SECONDS = 6 * 3600
+WEEK_DAYS = 7
+_PENDING_KEY = "dashboard_stale_users"
+
+_DAY_COLUMNS = [
+    "recovery_score",
+    "recovery_zone",
+    "strain_score",
+    "sleep_performance",
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "vo2_max",
+    "steps",
+    "active_calories",
+    "spo2",
+    "respiratory_rate",
+]
+_HEALTH_CHECKS = ["hrv_rmssd", "resting_heart_rate", "spo2", "respiratory_rate"]
+
+
+async def build_summary(
+    session: AsyncSession, user_id: uuid.UUID, day: date
+) -> DashboardSummaryResponse:
+    rows = await metrics_repo.list_day_columns(
+        session, user_id, _DAY_COLUMNS, day - timedelta(days=WEEK_DAYS - 1), day
+    )
+    today = rows[-1] if rows and rows[-1].date == day else None
+    window = await baseline_service.get_window(session, user_id, day)
+    steps_baseline = window.mean("steps")
+
+    return DashboardSummaryResponse(
+        date=day,
+        recovery_score=today.recovery_score if today else None,
+        recovery_zone=today.recovery_zone if today else None,
+        strain_score=today.strain_score if today else None,
+        sleep_performance=today.sleep_performance if today else None,
+        hrv_rmssd=today.hrv_rmssd if today else None,
+        resting_heart_rate=today.resting_heart_rate if today else None,
+        vo2_max=today.vo2_max if today else None,
+        steps=today.steps if today else None,
+        active_calories=today.active_calories if today else None,
+        stress_average=None,  # Computed on-device
+        health_monitor=health_monitor(today, window),
+        stress_timeline=[],  # Computed on-device from HealthKit
+        weekly_history=[
+            WeeklyMetricDay(
+                date=row.date,
+                strain_score=row.strain_score,
+                recovery_score=row.recovery_score,
+                recovery_zone=row.recovery_zone,
+            )
+            for row in rows
+        ],
+        journal_week=[],  # TODO: wire journal repo
+        active_plan=None,  # TODO: wire plans
+        hrv_baseline=window.mean("hrv_rmssd"),
+        rhr_baseline=window.mean("resting_heart_rate"),
+        vo2_max_baseline=window.mean("vo2_max"),
+        calories_baseline=window.mean("active_calories"),
+        steps_baseline=int(steps_baseline) if steps_baseline else None,
+    )
+
+
+def health_monitor(today, window: baseline_service.BaselineWindow) -> HealthMonitorStatus:
+    """Count today's vitals within 1.5 standard deviations of their baseline."""
+    if not today:
+        return HealthMonitorStatus(metrics_in_range=0, total_metrics=5, is_within_range=False)
+
+    in_range = 0
+    total = 0
+    for attr in _HEALTH_CHECKS:
+        current_val = getattr(today, attr)
+        mean = window.mean(attr)
+        if mean is None or current_val is None:
+            continue
+        total += 1
+        stdev = window.stdev(attr)
+        if stdev is None:
+            stdev = mean * 0.1
+        if abs(current_val - mean) <= 1.5 * stdev:
+            in_range += 1
+
+    if total == 0:
+        return HealthMonitorStatus(metrics_in_range=0, total_metrics=0, is_within_range=True)
+
+    return HealthMonitorStatus(
+        metrics_in_range=in_range, total_metrics=total, is_within_range=(in_range == total)
+    )
+
+
+async def get_summary(
+    session: AsyncSession, user_id: uuid.UUID, day: date
+) -> DashboardSummaryResponse:
+    """Cached summary for ``day``, building and caching it on a miss."""
+
+    async def load() -> dict:
+        summary = await build_summary(session, user_id, day)
+        return summary.model_dump(mode="json")
+
+    # No stale-while-revalidate: the loader needs the request's session.
+    data = await get_cache().get_or_load(
+        user_namespace(user_id), f"dashboard:{day.isoformat()}", load, ttl=CACHE_TTL_SECONDS
+    )
+    return DashboardSummaryResponse.model_validate(data)
+
+
+async def invalidate(session: AsyncSession, user_id: uuid.UUID) -> None:
+    """Retire the user's cached summaries now and again after ``session`` commits."""
+    after_commit.defer(session, _PENDING_KEY, user_id)
+    await get_cache().invalidate(user_namespace(user_id))
+
+
+@after_commit.on_commit(_PENDING_KEY)
+async def _invalidate_all(user_ids: list[uuid.UUID]) -> None:
+    for user_id in set(user_ids):
+        await get_cache().invalidate(user_namespace(user_id))
@@ -0,0 +1,189 @@
+"""Engine memoization — content-addressed cache of scoring engine results.
+
+Every engine call is keyed by a SHA-256 of its canonical inputs (sorted
+JSON, including the baseline values and cohort priors it scores against)
+and a digest of the scoring config, so identical inputs under the same
+config share one result across users and instances and any config change
+starts afresh. Results live in the shared two-tier cache; hits and misses
+per engine are counted in Redis and exposed through ``stats``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import asdict, replace
+from datetime import UTC, date, tzinfo
+from functools import lru_cache
+from typing import Any, ClassVar, Protocol, TypeVar
+
+import redis.asyncio as aioredis
+
+from app.core.cache import get_cache
+from app.core.redis_client import get_redis_or_none
+from app.engines.baseline_engine import BaselineResult
+from app.engines.config import get_scoring_config
+from app.engines.daily_pipeline import DailyHistory, DailyScoringResult, DayBundle
+from app.engines.recovery_engine import RecoveryBaselines, RecoveryResult, RecoveryZone
+from app.engines.sleep_engine import SleepAnalysisResult, SleepSessionData, SleepStageData
+from app.engines.strain_engine import StrainResult
+from app.services import scoring_service
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "engine"
+RESULT_TTL_SECONDS = 7 * 24 * 3600
+STATS_KEY = "engine:memo:stats"
+ENGINES = ("daily", "strain")
+
+
+class _Dataclass(Protocol):
+    __dataclass_fields__: ClassVar[dict[str, Any]]
+
+
+T = TypeVar("T", bound=_Dataclass)
+
+
+@lru_cache(maxsize=1)
+def config_digest() -> str:
+    config = get_scoring_config()
+    return f"{config.version}:{hashlib.sha256(config.model_dump_json().encode()).hexdigest()[:16]}"
+
+
+def fingerprint(engine: str, inputs: dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {"engine": engine, "config": config_digest(), "inputs": inputs},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def memoize(
+    engine: str,
+    inputs: dict[str, Any],
+    compute: Callable[[], T | None],
+    *,
+    decode: Callable[[dict[str, Any]], T],
+    encode: Callable[[T], dict[str, Any]] = asdict,
+) -> T | None:
+    """``compute()``'s result for ``inputs``, from the cache when it has been seen."""
+    computed = False
+
+    async def load() -> dict[str, Any] | None:
+        nonlocal computed
+        computed = True
+        result = compute()
+        return encode(result) if result is not None else None
+
+    data = await get_cache().get_or_load(
+        NAMESPACE, f"{engine}:{fingerprint(engine, inputs)}", load, ttl=RESULT_TTL_SECONDS
+    )
+    await _record(engine, hit=not computed)
+    return decode(data) if data is not None else None
+
+
+async def daily(
+    day: DayBundle,
+    history: DailyHistory,
+    *,
+    priors: dict[str, BaselineResult] | None = None,
+    tz: tzinfo = UTC,
+) -> DailyScoringResult:
+    """Memoized ``DailyScoringPipeline.run``; the day's date is not part of the key."""
+    bundle = asdict(day)
+    del bundle["date"]
+    inputs = {
+        "day": bundle,
+        "history": asdict(history),
+        "priors": {name: asdict(prior) for name, prior in (priors or {}).items()},
+        "tz": str(tz),
+    }
+    result = await memoize(
+        "daily",
+        inputs,
+        lambda: scoring_service.daily_pipeline(priors, tz).run(day, history),
+        encode=lambda r: {**asdict(r), "date": r.date.isoformat()},
+        decode=_decode_daily,
+    )
+    assert result is not None  # run() always scores the day
+    return replace(result, date=day.date)
+
+
+def _decode_daily(data: dict[str, Any]) -> DailyScoringResult:
+    def baseline(value: dict[str, Any] | None) -> BaselineResult | None:
+        return BaselineResult(**value) if value is not None else None
+
+    def session(value: dict[str, Any]) -> SleepSessionData:
+        return SleepSessionData(
+            **{**value, "stages": [SleepStageData(**stage) for stage in value["stages"]]}
+        )
+
+    sleep = data["sleep"]
+    low, high = data["strain_target"]
+    return DailyScoringResult(
+        date=date.fromisoformat(data["date"]),
+        baselines=RecoveryBaselines(
+            **{name: baseline(value) for name, value in data["baselines"].items()}
+        ),
+        sleep=SleepAnalysisResult(
+            **{
+                **sleep,
+                "main_sleep": session(sleep["main_sleep"]) if sleep["main_sleep"] else None,
+                "naps": [session(nap) for nap in sleep["naps"]],
+            }
+        )
+        if sleep is not None
+        else None,
+        recovery=RecoveryResult(
+            **{**data["recovery"], "zone": RecoveryZone(data["recovery"]["zone"])}
+        ),
+        strain_target=(low, high),
+        next_sleep_need_hours=data["next_sleep_need_hours"],
+        sleep_debt_hours=data["sleep_debt_hours"],
+    )
+
+
+async def strain(
+    max_heart_rate: int, hr_samples: list[tuple[int, float]]
+) -> StrainResult | None:
+    """Memoized ``scoring_service.compute_strain``."""
+    return await memoize(
+        "strain",
+        {"max_heart_rate": max_heart_rate, "hr_samples": hr_samples},
+        lambda: scoring_service.compute_strain(max_heart_rate, hr_samples),
+        decode=lambda d: StrainResult(**d),
+    )
+
+
+async def _record(engine: str, *, hit: bool) -> None:
+    redis = get_redis_or_none()
+    if redis is None:
+        return
+    try:
+        await redis.hincrby(STATS_KEY, f"{engine}:{'hits' if hit else 'misses'}", 1)
+    except aioredis.RedisError as exc:
+        logger.warning("Engine memo stats update failed: %s", exc)
+
+
+async def stats(redis: aioredis.Redis | None) -> dict[str, dict[str, float]]:
+    """Hits, misses and hit rate per engine across all instances; zeros without Redis."""
+    raw = {}
+    if redis is not None:
+        try:
+            raw = await redis.hgetall(STATS_KEY)
+        except aioredis.RedisError as exc:
+            logger.warning("Engine memo stats read failed: %s", exc)
+    result = {}
+    for engine in ENGINES:
+        hits = int(raw.get(f"{engine}:hits", 0))
+        misses = int(raw.get(f"{engine}:misses", 0))
+        lookups = hits + misses
+        result[engine] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+    return result
@@ -1,13 +1,22 @@
-"""Healthspan service — VitalOS Age computation using the full LongevityEngine."""
+"""Healthspan service — VitalOS Age computation using the full LongevityEngine.
+
+Window averages are computed in SQL (one GROUP BY per batch of users),
+sleep consistency comes from the running bed / wake time sums kept by
+``sleep_timing_service`` (two row reads per window), and scores are
+upserted, one row per user per day, so the nightly batch and
+on-demand recomputes never collide on ``uq_healthspan_scores_user_date``.
+"""
 
 from __future__ import annotations
 
+import logging
 import uuid
 from datetime import date, timedelta
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db.repositories import metrics_repo
+from app.db.repositories import healthspan_repo, metrics_repo
 from app.engines.longevity_engine import (
     LongevityResult,
     MetricID,
@@ -16,98 +25,173 @@ from app.engines.longevity_engine import (
 )
 from app.models.healthspan import HealthspanScore
 from app.models.user import User
+from app.services import sleep_timing_service
+
+logger = logging.getLogger(__name__)
+
+LONG_WINDOW_DAYS = 180
+# Feeds the engine's ``thirty_day_avg`` inputs. Four whole weeks weights each
+# weekday equally (weekend sleep and step counts skew a 30-day mean). Both
+# windows end on, and include, the scored day.
+RECENT_WINDOW_DAYS = 28
+BATCH_CHUNK_SIZE = 500
+
+# Longevity engine inputs fed from daily_metrics columns.
+_LONGEVITY_COLUMNS: dict[MetricID, str] = {
+    MetricID.HOURS_OF_SLEEP: "sleep_duration_hours",
+    MetricID.RESTING_HEART_RATE: "resting_heart_rate",
+    MetricID.VO2_MAX: "vo2_max",
+    MetricID.DAILY_STEPS: "steps",
+}
+_SUBSCORE_COLUMNS = ["recovery_score", "sleep_performance", "strain_score"]
+AVERAGED_COLUMNS = list(_LONGEVITY_COLUMNS.values()) + _SUBSCORE_COLUMNS
+
+WindowAverages = dict[str, tuple[float | None, float | None]]
+
+
+def build_score(
+    user_id: uuid.UUID,
+    date_of_birth: date,
+    on_date: date,
+    averages: WindowAverages,
+    sleep_consistency: tuple[float | None, float | None] = (None, None),
+) -> dict | None:
+    """Run the longevity engine over pre-aggregated window averages.
+
+    ``averages`` maps a ``daily_metrics`` column to its (180-day, 28-day)
+    averages, and ``sleep_consistency`` gives the same two windows' sleep
+    consistency. Returns the ``healthspan_scores`` row values, or None
+    when there is nothing to score.
+    """
+    chrono_age = (on_date - date_of_birth).days / 365.25
 
+    inputs = [
+        MetricInput(
+            id=metric_id,
+            six_month_avg=averages[column][0],
+            thirty_day_avg=averages[column][1],
+        )
+        for metric_id, column in _LONGEVITY_COLUMNS.items()
+    ]
+    inputs.append(
+        MetricInput(
+            id=MetricID.SLEEP_CONSISTENCY,
+            six_month_avg=sleep_consistency[0],
+            thirty_day_avg=sleep_consistency[1],
+        )
+    )
 
-def _avg(values: list[float | None]) -> float | None:
-    filtered = [v for v in values if v is not None]
-    return sum(filtered) / len(filtered) if filtered else None
-
-
-async def compute_healthspan(
-    session: AsyncSession, user_id: uuid.UUID
-) -> HealthspanScore | None:
-    """Compute a daily healthspan / VitalOS Age score using the LongevityEngine.
+    # Filter out inputs with no data
+    inputs = [i for i in inputs if i.six_month_avg is not None or i.thirty_day_avg is not None]
 
-    Replaces the previous simplified linear model with the full
-    dose-response curve engine (9 metrics, Gompertz mortality model).
-    """
-    user = await session.get(User, user_id)
-    if not user or not user.date_of_birth:
+    if not inputs:
         return None
 
-    today = date.today()
-    chrono_age = (today - user.date_of_birth).days / 365.25
+    result: LongevityResult = compute(chrono_age, inputs)
 
-    # Fetch 180-day and 28-day windows for the longevity engine
-    start_180 = today - timedelta(days=180)
-    start_28 = today - timedelta(days=28)
+    # Build recovery/sleep/activity sub-scores from the 28-day window
+    avg_recovery = averages["recovery_score"][1]
+    avg_sleep = averages["sleep_performance"][1]
+    avg_strain = averages["strain_score"][1]
+    activity_score = min(100.0, (avg_strain / 21.0) * 100.0) if avg_strain else None
 
-    metrics_180, _ = await metrics_repo.list_by_date_range(
-        session, user_id, start_180, today, limit=180
+    return {
+        "user_id": user_id,
+        "date": on_date,
+        "vitalos_age": round(result.zyva_age, 1),
+        "biological_age": round(result.zyva_age, 1),
+        "cardiovascular_score": round(avg_recovery, 1) if avg_recovery else None,
+        "recovery_score": round(avg_recovery, 1) if avg_recovery else None,
+        "sleep_score": round(avg_sleep, 1) if avg_sleep else None,
+        "activity_score": round(activity_score, 1) if activity_score else None,
+    }
+
+
+async def compute_scores(
+    session: AsyncSession,
+    users: list[tuple[uuid.UUID, date]],
+    on_date: date,
+) -> list[HealthspanScore]:
+    """Score a batch of ``(user_id, date_of_birth)`` pairs and upsert the results."""
+    averages = await metrics_repo.window_averages(
+        session,
+        [user_id for user_id, _ in users],
+        AVERAGED_COLUMNS,
+        from_date=on_date - timedelta(days=LONG_WINDOW_DAYS - 1),
+        recent_from=on_date - timedelta(days=RECENT_WINDOW_DAYS - 1),
+        to_date=on_date,
     )
-    if not metrics_180:
-        return None
 
-    metrics_28 = [m for m in metrics_180 if m.date >= start_28]
-
-    # Build averages for longevity metrics
-    def avg_field_180(field: str) -> float | None:
-        return _avg([getattr(m, field) for m in metrics_180])
-
-    def avg_field_28(field: str) -> float | None:
-        return _avg([getattr(m, field) for m in metrics_28])
+    user_ids = list(averages)
+    long_consistency = await sleep_timing_service.consistency(
+        session, user_ids, on_date - timedelta(days=LONG_WINDOW_DAYS - 1), on_date
+    )
+    recent_consistency = await sleep_timing_service.consistency(
+        session, user_ids, on_date - timedelta(days=RECENT_WINDOW_DAYS - 1), on_date
+    )
 
-    inputs: list[MetricInput] = [
-        MetricInput(
-            id=MetricID.HOURS_OF_SLEEP,
-            six_month_avg=avg_field_180("sleep_duration_hours"),
-            thirty_day_avg=avg_field_28("sleep_duration_hours"),
-        ),
-        MetricInput(
-            id=MetricID.RESTING_HEART_RATE,
-            six_month_avg=avg_field_180("resting_heart_rate"),
-            thirty_day_avg=avg_field_28("resting_heart_rate"),
-        ),
-        MetricInput(
-            id=MetricID.VO2_MAX,
-            six_month_avg=avg_field_180("vo2_max"),
-            thirty_day_avg=avg_field_28("vo2_max"),
-        ),
-        MetricInput(
-            id=MetricID.DAILY_STEPS,
-            six_month_avg=_avg([float(m.steps) for m in metrics_180 if m.steps is not None]),
-            thirty_day_avg=_avg([float(m.steps) for m in metrics_28 if m.steps is not None]),
-        ),
+    rows = [
+        row
+        for user_id, date_of_birth in users
+        if user_id in averages
+        and (
+            row := build_score(
+                user_id,
+                date_of_birth,
+                on_date,
+                averages[user_id],
+                (long_consistency.get(user_id), recent_consistency.get(user_id)),
+            )
+        )
     ]
+    return await healthspan_repo.upsert_many(session, rows)
 
-    # Filter out inputs with no data
-    inputs = [i for i in inputs if i.six_month_avg is not None or i.thirty_day_avg is not None]
 
-    if not inputs:
+async def compute_healthspan(
+    session: AsyncSession, user_id: uuid.UUID, on_date: date | None = None
+) -> HealthspanScore | None:
+    """Compute and upsert a user's healthspan / VitalOS Age score for a day."""
+    result = await session.execute(select(User.date_of_birth).where(User.id == user_id))
+    date_of_birth = result.scalar_one_or_none()
+    if date_of_birth is None:
         return None
 
-    result: LongevityResult = compute(chrono_age, inputs)
+    scores = await compute_scores(session, [(user_id, date_of_birth)], on_date or date.today())
+    return scores[0] if scores else None
 
-    # Build recovery/sleep/activity sub-scores for the ORM model
-    recovery_vals = [m.recovery_score for m in metrics_28 if m.recovery_score is not None]
-    sleep_vals = [m.sleep_performance for m in metrics_28 if m.sleep_performance is not None]
-    strain_vals = [m.strain_score for m in metrics_28 if m.strain_score is not None]
 
-    avg_recovery = sum(recovery_vals) / len(recovery_vals) if recovery_vals else None
-    avg_sleep = sum(sleep_vals) / len(sleep_vals) if sleep_vals else None
-    avg_strain = sum(strain_vals) / len(strain_vals) if strain_vals else None
-    activity_score = min(100.0, (avg_strain / 21.0) * 100.0) if avg_strain else None
+async def run_nightly_batch(
+    session_factory: async_sessionmaker[AsyncSession],
+    on_date: date | None = None,
+    *,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> int:
+    """Score every user for ``on_date`` in chunks, committing per chunk.
 
-    score = HealthspanScore(
-        user_id=user_id,
-        date=today,
-        vitalos_age=round(result.zyva_age, 1),
-        biological_age=round(result.zyva_age, 1),
-        cardiovascular_score=round(avg_recovery, 1) if avg_recovery else None,
-        recovery_score=round(avg_recovery, 1) if avg_recovery else None,
-        sleep_score=round(avg_sleep, 1) if avg_sleep else None,
-        activity_score=round(activity_score, 1) if activity_score else None,
-    )
-    session.add(score)
-    await session.flush()
-    return score
+    Each chunk costs one user page query, one window-aggregate query, four
+    sleep timing sum reads (two per consistency window) and one multi-row
+    upsert. Returns the number of scores written.
+    """
+    on_date = on_date or date.today()
+    written = 0
+    after_id: uuid.UUID | None = None
+
+    while True:
+        async with session_factory() as session:
+            users = await healthspan_repo.list_users_with_birth_date(
+                session, after_id=after_id, limit=chunk_size
+            )
+            if not users:
+                break
+            scores = await compute_scores(session, users, on_date)
+            await session.commit()
+
+        written += len(scores)
+        after_id = users[-1][0]
+        logger.info(
+            "Healthspan batch date=%s chunk=%d scored=%d", on_date, len(users), len(scores)
+        )
+        if len(users) < chunk_size:
+            break
+
+    return written
@@ -1,16 +1,42 @@
-"""Journal service — entry CRUD and impact correlation analysis."""
+"""Journal service — entry CRUD and impact correlation analysis.
+
+Impacts are derived from per-behaviour sufficient statistics
+(n, Σx, Σy, Σxy, Σx², Σy²) stored in ``journal_behavior_stats``. They are
+adjusted incrementally whenever a journal entry or that day's recovery score
+is written, so reading impacts costs one query and O(behaviours) work.
+"""
 
 from __future__ import annotations
 
+import math
 import uuid
 from datetime import date
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.repositories import journal_repo, metrics_repo
-from app.models.journal import JournalEntry
+from app.models.journal import JournalBehaviorStat, JournalEntry
 from app.schemas.journal import JournalImpact
 
+IMPACT_METRIC = "recovery_score"
+MIN_SAMPLE_SIZE = 5
+MIN_JOURNAL_DAYS = 7
+
+
+def response_value(
+    bool_value: bool | None,
+    numeric_value: float | None,
+    scale_value: int | None,
+) -> float | None:
+    """Map a journal response to the numeric value used for correlation."""
+    if bool_value is not None:
+        return 1.0 if bool_value else 0.0
+    if numeric_value is not None:
+        return numeric_value
+    if scale_value is not None:
+        return float(scale_value)
+    return None
+
 
 async def create_entry(
     session: AsyncSession,
@@ -18,8 +44,54 @@ async def create_entry(
     entry_date: date,
     responses: list[dict],
 ) -> JournalEntry:
-    """Create a new journal entry with responses."""
-    return await journal_repo.create_entry(session, user_id, entry_date, responses)
+    """Create a new journal entry with responses and fold it into the stats."""
+    entry = await journal_repo.create_entry(session, user_id, entry_date, responses)
+
+    metric = await metrics_repo.get_by_user_and_date(session, user_id, entry_date)
+    if metric is not None and metric.recovery_score is not None:
+        pairs = [
+            (r["behavior_key"], value)
+            for r in responses
+            if (
+                value := response_value(
+                    r.get("bool_value"), r.get("numeric_value"), r.get("scale_value")
+                )
+            )
+            is not None
+        ]
+        await _apply_pairs(session, user_id, pairs, None, metric.recovery_score)
+    return entry
+
+
+async def on_recovery_changed(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    metric_date: date,
+    previous: float | None,
+    current: float | None,
+) -> None:
+    """Re-weight the stats for a day whose recovery score was (re)written."""
+    if previous == current:
+        return
+
+    entry = await journal_repo.get_by_user_and_date(session, user_id, metric_date)
+    if entry is None:
+        return
+
+    pairs = [
+        (r.behavior_key, value)
+        for r in entry.responses
+        if (value := response_value(r.bool_value, r.numeric_value, r.scale_value)) is not None
+    ]
+    await _apply_pairs(session, user_id, pairs, previous, current)
+
+
+async def rebuild_behavior_stats(
+    session: AsyncSession, user_id: uuid.UUID
+) -> list[JournalBehaviorStat]:
+    """Recompute a user's stats from scratch with a single JOIN aggregate."""
+    rows = await journal_repo.aggregate_behavior_stats(session, user_id, IMPACT_METRIC)
+    return await journal_repo.replace_behavior_stats(session, user_id, IMPACT_METRIC, rows)
 
 
 async def compute_impacts(
@@ -27,60 +99,31 @@ async def compute_impacts(
 ) -> list[JournalImpact]:
     """Compute correlation between journal behaviours and recovery metrics.
 
-    This performs a simplified analysis:
-    1. Fetch all journal entries with responses.
-    2. Fetch corresponding daily metrics.
-    3. For each behaviour, compute Pearson correlation with recovery_score.
+    Reads the stored sufficient statistics; if the user has none yet they
+    are seeded once from the journal/metrics JOIN.
     """
-    entries, _ = await journal_repo.list_entries(
-        session, user_id, limit=200
-    )
-    if len(entries) < 7:
+    stats = await journal_repo.list_behavior_stats(session, user_id, IMPACT_METRIC)
+    if not stats:
+        stats = await rebuild_behavior_stats(session, user_id)
+    if not stats or max(s.n for s in stats) < MIN_JOURNAL_DAYS:
         return []
 
-    metrics_lookup: dict[date, float] = {}
-    for entry in entries:
-        metric = await metrics_repo.get_by_user_and_date(
-            session, user_id, entry.date
-        )
-        if metric and metric.recovery_score is not None:
-            metrics_lookup[entry.date] = metric.recovery_score
-
-    # Group response values by behaviour key
-    behaviour_values: dict[str, list[tuple[float, float]]] = {}
-    for entry in entries:
-        recovery = metrics_lookup.get(entry.date)
-        if recovery is None:
-            continue
-        for resp in entry.responses:
-            val: float | None = None
-            if resp.bool_value is not None:
-                val = 1.0 if resp.bool_value else 0.0
-            elif resp.numeric_value is not None:
-                val = resp.numeric_value
-            elif resp.scale_value is not None:
-                val = float(resp.scale_value)
-            if val is not None:
-                behaviour_values.setdefault(resp.behavior_key, []).append(
-                    (val, recovery)
-                )
-
     impacts: list[JournalImpact] = []
-    for key, pairs in behaviour_values.items():
-        if len(pairs) < 5:
+    for stat in stats:
+        if stat.n < MIN_SAMPLE_SIZE:
             continue
-        xs = [p[0] for p in pairs]
-        ys = [p[1] for p in pairs]
-        corr = _pearson(xs, ys)
+        corr = pearson_from_sums(
+            stat.n, stat.sum_x, stat.sum_y, stat.sum_xy, stat.sum_x2, stat.sum_y2
+        )
         significance = (
             "high" if abs(corr) > 0.5 else "medium" if abs(corr) > 0.3 else "low"
         )
         impacts.append(
             JournalImpact(
-                behavior_key=key,
-                metric="recovery_score",
+                behavior_key=stat.behavior_key,
+                metric=IMPACT_METRIC,
                 correlation=round(corr, 3),
-                sample_size=len(pairs),
+                sample_size=stat.n,
                 significance=significance,
             )
         )
@@ -89,16 +132,70 @@ async def compute_impacts(
     return impacts
 
 
-def _pearson(xs: list[float], ys: list[float]) -> float:
-    """Compute Pearson correlation coefficient."""
-    n = len(xs)
+def pearson_from_sums(
+    n: int,
+    sum_x: float,
+    sum_y: float,
+    sum_xy: float,
+    sum_x2: float,
+    sum_y2: float,
+) -> float:
+    """Compute the Pearson correlation coefficient from sufficient statistics."""
     if n < 2:
         return 0.0
-    mean_x = sum(xs) / n
-    mean_y = sum(ys) / n
-    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
-    den_x = sum((x - mean_x) ** 2 for x in xs) ** 0.5
-    den_y = sum((y - mean_y) ** 2 for y in ys) ** 0.5
-    if den_x == 0 or den_y == 0:
+    num = n * sum_xy - sum_x * sum_y
+    var_x = n * sum_x2 - sum_x * sum_x
+    var_y = n * sum_y2 - sum_y * sum_y
+    if var_x <= 0 or var_y <= 0:
         return 0.0
-    return num / (den_x * den_y)
+    return max(-1.0, min(1.0, num / math.sqrt(var_x * var_y)))
+
+
+async def _apply_pairs(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    pairs: list[tuple[str, float]],
+    previous_y: float | None,
+    current_y: float | None,
+) -> None:
+    """Retract ``(x, previous_y)`` and add ``(x, current_y)`` for each pair."""
+    if not pairs:
+        return
+
+    keys = [key for key, _ in pairs]
+    existing = await journal_repo.list_behavior_stats(
+        session, user_id, IMPACT_METRIC, behavior_keys=keys
+    )
+    by_key = {s.behavior_key: s for s in existing}
+
+    for key, x in pairs:
+        stat = by_key.get(key)
+        if stat is None:
+            stat = JournalBehaviorStat(
+                user_id=user_id,
+                behavior_key=key,
+                metric=IMPACT_METRIC,
+                n=0,
+                sum_x=0.0,
+                sum_y=0.0,
+                sum_xy=0.0,
+                sum_x2=0.0,
+                sum_y2=0.0,
+            )
+            session.add(stat)
+            by_key[key] = stat
+        if previous_y is not None:
+            _accumulate(stat, x, previous_y, -1)
+        if current_y is not None:
+            _accumulate(stat, x, current_y, 1)
+
+    await session.flush()
+
+
+def _accumulate(stat: JournalBehaviorStat, x: float, y: float, sign: int) -> None:
+    stat.n += sign
+    stat.sum_x += sign * x
+    stat.sum_y += sign * y
+    stat.sum_xy += sign * x * y
+    stat.sum_x2 += sign * x * x
+    stat.sum_y2 += sign * y * y
@@ -7,9 +7,74 @@ from datetime import date
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.repositories import metrics_repo
+from app.db.repositories import metrics_repo, team_repo
 from app.models.daily_metric import DailyMetric
 from app.schemas.metrics import MetricsSyncItem
+from app.services import (
+    baseline_service,
+    challenge_service,
+    coach_context,
+    coach_retrieval,
+    dashboard_service,
+    journal_service,
+    recompute_service,
+    sleep_ledger_service,
+    team_analytics,
+    team_service,
+)
+
+
+async def upsert_metric(
+    session: AsyncSession, user_id: uuid.UUID, **fields
+) -> DailyMetric:
+    """Upsert one day's metrics; see ``write_metric``."""
+    metric, _ = await write_metric(session, user_id, **fields)
+    return metric
+
+
+async def write_metric(
+    session: AsyncSession, user_id: uuid.UUID, **fields
+) -> tuple[DailyMetric, bool]:
+    """Upsert one day's metrics and refresh the state derived from them.
+
+    This is the single write path for ``daily_metrics``; anything that keeps
+    incremental state keyed on a metric day hooks in here. A write that
+    changes no column is skipped along with its hooks. Returns the metric
+    and whether anything was written.
+    """
+    metric_date = fields.pop("date")
+    metric = await metrics_repo.get_by_user_and_date(session, user_id, metric_date)
+    previous_recovery = metric.recovery_score if metric else None
+
+    if metric:
+        # None leaves the stored value in place (see ``metrics_repo.update``).
+        changed = {
+            name
+            for name, value in fields.items()
+            if value is not None and getattr(metric, name) != value
+        }
+        if not changed:
+            return metric, False
+        previous = {name: getattr(metric, name) for name in changed}
+        metric = await metrics_repo.update(session, metric, **fields)
+    else:
+        changed = {name for name, value in fields.items() if value is not None}
+        previous = dict.fromkeys(changed)
+        metric = await metrics_repo.create(session, user_id, date=metric_date, **fields)
+
+    await baseline_service.on_metric_changed(session, metric)
+    await recompute_service.on_metric_changed(session, metric, changed)
+    await sleep_ledger_service.on_metric_changed(session, metric, changed)
+    await dashboard_service.invalidate(session, user_id)
+    await journal_service.on_recovery_changed(
+        session, user_id, metric_date, previous_recovery, metric.recovery_score
+    )
+    team_ids = await team_repo.list_team_ids_for_user(session, user_id)
+    if team_ids:
+        await team_service.on_metric_changed(session, metric, team_ids)
+        await team_analytics.on_metric_changed(session, metric, team_ids, previous)
+        await challenge_service.on_metric_changed(session, metric, team_ids)
+    return metric, True
 
 
 async def sync_metrics(
@@ -20,8 +85,11 @@ async def sync_metrics(
     """Upsert a batch of daily metrics from the iOS app."""
     results = []
     for item in items:
-        metric = await metrics_repo.upsert(session, user_id, **item.model_dump())
+        metric = await upsert_metric(session, user_id, **item.model_dump())
         results.append(metric)
+    if results:
+        await coach_context.refresh(session, user_id)
+        await coach_retrieval.index_days(session, user_id, [m.date for m in results])
     return results
 
 
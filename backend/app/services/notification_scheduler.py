@@ -0,0 +1,363 @@
+"""Notification scheduler — delivers pushes at each user's preferred local time.
+
+Due times live in a Redis sorted set used as a min-heap: the member is
+``{notification_type}:{user_id}`` and the score is the next due instant in
+UTC epoch seconds. A tick pops only the members whose score has passed,
+re-arms each for its next local occurrence and hands the due users to
+``notification_service`` in batches. A recovery push whose score has not
+synced yet is retried every ``RECOVERY_RETRY_SECONDS`` until
+``RECOVERY_RETRY_WINDOW`` after the preferred time (or local midnight).
+Preference changes update the set incrementally via ``sync_preference``,
+or via ``defer_sync`` once the request's transaction commits; ``rebuild``
+reloads it from the database after a Redis flush, and entries that lost
+their spec are re-armed from their preference row.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from typing import cast
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.fcm_client import FCMClient
+from app.core.redis_client import get_redis_or_none
+from app.db import after_commit
+from app.models.notification import NotificationPreference
+from app.services import notification_service
+from app.services.notification_service import FanoutResult
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "notif:schedule"
+SPEC_KEY = "notif:schedule:spec"
+ORPHAN_KEY = "notif:schedule:orphans"
+_PENDING_KEY = "notif:schedule"
+TICK_BATCH_SIZE = 500
+REBUILD_CHUNK_SIZE = 1000
+RECOVERY_RETRY_SECONDS = 15 * 60
+RECOVERY_RETRY_WINDOW = timedelta(hours=6)
+
+# Notification types with a scheduled delivery.
+SCHEDULED_TYPES = frozenset({"recovery"})
+
+
+@dataclass(frozen=True, slots=True)
+class DueNotification:
+    user_id: uuid.UUID
+    notification_type: str
+    local_date: date
+    retry_until: datetime  # UTC; retries for this local date stop here
+
+
+@dataclass(frozen=True, slots=True)
+class _Change:
+    """A preference's schedule as of a write; no ``preferred_time`` unschedules it."""
+
+    user_id: uuid.UUID
+    notification_type: str
+    preferred_time: time | None
+    tz_name: str | None
+
+
+def resolve_timezone(name: str | None) -> ZoneInfo:
+    """Return the zone for an IANA name; raises ValueError for unknown names."""
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown timezone '{name}'") from exc
+
+
+def next_due(preferred_time: time, tz_name: str | None, now: datetime) -> datetime:
+    """Next UTC instant strictly after ``now`` at ``preferred_time`` local time."""
+    tz = resolve_timezone(tz_name)
+    local_day = now.astimezone(tz).date()
+    for offset in range(3):
+        candidate = datetime.combine(local_day + timedelta(days=offset), preferred_time, tz)
+        due = candidate.astimezone(UTC)
+        if due > now:
+            return due
+    raise AssertionError("unreachable: a later local occurrence always exists")
+
+
+def _member(notification_type: str, user_id: uuid.UUID) -> str:
+    return f"{notification_type}:{user_id}"
+
+
+def _spec(preferred_time: time, tz_name: str | None) -> str:
+    return f"{preferred_time.isoformat()}|{tz_name or 'UTC'}"
+
+
+def _parse_spec(spec: str) -> tuple[time, str]:
+    at, tz_name = spec.split("|", 1)
+    return time.fromisoformat(at), tz_name
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+async def schedule(
+    redis: aioredis.Redis,
+    user_id: uuid.UUID,
+    notification_type: str,
+    preferred_time: time,
+    tz_name: str | None,
+    *,
+    now: datetime | None = None,
+) -> datetime:
+    """Insert or move a user's entry; returns the next due instant."""
+    due = next_due(preferred_time, tz_name, now or _now())
+    member = _member(notification_type, user_id)
+    pipe = redis.pipeline(transaction=True)
+    pipe.hset(SPEC_KEY, member, _spec(preferred_time, tz_name))
+    pipe.zadd(SCHEDULE_KEY, {member: due.timestamp()})
+    await pipe.execute()
+    return due
+
+
+async def unschedule(
+    redis: aioredis.Redis, user_id: uuid.UUID, notification_type: str
+) -> None:
+    member = _member(notification_type, user_id)
+    pipe = redis.pipeline(transaction=True)
+    pipe.zrem(SCHEDULE_KEY, member)
+    pipe.hdel(SPEC_KEY, member)
+    await pipe.execute()
+
+
+def _change(pref: NotificationPreference) -> _Change:
+    preferred_time = pref.preferred_time if pref.enabled is not False else None
+    return _Change(pref.user_id, pref.notification_type, preferred_time, pref.timezone)
+
+
+async def _apply(redis: aioredis.Redis, change: _Change, now: datetime | None = None) -> None:
+    if change.preferred_time is not None:
+        await schedule(
+            redis,
+            change.user_id,
+            change.notification_type,
+            change.preferred_time,
+            change.tz_name,
+            now=now,
+        )
+    else:
+        await unschedule(redis, change.user_id, change.notification_type)
+
+
+async def sync_preference(
+    redis: aioredis.Redis, pref: NotificationPreference, *, now: datetime | None = None
+) -> None:
+    """Reflect one preference row in the schedule after it changes."""
+    if pref.notification_type not in SCHEDULED_TYPES:
+        return
+    await _apply(redis, _change(pref), now=now)
+
+
+def defer_sync(session: AsyncSession, pref: NotificationPreference) -> None:
+    """Reflect ``pref`` in the schedule once ``session`` commits; a rollback drops it."""
+    if pref.notification_type in SCHEDULED_TYPES:
+        after_commit.defer(session, _PENDING_KEY, _change(pref))
+
+
+@after_commit.on_commit(_PENDING_KEY)
+async def _sync_all(pending: list[_Change]) -> None:
+    redis = get_redis_or_none()
+    if redis is None:
+        return
+    latest = {(c.notification_type, c.user_id): c for c in pending}
+    for change in latest.values():
+        try:
+            await _apply(redis, change)
+        except aioredis.RedisError as exc:
+            # ``rebuild`` restores the entry from the committed row.
+            logger.warning(
+                "Could not sync %s schedule for %s: %s",
+                change.notification_type,
+                change.user_id,
+                exc,
+            )
+
+
+async def rebuild(
+    session: AsyncSession,
+    redis: aioredis.Redis,
+    *,
+    now: datetime | None = None,
+    chunk_size: int = REBUILD_CHUNK_SIZE,
+) -> int:
+    """Reload the schedule from ``notification_preferences``; returns entries written."""
+    now = now or _now()
+    await redis.delete(SCHEDULE_KEY, SPEC_KEY)
+    written = 0
+    after_id: uuid.UUID | None = None
+    while True:
+        stmt = (
+            select(NotificationPreference)
+            .where(
+                NotificationPreference.notification_type.in_(SCHEDULED_TYPES),
+                NotificationPreference.enabled.is_not(False),
+                NotificationPreference.preferred_time.is_not(None),
+            )
+            .order_by(NotificationPreference.id)
+            .limit(chunk_size)
+        )
+        if after_id is not None:
+            stmt = stmt.where(NotificationPreference.id > after_id)
+        prefs = list((await session.execute(stmt)).scalars().all())
+        if not prefs:
+            break
+
+        pipe = redis.pipeline(transaction=False)
+        for pref in prefs:
+            preferred_time = cast(time, pref.preferred_time)  # filtered above
+            try:
+                due = next_due(preferred_time, pref.timezone, now)
+            except ValueError:
+                logger.warning(
+                    "Skipping preference %s with bad timezone %r", pref.id, pref.timezone
+                )
+                continue
+            member = _member(pref.notification_type, pref.user_id)
+            pipe.hset(SPEC_KEY, member, _spec(preferred_time, pref.timezone))
+            pipe.zadd(SCHEDULE_KEY, {member: due.timestamp()})
+            written += 1
+        await pipe.execute()
+
+        after_id = prefs[-1].id
+        if len(prefs) < chunk_size:
+            break
+    logger.info("Notification schedule rebuilt with %d entries", written)
+    return written
+
+
+async def pop_due(
+    redis: aioredis.Redis, now: datetime, *, limit: int = TICK_BATCH_SIZE
+) -> list[DueNotification]:
+    """Claim up to ``limit`` due entries and re-arm each for its next occurrence.
+
+    Claiming is a ZREM, so concurrent tickers never deliver the same entry.
+    """
+    # The client decodes responses, so members and specs arrive as str.
+    members = cast(
+        list[tuple[str, float]],
+        await redis.zrangebyscore(
+            SCHEDULE_KEY, "-inf", now.timestamp(), start=0, num=limit, withscores=True
+        ),
+    )
+    if not members:
+        return []
+
+    pipe = redis.pipeline(transaction=False)
+    for member, _ in members:
+        pipe.zrem(SCHEDULE_KEY, member)
+    claimed = cast(list[int], await pipe.execute())
+    specs = cast(
+        list[str | None], await redis.hmget(SPEC_KEY, [member for member, _ in members])
+    )
+
+    due: list[DueNotification] = []
+    rearm = redis.pipeline(transaction=False)
+    for (member, score), won, spec in zip(members, claimed, specs):
+        if not won:
+            continue
+        if spec is None:
+            logger.warning("Schedule entry %s has no spec; re-arming from preferences", member)
+            rearm.sadd(ORPHAN_KEY, member)
+            continue
+        notification_type, raw_user_id = member.split(":", 1)
+        preferred_time, tz_name = _parse_spec(spec)
+        tz = resolve_timezone(tz_name)
+        local_date = datetime.fromtimestamp(score, UTC).astimezone(tz).date()
+        scheduled = datetime.combine(local_date, preferred_time, tz)
+        end_of_day = datetime.combine(local_date + timedelta(days=1), time(0), tz)
+        retry_until = min(scheduled + RECOVERY_RETRY_WINDOW, end_of_day).astimezone(UTC)
+        due.append(
+            DueNotification(uuid.UUID(raw_user_id), notification_type, local_date, retry_until)
+        )
+        rearm.zadd(
+            SCHEDULE_KEY, {member: next_due(preferred_time, tz_name, now).timestamp()}
+        )
+    if len(rearm):
+        await rearm.execute()
+    return due
+
+
+async def _rearm_orphans(
+    session: AsyncSession, redis: aioredis.Redis, now: datetime
+) -> None:
+    """Re-schedule entries popped without a spec from their preference rows."""
+    members = cast(set[str], await redis.smembers(ORPHAN_KEY))
+    if not members:
+        return
+    await redis.srem(ORPHAN_KEY, *members)
+    keys = [member.split(":", 1) for member in members]
+    stmt = select(NotificationPreference).where(
+        NotificationPreference.user_id.in_([uuid.UUID(raw) for _, raw in keys]),
+        NotificationPreference.notification_type.in_({kind for kind, _ in keys}),
+    )
+    for pref in (await session.execute(stmt)).scalars():
+        if _member(pref.notification_type, pref.user_id) in members:
+            await sync_preference(redis, pref, now=now)
+
+
+async def _retry_later(
+    redis: aioredis.Redis, items: list[DueNotification], now: datetime
+) -> None:
+    """Bring entries back in ``RECOVERY_RETRY_SECONDS`` unless past their retry window."""
+    retry_at = now + timedelta(seconds=RECOVERY_RETRY_SECONDS)
+    pipe = redis.pipeline(transaction=False)
+    for item in items:
+        if retry_at <= item.retry_until:
+            member = _member(item.notification_type, item.user_id)
+            pipe.zadd(SCHEDULE_KEY, {member: retry_at.timestamp()})
+        else:
+            logger.info(
+                "No recovery for %s on %s by the retry cutoff", item.user_id, item.local_date
+            )
+    if len(pipe):
+        await pipe.execute()
+
+
+async def run_tick(
+    session: AsyncSession,
+    redis: aioredis.Redis,
+    *,
+    now: datetime | None = None,
+    fcm: FCMClient | None = None,
+    batch_size: int = TICK_BATCH_SIZE,
+) -> FanoutResult:
+    """Deliver every notification that has come due by ``now``."""
+    now = now or _now()
+    total = FanoutResult()
+    while True:
+        batch = await pop_due(redis, now, limit=batch_size)
+        if not batch:
+            break
+
+        groups: dict[tuple[str, date], list[DueNotification]] = defaultdict(list)
+        for item in batch:
+            groups[(item.notification_type, item.local_date)].append(item)
+        for (notification_type, local_date), items in groups.items():
+            if notification_type == "recovery":
+                ready = await notification_service.users_with_recovery(
+                    session, local_date, [item.user_id for item in items]
+                )
+                await _retry_later(redis, [i for i in items if i.user_id not in ready], now)
+                if ready:
+                    total.merge(
+                        await notification_service.send_recovery_notifications(
+                            session, local_date, redis=redis, fcm=fcm, user_ids=list(ready)
+                        )
+                    )
+        if len(batch) < batch_size:
+            break
+    await _rearm_orphans(session, redis, now)
+    return total
@@ -1,29 +1,80 @@
-"""Notification service — FCM push notification delivery."""
+"""Notification service — FCM push notification delivery.
+
+Single pushes go through ``send_push``. Waves of pushes (e.g. the morning
+recovery notification for every user) go through ``fan_out``, which per
+chunk of users issues one token query, one Redis pipeline for
+deduplication / throttling, and one FCM multicast over the pooled client.
+"""
 
 from __future__ import annotations
 
 import logging
 import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
 
-from sqlalchemy import select
+import redis.asyncio as aioredis
+from sqlalchemy import and_, exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from app.core.fcm_client import FCM_MULTICAST_LIMIT, FCMClient, PushMessage, get_fcm
+from app.models.daily_metric import DailyMetric
 from app.models.notification import NotificationPreference
 
 logger = logging.getLogger(__name__)
 
+DEVICE_TOKEN_TYPE = "device_token"
+DEDUP_TTL_SECONDS = 36 * 3600
+THROTTLE_WINDOW_SECONDS = 3600
+THROTTLE_MAX_PER_WINDOW = 5
+
+ZONE_EMOJI = {"green": "🟢", "yellow": "🟡", "red": "🔴"}
+
+
+@dataclass
+class PushRequest:
+    user_id: uuid.UUID
+    title: str
+    body: str
+    device_token: str | None = None
+
+
+@dataclass
+class FanoutResult:
+    sent: int = 0
+    failed: int = 0
+    no_token: int = 0
+    suppressed: int = 0  # deduplicated or throttled
+
+    def merge(self, other: FanoutResult) -> None:
+        self.sent += other.sent
+        self.failed += other.failed
+        self.no_token += other.no_token
+        self.suppressed += other.suppressed
+
 
 async def get_device_token(
     session: AsyncSession, user_id: uuid.UUID
 ) -> str | None:
     """Retrieve the user's FCM device token."""
-    stmt = select(NotificationPreference).where(
-        NotificationPreference.user_id == user_id,
-        NotificationPreference.notification_type == "device_token",
+    tokens = await get_device_tokens(session, [user_id])
+    return tokens.get(user_id)
+
+
+async def get_device_tokens(
+    session: AsyncSession, user_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, str]:
+    """Retrieve FCM device tokens for many users in one query."""
+    if not user_ids:
+        return {}
+    stmt = select(NotificationPreference.user_id, NotificationPreference.device_token).where(
+        NotificationPreference.user_id.in_(user_ids),
+        NotificationPreference.notification_type == DEVICE_TOKEN_TYPE,
+        NotificationPreference.device_token.is_not(None),
     )
     result = await session.execute(stmt)
-    pref = result.scalar_one_or_none()
-    return pref.device_token if pref else None
+    return {row.user_id: row.device_token for row in result}
 
 
 async def send_push(
@@ -35,14 +86,17 @@ async def send_push(
 ) -> bool:
     """Send a push notification via Firebase Cloud Messaging.
 
-    In production, this calls the FCM HTTP v1 API.
-    Currently logs the notification as a placeholder.
+    Uses the pooled FCM client when configured; otherwise logs the
+    notification as a placeholder.
     """
     if not device_token:
         logger.warning("No device token for user %s; skipping push", user_id)
         return False
 
-    # Placeholder — in production, use google-auth + httpx to call FCM API
+    fcm = get_fcm()
+    if fcm is not None:
+        return await fcm.send(PushMessage(device_token, title, body))
+
     logger.info(
         "PUSH [%s] → %s: %s (token=%s…)",
         user_id,
@@ -53,6 +107,14 @@ async def send_push(
     return True
 
 
+def recovery_message(recovery_score: float, recovery_zone: str) -> tuple[str, str]:
+    zone_emoji = ZONE_EMOJI.get(recovery_zone.lower(), "")
+    return (
+        f"Recovery: {recovery_score:.0f}% {zone_emoji}",
+        f"Your recovery is in the {recovery_zone} zone today.",
+    )
+
+
 async def send_recovery_notification(
     session: AsyncSession,
     user_id: uuid.UUID,
@@ -61,12 +123,227 @@ async def send_recovery_notification(
 ) -> bool:
     """Send a morning recovery push notification."""
     token = await get_device_token(session, user_id)
-    zone_emoji = {"green": "🟢", "yellow": "🟡", "red": "🔴"}.get(
-        recovery_zone.lower(), ""
+    title, body = recovery_message(recovery_score, recovery_zone)
+    return await send_push(user_id, title, body, device_token=token)
+
+
+async def fan_out(
+    session: AsyncSession,
+    requests: list[PushRequest],
+    *,
+    kind: str,
+    redis: aioredis.Redis,
+    fcm: FCMClient | None = None,
+    day: date | None = None,
+) -> FanoutResult:
+    """Deliver a wave of pushes in multicast-sized chunks.
+
+    ``kind`` and ``day`` scope deduplication: each user receives at most one
+    push of a kind per day, and at most ``THROTTLE_MAX_PER_WINDOW`` pushes of
+    any kind per hour. Tokens missing from ``requests`` are loaded per chunk.
+    """
+    fcm = fcm or get_fcm()
+    day = day or date.today()
+    total = FanoutResult()
+    for start in range(0, len(requests), FCM_MULTICAST_LIMIT):
+        chunk = requests[start : start + FCM_MULTICAST_LIMIT]
+        total.merge(await _fan_out_chunk(session, chunk, kind, day, redis, fcm))
+    logger.info(
+        "Push fan-out kind=%s sent=%d failed=%d no_token=%d suppressed=%d",
+        kind,
+        total.sent,
+        total.failed,
+        total.no_token,
+        total.suppressed,
     )
-    return await send_push(
-        user_id,
-        f"Recovery: {recovery_score:.0f}% {zone_emoji}",
-        f"Your recovery is in the {recovery_zone} zone today.",
-        device_token=token,
+    return total
+
+
+async def send_recovery_notifications(
+    session: AsyncSession,
+    day: date,
+    *,
+    redis: aioredis.Redis,
+    fcm: FCMClient | None = None,
+    chunk_size: int = FCM_MULTICAST_LIMIT,
+    user_ids: list[uuid.UUID] | None = None,
+) -> FanoutResult:
+    """Send the recovery push to every opted-in user with a score for ``day``.
+
+    ``user_ids`` restricts the wave to those users (a scheduler tick).
+    """
+    total = FanoutResult()
+    after_id: uuid.UUID | None = None
+    while True:
+        rows = await _recovery_recipients(session, day, after_id, chunk_size, user_ids)
+        if not rows:
+            break
+        requests = []
+        for row in rows:
+            title, body = recovery_message(row.recovery_score, row.recovery_zone or "")
+            requests.append(PushRequest(row.user_id, title, body, row.device_token))
+        total.merge(
+            await fan_out(session, requests, kind="recovery", redis=redis, fcm=fcm, day=day)
+        )
+        after_id = rows[-1].user_id
+        if len(rows) < chunk_size:
+            break
+    return total
+
+
+async def users_with_recovery(
+    session: AsyncSession, day: date, user_ids: list[uuid.UUID]
+) -> set[uuid.UUID]:
+    """The subset of ``user_ids`` whose recovery score for ``day`` has synced."""
+    stmt = select(DailyMetric.user_id).where(
+        DailyMetric.user_id.in_(user_ids),
+        DailyMetric.date == day,
+        DailyMetric.recovery_score.is_not(None),
     )
+    result = await session.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def _recovery_recipients(
+    session: AsyncSession,
+    day: date,
+    after_id: uuid.UUID | None,
+    limit: int,
+    user_ids: list[uuid.UUID] | None = None,
+) -> list:
+    """Token plus the day's recovery for a keyset page of users, in one query."""
+    pref = aliased(NotificationPreference)
+    opted_out = select(pref.id).where(
+        pref.user_id == NotificationPreference.user_id,
+        pref.notification_type == "recovery",
+        pref.enabled.is_(False),
+    )
+    stmt = (
+        select(
+            NotificationPreference.user_id,
+            NotificationPreference.device_token,
+            DailyMetric.recovery_score,
+            DailyMetric.recovery_zone,
+        )
+        .join(
+            DailyMetric,
+            and_(
+                DailyMetric.user_id == NotificationPreference.user_id,
+                DailyMetric.date == day,
+            ),
+        )
+        .where(
+            NotificationPreference.notification_type == DEVICE_TOKEN_TYPE,
+            NotificationPreference.device_token.is_not(None),
+            DailyMetric.recovery_score.is_not(None),
+            ~exists(opted_out),
+        )
+        .order_by(NotificationPreference.user_id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(NotificationPreference.user_id > after_id)
+    if user_ids is not None:
+        stmt = stmt.where(NotificationPreference.user_id.in_(user_ids))
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def _fan_out_chunk(
+    session: AsyncSession,
+    chunk: list[PushRequest],
+    kind: str,
+    day: date,
+    redis: aioredis.Redis,
+    fcm: FCMClient | None,
+) -> FanoutResult:
+    result = FanoutResult()
+
+    missing = [r.user_id for r in chunk if not r.device_token]
+    tokens = await get_device_tokens(session, missing) if missing else {}
+    with_token: list[tuple[PushRequest, str]] = []
+    for req in chunk:
+        token = req.device_token or tokens.get(req.user_id)
+        if token:
+            with_token.append((req, token))
+        else:
+            result.no_token += 1
+
+    window = _throttle_window()
+    admitted = await _admit(redis, [req.user_id for req, _ in with_token], kind, day, window)
+    deliveries = [(req, token) for req, token in with_token if req.user_id in admitted]
+    result.suppressed += len(with_token) - len(deliveries)
+    if not deliveries:
+        return result
+
+    if fcm is not None:
+        outcomes = await fcm.send_multicast(
+            [PushMessage(token, req.title, req.body) for req, token in deliveries]
+        )
+    else:
+        outcomes = [
+            await send_push(req.user_id, req.title, req.body, device_token=token)
+            for req, token in deliveries
+        ]
+
+    failed_users = [req.user_id for (req, _), ok in zip(deliveries, outcomes) if not ok]
+    result.sent += len(deliveries) - len(failed_users)
+    result.failed += len(failed_users)
+    if failed_users:
+        await _release(redis, failed_users, kind, day, window)
+    return result
+
+
+def _dedup_key(kind: str, day: date, user_id: uuid.UUID) -> str:
+    return f"push:dedup:{kind}:{day.isoformat()}:{user_id}"
+
+
+def _throttle_window() -> int:
+    return int(datetime.now(timezone.utc).timestamp()) // THROTTLE_WINDOW_SECONDS
+
+
+def _throttle_key(user_id: uuid.UUID, window: int) -> str:
+    return f"push:throttle:{user_id}:{window}"
+
+
+async def _admit(
+    redis: aioredis.Redis, user_ids: list[uuid.UUID], kind: str, day: date, window: int
+) -> set[uuid.UUID]:
+    """Claim the per-day dedup key and a throttle slot for each user in one pipeline."""
+    if not user_ids:
+        return set()
+
+    pipe = redis.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.set(_dedup_key(kind, day, user_id), 1, nx=True, ex=DEDUP_TTL_SECONDS)
+        throttle_key = _throttle_key(user_id, window)
+        pipe.incr(throttle_key)
+        pipe.expire(throttle_key, THROTTLE_WINDOW_SECONDS)
+    replies = await pipe.execute()
+
+    admitted: set[uuid.UUID] = set()
+    undo = redis.pipeline(transaction=False)
+    for i, user_id in enumerate(user_ids):
+        is_new, count = replies[3 * i], replies[3 * i + 1]
+        throttle_key = _throttle_key(user_id, window)
+        if not is_new:
+            undo.decr(throttle_key)
+        elif count > THROTTLE_MAX_PER_WINDOW:
+            undo.decr(throttle_key)
+            undo.delete(_dedup_key(kind, day, user_id))
+        else:
+            admitted.add(user_id)
+    if len(admitted) < len(user_ids):
+        await undo.execute()
+    return admitted
+
+
+async def _release(
+    redis: aioredis.Redis, user_ids: list[uuid.UUID], kind: str, day: date, window: int
+) -> None:
+    """Give back the dedup key and throttle slot of failed deliveries so a retry can send."""
+    pipe = redis.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.delete(_dedup_key(kind, day, user_id))
+        pipe.decr(_throttle_key(user_id, window))
+    await pipe.execute()
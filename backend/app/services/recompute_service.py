@@ -0,0 +1,215 @@
+"""Recompute service — keeps derived metrics consistent when old days change.
+
+Derived metrics form a small dependency graph. Each ``Node`` names the
+``daily_metrics`` columns it reads and the span of days, relative to a
+changed day, whose values read them:
+
+* the sleep ledger carries debt night to night, so ``sleep_ledger_service``
+  marks its own node when an old night changes (it has no inputs here);
+* the 28-day baseline window is kept exact by ``baseline_service`` on
+  every write, so it needs no recompute of its own;
+* recovery for day D is scored by the daily pipeline against the days
+  before it in the window ending D, so a change to a baseline vital on D
+  makes recovery stale on D+1 … D+27;
+* healthspan for day D averages recovery, sleep, strain and vitals over
+  the 180 days ending D, so any of them changing on D makes D … D+179
+  stale.
+
+``on_metric_changed`` runs in the writing transaction and records, for
+each node whose inputs changed, the stale days (clipped to today) in
+``recompute_ranges``. ``run_pending`` later claims each user's ranges and
+recomputes them node by node in ``NODES`` order, oldest day first, only
+for days that have something stored. Recomputed recovery goes back
+through ``metrics_service.upsert_metric``, so healthspan (and any other
+consumer of recovery) is marked in turn before its node is processed.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.repositories import healthspan_repo, metrics_repo, recompute_repo
+from app.engines.daily_pipeline import DayBundle
+from app.models.daily_metric import DailyMetric
+from app.models.user import User
+from app.services import (
+    baseline_service,
+    daily_scoring_service,
+    healthspan_service,
+    metrics_service,
+    sleep_ledger_service,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_PASSES = 10
+
+_RECOVERY_INPUTS = [
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "sleep_performance",
+    "respiratory_rate",
+    "spo2",
+    "skin_temperature_deviation",
+]
+_RECOVERY_BASELINE_INPUTS = frozenset(_RECOVERY_INPUTS) & frozenset(
+    baseline_service.BASELINE_METRICS
+)
+
+Recompute = Callable[[AsyncSession, uuid.UUID, date, date], Awaitable[int]]
+
+
+@dataclass(frozen=True, slots=True)
+class Node:
+    name: str
+    inputs: frozenset[str]
+    first_offset: int
+    last_offset: int
+    recompute: Recompute
+
+    def stale_days(self, changed_on: date, today: date) -> tuple[date, date] | None:
+        start = changed_on + timedelta(days=self.first_offset)
+        end = min(changed_on + timedelta(days=self.last_offset), today)
+        return (start, end) if start <= end else None
+
+
+async def _recompute_recovery(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date
+) -> int:
+    rows = await metrics_repo.list_day_columns(
+        session, user_id, [*_RECOVERY_INPUTS, "strain_score", "recovery_score"], from_date, to_date
+    )
+    if not rows:
+        return 0
+    user = await session.get(User, user_id)
+    if user is None:
+        return 0  # deleted since the range was queued
+
+    # Stored days are scored as one batch: the pipeline carries each day's
+    # vitals into the next day's baselines instead of re-reading the window.
+    scorer = await daily_scoring_service.Scorer.load(session, user, from_date, to_date)
+    days = []
+    for row in rows:
+        night = scorer.night(row.date)
+        days.append(
+            DayBundle(
+                date=row.date,
+                hrv=row.hrv_rmssd,
+                resting_heart_rate=row.resting_heart_rate,
+                respiratory_rate=row.respiratory_rate,
+                spo2=row.spo2,
+                skin_temperature_deviation=row.skin_temperature_deviation,
+                strain=row.strain_score,
+                sleep_performance=row.sleep_performance,
+                sleep_hours=night.sleep_hours,
+                sleep_need_hours=night.need_hours,
+                bedtime_minutes=night.bedtime_minutes,
+                wake_time_minutes=night.wake_time_minutes,
+            )
+        )
+
+    updated = 0
+    for row, scored in zip(rows, await scorer.score_days(session, days)):
+        if scored.recovery.score == row.recovery_score:
+            continue
+        await metrics_service.upsert_metric(
+            session,
+            user_id,
+            date=row.date,
+            recovery_score=scored.recovery.score,
+            recovery_zone=scored.recovery.zone.value,
+        )
+        updated += 1
+    return updated
+
+
+async def _recompute_healthspan(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date
+) -> int:
+    days = await healthspan_repo.list_score_dates(session, user_id, from_date, to_date)
+    if not days:
+        return 0
+    result = await session.execute(select(User.date_of_birth).where(User.id == user_id))
+    date_of_birth = result.scalar_one_or_none()
+    if date_of_birth is None:
+        return 0
+    for day in days:
+        await healthspan_service.compute_scores(session, [(user_id, date_of_birth)], day)
+    return len(days)
+
+
+# Topological order: a node's recompute may only mark nodes after it.
+NODES = [
+    # Marked by sleep_ledger_service for nights older than it updates inline.
+    Node(sleep_ledger_service.NODE, frozenset(), 0, 0, sleep_ledger_service.rebuild),
+    Node(
+        "recovery",
+        _RECOVERY_BASELINE_INPUTS,
+        1,
+        baseline_service.WINDOW_DAYS - 1,
+        _recompute_recovery,
+    ),
+    Node(
+        "healthspan",
+        frozenset(healthspan_service.AVERAGED_COLUMNS),
+        0,
+        healthspan_service.LONG_WINDOW_DAYS - 1,
+        _recompute_healthspan,
+    ),
+]
+
+
+async def on_metric_changed(
+    session: AsyncSession,
+    metric: DailyMetric,
+    changed: set[str],
+    *,
+    today: date | None = None,
+) -> None:
+    """Mark the days whose derived metrics read the ``changed`` columns of ``metric``."""
+    today = today or date.today()
+    if not changed or metric.date > today:
+        return
+    for node in NODES:
+        if not node.inputs & changed:
+            continue
+        stale = node.stale_days(metric.date, today)
+        if stale is not None:
+            await recompute_repo.mark(session, metric.user_id, node.name, *stale)
+
+
+async def recompute_user(session: AsyncSession, user_id: uuid.UUID) -> int:
+    """Recompute all of a user's pending ranges; returns the number of days rewritten."""
+    rewritten = 0
+    for node in NODES:
+        for _ in range(MAX_PASSES):
+            claimed = await recompute_repo.claim(session, user_id, node.name)
+            if claimed is None:
+                break
+            rewritten += await node.recompute(session, user_id, *claimed)
+    return rewritten
+
+
+async def run_pending(
+    session_factory: async_sessionmaker[AsyncSession], *, batch_size: int = BATCH_SIZE
+) -> int:
+    """Recompute pending ranges for up to ``batch_size`` users, committing per user."""
+    async with session_factory() as session:
+        user_ids = await recompute_repo.list_pending_users(session, limit=batch_size)
+
+    rewritten = 0
+    for user_id in user_ids:
+        async with session_factory() as session:
+            days = await recompute_user(session, user_id)
+            await session.commit()
+        rewritten += days
+        logger.info("Recomputed %d derived days for %s", days, user_id)
+    return rewritten
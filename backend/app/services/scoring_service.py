@@ -2,20 +2,28 @@
 
 from __future__ import annotations
 
+from datetime import UTC, tzinfo
+
 from app.engines.baseline_engine import BaselineResult, compute_baseline, z_score
 from app.engines.config import get_scoring_config
+from app.engines.daily_pipeline import DailyScoringPipeline
 from app.engines.recovery_engine import (
     RecoveryBaselines,
     RecoveryEngine,
     RecoveryInput,
     RecoveryResult,
 )
+from app.engines.sleep_ledger import SleepLedger
 from app.engines.strain_engine import StrainEngine, StrainResult
 
 
-def build_baseline(values: list[float], window_days: int = 28) -> BaselineResult | None:
-    """Build a baseline from a list of recent values."""
-    return compute_baseline(values, window_days=window_days)
+def build_baseline(
+    values: list[float],
+    window_days: int = 28,
+    prior: BaselineResult | None = None,
+) -> BaselineResult | None:
+    """Build a baseline from a list of recent values, falling back to ``prior``."""
+    return compute_baseline(values, window_days=window_days, prior=prior)
 
 
 def compute_recovery(
@@ -31,17 +39,29 @@ def compute_recovery(
     historical_resp: list[float] | None = None,
     historical_spo2: list[float] | None = None,
     historical_skin_temp: list[float] | None = None,
+    priors: dict[str, BaselineResult] | None = None,
 ) -> RecoveryResult | None:
-    """Compute recovery score from vitals and historical baselines."""
+    """Compute recovery score from vitals and historical baselines.
+
+    ``priors`` (keyed by metric column, e.g. from the user's cohort) stand in
+    for baselines the user's own history is too short to establish.
+    """
     config = get_scoring_config()
     engine = RecoveryEngine(config.recovery)
+    priors = priors or {}
 
     baselines = RecoveryBaselines(
-        hrv=build_baseline(historical_hrv) if historical_hrv else None,
-        resting_heart_rate=build_baseline(historical_rhr) if historical_rhr else None,
-        sleep_performance=build_baseline(historical_sleep) if historical_sleep else None,
-        respiratory_rate=build_baseline(historical_resp) if historical_resp else None,
-        spo2=build_baseline(historical_spo2) if historical_spo2 else None,
+        hrv=build_baseline(historical_hrv or [], prior=priors.get("hrv_rmssd")),
+        resting_heart_rate=build_baseline(
+            historical_rhr or [], prior=priors.get("resting_heart_rate")
+        ),
+        sleep_performance=build_baseline(
+            historical_sleep or [], prior=priors.get("sleep_performance")
+        ),
+        respiratory_rate=build_baseline(
+            historical_resp or [], prior=priors.get("respiratory_rate")
+        ),
+        spo2=build_baseline(historical_spo2 or [], prior=priors.get("spo2")),
         skin_temperature=build_baseline(historical_skin_temp) if historical_skin_temp else None,
     )
 
@@ -57,6 +77,18 @@ def compute_recovery(
     return engine.compute_recovery(inp, baselines)
 
 
+def daily_pipeline(
+    priors: dict[str, BaselineResult] | None = None, tz: tzinfo = UTC
+) -> DailyScoringPipeline:
+    """A ``DailyScoringPipeline`` on the bundled config, with optional cohort priors."""
+    return DailyScoringPipeline(get_scoring_config(), priors, tz=tz)
+
+
+def sleep_ledger(deficits: list[float] | None = None) -> SleepLedger:
+    """A ``SleepLedger`` on the bundled config, seeded with trailing nightly deficits."""
+    return SleepLedger(get_scoring_config().sleep, deficits or ())
+
+
 def compute_strain(
     max_heart_rate: int,
     hr_samples: list[tuple[int, float]],
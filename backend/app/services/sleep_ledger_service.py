@@ -0,0 +1,124 @@
+"""Sleep ledger service — persisted nightly sleep need and debt.
+
+Each ledger row is one night, dated by the morning it ends, holding the
+night's need, deficit, the trailing seven-night debt and the need for the
+night after. ``rebuild`` walks a span of nights once, seeding the
+``SleepLedger`` with the stored deficits of the seven nights before it,
+so a day's write costs a handful of rows however long the history is.
+
+``on_metric_changed`` keeps the ledger current from the metrics write
+path: a change within a week of the latest ledger night (the usual
+morning sync, or yesterday's strain arriving after it) is applied
+inline; a change to an older night marks the ``sleep`` node in
+``recompute_ranges``, and the recompute worker rebuilds from that night
+forward. A user's first write with older history behind it is likewise
+handed to the worker rather than replayed in the request.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import metrics_repo, recompute_repo, sleep_repo
+from app.engines.sleep_ledger import DEBT_WINDOW_NIGHTS
+from app.models.daily_metric import DailyMetric
+from app.models.sleep import SleepLedgerNight
+from app.services import scoring_service
+
+NODE = "sleep"
+INPUTS = frozenset({"sleep_duration_hours", "strain_score"})
+INLINE_NIGHTS = DEBT_WINDOW_NIGHTS
+
+
+async def rebuild(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date | None = None
+) -> int:
+    """Rewrite the ledger for nights ``from_date`` … ``to_date``; returns nights written.
+
+    ``to_date`` defaults to the latest stored metric day.
+    """
+    seed = await sleep_repo.list_deficits(
+        session,
+        user_id,
+        from_date - timedelta(days=DEBT_WINDOW_NIGHTS),
+        from_date - timedelta(days=1),
+    )
+    rows = await metrics_repo.list_day_columns(
+        session,
+        user_id,
+        ["sleep_duration_hours", "strain_score"],
+        from_date - timedelta(days=1),
+        to_date or date.max,
+    )
+    if to_date is None:
+        to_date = rows[-1].date if rows else from_date
+    by_date = {row.date: row for row in rows}
+
+    ledger = scoring_service.sleep_ledger(
+        [
+            seed.get(from_date - timedelta(days=offset), 0.0)
+            for offset in range(DEBT_WINDOW_NIGHTS, 0, -1)
+        ]
+    )
+    previous = by_date.get(from_date - timedelta(days=1))
+    previous_strain = previous.strain_score if previous else None
+
+    nights = []
+    day = from_date
+    while day <= to_date:
+        row = by_date.get(day)
+        strain = row.strain_score if row else None
+        sleep_hours = row.sleep_duration_hours if row else None
+        night = ledger.record(sleep_hours, previous_strain)
+        if sleep_hours is not None:
+            nights.append(
+                {
+                    "date": day,
+                    "sleep_hours": sleep_hours,
+                    "strain": strain,
+                    "need_hours": night.need_hours,
+                    "deficit_hours": night.deficit_hours,
+                    "debt_hours": night.debt_hours,
+                    "next_need_hours": ledger.need(strain),
+                }
+            )
+        previous_strain = strain
+        day += timedelta(days=1)
+
+    await sleep_repo.replace_nights(session, user_id, from_date, to_date, nights)
+    return len(nights)
+
+
+async def on_metric_changed(
+    session: AsyncSession,
+    metric: DailyMetric,
+    changed: set[str],
+    *,
+    today: date | None = None,
+) -> None:
+    """Bring the ledger up to date with a write that touched ``changed`` on ``metric``."""
+    if not INPUTS & changed:
+        return
+    today = today or date.today()
+    latest = await sleep_repo.get_latest_night(session, metric.user_id)
+    if latest is None:
+        first = await metrics_repo.get_first_date(session, metric.user_id)
+        if first is not None and first < metric.date:
+            await recompute_repo.mark(
+                session, metric.user_id, NODE, first, max(today, metric.date)
+            )
+            return
+    elif metric.date < latest.date - timedelta(days=INLINE_NIGHTS):
+        await recompute_repo.mark(
+            session, metric.user_id, NODE, metric.date, max(today, latest.date)
+        )
+        return
+    await rebuild(session, metric.user_id, metric.date)
+
+
+async def get_latest(session: AsyncSession, user_id: uuid.UUID) -> SleepLedgerNight | None:
+    """The user's latest ledger night; its ``next_need_hours`` is tonight's need."""
+    return await sleep_repo.get_latest_night(session, user_id)
@@ -0,0 +1,253 @@
+"""Sleep service — server-side analysis of synced sleep stages.
+
+``sync_nights`` stitches each night's stage samples into sessions with
+``SleepEngine``, analyzes them against the trailing week's debt and the
+consistency window, and stores the sessions, the night's sleep metrics
+and its bed and wake times (see ``sleep_timing_service``), read as
+clock times in the user's own timezone. The history
+those analyses read (previous day's strain, main session bed and wake
+times, ledger hours and needs) is loaded for the whole batch in one
+query and extended in memory night by night, and the sessions, each
+with its run-length encoded hypnogram, are replaced with one delete and
+one insert, so a backfill of months costs the same few statements per
+batch as a single night, plus the per-night metric and timing writes.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta, tzinfo
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import NotFoundError, ValidationError
+from app.db.repositories import recompute_repo, sleep_repo
+from app.engines import hypnogram
+from app.engines.config import get_scoring_config
+from app.engines.sleep_engine import (
+    SleepConsistencyInput,
+    SleepEngine,
+    SleepSessionData,
+    SleepStageData,
+    minutes_since_midnight,
+)
+from app.engines.sleep_ledger import DEBT_WINDOW_NIGHTS
+from app.models.daily_metric import DailyMetric
+from app.models.user import User
+from app.schemas.sleep import HypnogramResponse, SleepNightSyncItem
+from app.services import (
+    coach_context,
+    coach_retrieval,
+    healthspan_service,
+    metrics_service,
+    notification_scheduler,
+    sleep_timing_service,
+)
+
+
+@dataclass
+class Night:
+    """One stored day's inputs to the analysis of the nights after it."""
+
+    strain: float | None = None
+    bedtime_minutes: float | None = None
+    wake_time_minutes: float | None = None
+    sleep_hours: float | None = None
+    need_hours: float | None = None
+
+
+def _millis(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return int(value.timestamp() * 1000)
+
+
+def _from_millis(millis: int) -> datetime:
+    return datetime.fromtimestamp(millis / 1000.0, tz=UTC)
+
+
+def _stages(item: SleepNightSyncItem) -> list[SleepStageData]:
+    return [
+        SleepStageData(
+            type=stage.type,
+            start_date_millis=_millis(stage.start_date),
+            end_date_millis=_millis(stage.end_date),
+            duration_minutes=(stage.end_date - stage.start_date).total_seconds() / 60.0,
+        )
+        for stage in item.stages
+    ]
+
+
+def _session_row(
+    data: SleepSessionData, metric: DailyMetric, *, is_main: bool, performance: float | None
+) -> dict:
+    return {
+        "daily_metric_id": metric.id,
+        "start_date": _from_millis(data.start_date_millis),
+        "end_date": _from_millis(data.end_date_millis),
+        "is_main_sleep": is_main,
+        "total_sleep_minutes": round(data.total_sleep_minutes),
+        "light_minutes": round(data.light_minutes),
+        "deep_minutes": round(data.deep_minutes),
+        "rem_minutes": round(data.rem_minutes),
+        "awake_minutes": round(data.awake_minutes),
+        "sleep_efficiency": data.sleep_efficiency,
+        "sleep_performance": performance,
+        "hypnogram": hypnogram.encode(data.stages, data.start_date_millis, data.end_date_millis),
+    }
+
+
+async def sync_nights(
+    session: AsyncSession, user_id: uuid.UUID, items: list[SleepNightSyncItem]
+) -> list[DailyMetric]:
+    """Analyze and store a batch of nights; returns the metrics written, by date."""
+    if not items:
+        return []
+    config = get_scoring_config().sleep
+    engine = SleepEngine(config)
+    items = sorted(items, key=lambda item: item.date)
+    tz = await user_zone(session, user_id)
+    lookback = max(config.consistencyWindowNights, DEBT_WINDOW_NIGHTS)
+    history = await load_nights(
+        session, user_id, items[0].date - timedelta(days=lookback), items[-1].date, tz
+    )
+
+    metrics = []
+    sessions = []
+    for item in items:
+        built = engine.build_sessions(_stages(item))
+        if not built:
+            continue
+
+        def trailing(nights: int) -> list[Night]:
+            days = (item.date - timedelta(days=offset) for offset in range(nights, 0, -1))
+            return [history[day] for day in days if day in history]
+
+        week = [
+            (n.sleep_hours, n.need_hours)
+            for n in trailing(DEBT_WINDOW_NIGHTS)
+            if n.sleep_hours is not None and n.need_hours is not None
+        ]
+        recent = [
+            (n.bedtime_minutes, n.wake_time_minutes)
+            for n in trailing(config.consistencyWindowNights)
+            if n.bedtime_minutes is not None and n.wake_time_minutes is not None
+        ]
+        previous = history.get(item.date - timedelta(days=1))
+        analysis = engine.analyze(
+            built,
+            config.defaults.baselineHours,
+            previous.strain if previous and previous.strain is not None else 0.0,
+            [hours for hours, _ in week],
+            [need for _, need in week],
+            SleepConsistencyInput(
+                recent_bedtime_minutes=[bedtime for bedtime, _ in recent],
+                recent_wake_time_minutes=[wake for _, wake in recent],
+            ),
+            tz=tz,
+        )
+
+        metric = await metrics_service.upsert_metric(
+            session,
+            user_id,
+            date=item.date,
+            sleep_duration_hours=analysis.total_sleep_hours,
+            sleep_performance=analysis.sleep_performance,
+            sleep_need_hours=analysis.sleep_need_hours,
+        )
+        metrics.append(metric)
+
+        main = analysis.main_sleep
+        night = history.setdefault(item.date, Night(strain=metric.strain_score))
+        night.sleep_hours = analysis.total_sleep_hours
+        night.need_hours = analysis.sleep_need_hours
+        if main is not None:
+            night.bedtime_minutes = minutes_since_midnight(main.start_date_millis, tz)
+            night.wake_time_minutes = minutes_since_midnight(main.end_date_millis, tz)
+            sessions.append(
+                _session_row(main, metric, is_main=True, performance=analysis.sleep_performance)
+            )
+        sessions.extend(
+            _session_row(nap, metric, is_main=False, performance=None) for nap in analysis.naps
+        )
+
+    await sleep_repo.replace_sessions(session, user_id, [m.id for m in metrics], sessions)
+    await _record_timing(session, user_id, [m.date for m in metrics], history)
+    if metrics:
+        await coach_context.refresh(session, user_id)
+        await coach_retrieval.index_days(session, user_id, [m.date for m in metrics])
+    return metrics
+
+
+async def load_nights(
+    session: AsyncSession, user_id: uuid.UUID, from_date: date, to_date: date, tz: tzinfo
+) -> dict[date, Night]:
+    """Stored days ``from_date`` … ``to_date`` by date, bed and wake times read in ``tz``."""
+    rows = await sleep_repo.list_night_context(session, user_id, from_date, to_date)
+    return {
+        row.date: Night(
+            strain=row.strain_score,
+            bedtime_minutes=minutes_since_midnight(_millis(row.start_date), tz)
+            if row.start_date
+            else None,
+            wake_time_minutes=minutes_since_midnight(_millis(row.end_date), tz)
+            if row.end_date
+            else None,
+            sleep_hours=row.sleep_hours,
+            need_hours=row.need_hours,
+        )
+        for row in rows
+    }
+
+
+async def user_zone(session: AsyncSession, user_id: uuid.UUID) -> tzinfo:
+    """The user's timezone, UTC when unset or unknown."""
+    user = await session.get(User, user_id)
+    try:
+        return notification_scheduler.resolve_timezone(user.timezone if user else None)
+    except ValueError:
+        return UTC
+
+
+async def _record_timing(
+    session: AsyncSession, user_id: uuid.UUID, days: list[date], history: dict[date, Night]
+) -> None:
+    """Fold the nights' main-sleep times into the consistency sums.
+
+    Healthspan reads those sums, so a change to a past night marks its
+    window for recompute.
+    """
+    today = date.today()
+    for day in days:
+        night = history[day]
+        if night.bedtime_minutes is None or night.wake_time_minutes is None:
+            continue
+        changed = await sleep_timing_service.record_night(
+            session, user_id, day, night.bedtime_minutes, night.wake_time_minutes
+        )
+        if changed and day < today:
+            last = min(day + timedelta(days=healthspan_service.LONG_WINDOW_DAYS - 1), today)
+            await recompute_repo.mark(session, user_id, "healthspan", day, last)
+
+
+async def get_hypnogram(
+    session: AsyncSession, user_id: uuid.UUID, session_id: uuid.UUID, resolution_seconds: int
+) -> HypnogramResponse:
+    """One session's stage timeline at ``resolution_seconds`` per epoch."""
+    if resolution_seconds % hypnogram.EPOCH_SECONDS:
+        raise ValidationError(
+            f"resolution_seconds must be a multiple of {hypnogram.EPOCH_SECONDS}"
+        )
+    row = await sleep_repo.get_hypnogram(session, user_id, session_id)
+    if row is None:
+        raise NotFoundError("Sleep session", str(session_id))
+    runs = hypnogram.decode(row.hypnogram or b"")
+    factor = resolution_seconds // hypnogram.EPOCH_SECONDS
+    return HypnogramResponse(
+        session_id=session_id,
+        start_date=row.start_date,
+        resolution_seconds=resolution_seconds,
+        stages=list(hypnogram.STAGES),
+        runs=[[code, length] for code, length in hypnogram.resample(runs, factor)],
+    )
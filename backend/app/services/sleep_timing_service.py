@@ -0,0 +1,100 @@
+"""Sleep timing service — rolling bedtime / wake-time consistency.
+
+Each night with a main sleep session gets a ``sleep_timing_sums`` row
+holding its bed and wake times and the running circular sums (count,
+sin and cos of each time) over all of the user's nights so far. A new
+night adds one row built from the row before it; a late or corrected
+night also shifts every later row's sums by its difference, in one
+UPDATE. The sums for any window are then the difference between the
+rows at its two ends, so 30- and 180-day consistency cost two indexed
+row reads each, however many nights they cover.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import sleep_repo
+from app.db.repositories.sleep_repo import TIMING_SUM_COLUMNS
+from app.engines.config import get_scoring_config
+from app.engines.sleep_engine import SleepEngine, clock_vector
+from app.models.sleep import SleepTimingSum
+
+
+def _vector(bedtime_minutes: float, wake_time_minutes: float) -> dict[str, float]:
+    bedtime_sin, bedtime_cos = clock_vector(bedtime_minutes)
+    wake_time_sin, wake_time_cos = clock_vector(wake_time_minutes)
+    return {
+        "nights": 1,
+        "bedtime_sin": bedtime_sin,
+        "bedtime_cos": bedtime_cos,
+        "wake_time_sin": wake_time_sin,
+        "wake_time_cos": wake_time_cos,
+    }
+
+
+async def record_night(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    night: date,
+    bedtime_minutes: float,
+    wake_time_minutes: float,
+) -> bool:
+    """Store a night's main-sleep times; returns whether anything changed."""
+    own = _vector(bedtime_minutes, wake_time_minutes)
+    row = await sleep_repo.get_timing(session, user_id, night)
+    if row is not None:
+        if (row.bedtime_minutes, row.wake_time_minutes) == (bedtime_minutes, wake_time_minutes):
+            return False
+        old = _vector(row.bedtime_minutes, row.wake_time_minutes)
+        delta = {c: own[c] - old[c] for c in TIMING_SUM_COLUMNS}
+        row.bedtime_minutes = bedtime_minutes
+        row.wake_time_minutes = wake_time_minutes
+        for column, value in delta.items():
+            setattr(row, column, getattr(row, column) + value)
+    else:
+        previous = await sleep_repo.get_timing_before(session, user_id, night)
+        delta = own
+        session.add(
+            SleepTimingSum(
+                user_id=user_id,
+                date=night,
+                bedtime_minutes=bedtime_minutes,
+                wake_time_minutes=wake_time_minutes,
+                **{
+                    c: own[c] + (getattr(previous, c) if previous else 0)
+                    for c in TIMING_SUM_COLUMNS
+                },
+            )
+        )
+    await sleep_repo.shift_timing_after(session, user_id, night, delta)
+    return True
+
+
+async def consistency(
+    session: AsyncSession, user_ids: list[uuid.UUID], from_date: date, to_date: date
+) -> dict[uuid.UUID, float]:
+    """Sleep consistency over nights ``from_date`` … ``to_date``, per user.
+
+    Users with fewer than two nights in the window are absent.
+    """
+    end = await sleep_repo.timing_sums_at(session, user_ids, to_date)
+    start = await sleep_repo.timing_sums_at(session, list(end), from_date - timedelta(days=1))
+    engine = SleepEngine(get_scoring_config().sleep)
+    result = {}
+    for user_id, sums in end.items():
+        before = start.get(user_id)
+        window = {c: sums[c] - (before[c] if before else 0) for c in TIMING_SUM_COLUMNS}
+        score = engine.window_consistency(
+            int(window["nights"]),
+            window["bedtime_sin"],
+            window["bedtime_cos"],
+            window["wake_time_sin"],
+            window["wake_time_cos"],
+        )
+        if score is not None:
+            result[user_id] = score
+    return result
@@ -0,0 +1,157 @@
+"""Team analytics — per-team daily rollups of member metrics.
+
+Each team-day keeps, per trend metric, the member count, sum and sum of
+squares (for mean and standard deviation) and the quartiles in
+``team_daily_aggregates``. A metric upsert applies the member's old→new
+change to those sums for each of their teams and recomputes that one
+team-day's quartiles from the day's member values; joining a team
+recomputes the team's trend window. Trends are served from one indexed
+range read.
+"""
+
+from __future__ import annotations
+
+import math
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import team_repo
+from app.models.daily_metric import DailyMetric
+from app.schemas.team import TeamTrendPoint, TeamTrendsResponse
+
+TREND_DAYS = 90
+TREND_METRICS = {
+    "recovery": "recovery_score",
+    "strain": "strain_score",
+    "sleep": "sleep_duration_hours",
+}
+
+
+def quartiles(values: list[float]) -> dict:
+    """p25 / p50 / p75 of one team-day of a metric (None when it has no values)."""
+    if not values:
+        return {"p25": None, "p50": None, "p75": None}
+    p25, p50, p75 = np.percentile(np.asarray(values, dtype=np.float64), [25, 50, 75])
+    return {"p25": float(p25), "p50": float(p50), "p75": float(p75)}
+
+
+def summarize(values: list[float]) -> dict:
+    """Sufficient statistics and quartiles for one team-day of a metric."""
+    array = np.asarray(values, dtype=np.float64)
+    return {
+        "n": int(array.size),
+        "sum": float(array.sum()),
+        "sum_sq": float((array * array).sum()),
+        **quartiles(values),
+    }
+
+
+async def _member_values(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    from_date: date,
+    to_date: date,
+    metrics: dict[str, str] = TREND_METRICS,
+) -> dict[tuple[date, str], list[float]]:
+    values: dict[tuple[date, str], list[float]] = defaultdict(list)
+    for row in await team_repo.member_metric_values(
+        session, team_id, list(metrics.values()), from_date, to_date
+    ):
+        for metric, column in metrics.items():
+            value = getattr(row, column)
+            if value is not None:
+                values[(row.date, metric)].append(value)
+    return values
+
+
+async def rollup(
+    session: AsyncSession, team_id: uuid.UUID, from_date: date, to_date: date
+) -> int:
+    """Recompute the team's aggregates for ``from_date``..``to_date``; returns rows written."""
+    values = await _member_values(session, team_id, from_date, to_date)
+    rows = [
+        {"date": day, "metric": metric, **summarize(day_values)}
+        for (day, metric), day_values in sorted(values.items())
+    ]
+    await team_repo.replace_daily_aggregates(session, team_id, from_date, to_date, rows)
+    return len(rows)
+
+
+async def on_metric_changed(
+    session: AsyncSession,
+    metric: DailyMetric,
+    team_ids: list[uuid.UUID],
+    previous: dict[str, float | None],
+) -> None:
+    """Move the metric's day in each of the member's teams from old to new values.
+
+    ``previous`` maps each column the write changed to its value before it.
+    Sums take the delta; the day's quartiles are recomputed per team from
+    that one day's member values.
+    """
+    changed = {name: column for name, column in TREND_METRICS.items() if column in previous}
+    if not changed:
+        return
+    deltas = {}
+    for name, column in changed.items():
+        old, new = previous[column], getattr(metric, column)
+        dn, dsum, dsum_sq = 0, 0.0, 0.0
+        if old is not None:
+            dn, dsum, dsum_sq = dn - 1, dsum - old, dsum_sq - old * old
+        if new is not None:
+            dn, dsum, dsum_sq = dn + 1, dsum + new, dsum_sq + new * new
+        deltas[name] = {"n": dn, "sum": dsum, "sum_sq": dsum_sq}
+    for team_id in team_ids:
+        values = await _member_values(session, team_id, metric.date, metric.date, changed)
+        await team_repo.add_daily_aggregate_deltas(
+            session,
+            team_id,
+            metric.date,
+            {
+                name: {**delta, **quartiles(values.get((metric.date, name), []))}
+                for name, delta in deltas.items()
+            },
+        )
+
+
+async def on_membership_changed(
+    session: AsyncSession, team_id: uuid.UUID, *, today: date | None = None
+) -> None:
+    """Recompute the whole trend window after members join or leave."""
+    today = today or date.today()
+    await rollup(session, team_id, today - timedelta(days=TREND_DAYS - 1), today)
+
+
+async def get_trends(
+    session: AsyncSession,
+    team_id: uuid.UUID,
+    *,
+    days: int = TREND_DAYS,
+    to_date: date | None = None,
+) -> TeamTrendsResponse:
+    to_date = to_date or date.today()
+    from_date = to_date - timedelta(days=days - 1)
+    series: dict[str, list[TeamTrendPoint]] = {metric: [] for metric in TREND_METRICS}
+    for agg in await team_repo.list_daily_aggregates(session, team_id, from_date, to_date):
+        if agg.metric not in series or agg.n <= 0:
+            continue
+        mean = agg.sum / agg.n
+        variance = max(agg.sum_sq / agg.n - mean * mean, 0.0)
+        series[agg.metric].append(
+            TeamTrendPoint(
+                date=agg.date,
+                members=agg.n,
+                mean=round(mean, 2),
+                stddev=round(math.sqrt(variance), 2),
+                p25=agg.p25,
+                p50=agg.p50,
+                p75=agg.p75,
+            )
+        )
+    return TeamTrendsResponse(
+        team_id=team_id, from_date=from_date, to_date=to_date, metrics=series
+    )
@@ -1,55 +1,78 @@
-"""Team service — leaderboard computation and team management."""
+"""Team service — leaderboard computation and team management.
+
+Leaderboards are served from per-team, per-day Redis sorted sets (one for
+recovery, one for strain) plus a roster hash of member display names; a
+read takes ranks and scores straight from the requested set's order.
+Metric upserts ZADD the member's new scores into every team they belong
+to once the writing transaction commits; membership and profile changes
+drop the roster so the next read rebuilds the day from a single JOIN over
+members, users and metrics.
+"""
 
 from __future__ import annotations
 
 import uuid
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select
+import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.redis_client import get_redis_or_none
+from app.db import after_commit
+from app.db.repositories import team_repo
 from app.models.daily_metric import DailyMetric
 from app.models.team import Team
-from app.models.user import User
 from app.schemas.team import LeaderboardEntry, LeaderboardResponse
 
+LEADERBOARD_TTL_SECONDS = 2 * 24 * 3600
+LEADERBOARD_METRICS = {"recovery": "recovery_score", "strain": "strain_score"}
+_PENDING_KEY = "leaderboard_pending_scores"
+
+
+def _board_key(team_id: uuid.UUID, day: date, metric: str) -> str:
+    return f"leaderboard:{team_id}:{day.isoformat()}:{metric}"
+
+
+def _roster_key(team_id: uuid.UUID, day: date) -> str:
+    return f"leaderboard:{team_id}:{day.isoformat()}:roster"
+
+
+def rank_entries(rows: list[dict], sort_by: str = "recovery") -> list[LeaderboardEntry]:
+    """Rank members by ``sort_by`` descending; members without a score go last."""
+    field = LEADERBOARD_METRICS[sort_by]
+    rows = sorted(
+        rows,
+        key=lambda r: (r[field] is None, -(r[field] or 0.0), str(r["user_id"])),
+    )
+    return [LeaderboardEntry(rank=i + 1, **row) for i, row in enumerate(rows)]
+
 
 async def build_leaderboard(
-    session: AsyncSession, team: Team
+    session: AsyncSession,
+    team: Team,
+    *,
+    sort_by: str = "recovery",
+    day: date | None = None,
+    redis: aioredis.Redis | None = None,
 ) -> LeaderboardResponse:
-    """Build a leaderboard for a team from today's metrics."""
-    today = date.today()
-    entries: list[LeaderboardEntry] = []
-
-    for member in team.members:
-        # Fetch today's metric for this member
-        stmt = select(DailyMetric).where(
-            DailyMetric.user_id == member.user_id,
-            DailyMetric.date == today,
-        )
-        result = await session.execute(stmt)
-        metric = result.scalar_one_or_none()
-
-        # Fetch display name
-        user = await session.get(User, member.user_id)
-
-        entries.append(
-            LeaderboardEntry(
-                user_id=member.user_id,
-                display_name=user.display_name if user else None,
-                rank=0,  # Will be set after sorting
-                recovery_score=metric.recovery_score if metric else None,
-                strain_score=metric.strain_score if metric else None,
-            )
-        )
+    """Build a leaderboard for a team from the day's metrics."""
+    day = day or date.today()
+    redis = redis or get_redis_or_none()
 
-    # Sort by recovery score descending (None values last)
-    entries.sort(
-        key=lambda e: e.recovery_score if e.recovery_score is not None else -1,
-        reverse=True,
-    )
-    for i, entry in enumerate(entries):
-        entry.rank = i + 1
+    entries = await _read_live(redis, team.id, day, sort_by) if redis is not None else None
+    if entries is None:
+        rows = [
+            {
+                "user_id": row.user_id,
+                "display_name": row.display_name,
+                "recovery_score": row.recovery_score,
+                "strain_score": row.strain_score,
+            }
+            for row in await team_repo.leaderboard_rows(session, team.id, day)
+        ]
+        if redis is not None:
+            await _warm(redis, team.id, day, rows)
+        entries = rank_entries(rows, sort_by)
 
     return LeaderboardResponse(
         team_id=team.id,
@@ -57,3 +80,116 @@ async def build_leaderboard(
         entries=entries,
         updated_at=datetime.now(timezone.utc),
     )
+
+
+async def on_metric_changed(
+    session: AsyncSession, metric: DailyMetric, team_ids: list[uuid.UUID]
+) -> None:
+    """Queue a member's upserted scores for their teams' live leaderboards.
+
+    The scores are pushed once ``session`` commits and dropped on rollback.
+    """
+    if metric.date < date.today() - timedelta(days=1):
+        return  # only recent days have live boards
+    scores = {
+        metric_name: getattr(metric, field)
+        for metric_name, field in LEADERBOARD_METRICS.items()
+        if getattr(metric, field) is not None
+    }
+    if not scores or not team_ids:
+        return
+    after_commit.defer(
+        session, _PENDING_KEY, (list(team_ids), metric.user_id, metric.date, scores)
+    )
+
+
+@after_commit.on_commit(_PENDING_KEY)
+async def _push_scores(
+    pending: list[tuple[list[uuid.UUID], uuid.UUID, date, dict[str, float]]],
+) -> None:
+    redis = get_redis_or_none()
+    if redis is None:
+        return
+    pipe = redis.pipeline(transaction=False)
+    for team_ids, user_id, day, scores in pending:
+        for team_id in team_ids:
+            for metric_name, value in scores.items():
+                key = _board_key(team_id, day, metric_name)
+                pipe.zadd(key, {str(user_id): value})
+                pipe.expire(key, LEADERBOARD_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def invalidate_rosters(
+    team_ids: list[uuid.UUID],
+    *,
+    day: date | None = None,
+    redis: aioredis.Redis | None = None,
+) -> None:
+    """Force the next leaderboard read to rebuild from the database."""
+    redis = redis or get_redis_or_none()
+    if redis is None or not team_ids:
+        return
+    day = day or date.today()
+    await redis.delete(*(_roster_key(team_id, day) for team_id in team_ids))
+
+
+async def _read_live(
+    redis: aioredis.Redis, team_id: uuid.UUID, day: date, sort_by: str
+) -> list[LeaderboardEntry] | None:
+    """Entries ranked by the ``sort_by`` sorted set in one round trip, or None when cold.
+
+    Members come in descending score order, ties by id as in ``rank_entries``
+    (ZREVRANGE alone would reverse them), so rank is the index; members
+    without a score follow, ordered by id.
+    """
+    pipe = redis.pipeline(transaction=False)
+    pipe.hgetall(_roster_key(team_id, day))
+    for metric_name in LEADERBOARD_METRICS:
+        pipe.zrevrange(_board_key(team_id, day, metric_name), 0, -1, withscores=True)
+    roster, *boards = await pipe.execute()
+    if not roster:
+        return None
+
+    by_metric = dict(zip(LEADERBOARD_METRICS, boards))
+    ranked = [
+        member
+        for member, _ in sorted(by_metric[sort_by], key=lambda item: (-item[1], item[0]))
+        if member in roster
+    ]
+    scored = set(ranked)
+    ranked += sorted(member for member in roster if member not in scored)
+    scores = {
+        LEADERBOARD_METRICS[metric_name]: dict(board)
+        for metric_name, board in by_metric.items()
+    }
+    return [
+        LeaderboardEntry(
+            rank=i + 1,
+            user_id=uuid.UUID(member),
+            display_name=roster[member] or None,
+            **{field: by_member.get(member) for field, by_member in scores.items()},
+        )
+        for i, member in enumerate(ranked)
+    ]
+
+
+async def _warm(redis: aioredis.Redis, team_id: uuid.UUID, day: date, rows: list[dict]) -> None:
+    if not rows:
+        return
+    pipe = redis.pipeline(transaction=True)
+    roster_key = _roster_key(team_id, day)
+    pipe.delete(roster_key)
+    pipe.hset(
+        roster_key,
+        mapping={str(r["user_id"]): r["display_name"] or "" for r in rows},
+    )
+    pipe.expire(roster_key, LEADERBOARD_TTL_SECONDS)
+    for metric_name, field in LEADERBOARD_METRICS.items():
+        key = _board_key(team_id, day, metric_name)
+        pipe.delete(key)
+        members = {str(r["user_id"]): r[field] for r in rows if r[field] is not None}
+        if members:
+            pipe.zadd(key, members)
+            pipe.expire(key, LEADERBOARD_TTL_SECONDS)
+    await pipe.execute()
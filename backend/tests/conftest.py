@@ -8,6 +8,7 @@ from collections.abc import AsyncGenerator
 
 import pytest
 import pytest_asyncio
+from fakeredis import FakeAsyncRedis
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
@@ -48,7 +49,20 @@ async def db_session(engine) -> AsyncGenerator[AsyncSession, None]:
 
 
 @pytest_asyncio.fixture
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def redis(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[FakeAsyncRedis, None]:
+    """In-memory Redis installed as the app-wide client."""
+    from app.core import redis_client
+
+    fake = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis", fake)
+    yield fake
+    await fake.aclose()
+
+
+@pytest_asyncio.fixture
+async def client(
+    db_session: AsyncSession, redis: FakeAsyncRedis
+) -> AsyncGenerator[AsyncClient, None]:
     app = create_app()
 
     # Override the DB session dependency
@@ -0,0 +1,103 @@
+"""Tests for the two-tier cache."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.cache import TwoTierCache
+
+
+class CountingLoader:
+    def __init__(self, value, delay: float = 0.0) -> None:
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_l1_then_l2_hits(redis):
+    cache = TwoTierCache(redis=redis)
+    loader = CountingLoader({"a": 1})
+    assert await cache.get_or_load("user:1", "k", loader, ttl=60) == {"a": 1}
+    assert await cache.get_or_load("user:1", "k", loader, ttl=60) == {"a": 1}
+    assert loader.calls == 1
+
+    # A second worker has an empty L1 but finds the value in Redis.
+    other = TwoTierCache(redis=redis)
+    assert await other.get_or_load("user:1", "k", loader, ttl=60) == {"a": 1}
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_bound(redis):
+    cache = TwoTierCache(max_entries=2, redis=redis)
+    for key in ("a", "b", "c"):
+        await cache.get_or_load("ns", key, CountingLoader(key), ttl=60)
+    assert len(cache._entries) == 2
+
+
+@pytest.mark.asyncio
+async def test_namespace_invalidation_reaches_other_instances(redis):
+    first, second = TwoTierCache(redis=redis), TwoTierCache(redis=redis)
+    await second.start()
+    try:
+        await asyncio.sleep(0.05)
+        await first.get_or_load("user:1", "k", CountingLoader("old"), ttl=60)
+        await first.get_or_load("user:2", "k", CountingLoader("kept"), ttl=60)
+        assert await second.get_or_load("user:1", "k", CountingLoader("unused"), ttl=60) == "old"
+
+        await first.invalidate("user:1")
+        await asyncio.sleep(0.05)  # let the pub/sub message arrive
+
+        new = CountingLoader("new")
+        assert await first.get_or_load("user:1", "k", new, ttl=60) == "new"
+        assert await second.get_or_load("user:1", "k", new, ttl=60) == "new"
+        assert new.calls == 1
+        assert await second.get_or_load("user:2", "k", CountingLoader("x"), ttl=60) == "kept"
+    finally:
+        await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once(redis):
+    cache, other = TwoTierCache(redis=redis), TwoTierCache(redis=redis)
+    loader = CountingLoader(42, delay=0.1)
+    results = await asyncio.gather(
+        *(cache.get_or_load("ns", "k", loader, ttl=60) for _ in range(5)),
+        *(other.get_or_load("ns", "k", loader, ttl=60) for _ in range(5)),
+    )
+    assert results == [42] * 10
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(redis):
+    cache = TwoTierCache(redis=redis)
+    await cache.get_or_load("ns", "k", CountingLoader("v1"), ttl=0.05, stale_ttl=60)
+    await asyncio.sleep(0.1)
+
+    refresh = CountingLoader("v2", delay=0.05)
+    assert await cache.get_or_load("ns", "k", refresh, ttl=0.05, stale_ttl=60) == "v1"
+    assert await cache.get_or_load("ns", "k", refresh, ttl=0.05, stale_ttl=60) == "v1"
+    await asyncio.sleep(0.1)
+    assert refresh.calls == 1
+    assert await cache.get_or_load("ns", "k", refresh, ttl=60) == "v2"
+
+
+@pytest.mark.asyncio
+async def test_loads_without_redis(monkeypatch):
+    from app.core import redis_client
+
+    monkeypatch.setattr(redis_client, "_redis", None)
+    cache = TwoTierCache()
+    loader = CountingLoader(1)
+    await cache.get_or_load("ns", "k", loader, ttl=60)
+    await cache.get_or_load("ns", "k", loader, ttl=60)
+    assert loader.calls == 2
@@ -0,0 +1,133 @@
+"""Tests for team challenges and their Redis standings."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import challenge_repo, team_repo, user_repo
+from app.models.challenge import TeamChallenge
+from app.services import challenge_service, metrics_service
+
+
+def test_streak_score_counts_longest_qualifying_run():
+    challenge = TeamChallenge(aggregation="streak", threshold=7.0)
+    start = date(2026, 3, 1)
+    values = {start + timedelta(days=i): v for i, v in enumerate([7.5, 8, 6, 7, 7.2, 9, 5])}
+    assert challenge_service.score(challenge, values) == 3.0
+    assert challenge_service.score(challenge, {}) is None
+
+
+@pytest.mark.asyncio
+async def test_challenge_standings_follow_metric_writes(
+    client: AsyncClient, db_session: AsyncSession, redis
+):
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Strain Week"})
+    team_id = uuid.UUID(create_resp.json()["id"])
+    today = date.today()
+
+    resp = await client.post(
+        f"/api/v1/teams/{team_id}/challenges",
+        json={
+            "name": "Most strain",
+            "metric": "strain",
+            "aggregation": "sum",
+            "start_date": (today - timedelta(days=6)).isoformat(),
+            "end_date": today.isoformat(),
+        },
+    )
+    assert resp.status_code == 200
+    challenge_id = resp.json()["id"]
+
+    mates = {}
+    for name in ("Ana", "Ben"):
+        mate = await user_repo.create(
+            db_session, firebase_uid=f"challenge-{uuid.uuid4()}", display_name=name
+        )
+        await team_repo.add_member(db_session, team_id, mate.id)
+        mates[name] = mate
+    for days_ago, ana, ben in ((2, 10.0, 12.0), (1, 11.0, 4.0), (8, 50.0, 0.0)):
+        day = today - timedelta(days=days_ago)
+        await metrics_service.upsert_metric(db_session, mates["Ana"].id, date=day, strain_score=ana)
+        await metrics_service.upsert_metric(db_session, mates["Ben"].id, date=day, strain_score=ben)
+
+    url = f"/api/v1/teams/{team_id}/challenges/{challenge_id}/standings"
+    data = (await client.get(url)).json()
+    assert [(s["display_name"], s["score"]) for s in data["standings"]] == [
+        ("Ana", 21.0),
+        ("Ben", 16.0),
+    ]
+    assert data["participants"] == 2
+    assert data["me"] is None  # the creator has logged nothing
+
+    # A correction replaces the day's value rather than adding to it.
+    await metrics_service.upsert_metric(
+        db_session, mates["Ben"].id, date=today - timedelta(days=1), strain_score=14.0
+    )
+    data = (await client.get(url)).json()
+    assert [(s["display_name"], s["score"]) for s in data["standings"]] == [
+        ("Ben", 26.0),
+        ("Ana", 21.0),
+    ]
+
+    # Reconciliation repairs drifted standings.
+    await redis.zadd(f"challenge:{challenge_id}:standings", {str(mates["Ana"].id): 999.0})
+    challenge = await challenge_repo.get(db_session, uuid.UUID(challenge_id))
+    assert await challenge_service.reconcile(db_session, challenge, redis) == 1
+    assert await redis.zscore(f"challenge:{challenge_id}:standings", str(mates["Ana"].id)) == 21.0
+
+
+@pytest.mark.asyncio
+async def test_streak_challenge_requires_threshold(client: AsyncClient):
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Sleepers"})
+    team_id = create_resp.json()["id"]
+    resp = await client.post(
+        f"/api/v1/teams/{team_id}/challenges",
+        json={
+            "name": "Sleep streak",
+            "metric": "sleep",
+            "aggregation": "streak",
+            "start_date": "2026-03-01",
+            "end_date": "2026-03-14",
+        },
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_empty_standings_are_not_rebuilt_on_every_read(
+    client: AsyncClient, db_session: AsyncSession, redis, monkeypatch: pytest.MonkeyPatch
+):
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Quiet Week"})
+    team_id = create_resp.json()["id"]
+    today = date.today()
+    resp = await client.post(
+        f"/api/v1/teams/{team_id}/challenges",
+        json={
+            "name": "Most steps",
+            "metric": "steps",
+            "aggregation": "sum",
+            "start_date": (today - timedelta(days=6)).isoformat(),
+            "end_date": today.isoformat(),
+        },
+    )
+    challenge_id = resp.json()["id"]
+    url = f"/api/v1/teams/{team_id}/challenges/{challenge_id}/standings"
+
+    rebuilds = []
+    reconcile = challenge_service.reconcile
+
+    async def counting_reconcile(*args, **kwargs):
+        rebuilds.append(1)
+        return await reconcile(*args, **kwargs)
+
+    monkeypatch.setattr(challenge_service, "reconcile", counting_reconcile)
+    for _ in range(3):
+        data = (await client.get(url)).json()
+        assert data["participants"] == 0
+    assert len(rebuilds) == 1
+    assert await redis.ttl(f"challenge:{challenge_id}:reconciled") > 0
@@ -0,0 +1,189 @@
+"""Tests for coach conversation endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import after_commit
+from app.services import coach_cache, coach_retrieval
+
+
+async def _send(client: AsyncClient, content: str, conversation_id: str | None = None) -> dict:
+    payload = {"content": content}
+    if conversation_id:
+        payload["conversation_id"] = conversation_id
+    response = await client.post("/api/v1/coach/message", json=payload)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_conversation_list_is_lightweight(client: AsyncClient):
+    """GET /coach/conversations returns counts and a preview, not messages."""
+    first = await _send(client, "How did I sleep?")
+    conversation_id = first["conversation_id"]
+    await _send(client, "And my recovery?", conversation_id)
+    await _send(client, "Another topic")
+
+    response = await client.get("/api/v1/coach/conversations")
+    assert response.status_code == 200
+    convos = {c["id"]: c for c in response.json()}
+    assert len(convos) == 2
+    summary = convos[conversation_id]
+    assert "messages" not in summary
+    assert summary["message_count"] == 4
+    assert summary["last_message_preview"].startswith("I don't have recent metrics")
+    assert len(summary["last_message_preview"]) <= 120
+    assert summary["last_message_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_conversation_messages_are_cursor_paginated(client: AsyncClient):
+    """GET /coach/conversations/{id} pages backwards through history."""
+    first = await _send(client, "message 0")
+    conversation_id = first["conversation_id"]
+    for i in range(1, 5):
+        await _send(client, f"message {i}", conversation_id)
+
+    url = f"/api/v1/coach/conversations/{conversation_id}"
+    seen: list[dict] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen = data["messages"] + seen
+        cursor = data["next_cursor"]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 4
+    assert len(seen) == 10
+    assert len({m["id"] for m in seen}) == 10
+    user_messages = [m["content"] for m in seen if m["role"] == "user"]
+    assert user_messages == [f"message {i}" for i in range(5)]
+    assert [m["role"] for m in seen[:2]] == ["user", "assistant"]
+
+    response = await client.get(url, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stream_message_emits_tokens_and_persists_reply(client: AsyncClient):
+    """POST /coach/message/stream streams SSE tokens then the saved message."""
+    async with client.stream(
+        "POST", "/api/v1/coach/message/stream", json={"content": "Should I train hard?"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join([chunk async for chunk in response.aiter_text()])
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line.removeprefix("event: "), json.loads(data_line[6:])))
+
+    assert events[0][0] == "start"
+    conversation_id = events[0][1]["conversation_id"]
+    tokens = [data["delta"] for event, data in events if event == "token"]
+    assert len(tokens) > 5
+    event, final = events[-1]
+    assert event == "done"
+    assert final["content"] == "".join(tokens)
+    assert "Should I train hard?" in final["content"]
+
+    response = await client.get(f"/api/v1/coach/conversations/{conversation_id}")
+    messages = response.json()["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[1]["id"] == final["id"]
+
+
+@pytest.mark.asyncio
+async def test_context_snapshot_refreshed_on_metric_sync(
+    client: AsyncClient, db_session: AsyncSession, redis
+):
+    """Metric sync rebuilds the Redis snapshot the coach reads from on commit."""
+    today = date.today()
+    payload = {
+        "metrics": [
+            {
+                "date": (today - timedelta(days=i)).isoformat(),
+                "recovery_score": 60.0 + 10 * i,
+                "recovery_zone": "green",
+                "hrv_rmssd": 50.0,
+            }
+            for i in range(3)
+        ]
+    }
+    response = await client.post("/api/v1/metrics/sync", json=payload)
+    assert response.status_code == 200
+
+    # Nothing is stored until the sync's transaction commits.
+    assert await redis.keys("coach:context:*") == []
+    after_commit._flush_after_commit(db_session.sync_session)
+    await asyncio.gather(*after_commit._background_tasks)
+
+    keys = await redis.keys("coach:context:*")
+    assert len(keys) == 1
+    snapshot = json.loads(await redis.get(keys[0]))
+    assert snapshot["as_of"] == today.isoformat()
+    assert snapshot["latest"]["recovery_score"] == 60.0
+    assert snapshot["averages"]["recovery_score"]["7d"] == 70.0
+
+    # The coach turn renders the stored snapshot rather than re-querying.
+    snapshot["averages"]["recovery_score"]["7d"] = 42.0
+    await redis.set(keys[0], json.dumps(snapshot))
+    reply = await _send(client, "How am I doing?")
+    assert reply["content"].startswith("Your average recovery this week is 42%.")
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_replays_similar_opening_questions(
+    client: AsyncClient, redis, monkeypatch: pytest.MonkeyPatch
+):
+    """Repeated opening questions hit the cache until the context changes."""
+    first = await _send(client, "Should I train today?")
+
+    # A hit is served before retrieval or prompt building runs.
+    async def _no_retrieval(*args, **kwargs):
+        raise AssertionError("retrieval ran for a cached reply")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(coach_retrieval, "retrieve", _no_retrieval)
+        again = await _send(client, "should I train today")
+    assert again["content"] == first["content"]
+    assert again["conversation_id"] != first["conversation_id"]
+
+    # A follow-up turn is never served from the cache.
+    await _send(client, "Should I train today?", first["conversation_id"])
+    # Nor is an unrelated question.
+    other = await _send(client, "What about my resting heart rate trend?")
+    assert "resting heart rate" in other["content"]
+
+    # Cache stats are admin-only.
+    assert (await client.get("/api/v1/coach/cache/stats")).status_code == 403
+    stats = await coach_cache.stats(redis)
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+    # New data rebuilds the context snapshot and drops cached replies.
+    await client.post(
+        "/api/v1/metrics/sync",
+        json={"metrics": [{"date": date.today().isoformat(), "recovery_score": 81.0}]},
+    )
+    fresh = await _send(client, "Should I train today?")
+    assert fresh["content"].startswith("Your average recovery this week is 81%.")
+    stats = await coach_cache.stats(redis)
+    assert stats["misses"] == 3
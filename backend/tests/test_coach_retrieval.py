@@ -0,0 +1,195 @@
+"""Tests for coach retrieval over embedded user history."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.vector_index import HashingEmbedder, NumpyVectorIndex, PgVectorIndex
+from app.db.repositories import coach_repo, user_repo
+from app.models.coach import CoachDocument
+from app.models.user import User
+from app.services import coach_retrieval
+
+DAY = date(2025, 5, 1)
+
+
+async def _user_id(session: AsyncSession) -> uuid.UUID:
+    stmt = select(User.id).where(User.firebase_uid == "test-firebase-uid")
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_sync_indexes_history_and_retrieval_finds_relevant_days(
+    client: AsyncClient, db_session: AsyncSession
+):
+    metrics = [
+        {
+            "date": (DAY + timedelta(days=i)).isoformat(),
+            "recovery_score": 50.0 + i,
+            "recovery_zone": "yellow",
+            "hrv_rmssd": 40.0 + i,
+        }
+        for i in range(5)
+    ]
+    response = await client.post("/api/v1/metrics/sync", json={"metrics": metrics})
+    assert response.status_code == 200
+    await client.post(
+        "/api/v1/journal/",
+        json={
+            "date": (DAY + timedelta(days=2)).isoformat(),
+            "responses": [
+                {"behavior_key": "alcohol", "response_type": "toggle", "bool_value": True}
+            ],
+        },
+    )
+    await client.post(
+        "/api/v1/workouts/sync",
+        json={
+            "workouts": [
+                {
+                    "workout_type": "cycling",
+                    "start_date": f"{DAY.isoformat()}T07:00:00Z",
+                    "end_date": f"{DAY.isoformat()}T08:00:00Z",
+                    "duration_minutes": 60,
+                    "strain_score": 14.2,
+                }
+            ]
+        },
+    )
+
+    user_id = await _user_id(db_session)
+    docs = (
+        await db_session.execute(select(CoachDocument).where(CoachDocument.user_id == user_id))
+    ).scalars().all()
+    assert sorted(d.source for d in docs) == ["day"] * 5 + ["journal", "workout"]
+
+    index = NumpyVectorIndex()
+    hits = await coach_retrieval.retrieve(db_session, user_id, "did alcohol hurt me?", index=index)
+    assert hits[0].source == "journal"
+    assert hits[0].doc_date == DAY + timedelta(days=2)
+    hits = await coach_retrieval.retrieve(db_session, user_id, "my cycling workout", index=index)
+    assert hits[0].source == "workout"
+
+    # Unchanged days are not re-embedded; a changed day updates in place.
+    dates = [DAY + timedelta(days=i) for i in range(5)]
+    assert await coach_retrieval.index_days(db_session, user_id, dates, index=index) == 0
+    metrics[0]["recovery_score"] = 90.0
+    await client.post("/api/v1/metrics/sync", json={"metrics": metrics[:1]})
+    assert await coach_retrieval.index_days(db_session, user_id, dates, index=index) == 0
+    doc = (
+        await db_session.execute(
+            select(CoachDocument)
+            .where(CoachDocument.user_id == user_id, CoachDocument.source_key == DAY.isoformat())
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    assert "recovery 90%" in doc.content
+
+
+@pytest.mark.asyncio
+async def test_numpy_index_matches_exact_ranking(db_session: AsyncSession):
+    user = await user_repo.create(db_session, firebase_uid=f"rag-{uuid.uuid4()}")
+    embedder = HashingEmbedder()
+    texts = ["slept well after yoga", "late alcohol and poor sleep", "long cycling ride"]
+    vectors = await embedder.embed(texts)
+    index = NumpyVectorIndex()
+
+    # Loaded from the table on first search, then kept current by add().
+    written = await coach_repo.upsert_documents(
+        db_session,
+        [
+            {
+                "user_id": user.id,
+                "source": "note",
+                "source_key": str(i),
+                "doc_date": DAY,
+                "content": text,
+                "content_hash": str(i),
+                "embedding": vector,
+            }
+            for i, (text, vector) in enumerate(zip(texts[:2], vectors[:2]))
+        ],
+    )
+    [query] = await embedder.embed(["alcohol sleep"])
+    assert len(await index.search(db_session, user.id, query, 5)) == 2
+    later = await coach_repo.upsert_documents(
+        db_session,
+        [
+            {
+                "user_id": user.id,
+                "source": "note",
+                "source_key": "2",
+                "doc_date": DAY,
+                "content": texts[2],
+                "content_hash": "2",
+                "embedding": vectors[2],
+            }
+        ],
+    )
+    await index.add(user.id, later)
+
+    ids = [doc_id for doc_id, _ in written + later]
+    hits = await index.search(db_session, user.id, query, 3)
+    expected = sorted(range(3), key=lambda i: -sum(a * b for a, b in zip(vectors[i], query)))
+    assert [doc_id for doc_id, _ in hits] == [ids[i] for i in expected]
+    assert hits[0][0] == ids[1]
+
+
+@pytest.mark.asyncio
+async def test_search_returns_k_of_the_users_documents_among_many_users(
+    db_session: AsyncSession,
+):
+    """Other users' closer vectors never crowd a user's own documents out."""
+    embedder = HashingEmbedder()
+    [query] = await embedder.embed(["alcohol and poor sleep"])
+    users = [
+        await user_repo.create(db_session, firebase_uid=f"rag-many-{uuid.uuid4()}")
+        for _ in range(20)
+    ]
+    target = users[0]
+    rows = []
+    for n, user in enumerate(users):
+        # Everyone else's notes match the query exactly; the target's only loosely.
+        texts = (
+            ["alcohol", "poor sleep", "long run", "yoga"]
+            if user is target
+            else ["alcohol and poor sleep"] * 10
+        )
+        vectors = await embedder.embed(texts)
+        rows += [
+            {
+                "user_id": user.id,
+                "source": "note",
+                "source_key": f"{n}-{i}",
+                "doc_date": DAY,
+                "content": text,
+                "content_hash": f"{n}-{i}",
+                "embedding": vector,
+            }
+            for i, (text, vector) in enumerate(zip(texts, vectors))
+        ]
+    await coach_repo.upsert_documents(db_session, rows)
+    own = set(
+        await db_session.scalars(
+            select(CoachDocument.id).where(CoachDocument.user_id == target.id)
+        )
+    )
+
+    hits = await NumpyVectorIndex().search(db_session, target.id, query, 3)
+    assert len(hits) == 3
+    assert {doc_id for doc_id, _ in hits} <= own
+
+    # The pgvector fallback scores only the user's rows, off the HNSW index.
+    sql = str(
+        PgVectorIndex._exact_stmt(target.id, query, 3).compile(dialect=postgresql.dialect())
+    )
+    assert "AS MATERIALIZED" in sql
+    assert "WHERE coach_documents.user_id =" in sql
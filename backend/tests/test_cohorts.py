@@ -0,0 +1,105 @@
+"""Tests for cohort sketches, percentile comparisons and baseline priors."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import cohort_repo, user_repo
+from app.engines.quantile_sketch import TDigest
+from app.services import cohort_service, metrics_service
+
+
+def test_age_bands_and_sex_normalisation():
+    on = date(2026, 6, 1)
+    assert cohort_service.age_band(date(2000, 6, 2), on) == "<30"
+    assert cohort_service.age_band(date(1990, 6, 1), on) == "30-39"
+    assert cohort_service.age_band(date(1950, 1, 1), on) == "60+"
+    assert cohort_service.age_band(None, on) is None
+    assert cohort_service.normalize_sex("F") == "female"
+    assert cohort_service.normalize_sex(None) == "unknown"
+
+
+@pytest.mark.asyncio
+async def test_cohort_percentiles_and_priors(client: AsyncClient, db_session: AsyncSession):
+    cohort_service.invalidate()
+    yesterday = date.today() - timedelta(days=1)
+    dob = date.today().replace(year=date.today().year - 35) - timedelta(days=10)
+    for i in range(41):
+        peer = await user_repo.create(
+            db_session,
+            firebase_uid=f"cohort-{uuid.uuid4()}",
+            date_of_birth=dob,
+            biological_sex="female",
+        )
+        await metrics_service.upsert_metric(
+            db_session, peer.id, date=yesterday, hrv_rmssd=20.0 + 2 * i, resting_heart_rate=60.0
+        )
+
+    added = await cohort_service.refresh(db_session, through=yesterday)
+    assert added == 82
+    assert await cohort_service.refresh(db_session, through=yesterday) == 0
+
+    await client.get("/api/v1/users/me")
+    await client.patch(
+        "/api/v1/users/me", json={"date_of_birth": dob.isoformat(), "biological_sex": "Female"}
+    )
+    me = await user_repo.get_by_firebase_uid(db_session, "test-firebase-uid")
+    await metrics_service.upsert_metric(db_session, me.id, date=date.today(), hrv_rmssd=80.0)
+
+    data = (await client.get("/api/v1/metrics/cohort")).json()
+    [hrv] = data["metrics"]
+    assert hrv["metric"] == "hrv_rmssd"
+    assert (hrv["age_band"], hrv["sex"], hrv["cohort_size"]) == ("30-39", "female", 41)
+    assert hrv["percentile"] == pytest.approx(75.0, abs=2.0)
+    assert hrv["p50"] == pytest.approx(60.0, abs=1.0)
+
+    priors = await cohort_service.baseline_priors(db_session, me)
+    assert priors["hrv_rmssd"].mean == pytest.approx(60.0, abs=1.0)
+    assert priors["hrv_rmssd"].sample_count == cohort_service.PRIOR_PSEUDO_COUNT
+    assert "vo2_max" not in priors
+    cohort_service.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_sketches_take_one_mean_per_user_and_pick_up_corrections(
+    db_session: AsyncSession,
+):
+    cohort_service.invalidate()
+    through = date.today() - timedelta(days=1)
+    dob = date.today().replace(year=date.today().year - 45)
+    daily = await user_repo.create(
+        db_session, firebase_uid=f"cohort-{uuid.uuid4()}", date_of_birth=dob
+    )
+    occasional = await user_repo.create(
+        db_session, firebase_uid=f"cohort-{uuid.uuid4()}", date_of_birth=dob
+    )
+    for days_ago in range(10):
+        await metrics_service.upsert_metric(
+            db_session, daily.id, date=through - timedelta(days=days_ago), hrv_rmssd=40.0
+        )
+    await metrics_service.upsert_metric(db_session, occasional.id, date=through, hrv_rmssd=80.0)
+    # Outside the window; never counted.
+    await metrics_service.upsert_metric(
+        db_session,
+        occasional.id,
+        date=through - timedelta(days=cohort_service.WINDOW_DAYS),
+        hrv_rmssd=10.0,
+    )
+
+    assert await cohort_service.refresh(db_session, through=through) == 2
+    [sketch] = await cohort_repo.list_sketches(db_session)
+    digest = TDigest.from_dict(sketch.digest)
+    assert (digest.count, digest.min, digest.max) == (2, 40.0, 80.0)
+
+    # A correction to an already-sketched day shows up in the next night's rebuild.
+    await metrics_service.upsert_metric(db_session, occasional.id, date=through, hrv_rmssd=60.0)
+    assert await cohort_service.refresh(db_session, through=through + timedelta(days=1)) == 2
+    db_session.expire_all()  # the upsert bypasses the identity map
+    [sketch] = await cohort_repo.list_sketches(db_session)
+    assert TDigest.from_dict(sketch.digest).max == 60.0
+    cohort_service.invalidate()
@@ -52,3 +52,16 @@ def test_update_baseline_shifts_toward_new_value():
     # newVariance = 25*0.9 + (70-61)^2*0.1 = 22.5 + 8.1 = 30.6
     # newStdDev = sqrt(30.6) = 5.532
     _approx(5.532, updated.standard_deviation)
+
+
+def test_compute_baseline_prior_fills_in_below_minimum_samples():
+    prior = BaselineResult(mean=50.0, standard_deviation=12.0, sample_count=3, window_days=28)
+    assert compute_baseline([60.0, 70.0]) is None
+    result = compute_baseline([60.0, 70.0], prior=prior)
+    assert result is not None
+    _approx(56.0, result.mean)
+    _approx(12.0, result.standard_deviation)
+    assert result.sample_count == 5
+    assert result.is_valid
+    # Enough own samples: the prior is ignored.
+    _approx(70.0, compute_baseline([60.0, 70.0, 80.0], prior=prior).mean)
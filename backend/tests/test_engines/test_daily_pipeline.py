@@ -0,0 +1,160 @@
+"""Daily scoring pipeline tests."""
+
+from datetime import date, timedelta
+
+from app.engines.config import ScoringConfig, get_scoring_config
+from app.engines.daily_pipeline import DailyHistory, DailyScoringPipeline, DayBundle
+from app.engines.recovery_engine import RecoveryEngine, RecoveryInput
+from app.engines.sleep_engine import SleepEngine, SleepSessionData
+from tests.test_engines.conftest import (
+    HR_ZONE_CONFIG,
+    RECOVERY_CONFIG,
+    SLEEP_CONFIG,
+    SLEEP_PLANNER_CONFIG,
+    STRAIN_CONFIG,
+)
+
+HOUR_MS = 3_600_000
+START = date(2025, 3, 1)
+
+
+def _config() -> ScoringConfig:
+    return ScoringConfig(
+        version=1,
+        recovery=RECOVERY_CONFIG,
+        sleep=SLEEP_CONFIG,
+        strain=STRAIN_CONFIG,
+        heartRateZones=HR_ZONE_CONFIG,
+        baselines=get_scoring_config().baselines,
+        sleepPlanner=SLEEP_PLANNER_CONFIG,
+    )
+
+
+def _night(day_index: int, hours: float) -> SleepSessionData:
+    start = day_index * 24 * HOUR_MS - 2 * HOUR_MS  # 22:00 the evening before
+    return SleepSessionData(
+        start_date_millis=start,
+        end_date_millis=start + int(hours * HOUR_MS),
+        total_sleep_minutes=hours * 60,
+        time_in_bed_minutes=hours * 60 / 0.9,
+        light_minutes=hours * 30,
+        deep_minutes=hours * 15,
+        rem_minutes=hours * 15,
+        awake_minutes=0.0,
+        awakenings=2,
+        sleep_onset_latency_minutes=10.0,
+        sleep_efficiency=90.0,
+    )
+
+
+def _history() -> DailyHistory:
+    return DailyHistory(
+        hrv=[60.0, 62.0, None, 58.0, 61.0, 59.0],
+        resting_heart_rate=[55.0, 56.0, None, 54.0, 55.0, 55.5],
+        sleep_performance=[None, None, 85.0, 90.0, 80.0, 88.0],
+        sleep_hours=[7.0, None, 6.5, 7.5],
+        sleep_needs=[7.5, 7.5, 7.5, 7.5],
+        previous_strain=12.0,
+    )
+
+
+def test_run_matches_engines_called_separately():
+    config = _config()
+    day = DayBundle(date=START, sleep_sessions=[_night(1, 6.0)], hrv=70.0, resting_heart_rate=52.0)
+    result = DailyScoringPipeline(config).run(day, _history())
+
+    # Empty slots are skipped; nights need both hours and need.
+    sleep = SleepEngine(config.sleep).analyze(
+        day.sleep_sessions, 7.5, 12.0, [7.0, 6.5, 7.5], [7.5, 7.5, 7.5]
+    )
+    assert result.sleep.sleep_performance == sleep.sleep_performance
+    assert result.baselines.hrv.sample_count == 5
+
+    recovery_engine = RecoveryEngine(config.recovery)
+    recovery = recovery_engine.compute_recovery(
+        RecoveryInput(hrv=70.0, resting_heart_rate=52.0, sleep_performance=sleep.sleep_performance),
+        result.baselines,
+    )
+    assert result.recovery == recovery
+    assert result.strain_target == recovery_engine.strain_target(recovery.zone)
+    # Tonight's debt includes last night's shortfall.
+    assert result.sleep_debt_hours == sleep.sleep_debt_hours + (sleep.sleep_need_hours - 6.0)
+    assert result.next_sleep_need_hours > config.sleep.defaults.baselineHours
+
+
+def test_run_without_sessions_uses_recorded_night():
+    day = DayBundle(
+        date=START, hrv=60.0, sleep_performance=95.0, sleep_hours=5.0, sleep_need_hours=8.0
+    )
+    result = DailyScoringPipeline(_config()).run(day, _history())
+    assert result.sleep is None
+    assert result.recovery.sleep_score is not None
+    assert result.sleep_debt_hours > DailyScoringPipeline(_config()).run(
+        DayBundle(date=START, hrv=60.0, sleep_performance=95.0), _history()
+    ).sleep_debt_hours
+
+
+def test_baselines_read_only_the_window_before_the_day():
+    pipeline = DailyScoringPipeline(_config(), window_days=4)
+    history = DailyHistory(hrv=[10.0, 60.0, 62.0, 58.0])
+    assert pipeline.baselines(history).hrv.mean == 60.0
+
+
+def _days(count: int, *, skip: int | None = None) -> list[DayBundle]:
+    return [
+        DayBundle(
+            date=START + timedelta(days=i),
+            sleep_sessions=[_night(i + 1, 5.0)],
+            hrv=60.0 - i,
+            resting_heart_rate=55.0 + i,
+            strain=15.0,
+        )
+        for i in range(count)
+        if i != skip
+    ]
+
+
+def _carry(history: DailyHistory, day: DayBundle | None, result=None) -> None:
+    """Append one calendar day to ``history`` the way the batch does."""
+    sleep = result.sleep if result else None
+    history.hrv.append(day.hrv if day else None)
+    history.resting_heart_rate.append(day.resting_heart_rate if day else None)
+    history.respiratory_rate.append(None)
+    history.spo2.append(None)
+    history.sleep_performance.append(sleep.sleep_performance if sleep else None)
+    history.sleep_hours.append(sleep.total_sleep_hours if sleep else None)
+    history.sleep_needs.append(sleep.sleep_need_hours if sleep else None)
+    history.bedtime_minutes.append(22 * 60.0 if sleep else None)
+    history.wake_time_minutes.append(3 * 60.0 if sleep else None)
+    history.previous_strain = day.strain if day else None
+
+
+def test_batch_carries_state_forward():
+    pipeline = DailyScoringPipeline(_config())
+    days = _days(5)
+    batch = pipeline.run_batch(list(reversed(days)), _history())
+    assert [r.date for r in batch] == [d.date for d in days]
+
+    # Each day equals a single run over the history the batch built up.
+    history = _history()
+    for day, result in zip(days, batch):
+        single = pipeline.run(day, history)
+        assert single == result
+        _carry(history, day, single)
+
+    # Short nights accumulate debt, so later nights need more sleep.
+    assert batch[-1].sleep_debt_hours > batch[0].sleep_debt_hours
+    assert batch[-1].next_sleep_need_hours > batch[0].next_sleep_need_hours
+
+
+def test_batch_leaves_empty_slots_for_missing_days():
+    pipeline = DailyScoringPipeline(_config())
+    days = _days(4, skip=1)
+    batch = pipeline.run_batch(days, _history())
+
+    history = _history()
+    first = pipeline.run(days[0], history)
+    _carry(history, days[0], first)
+    _carry(history, None)
+    # The day after a gap has no previous strain and one night fewer.
+    assert pipeline.run(days[1], history) == batch[1]
@@ -0,0 +1,56 @@
+"""Hypnogram encoding tests."""
+
+from app.engines import hypnogram
+from app.engines.sleep_engine import SleepStageData
+
+EPOCH_MILLIS = hypnogram.EPOCH_SECONDS * 1000
+
+
+def _stage(kind: str, first_epoch: int, epochs: int) -> SleepStageData:
+    start = first_epoch * EPOCH_MILLIS
+    return SleepStageData(kind, start, start + epochs * EPOCH_MILLIS, epochs / 2.0)
+
+
+def _codes(*runs: tuple[str, int]) -> list[tuple[int, int]]:
+    return [(hypnogram.stage_code(stage), length) for stage, length in runs]
+
+
+def test_encode_layers_sleep_stages_over_in_bed():
+    stages = [
+        _stage("inBed", 0, 100),
+        _stage("light", 10, 40),
+        _stage("deep", 50, 30),
+        _stage("awake", 80, 5),
+    ]
+    blob = hypnogram.encode(stages, 0, 100 * EPOCH_MILLIS)
+    assert hypnogram.decode(blob) == _codes(
+        ("inBed", 10), ("light", 40), ("deep", 30), ("awake", 5), ("inBed", 15)
+    )
+    assert len(blob) == 5 * 3
+
+
+def test_long_runs_split_and_rejoin():
+    runs = _codes(("light", 70_000))
+    blob = hypnogram.to_bytes(runs)
+    assert len(blob) == 6
+    assert hypnogram.decode(blob) == runs
+
+
+def test_resample_takes_the_majority_stage_per_epoch():
+    runs = _codes(("light", 25), ("deep", 7), ("rem", 3), ("awake", 10), ("light", 4))
+    # Buckets of 10: light, light, deep (5 light / 5 deep tie -> deep),
+    # deep 2 / rem 3 / awake 5 -> awake, and a partial awake 5 / light 4 -> awake.
+    assert hypnogram.resample(runs, 10) == _codes(("light", 2), ("deep", 1), ("awake", 2))
+    assert hypnogram.resample(runs, 1) == runs
+
+
+def test_resample_matches_expanded_majority():
+    runs = _codes(("light", 13), ("deep", 40), ("rem", 9), ("light", 2), ("rem", 31), ("awake", 6))
+    epochs = [code for code, length in runs for _ in range(length)]
+    rank = [hypnogram.stage_code(s) for s in ("unknown", "inBed", "awake", "light", "rem", "deep")]
+    for factor in (2, 4, 10, 60):
+        expanded = []
+        for i in range(0, len(epochs), factor):
+            bucket = epochs[i : i + factor]
+            expanded.append(max(set(bucket), key=lambda c: (bucket.count(c), rank.index(c))))
+        assert [c for c, n in hypnogram.resample(runs, factor) for _ in range(n)] == expanded
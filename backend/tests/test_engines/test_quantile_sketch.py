@@ -0,0 +1,47 @@
+"""Quantile sketch engine tests."""
+
+import random
+
+from app.engines.quantile_sketch import TDigest
+
+
+def _sorted_quantile(values, q):
+    ordered = sorted(values)
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def test_quantiles_track_exact_values():
+    rng = random.Random(7)
+    values = [rng.gauss(60.0, 15.0) for _ in range(20_000)]
+    digest = TDigest()
+    digest.update(values)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert abs(digest.quantile(q) - _sorted_quantile(values, q)) < 0.5
+    assert abs(digest.cdf(60.0) - 0.5) < 0.01
+
+
+def test_merged_digests_match_a_single_digest():
+    rng = random.Random(11)
+    values = [rng.lognormvariate(3.5, 0.4) for _ in range(10_000)]
+    left, right, whole = TDigest(), TDigest(), TDigest()
+    left.update(values[::2])
+    right.update(values[1::2])
+    whole.update(values)
+    left.merge(right)
+    assert left.count == whole.count
+    assert abs(left.quantile(0.5) - whole.quantile(0.5)) < 0.5
+    assert abs(left.mean - whole.mean) < 1e-9
+
+
+def test_round_trip_and_empty_digest():
+    assert TDigest().quantile(0.5) is None
+    assert TDigest().cdf(1.0) is None
+    digest = TDigest()
+    digest.update([1.0, 2.0, 3.0, 4.0])
+    restored = TDigest.from_dict(digest.to_dict())
+    assert restored.quantile(0.5) == digest.quantile(0.5)
+    assert restored.cdf(0.0) == 0.0
+    assert restored.cdf(10.0) == 1.0
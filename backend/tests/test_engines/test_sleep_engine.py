@@ -2,7 +2,13 @@
 
 from tests.test_engines.conftest import SLEEP_CONFIG
 
-from app.engines.sleep_engine import SleepEngine, SleepSessionData
+from app.engines.sleep_engine import (
+    SleepEngine,
+    SleepSessionData,
+    SleepStageData,
+    circular_std_minutes,
+    clock_vector,
+)
 
 
 def _approx(expected, actual, tolerance=0.01):
@@ -133,3 +139,53 @@ def test_compute_sleep_consistency_no_prior_history_returns_100():
         recent_wake_time_minutes=[],
     )
     _approx(100.0, result)
+
+
+def _stage(kind: str, start_minute: float, minutes: float) -> SleepStageData:
+    start = int(start_minute * 60_000)
+    return SleepStageData(kind, start, start + int(minutes * 60_000), minutes)
+
+
+def test_build_sessions_stitches_stages_within_gap_tolerance():
+    stages = [
+        _stage("inBed", 0, 490),
+        _stage("light", 10, 200),
+        _stage("awake", 210, 10),
+        _stage("deep", 220, 100),
+        _stage("rem", 340, 150),
+        # Afternoon nap, well past the gap tolerance
+        _stage("light", 900, 40),
+    ]
+    sessions = engine.build_sessions(stages)
+    assert len(sessions) == 2
+    night, nap = sessions
+    _approx(450.0, night.total_sleep_minutes)
+    _approx(490.0, night.time_in_bed_minutes)
+    _approx(10.0, night.sleep_onset_latency_minutes)
+    assert night.awakenings == 1
+    _approx(450.0 / 490.0 * 100, night.sleep_efficiency)
+    _approx(40.0, nap.total_sleep_minutes)
+    assert nap.sleep_onset_latency_minutes is None
+
+
+def test_build_sessions_drops_sessions_below_minimum_duration():
+    assert engine.build_sessions([_stage("light", 0, 20), _stage("awake", 20, 30)]) == []
+
+
+def _sums(minutes: list[float]) -> tuple[float, float]:
+    vectors = [clock_vector(m) for m in minutes]
+    return sum(v[0] for v in vectors), sum(v[1] for v in vectors)
+
+
+def test_circular_std_spans_midnight():
+    # 23:30 and 00:30 are an hour apart, not 23 hours.
+    _approx(30.0, circular_std_minutes(2, *_sums([1410.0, 30.0])), tolerance=0.1)
+
+
+def test_window_consistency_matches_linear_consistency_for_tight_schedules():
+    bedtimes = [1380.0, 1395.0, 1370.0, 1400.0, 1385.0]
+    wakes = [420.0, 430.0, 415.0, 440.0, 425.0]
+    linear = engine.compute_sleep_consistency(bedtimes[-1], wakes[-1], bedtimes[:-1], wakes[:-1])
+    circular = engine.window_consistency(5, *_sums(bedtimes), *_sums(wakes))
+    _approx(linear, circular, tolerance=0.1)
+    assert engine.window_consistency(1, *_sums(bedtimes[:1]), *_sums(wakes[:1])) is None
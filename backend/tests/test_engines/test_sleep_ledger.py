@@ -0,0 +1,47 @@
+"""Sleep ledger tests."""
+
+import random
+
+from app.engines.sleep_engine import SleepEngine
+from app.engines.sleep_ledger import SleepLedger
+from tests.test_engines.conftest import SLEEP_CONFIG
+
+
+def _approx(expected, actual, tolerance=1e-9):
+    assert abs(expected - actual) < tolerance, f"expected {expected} but got {actual}"
+
+
+def test_ledger_matches_sleep_engine_windows():
+    rng = random.Random(7)
+    engine = SleepEngine(SLEEP_CONFIG)
+    ledger = SleepLedger(SLEEP_CONFIG)
+
+    hours: list[float] = []
+    needs: list[float] = []
+    for _ in range(365):
+        strain = rng.uniform(2.0, 20.0)
+        debt = engine.compute_sleep_debt(hours[-7:], needs[-7:])
+        expected_need = engine.compute_sleep_need(7.5, strain, debt, 0.0)
+        sleep_hours = expected_need + rng.uniform(-2.0, 0.5)
+
+        night = ledger.record(sleep_hours, strain)
+        _approx(expected_need, night.need_hours)
+        hours.append(sleep_hours)
+        needs.append(expected_need)
+        _approx(engine.compute_sleep_debt(hours[-7:], needs[-7:]), night.debt_hours)
+
+
+def test_missing_nights_add_no_debt_and_age_out_old_deficits():
+    ledger = SleepLedger(SLEEP_CONFIG, deficits=[2.0])
+    _approx(2.0, ledger.debt_hours)
+    for _ in range(6):
+        ledger.record(None, 5.0)
+    _approx(2.0, ledger.debt_hours)
+    ledger.record(None, 5.0)
+    _approx(0.0, ledger.debt_hours)
+
+
+def test_need_includes_strain_supplement_and_debt_repayment():
+    ledger = SleepLedger(SLEEP_CONFIG, deficits=[1.0, 1.0])
+    # 7.5 baseline + 0.5 for strain in [14, 18) + 20% of 2h debt
+    _approx(7.5 + 0.5 + 0.4, ledger.need(15.0))
@@ -0,0 +1,84 @@
+"""Tests for healthspan score computation and the nightly batch."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.repositories import metrics_repo, user_repo
+from app.models import Base
+from app.models.healthspan import HealthspanScore
+from app.services.healthspan_service import compute_healthspan, run_nightly_batch
+
+TODAY = date(2025, 6, 30)
+
+
+async def _seed_user(session: AsyncSession, days: int = 60) -> uuid.UUID:
+    user = await user_repo.create(
+        session, firebase_uid=f"hs-{uuid.uuid4()}", date_of_birth=date(1990, 1, 1)
+    )
+    for i in range(days):
+        await metrics_repo.create(
+            session,
+            user.id,
+            date=TODAY - timedelta(days=i),
+            resting_heart_rate=55.0 if i < 28 else 65.0,
+            sleep_duration_hours=7.5,
+            steps=9000,
+            recovery_score=70.0,
+            strain_score=10.5,
+        )
+    return user.id
+
+
+@pytest.mark.asyncio
+async def test_compute_healthspan_uses_both_windows_and_upserts(db_session: AsyncSession):
+    user_id = await _seed_user(db_session)
+
+    first = await compute_healthspan(db_session, user_id, TODAY)
+    assert first is not None
+    assert first.recovery_score == 70.0
+    assert first.activity_score == 50.0
+
+    # Recomputing the same day overwrites rather than violating the unique key.
+    second = await compute_healthspan(db_session, user_id, TODAY)
+    assert second is not None
+    count = await db_session.scalar(
+        select(func.count()).select_from(HealthspanScore).where(
+            HealthspanScore.user_id == user_id
+        )
+    )
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_compute_healthspan_without_birth_date_returns_none(db_session: AsyncSession):
+    user = await user_repo.create(db_session, firebase_uid=f"hs-{uuid.uuid4()}")
+    assert await compute_healthspan(db_session, user.id, TODAY) is None
+
+
+@pytest.mark.asyncio
+async def test_nightly_batch_scores_every_user_in_chunks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with factory() as session:
+        for _ in range(5):
+            await _seed_user(session, days=10)
+        await user_repo.create(session, firebase_uid="hs-no-dob")
+        await session.commit()
+
+    assert await run_nightly_batch(factory, TODAY, chunk_size=2) == 5
+    # Re-running the batch for the same day is idempotent.
+    assert await run_nightly_batch(factory, TODAY, chunk_size=2) == 5
+
+    async with factory() as session:
+        count = await session.scalar(select(func.count()).select_from(HealthspanScore))
+    assert count == 5
+    await engine.dispose()
@@ -53,3 +53,78 @@ async def test_get_journal_impacts(client: AsyncClient):
     response = await client.get("/api/v1/journal/impacts")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+@pytest.mark.asyncio
+async def test_journal_impacts_track_metric_and_journal_writes(client: AsyncClient):
+    """Impacts reflect journals and recovery scores regardless of write order."""
+    days = [f"2025-05-{d:02d}" for d in range(1, 9)]
+    caffeine = [True, False, True, False, True, False, True, False]
+    recovery = [40.0, 80.0, 45.0, 75.0, 50.0, 85.0, 42.0, 78.0]
+
+    # First half: journal before metrics; second half: metrics before journal.
+    for day, had_caffeine in zip(days[:4], caffeine[:4]):
+        await client.post(
+            "/api/v1/journal/",
+            json={
+                "date": day,
+                "responses": [
+                    {"behavior_key": "caffeine", "response_type": "toggle",
+                     "bool_value": had_caffeine},
+                ],
+            },
+        )
+    await client.post(
+        "/api/v1/metrics/sync",
+        json={"metrics": [{"date": d, "recovery_score": r} for d, r in zip(days, recovery)]},
+    )
+    for day, had_caffeine in zip(days[4:], caffeine[4:]):
+        await client.post(
+            "/api/v1/journal/",
+            json={
+                "date": day,
+                "responses": [
+                    {"behavior_key": "caffeine", "response_type": "toggle",
+                     "bool_value": had_caffeine},
+                ],
+            },
+        )
+
+    response = await client.get("/api/v1/journal/impacts")
+    assert response.status_code == 200
+    impacts = {i["behavior_key"]: i for i in response.json()}
+    assert impacts["caffeine"]["sample_size"] == 8
+    assert impacts["caffeine"]["correlation"] < -0.9
+    assert impacts["caffeine"]["significance"] == "high"
+
+    # Rewriting a day's recovery re-weights the stored statistics in place.
+    await client.post(
+        "/api/v1/metrics/sync",
+        json={"metrics": [{"date": days[0], "recovery_score": 90.0}]},
+    )
+    response = await client.get("/api/v1/journal/impacts")
+    rewritten = {i["behavior_key"]: i for i in response.json()}["caffeine"]
+    assert rewritten["sample_size"] == 8
+    assert rewritten["correlation"] > impacts["caffeine"]["correlation"]
+
+
+def test_pearson_from_sums_matches_direct_computation():
+    from app.services.journal_service import pearson_from_sums
+
+    xs = [1.0, 2.0, 3.0, 4.0, 5.0]
+    ys = [2.0, 4.1, 5.9, 8.2, 9.8]
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    direct = cov / (
+        sum((x - mean_x) ** 2 for x in xs) ** 0.5 * sum((y - mean_y) ** 2 for y in ys) ** 0.5
+    )
+    from_sums = pearson_from_sums(
+        n,
+        sum(xs),
+        sum(ys),
+        sum(x * y for x, y in zip(xs, ys)),
+        sum(x * x for x in xs),
+        sum(y * y for y in ys),
+    )
+    assert abs(direct - from_sums) < 1e-9
@@ -62,3 +62,127 @@ async def test_sync_then_query(client: AsyncClient):
     assert response.status_code == 200
     data = response.json()
     assert data["total"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_baseline_row_tracks_rolling_window(client: AsyncClient, db_session):
+    """Metric writes keep the 28-day baseline row in step with daily_metrics."""
+    import uuid
+    from datetime import date, timedelta
+
+    from app.db.repositories import metrics_repo, user_repo
+    from app.services import baseline_service, metrics_service
+
+    user = await user_repo.create(db_session, firebase_uid=f"baseline-{uuid.uuid4()}")
+    today = date.today()
+    for days_ago in range(30, -1, -1):
+        await metrics_service.upsert_metric(
+            db_session, user.id, date=today - timedelta(days=days_ago), hrv_rmssd=float(days_ago)
+        )
+
+    row = await metrics_repo.get_baseline(db_session, user.id)
+    assert row.through_date == today
+    assert len(row.daily_values["hrv_rmssd"]) == baseline_service.WINDOW_DAYS
+
+    window = await baseline_service.get_window(db_session, user.id, today)
+    assert window.values["hrv_rmssd"] == [float(d) for d in range(27, -1, -1)]
+    assert window.mean("hrv_rmssd") == 13.5
+
+    # A late correction inside the window replaces that day's value.
+    await metrics_service.upsert_metric(
+        db_session, user.id, date=today - timedelta(days=3), hrv_rmssd=87.0
+    )
+    window = await baseline_service.get_window(db_session, user.id, today)
+    assert window.mean("hrv_rmssd") == pytest.approx(13.5 + 84.0 / 28)
+
+    # Windows ending before the stored one are read from daily_metrics.
+    older = await baseline_service.get_window(db_session, user.id, today - timedelta(days=2))
+    assert older.values["hrv_rmssd"][0] == 29.0
+
+
+@pytest.mark.asyncio
+async def test_dashboard_summary_cached_until_metric_write(client: AsyncClient, db_session, redis):
+    """The dashboard is served from the cache until a metric write invalidates it."""
+    from datetime import date
+
+    from app.core.cache import get_cache, user_namespace
+    from app.db.repositories import user_repo
+    from app.services import metrics_service
+
+    today = date.today()
+    await client.get("/api/v1/users/me")
+    user = await user_repo.get_by_firebase_uid(db_session, "test-firebase-uid")
+    await metrics_service.upsert_metric(db_session, user.id, date=today, recovery_score=55.0)
+
+    response = await client.get("/api/v1/dashboard/summary")
+    assert response.status_code == 200
+    assert response.json()["recovery_score"] == 55.0
+    namespace = user_namespace(user.id)
+    version = await get_cache().namespace_version(namespace)
+    assert await redis.exists(f"cache:{namespace}:v{version}:dashboard:{today.isoformat()}")
+
+    await metrics_service.upsert_metric(db_session, user.id, date=today, recovery_score=81.0)
+    assert await get_cache().namespace_version(namespace) == version + 1
+
+    response = await client.get("/api/v1/dashboard/summary")
+    assert response.json()["recovery_score"] == 81.0
+    assert response.json()["weekly_history"][-1]["recovery_score"] == 81.0
+
+
+@pytest.mark.asyncio
+async def test_sync_raw_resync_reuses_engine_results(client: AsyncClient, redis):
+    """Re-sending an unchanged day is served from the engine memo and writes nothing."""
+    from datetime import date, timedelta
+
+    from app.services import engine_memo
+
+    today = date.today()
+    payload = {
+        "metrics": [
+            {
+                "date": (today - timedelta(days=i)).isoformat(),
+                "hrv_rmssd": 60.0 + i,
+                "resting_heart_rate": 55.0,
+                "sleep_efficiency": 88.0,
+            }
+            for i in range(3, 0, -1)
+        ]
+    }
+    for _ in range(3):
+        response = await client.post("/api/v1/metrics/sync-raw", json=payload)
+        assert response.status_code == 200
+    updated = [m["updated_at"] for m in response.json()]
+
+    response = await client.post("/api/v1/metrics/sync-raw", json=payload)
+    assert [m["updated_at"] for m in response.json()] == updated
+    day = response.json()[-1]
+    assert day["strain_target_min"] < day["strain_target_max"]
+    assert day["next_sleep_need_hours"] > 0
+
+    # Engine cache stats are admin-only.
+    assert (await client.get("/api/v1/metrics/engine-cache/stats")).status_code == 403
+    stats = (await engine_memo.stats(redis))["daily"]
+    assert stats["hits"] == 9
+    assert stats["hits"] + stats["misses"] == 12
+
+
+@pytest.mark.asyncio
+async def test_partial_resync_of_existing_day_writes_nothing(db_session):
+    """Fields a re-sync leaves out keep their stored values and are not a change."""
+    import uuid
+    from datetime import date
+
+    from app.db.repositories import user_repo
+    from app.services import metrics_service
+
+    user = await user_repo.create(db_session, firebase_uid=f"partial-{uuid.uuid4()}")
+    today = date.today()
+    await metrics_service.upsert_metric(
+        db_session, user.id, date=today, hrv_rmssd=60.0, recovery_score=70.0, strain_score=12.0
+    )
+
+    metric, written = await metrics_service.write_metric(
+        db_session, user.id, date=today, hrv_rmssd=60.0, recovery_score=None, strain_score=None
+    )
+    assert written is False
+    assert (metric.recovery_score, metric.strain_score) == (70.0, 12.0)
@@ -0,0 +1,299 @@
+"""Tests for batched push fan-out against the local FCM stub."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import UTC, date, datetime, time, timedelta
+
+import httpx
+import pytest
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.fcm_client import FCMClient
+from app.core.fcm_stub import create_fcm_stub_app
+from app.db import after_commit
+from app.db.repositories import metrics_repo, user_repo
+from app.models.notification import NotificationPreference
+from app.services import notification_scheduler, notification_service
+from app.services.notification_service import PushRequest
+
+DAY = date(2025, 7, 1)
+
+
+@pytest.fixture
+def fcm_stub():
+    app = create_fcm_stub_app()
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fcm")
+    return app, FCMClient(http, "zyva-test", base_url="http://fcm", concurrency=8)
+
+
+async def _user_with_token(session: AsyncSession, token: str | None) -> uuid.UUID:
+    user = await user_repo.create(session, firebase_uid=f"push-{uuid.uuid4()}")
+    if token is not None:
+        session.add(
+            NotificationPreference(
+                user_id=user.id, notification_type="device_token", device_token=token
+            )
+        )
+        await session.flush()
+    return user.id
+
+
+@pytest.mark.asyncio
+async def test_fan_out_counts_and_deduplicates(db_session: AsyncSession, redis, fcm_stub):
+    stub, fcm = fcm_stub
+    good = [await _user_with_token(db_session, f"tok-{i}") for i in range(3)]
+    bad = await _user_with_token(db_session, "invalid-token")
+    missing = await _user_with_token(db_session, None)
+    requests = [PushRequest(u, "Hi", "There") for u in [*good, bad, missing]]
+
+    result = await notification_service.fan_out(
+        db_session, requests, kind="test", redis=redis, fcm=fcm, day=DAY
+    )
+    assert (result.sent, result.failed, result.no_token, result.suppressed) == (3, 1, 1, 0)
+    assert len(stub.state.received) == 3
+
+    # Second wave the same day: delivered users are deduplicated, the failed
+    # delivery is retried.
+    again = await notification_service.fan_out(
+        db_session, requests, kind="test", redis=redis, fcm=fcm, day=DAY
+    )
+    assert (again.sent, again.failed, again.suppressed) == (0, 1, 3)
+    assert len(stub.state.received) == 3
+
+
+@pytest.mark.asyncio
+async def test_fan_out_throttles_per_user(db_session: AsyncSession, redis, fcm_stub):
+    _, fcm = fcm_stub
+    user_id = await _user_with_token(db_session, "tok-throttle")
+    limit = notification_service.THROTTLE_MAX_PER_WINDOW
+
+    sent = 0
+    for i in range(limit + 2):
+        result = await notification_service.fan_out(
+            db_session, [PushRequest(user_id, "Hi", "There")], kind=f"k{i}", redis=redis,
+            fcm=fcm, day=DAY,
+        )
+        sent += result.sent
+    assert sent == limit
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_give_back_their_throttle_slot(
+    db_session: AsyncSession, redis, fcm_stub
+):
+    _, fcm = fcm_stub
+    user_id = await _user_with_token(db_session, "invalid-token")
+
+    for _ in range(notification_service.THROTTLE_MAX_PER_WINDOW + 1):
+        result = await notification_service.fan_out(
+            db_session, [PushRequest(user_id, "Hi", "There")], kind="retry", redis=redis,
+            fcm=fcm, day=DAY,
+        )
+        assert result.failed == 1
+    window = notification_service._throttle_window()
+    assert int(await redis.get(notification_service._throttle_key(user_id, window))) == 0
+
+
+@pytest.mark.asyncio
+async def test_recovery_wave_loads_tokens_and_scores_in_bulk(
+    db_session: AsyncSession, redis, fcm_stub
+):
+    stub, fcm = fcm_stub
+    users = [await _user_with_token(db_session, f"wave-{i}") for i in range(5)]
+    for i, user_id in enumerate(users[:4]):
+        await metrics_repo.create(
+            db_session, user_id, date=DAY, recovery_score=50.0 + i, recovery_zone="yellow"
+        )
+    # Opted out of recovery pushes.
+    db_session.add(
+        NotificationPreference(user_id=users[0], notification_type="recovery", enabled=False)
+    )
+    await db_session.flush()
+
+    result = await notification_service.send_recovery_notifications(
+        db_session, DAY, redis=redis, fcm=fcm, chunk_size=2
+    )
+    assert result.sent == 3
+    titles = sorted(m["notification"]["title"] for m in stub.state.received)
+    assert titles == ["Recovery: 51% 🟡", "Recovery: 52% 🟡", "Recovery: 53% 🟡"]
+
+
+def test_next_due_uses_local_time_across_dst():
+    # 07:00 in New York is 11:00 UTC in summer and 12:00 UTC in winter.
+    summer = datetime(2025, 7, 1, 5, 0, tzinfo=UTC)
+    due = notification_scheduler.next_due(time(7, 0), "America/New_York", summer)
+    assert due == datetime(2025, 7, 1, 11, 0, tzinfo=UTC)
+
+    winter = datetime(2025, 12, 1, 13, 0, tzinfo=UTC)  # already past today
+    due = notification_scheduler.next_due(time(7, 0), "America/New_York", winter)
+    assert due == datetime(2025, 12, 2, 12, 0, tzinfo=UTC)
+
+    with pytest.raises(ValueError):
+        notification_scheduler.next_due(time(7, 0), "Mars/Olympus", winter)
+
+
+@pytest.mark.asyncio
+async def test_pop_due_claims_only_due_entries_and_rearms(redis):
+    now = datetime(2025, 7, 1, 10, 0, tzinfo=UTC)
+    early, late = uuid.uuid4(), uuid.uuid4()
+    await notification_scheduler.schedule(redis, early, "recovery", time(7, 0), "UTC", now=now)
+    await notification_scheduler.schedule(redis, late, "recovery", time(9, 0), "UTC", now=now)
+
+    tick = datetime(2025, 7, 2, 8, 0, tzinfo=UTC)
+    due = await notification_scheduler.pop_due(redis, tick)
+    assert [(d.user_id, d.local_date) for d in due] == [(early, date(2025, 7, 2))]
+    assert await notification_scheduler.pop_due(redis, tick) == []
+
+    rearmed = await redis.zscore(notification_scheduler.SCHEDULE_KEY, f"recovery:{early}")
+    assert rearmed == datetime(2025, 7, 3, 7, 0, tzinfo=UTC).timestamp()
+
+    await notification_scheduler.unschedule(redis, late, "recovery")
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 1
+
+
+@pytest.mark.asyncio
+async def test_tick_delivers_recovery_for_local_date(db_session: AsyncSession, redis, fcm_stub):
+    stub, fcm = fcm_stub
+    user_id = await _user_with_token(db_session, "tok-tokyo")
+    await metrics_repo.create(
+        db_session, user_id, date=date(2025, 7, 2), recovery_score=71.0, recovery_zone="green"
+    )
+    pref = NotificationPreference(
+        user_id=user_id,
+        notification_type="recovery",
+        preferred_time=time(7, 30),
+        timezone="Asia/Tokyo",
+    )
+    db_session.add(pref)
+    await db_session.flush()
+    assert await notification_scheduler.rebuild(
+        db_session, redis, now=datetime(2025, 7, 1, 12, 0, tzinfo=UTC)
+    ) == 1
+
+    # 07:30 JST on 2 July is 22:30 UTC on 1 July.
+    before = await notification_scheduler.run_tick(
+        db_session, redis, now=datetime(2025, 7, 1, 22, 0, tzinfo=UTC), fcm=fcm
+    )
+    assert before.sent == 0
+    result = await notification_scheduler.run_tick(
+        db_session, redis, now=datetime(2025, 7, 1, 22, 31, tzinfo=UTC), fcm=fcm
+    )
+    assert result.sent == 1
+    assert stub.state.received[0]["notification"]["title"] == "Recovery: 71% 🟢"
+
+
+@pytest.mark.asyncio
+async def test_tick_retries_until_recovery_syncs(db_session: AsyncSession, redis, fcm_stub):
+    stub, fcm = fcm_stub
+    user_id = await _user_with_token(db_session, "tok-late-sync")
+    member = f"recovery:{user_id}"
+    start = datetime(2025, 7, 1, 0, 0, tzinfo=UTC)
+    await notification_scheduler.schedule(redis, user_id, "recovery", time(7, 0), "UTC", now=start)
+
+    due = datetime(2025, 7, 1, 7, 1, tzinfo=UTC)
+    result = await notification_scheduler.run_tick(db_session, redis, now=due, fcm=fcm)
+    assert result.sent == 0
+    retry_at = due + timedelta(seconds=notification_scheduler.RECOVERY_RETRY_SECONDS)
+    assert await redis.zscore(notification_scheduler.SCHEDULE_KEY, member) == retry_at.timestamp()
+
+    await metrics_repo.create(
+        db_session, user_id, date=date(2025, 7, 1), recovery_score=64.0, recovery_zone="yellow"
+    )
+    result = await notification_scheduler.run_tick(db_session, redis, now=retry_at, fcm=fcm)
+    assert result.sent == 1
+    tomorrow = datetime(2025, 7, 2, 7, 0, tzinfo=UTC)
+    assert await redis.zscore(notification_scheduler.SCHEDULE_KEY, member) == tomorrow.timestamp()
+
+    # Past the retry window the entry just waits for tomorrow.
+    await notification_scheduler.run_tick(
+        db_session, redis, now=datetime(2025, 7, 2, 13, 30, tzinfo=UTC), fcm=fcm
+    )
+    day_after = datetime(2025, 7, 3, 7, 0, tzinfo=UTC)
+    assert await redis.zscore(notification_scheduler.SCHEDULE_KEY, member) == day_after.timestamp()
+
+
+@pytest.mark.asyncio
+async def test_tick_rearms_entries_without_spec(db_session: AsyncSession, redis):
+    user_id = await _user_with_token(db_session, "tok-orphan")
+    db_session.add(
+        NotificationPreference(
+            user_id=user_id, notification_type="recovery", preferred_time=time(8, 0)
+        )
+    )
+    await db_session.flush()
+    member = f"recovery:{user_id}"
+    await redis.zadd(notification_scheduler.SCHEDULE_KEY, {member: 0})
+
+    now = datetime(2025, 7, 1, 9, 0, tzinfo=UTC)
+    await notification_scheduler.run_tick(db_session, redis, now=now)
+    rearmed = await redis.zscore(notification_scheduler.SCHEDULE_KEY, member)
+    assert rearmed == datetime(2025, 7, 2, 8, 0, tzinfo=UTC).timestamp()
+    assert await redis.hget(notification_scheduler.SPEC_KEY, member) is not None
+
+
+async def _commit(session: AsyncSession) -> None:
+    """Run the session's after-commit work as a real commit would."""
+    after_commit._flush_after_commit(session.sync_session)
+    await asyncio.gather(*after_commit._background_tasks)
+
+
+@pytest.mark.asyncio
+async def test_preference_update_reschedules(client, db_session: AsyncSession, redis):
+    resp = await client.put(
+        "/api/v1/notifications/preferences",
+        json={
+            "notification_type": "recovery",
+            "enabled": True,
+            "preferred_time": "06:45",
+            "timezone": "Europe/Berlin",
+        },
+    )
+    assert resp.status_code == 200
+    # The schedule follows the row only once the request's transaction commits.
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 0
+    await _commit(db_session)
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 1
+
+    resp = await client.put(
+        "/api/v1/notifications/preferences",
+        json={"notification_type": "recovery", "enabled": False},
+    )
+    assert resp.status_code == 200
+    await _commit(db_session)
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 0
+
+    resp = await client.put(
+        "/api/v1/notifications/preferences",
+        json={"notification_type": "recovery", "enabled": True, "timezone": "Nowhere/Land"},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_preference_update_survives_redis_errors(
+    client, db_session: AsyncSession, redis, monkeypatch: pytest.MonkeyPatch
+):
+    async def broken(*args, **kwargs):
+        raise aioredis.ConnectionError("redis is down")
+
+    monkeypatch.setattr(notification_scheduler, "schedule", broken)
+    resp = await client.put(
+        "/api/v1/notifications/preferences",
+        json={"notification_type": "recovery", "enabled": True, "preferred_time": "07:00"},
+    )
+    assert resp.status_code == 200
+    await _commit(db_session)
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 0
+
+    # A rollback drops the pending sync, so Redis never sees the change.
+    monkeypatch.undo()
+    resp = await client.put(
+        "/api/v1/notifications/preferences",
+        json={"notification_type": "recovery", "enabled": True, "preferred_time": "07:30"},
+    )
+    await db_session.rollback()
+    await _commit(db_session)
+    assert await redis.zcard(notification_scheduler.SCHEDULE_KEY) == 0
@@ -0,0 +1,88 @@
+"""Tests for late-data recompute of derived metrics."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import metrics_repo, user_repo
+from app.models.recompute import RecomputeRange
+from app.services import healthspan_service, metrics_service, recompute_service
+
+
+async def _pending(session: AsyncSession, user_id: uuid.UUID) -> dict[str, tuple[date, date]]:
+    result = await session.execute(
+        select(RecomputeRange).where(RecomputeRange.user_id == user_id)
+    )
+    return {r.node: (r.from_date, r.to_date) for r in result.scalars()}
+
+
+@pytest.mark.asyncio
+async def test_late_day_marks_and_recomputes_downstream(db_session: AsyncSession):
+    today = date.today()
+    user = await user_repo.create(
+        db_session, firebase_uid=f"rc-{uuid.uuid4()}", date_of_birth=date(1990, 1, 1)
+    )
+    for days_ago in range(10, 0, -1):
+        await metrics_service.upsert_metric(
+            db_session,
+            user.id,
+            date=today - timedelta(days=days_ago),
+            hrv_rmssd=60.0 + days_ago % 3,
+            resting_heart_rate=55.0,
+            sleep_duration_hours=7.5,
+        )
+    await recompute_service.recompute_user(db_session, user.id)
+    scored = await healthspan_service.compute_healthspan(
+        db_session, user.id, today - timedelta(days=1)
+    )
+    healthspan_before = scored.recovery_score
+    before = {
+        m.date: m.recovery_score
+        for m in (await metrics_repo.list_by_date_range(db_session, user.id, limit=30))[0]
+    }
+    assert await _pending(db_session, user.id) == {}
+
+    # A late day 20 days back with a very low HRV shifts later baselines.
+    late = today - timedelta(days=20)
+    await metrics_service.upsert_metric(
+        db_session, user.id, date=late, hrv_rmssd=20.0, sleep_duration_hours=4.0
+    )
+    assert await _pending(db_session, user.id) == {
+        "recovery": (late + timedelta(days=1), today),
+        "healthspan": (late, today),
+        "sleep": (late, today),
+    }
+
+    # Changing a column nothing reads for later days marks nothing.
+    await recompute_service.recompute_user(db_session, user.id)
+    await metrics_service.upsert_metric(db_session, user.id, date=late, steps=1000)
+    assert "recovery" not in await _pending(db_session, user.id)
+
+    after = {
+        m.date: m.recovery_score
+        for m in (await metrics_repo.list_by_date_range(db_session, user.id, limit=30))[0]
+    }
+    # The first seeded day was never downstream of anything. Recovery scores a
+    # day against the days before it, so from the third seeded day on the late
+    # day completes or shifts every baseline and each of those days moved.
+    first = today - timedelta(days=10)
+    assert after[first] is not None
+    assert all(after[d] != before[d] for d in before if d > first + timedelta(days=1))
+    # The stored healthspan row was rescored from the new recoveries.
+    await db_session.refresh(scored)
+    assert scored.recovery_score != healthspan_before
+
+
+@pytest.mark.asyncio
+async def test_same_day_write_marks_nothing_for_recovery(db_session: AsyncSession):
+    today = date.today()
+    user = await user_repo.create(db_session, firebase_uid=f"rc-{uuid.uuid4()}")
+    await metrics_service.upsert_metric(
+        db_session, user.id, date=today, hrv_rmssd=50.0, resting_heart_rate=52.0
+    )
+    assert await _pending(db_session, user.id) == {"healthspan": (today, today)}
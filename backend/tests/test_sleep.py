@@ -0,0 +1,186 @@
+"""Tests for sleep sync, hypnograms and sleep consistency."""
+
+from __future__ import annotations
+
+import math
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import user_repo
+from app.engines.config import get_scoring_config
+from app.engines.sleep_engine import SleepEngine, clock_vector
+from app.models.recompute import RecomputeRange
+from app.models.sleep import SleepTimingSum
+from app.services import healthspan_service, sleep_timing_service
+
+
+def _night(day: date, asleep_hours: float, naps: bool = False, bedtime_offset: int = 0) -> dict:
+    bedtime = datetime.combine(day - timedelta(days=1), datetime.min.time(), UTC).replace(hour=23)
+    bedtime += timedelta(minutes=bedtime_offset)
+    wake = bedtime + timedelta(hours=asleep_hours)
+
+    def stage(kind: str, start: datetime, end: datetime) -> dict:
+        return {"type": kind, "start_date": start.isoformat(), "end_date": end.isoformat()}
+
+    middle = bedtime + timedelta(hours=asleep_hours / 2)
+    stages = [
+        stage("light", bedtime, middle),
+        stage("awake", middle, middle + timedelta(minutes=5)),
+        stage("deep", middle + timedelta(minutes=5), wake + timedelta(minutes=5)),
+    ]
+    if naps:
+        nap = wake + timedelta(hours=7)
+        stages.append(stage("light", nap, nap + timedelta(minutes=45)))
+    return {"date": day.isoformat(), "stages": stages}
+
+
+@pytest.mark.asyncio
+async def test_sync_sleep_scores_nights_against_the_batch(client: AsyncClient):
+    today = date.today()
+    nights = [_night(today - timedelta(days=2), 6.0), _night(today - timedelta(days=1), 8.0, True)]
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": nights})
+    assert resp.status_code == 200
+    first, second = resp.json()
+
+    assert first["sleep_duration_hours"] == pytest.approx(6.0)
+    assert first["sleep_need_hours"] == pytest.approx(7.5)
+    assert first["sleep_performance"] == pytest.approx(80.0)
+    # The second night sees the first night's 1.5h deficit and gets nap credit.
+    assert second["sleep_duration_hours"] == pytest.approx(8.75)
+    assert second["sleep_need_hours"] == pytest.approx(7.5 + 0.3 - 0.75)
+
+    history = (await client.get("/api/v1/sleep/history")).json()
+    assert sorted(s["is_main_sleep"] for s in history) == [False, True, True]
+
+    # Re-syncing replaces the nights' sessions rather than adding to them.
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": nights[1:]})
+    assert resp.status_code == 200
+    assert resp.json()[0]["sleep_need_hours"] == pytest.approx(7.05)
+    history = (await client.get("/api/v1/sleep/history")).json()
+    assert len(history) == 3
+
+
+@pytest.mark.asyncio
+async def test_sync_sleep_skips_nights_without_a_session(client: AsyncClient):
+    day = date.today() - timedelta(days=1)
+    start = datetime.combine(day, datetime.min.time(), UTC)
+    nights = [
+        {
+            "date": day.isoformat(),
+            "stages": [
+                {
+                    "type": "light",
+                    "start_date": start.isoformat(),
+                    "end_date": (start + timedelta(minutes=10)).isoformat(),
+                }
+            ],
+        }
+    ]
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": nights})
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+
+@pytest.mark.asyncio
+async def test_hypnogram_served_at_requested_resolution(client: AsyncClient):
+    day = date.today() - timedelta(days=1)
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": [_night(day, 6.0)]})
+    assert resp.status_code == 200
+    (main,) = (await client.get("/api/v1/sleep/history")).json()
+    url = f"/api/v1/sleep/sessions/{main['id']}/hypnogram"
+
+    body = (await client.get(url)).json()
+    names = [body["stages"][code] for code, _ in body["runs"]]
+    assert names == ["light", "awake", "deep"]
+    assert [length for _, length in body["runs"]] == [360, 10, 360]
+
+    body = (await client.get(url, params={"resolution_seconds": 600})).json()
+    assert body["resolution_seconds"] == 600
+    assert [length for _, length in body["runs"]] == [18, 19]  # the awake epochs vanish
+    assert [body["stages"][code] for code, _ in body["runs"]] == ["light", "deep"]
+
+    resp = await client.get(url, params={"resolution_seconds": 45})
+    assert resp.status_code == 422
+
+
+def _expected_consistency(bedtimes: list[float], wakes: list[float]) -> float:
+    def sums(minutes: list[float]) -> tuple[float, float]:
+        vectors = [clock_vector(m) for m in minutes]
+        return sum(v[0] for v in vectors), sum(v[1] for v in vectors)
+
+    engine = SleepEngine(get_scoring_config().sleep)
+    return engine.window_consistency(len(bedtimes), *sums(bedtimes), *sums(wakes))
+
+
+@pytest.mark.asyncio
+async def test_sleep_consistency_from_running_sums(client: AsyncClient, db_session: AsyncSession):
+    today = date.today()
+    days = [today - timedelta(days=days_ago) for days_ago in range(10, 0, -1)]
+    # Bedtimes alternate 23:30 and 00:30, either side of midnight.
+    offsets = [30 + 60 * (i % 2) for i in range(len(days))]
+    nights = [_night(day, 7.0, bedtime_offset=o) for day, o in zip(days, offsets)]
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": nights})
+    assert resp.status_code == 200
+    user = await user_repo.get_by_firebase_uid(db_session, "test-firebase-uid")
+
+    def expected(window_offsets: list[int]) -> float:
+        bedtimes = [(23 * 60 + o) % 1440 for o in window_offsets]
+        return _expected_consistency(bedtimes, [(b + 7 * 60 + 5) % 1440 for b in bedtimes])
+
+    result = await sleep_timing_service.consistency(db_session, [user.id], days[0], days[-1])
+    assert result[user.id] == pytest.approx(expected(offsets))
+    assert result[user.id] == pytest.approx(100.0 * math.exp(-0.5), rel=1e-3)
+    # A window is the difference of two running sums.
+    result = await sleep_timing_service.consistency(db_session, [user.id], days[6], days[-1])
+    assert result[user.id] == pytest.approx(expected(offsets[6:]))
+
+    # A late correction shifts the later sums and marks healthspan for recompute.
+    offsets[2] = 0
+    resp = await client.post(
+        "/api/v1/sleep/sync", json={"nights": [_night(days[2], 7.0, bedtime_offset=0)]}
+    )
+    assert resp.status_code == 200
+    result = await sleep_timing_service.consistency(db_session, [user.id], days[0], days[-1])
+    assert result[user.id] == pytest.approx(expected(offsets))
+    pending = await db_session.execute(
+        select(RecomputeRange.from_date).where(
+            RecomputeRange.user_id == user.id, RecomputeRange.node == "healthspan"
+        )
+    )
+    assert pending.scalar_one() <= days[2]
+
+    # The longevity engine now receives sleep consistency.
+    averages = {column: (None, None) for column in healthspan_service.AVERAGED_COLUMNS}
+    averages["sleep_duration_hours"] = (7.5, 7.5)
+    without = healthspan_service.build_score(user.id, date(1990, 1, 1), today, averages)
+    with_consistency = healthspan_service.build_score(
+        user.id, date(1990, 1, 1), today, averages, (50.0, 50.0)
+    )
+    assert with_consistency["vitalos_age"] > without["vitalos_age"]
+
+
+@pytest.mark.asyncio
+async def test_sleep_timing_uses_the_users_local_clock(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Bed and wake times are read in the user's timezone, not UTC."""
+    await client.get("/api/v1/users/me")
+    resp = await client.patch("/api/v1/users/me", json={"timezone": "Mars/Olympus"})
+    assert resp.status_code == 422
+    resp = await client.patch("/api/v1/users/me", json={"timezone": "Asia/Kolkata"})
+    assert resp.json()["timezone"] == "Asia/Kolkata"
+
+    day = date.today() - timedelta(days=1)
+    resp = await client.post("/api/v1/sleep/sync", json={"nights": [_night(day, 7.0)]})
+    assert resp.status_code == 200
+    user = await user_repo.get_by_firebase_uid(db_session, "test-firebase-uid")
+    timing = await db_session.scalar(
+        select(SleepTimingSum).where(SleepTimingSum.user_id == user.id)
+    )
+    # 23:00 UTC is 04:30 in India; waking 7h05m later is 11:35.
+    assert timing.bedtime_minutes == pytest.approx(4 * 60 + 30)
+    assert timing.wake_time_minutes == pytest.approx(11 * 60 + 35)
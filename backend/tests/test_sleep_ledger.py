@@ -0,0 +1,101 @@
+"""Tests for the persisted sleep ledger."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import user_repo
+from app.engines.config import get_scoring_config
+from app.engines.sleep_engine import SleepEngine
+from app.models.recompute import RecomputeRange
+from app.models.sleep import SleepLedgerNight
+from app.services import metrics_service, recompute_service, sleep_ledger_service
+
+
+async def _ledger(session: AsyncSession, user_id: uuid.UUID) -> dict[date, SleepLedgerNight]:
+    result = await session.execute(
+        select(SleepLedgerNight).where(SleepLedgerNight.user_id == user_id)
+    )
+    return {night.date: night for night in result.scalars()}
+
+
+def _replay(nights: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """(need, debt) per night the way ``SleepEngine.analyze`` derives them."""
+    engine = SleepEngine(get_scoring_config().sleep)
+    hours: list[float] = []
+    needs: list[float] = []
+    expected = []
+    previous_strain = 0.0
+    for sleep_hours, strain in nights:
+        debt = engine.compute_sleep_debt(hours[-7:], needs[-7:])
+        need = engine.compute_sleep_need(7.5, previous_strain, debt, 0.0)
+        hours.append(sleep_hours)
+        needs.append(need)
+        expected.append((need, engine.compute_sleep_debt(hours[-7:], needs[-7:])))
+        previous_strain = strain
+    return expected
+
+
+@pytest.mark.asyncio
+async def test_ledger_follows_writes_and_late_nights(db_session: AsyncSession):
+    today = date.today()
+    user = await user_repo.create(db_session, firebase_uid=f"sl-{uuid.uuid4()}")
+    days = [today - timedelta(days=days_ago) for days_ago in range(20, 0, -1)]
+    nights = [(6.0 + (i % 4) * 0.5, 8.0 + (i % 5) * 2.0) for i in range(len(days))]
+    for day, (sleep_hours, strain) in zip(days, nights):
+        await metrics_service.upsert_metric(
+            db_session, user.id, date=day, sleep_duration_hours=sleep_hours, strain_score=strain
+        )
+
+    ledger = await _ledger(db_session, user.id)
+    for day, (need, debt) in zip(days, _replay(nights)):
+        assert ledger[day].need_hours == pytest.approx(need)
+        assert ledger[day].debt_hours == pytest.approx(debt)
+
+    latest = await sleep_ledger_service.get_latest(db_session, user.id)
+    assert latest.date == days[-1]
+
+    # A short night two weeks back goes to the recompute worker.
+    nights[5] = (3.0, nights[5][1])
+    await metrics_service.upsert_metric(
+        db_session, user.id, date=days[5], sleep_duration_hours=3.0
+    )
+    result = await db_session.execute(
+        select(RecomputeRange.from_date).where(
+            RecomputeRange.user_id == user.id, RecomputeRange.node == "sleep"
+        )
+    )
+    assert result.scalar_one() == days[5]
+
+    await recompute_service.recompute_user(db_session, user.id)
+    ledger = await _ledger(db_session, user.id)
+    for day, (need, debt) in zip(days, _replay(nights)):
+        assert ledger[day].need_hours == pytest.approx(need)
+        assert ledger[day].debt_hours == pytest.approx(debt)
+
+
+@pytest.mark.asyncio
+async def test_sleep_need_endpoint(client):
+    resp = await client.get("/api/v1/sleep/need")
+    assert resp.status_code == 404
+
+    await client.get("/api/v1/users/me")
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    resp = await client.post(
+        "/api/v1/metrics/sync",
+        json={"metrics": [{"date": yesterday, "sleep_duration_hours": 6.0, "strain_score": 15.0}]},
+    )
+    assert resp.status_code in (200, 201)
+
+    resp = await client.get("/api/v1/sleep/need")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["date"] == yesterday
+    assert body["debt_hours"] == pytest.approx(1.5)
+    # 7.5 baseline + 0.5 for strain in [14, 18) + 20% of 1.5h debt
+    assert body["next_need_hours"] == pytest.approx(8.3)
@@ -0,0 +1,106 @@
+"""Tests for the in-process task worker and enqueue_task dispatch."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.config import get_settings
+from app.core import task_queue
+from app.core.cloud_tasks import cloud_queue_name, enqueue_task
+from app.core.task_queue import LocalTaskWorker, TaskPriority
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_runs_before_batch():
+    order: list[str] = []
+
+    async def handler(payload: dict) -> None:
+        order.append(payload["id"])
+
+    worker = LocalTaskWorker({"/tasks/test": handler}, concurrency=1)
+    for i in range(3):
+        await worker.enqueue("batch", "/tasks/test", {"id": f"b{i}"}, priority=TaskPriority.BATCH)
+    await worker.enqueue("rescore", "/tasks/test", {"id": "i0"}, priority=TaskPriority.INTERACTIVE)
+
+    await worker.start()
+    await worker.join()
+    await worker.stop()
+
+    assert order == ["i0", "b0", "b1", "b2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_tasks_retry_with_backoff_then_succeed():
+    attempts = {"n": 0}
+
+    async def flaky(payload: dict) -> None:
+        attempts["n"] += 1
+        if attempts["n"] < 3:
+            raise RuntimeError("transient")
+
+    worker = LocalTaskWorker({"/tasks/flaky": flaky}, concurrency=2, backoff_base_s=0.001)
+    await worker.start()
+    await worker.enqueue("q", "/tasks/flaky", {})
+    await worker.join()
+    await worker.stop()
+
+    stats = worker.stats()["q"]
+    assert attempts["n"] == 3
+    assert stats["completed"] == 1
+    assert stats["retried"] == 2
+    assert stats["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_and_unknown_handlers_count_as_failed():
+    async def always_fails(payload: dict) -> None:
+        raise RuntimeError("boom")
+
+    worker = LocalTaskWorker(
+        {"/tasks/bad": always_fails}, max_attempts=2, backoff_base_s=0.001
+    )
+    await worker.start()
+    await worker.enqueue("q", "/tasks/bad", {})
+    await worker.enqueue("q", "/tasks/missing", {})
+    await worker.join()
+    await worker.stop()
+
+    stats = worker.stats()["q"]
+    assert stats["enqueued"] == 2
+    assert stats["failed"] == 2
+    assert stats["completed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_task_uses_local_worker(monkeypatch: pytest.MonkeyPatch):
+    received: list[dict] = []
+
+    @task_queue.task_handler("/tasks/test/echo")
+    async def echo(payload: dict) -> None:
+        received.append(payload)
+
+    monkeypatch.setenv("TASK_BACKEND", "local")
+    get_settings.cache_clear()
+    worker = await task_queue.init_local_worker(concurrency=2)
+    try:
+        name = await enqueue_task("echo", "/tasks/test/echo", {"x": 1})
+        await worker.join()
+    finally:
+        await task_queue.close_local_worker()
+        get_settings.cache_clear()
+
+    assert name is not None and name.startswith("echo/")
+    assert received == [{"x": 1}]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_task_logs_without_worker():
+    assert await enqueue_task("q", "/tasks/none", {"x": 1}) is None
+
+
+def test_cloud_queue_per_priority_lane():
+    assert cloud_queue_name("notifications", TaskPriority.DEFAULT) == "notifications"
+    assert cloud_queue_name("notifications", TaskPriority.INTERACTIVE) == (
+        "notifications-interactive"
+    )
+    assert cloud_queue_name("notifications", TaskPriority.BATCH) == "notifications-batch"
@@ -2,8 +2,17 @@
 
 from __future__ import annotations
 
+import asyncio
+import uuid
+from datetime import date, timedelta
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import after_commit
+from app.db.repositories import team_repo, user_repo
+from app.services import metrics_service
 
 
 @pytest.mark.asyncio
@@ -47,3 +56,146 @@ async def test_get_leaderboard(client: AsyncClient):
     data = response.json()
     assert data["team_name"] == "Leaderboard Team"
     assert isinstance(data["entries"], list)
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_tracks_metric_upserts(
+    client: AsyncClient, db_session: AsyncSession, redis
+):
+    """Upserts after the first read are pushed into the live rankings."""
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Live Board"})
+    team_id = uuid.UUID(create_resp.json()["id"])
+
+    today = date.today()
+    mates = []
+    for name, recovery, strain in (("Ana", 80.0, 9.0), ("Ben", 55.0, 15.0)):
+        mate = await user_repo.create(
+            db_session, firebase_uid=f"board-{uuid.uuid4()}", display_name=name
+        )
+        await team_repo.add_member(db_session, team_id, mate.id)
+        await metrics_service.upsert_metric(
+            db_session, mate.id, date=today, recovery_score=recovery, strain_score=strain
+        )
+        mates.append(mate)
+
+    board = (await client.get(f"/api/v1/teams/{team_id}/leaderboard")).json()
+    assert [e["display_name"] for e in board["entries"]][:2] == ["Ana", "Ben"]
+    assert board["entries"][-1]["recovery_score"] is None  # the creator has no data
+    assert await redis.exists(f"leaderboard:{team_id}:{today.isoformat()}:roster")
+
+    await metrics_service.upsert_metric(
+        db_session, mates[1].id, date=today, recovery_score=91.0
+    )
+    # The new score reaches the live board only once the write commits.
+    board = (await client.get(f"/api/v1/teams/{team_id}/leaderboard")).json()
+    assert board["entries"][0]["display_name"] == "Ana"
+    after_commit._flush_after_commit(db_session.sync_session)
+    await asyncio.gather(*after_commit._background_tasks)
+
+    board = (await client.get(f"/api/v1/teams/{team_id}/leaderboard")).json()
+    assert [(e["display_name"], e["rank"]) for e in board["entries"][:2]] == [
+        ("Ben", 1),
+        ("Ana", 2),
+    ]
+    assert board["entries"][0]["recovery_score"] == 91.0
+
+    by_strain = (
+        await client.get(f"/api/v1/teams/{team_id}/leaderboard", params={"sort_by": "strain"})
+    ).json()
+    assert [e["strain_score"] for e in by_strain["entries"][:2]] == [15.0, 9.0]
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_ties_rank_the_same_cold_and_warm(
+    client: AsyncClient, db_session: AsyncSession, redis
+):
+    """Tied members keep one order whether the board is rebuilt or read live."""
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Tie Board"})
+    team_id = uuid.UUID(create_resp.json()["id"])
+    for _ in range(4):
+        mate = await user_repo.create(db_session, firebase_uid=f"tie-{uuid.uuid4()}")
+        await team_repo.add_member(db_session, team_id, mate.id)
+        await metrics_service.upsert_metric(
+            db_session, mate.id, date=date.today(), recovery_score=70.0
+        )
+
+    url = f"/api/v1/teams/{team_id}/leaderboard"
+    cold = [e["user_id"] for e in (await client.get(url)).json()["entries"]]
+    warm = [e["user_id"] for e in (await client.get(url)).json()["entries"]]
+    assert warm == cold
+    assert cold[:4] == sorted(cold[:4])
+
+
+@pytest.mark.asyncio
+async def test_member_counts_and_paged_members(client: AsyncClient, db_session: AsyncSession):
+    """Listings report SQL member counts; members page through a cursor."""
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Big Team"})
+    team_id = uuid.UUID(create_resp.json()["id"])
+    for i in range(4):
+        mate = await user_repo.create(
+            db_session, firebase_uid=f"member-{uuid.uuid4()}", display_name=f"Mate {i}"
+        )
+        await team_repo.add_member(db_session, team_id, mate.id)
+
+    teams = (await client.get("/api/v1/teams/")).json()
+    assert next(t for t in teams if t["id"] == str(team_id))["member_count"] == 5
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = (await client.get(f"/api/v1/teams/{team_id}/members", params=params)).json()
+        seen.extend(m["display_name"] for m in page["members"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 5
+    assert seen[1:] == [f"Mate {i}" for i in range(4)]
+
+    bad = await client.get(f"/api/v1/teams/{team_id}/members", params={"cursor": "nope"})
+    assert bad.status_code == 422
+
+    outsider_team = await team_repo.create(
+        db_session, name="Other", invite_code=f"X{uuid.uuid4().hex[:7]}", owner_id=mate.id
+    )
+    forbidden = await client.get(f"/api/v1/teams/{outsider_team.id}/members")
+    assert forbidden.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_team_trends_rollup(client: AsyncClient, db_session: AsyncSession):
+    """Member upserts roll up into per-team daily distributions."""
+    create_resp = await client.post("/api/v1/teams/", json={"name": "Trend Team"})
+    team_id = uuid.UUID(create_resp.json()["id"])
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    mates = []
+    for _ in range(3):
+        mate = await user_repo.create(db_session, firebase_uid=f"trend-{uuid.uuid4()}")
+        await team_repo.add_member(db_session, team_id, mate.id)
+        mates.append(mate)
+    for mate, recovery in zip(mates, (40.0, 60.0, 80.0)):
+        await metrics_service.upsert_metric(
+            db_session, mate.id, date=yesterday, recovery_score=recovery, strain_score=10.0
+        )
+    await metrics_service.upsert_metric(db_session, mates[0].id, date=today, recovery_score=70.0)
+
+    data = (await client.get(f"/api/v1/teams/{team_id}/trends")).json()
+    recovery = {p["date"]: p for p in data["metrics"]["recovery"]}
+    day = recovery[yesterday.isoformat()]
+    assert day["members"] == 3
+    assert day["mean"] == 60.0
+    assert day["stddev"] == pytest.approx(16.33, abs=0.01)
+    assert (day["p25"], day["p50"], day["p75"]) == (50.0, 60.0, 70.0)
+    assert recovery[today.isoformat()]["members"] == 1
+    assert [p["mean"] for p in data["metrics"]["strain"]] == [10.0]
+    assert data["metrics"]["sleep"] == []
+
+    # Correcting a value replaces that day's aggregate.
+    await metrics_service.upsert_metric(
+        db_session, mates[0].id, date=yesterday, recovery_score=60.0
+    )
+    data = (await client.get(f"/api/v1/teams/{team_id}/trends", params={"days": 7})).json()
+    day = next(p for p in data["metrics"]["recovery"] if p["date"] == yesterday.isoformat())
+    assert day["mean"] == pytest.approx(66.67, abs=0.01)
+    assert (day["p25"], day["p50"], day["p75"]) == (60.0, 60.0, 70.0)